@@ -0,0 +1,135 @@
+import fnmatch
+import json
+import platform
+import sys
+import timeit
+import typing as tp
+from datetime import datetime
+
+# Une fonction de préparation reçoit la taille du jeu de données (ou None) et renvoie la fonction à chronométrer.
+Setup = tp.Callable[[int | None], tp.Callable[[], tp.Any]]
+
+BENCHMARKS: dict[str, tuple[Setup, int | None]] = {}
+
+
+def benchmark(name: str, sizes: tp.Iterable[int] | None = None) -> tp.Callable[[Setup], Setup]:
+    """Décorateur enregistrant une fonction de préparation de benchmark. Avec sizes, un benchmark nommé name[taille] est
+    enregistré pour chaque taille.
+
+    :param name: Nom du benchmark.
+    :param sizes: Tailles des jeux de données à essayer.
+
+    :return: Le décorateur, qui renvoie la fonction de préparation inchangée."""
+    def decorator(setup: Setup) -> Setup:
+        for size in (sizes if sizes is not None else [None]):
+            BENCHMARKS[name if size is None else f'{name}[{size}]'] = (setup, size)
+
+        return setup
+
+    return decorator
+
+
+def measure(func: tp.Callable[[], tp.Any], repeat: int = 5, min_time: float = 0.2) -> dict[str, float | int]:
+    """Chronomètre une fonction. Le nombre d'appels par mesure est choisi pour que chaque mesure dure au moins min_time
+    secondes, puis la mesure est répétée repeat fois.
+
+    :param func: Fonction à chronométrer.
+    :param repeat: Nombre de mesures.
+    :param min_time: Durée minimale d'une mesure, en secondes.
+
+    :rtype: dict[str, float | int]
+    :return: Le meilleur temps et le temps médian d'un appel (en secondes), ainsi que le nombre d'appels par mesure."""
+    timer = timeit.Timer(func)
+    loops = 1
+
+    while timer.timeit(loops) < min_time:
+        loops *= 10 if loops < 1000 else 2
+
+    timings = sorted(timing / loops for timing in timer.repeat(repeat, loops))
+    return {'best': timings[0], 'median': timings[len(timings) // 2], 'loops': loops}
+
+
+def run(pattern: str = '*', repeat: int = 5, min_time: float = 0.2,
+        report: tp.Callable[[str, dict], None] | None = None) -> dict[str, dict[str, float | int]]:
+    """Exécute les benchmarks enregistrés dont le nom correspond au motif donné.
+
+    :param pattern: Motif (à la fnmatch) des noms des benchmarks à exécuter.
+    :param repeat: Nombre de mesures par benchmark.
+    :param min_time: Durée minimale d'une mesure, en secondes.
+    :param report: Fonction appelée avec le nom et le résultat de chaque benchmark, dès qu'il est terminé.
+
+    :rtype: dict[str, dict[str, float | int]]
+    :return: Les résultats, par nom de benchmark."""
+    from benchmarks import bench_entities, bench_security, bench_uuid_list  # noqa: F401 (enregistrement)
+
+    results = {}
+
+    for name, (setup, size) in BENCHMARKS.items():
+        if not fnmatch.fnmatchcase(name, pattern):
+            continue
+
+        results[name] = measure(setup(size), repeat, min_time)
+
+        if report is not None:
+            report(name, results[name])
+
+    return results
+
+
+def save(results: dict[str, dict], path: str):
+    """Enregistre des résultats au format JSON, accompagnés de la description de la machine.
+
+    :param results: Résultats renvoyés par run().
+    :param path: Chemin du fichier."""
+    with open(path, 'w') as file:
+        json.dump({
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': results
+        }, file, indent=2)
+
+
+def load(path: str) -> dict[str, dict]:
+    """Lit des résultats enregistrés par save().
+
+    :param path: Chemin du fichier.
+
+    :rtype: dict[str, dict]
+    :return: Les résultats, par nom de benchmark."""
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict],
+            threshold: float = 0.2) -> list[tuple[str, float, float, float, bool]]:
+    """Compare des résultats à une référence, benchmark par benchmark, sur le meilleur temps.
+
+    :param results: Résultats à comparer.
+    :param baseline: Résultats de référence.
+    :param threshold: Ralentissement relatif au-delà duquel un benchmark est considéré comme une régression (0.2 pour
+        20 %).
+
+    :rtype: list[tuple[str, float, float, float, bool]]
+    :return: Pour chaque benchmark présent des deux côtés : son nom, le temps de référence, le temps actuel, leur
+        rapport et s'il s'agit d'une régression."""
+    comparisons = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before, after = baseline[name]['best'], result['best']
+        ratio = after / before if before else float('inf')
+        comparisons.append((name, before, after, ratio, ratio > 1 + threshold))
+
+    return comparisons
+
+
+def format_time(seconds: float) -> str:
+    """Formate une durée avec l'unité la plus lisible."""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+
+    return f'{seconds / 1e-9:.0f} ns'
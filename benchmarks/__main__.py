@@ -0,0 +1,61 @@
+import argparse
+import sys
+
+from benchmarks import compare, format_time, load, run, save
+
+
+def parse_arguments(arguments: list[str] | None = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande.
+
+    :param arguments: Arguments à analyser. Si None, ceux du processus sont utilisés."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description="Micro-benchmarks des chemins chauds de PANDAMONIUM, sans base de données."
+    )
+    parser.add_argument('-k', '--pattern', default='*', help='Motif des benchmarks à exécuter (ex. "uuid_list.*").')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Nombre de mesures par benchmark.')
+    parser.add_argument('--min-time', type=float, default=0.2, help="Durée minimale d'une mesure, en secondes.")
+    parser.add_argument('--save', metavar='PATH', help='Enregistrer les résultats dans ce fichier JSON.')
+    parser.add_argument('--compare', metavar='PATH', help='Comparer les résultats à ceux de ce fichier JSON.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Ralentissement relatif considéré comme une régression (0.2 pour 20 %%).')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """Point d'entrée : exécute les benchmarks, puis les enregistre et/ou les compare à une référence.
+
+    :param arguments: Arguments de la ligne de commande. Si None, ceux du processus sont utilisés.
+
+    :rtype: int
+    :return: Le code de sortie : 1 si une régression a été détectée, 0 sinon."""
+    options = parse_arguments(arguments)
+    baseline = load(options.compare) if options.compare else None
+
+    def report(name: str, result: dict):
+        print(f'{name:<40} {format_time(result["best"]):>12} (médiane {format_time(result["median"])}, '
+              f'{result["loops"]} appels)')
+
+    results = run(options.pattern, options.repeat, options.min_time, report)
+
+    if options.save:
+        save(results, options.save)
+        print(f'\nRésultats enregistrés dans {options.save}.')
+
+    if baseline is None:
+        return 0
+
+    comparisons = compare(results, baseline, options.threshold)
+    regressions = [comparison for comparison in comparisons if comparison[4]]
+    print()
+
+    for name, before, after, ratio, regression in comparisons:
+        print(f'{name:<40} {format_time(before):>12} -> {format_time(after):>12} '
+              f'x{ratio:.2f}{"  RÉGRESSION" if regression else ""}')
+
+    print(f'\n{len(regressions)} régression(s) sur {len(comparisons)} benchmark(s) comparé(s).')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+from benchmarks import benchmark
+from pandamonium.entities.message import Message, content_filter
+from pandamonium.entities.user import User, email_filter, password_filter, username_filter
+
+USER_UUID = 'e2008d2f-92f6-4e88-80dd-58f08f9581ed'
+BRANCH_UUID = 'cae10a02-8555-42ba-8ead-314879f725e3'
+MESSAGE_UUID = '39bfec44-5492-49b2-9063-fb69794a8d73'
+
+
+def user_row() -> dict:
+    """Renvoie une ligne de la table users, telle que lue par un curseur en mode dictionnaire."""
+    return {
+        'uuid': USER_UUID, 'username': 'tartur', 'email': 'tartur.dev@gmail.com', 'password': 'scrypt$...',
+        'date_of_birth': date(2006, 6, 26), 'registration_date': date(2023, 10, 6),
+        'last_connection_date': datetime(2023, 10, 6), 'pronouns': 'il/lui', 'public_display_name': 'Tartur',
+        'public_bio': None, 'private_display_name': 'Arthur', 'private_bio': None, 'version': 3
+    }
+
+
+@benchmark('user.construct')
+def construct_user(size):
+    return lambda: User(USER_UUID, 'tartur', 'tartur.dev@gmail.com', 'supermdp', date(2006, 6, 26), 'il/lui',
+                        'Tartur', 'Arthur')
+
+
+@benchmark('user.from_row')
+def user_from_row(size):
+    row = user_row()
+    return lambda: User._from_row(row)
+
+
+@benchmark('message.construct')
+def construct_message(size):
+    sent = datetime(2024, 1, 1, 12)
+    return lambda: Message(MESSAGE_UUID, 'Salut tout le monde !', sent, False, USER_UUID, BRANCH_UUID)
+
+
+@benchmark('message.from_row')
+def message_from_row(size):
+    row = {'uuid': MESSAGE_UUID, 'content': 'Salut tout le monde !', 'date_sent': datetime(2024, 1, 1, 12),
+           'modified': False, 'sender_uuid': USER_UUID, 'branch_uuid': BRANCH_UUID, 'response_to_message_uuid': None}
+    return lambda: Message._from_row(row)
+
+
+@benchmark('entity.set_column')
+def set_column(size):
+    user = User._from_row(user_row())
+    names = ['Tartur', 'Arthur']
+
+    def run():
+        for name in names:
+            user.set_column('public_display_name', name)
+
+    return run
+
+
+@benchmark('filters.user')
+def user_filters(size):
+    def run():
+        username_filter('tartur')
+        email_filter('tartur.dev@gmail.com')
+        password_filter('supermdp')
+
+    return run
+
+
+@benchmark('filters.content', (20, 2000))
+def message_filter(size):
+    content = 'a' * size
+    return lambda: content_filter(content)
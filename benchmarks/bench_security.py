@@ -0,0 +1,36 @@
+import hashlib
+
+from benchmarks import benchmark
+from pandamonium.security import check_password, date_from_string, hash_password, is_valid_uuid
+
+
+@benchmark('security.is_valid_uuid')
+def valid_uuid(size):
+    return lambda: is_valid_uuid('e2008d2f-92f6-4e88-80dd-58f08f9581ed')
+
+
+@benchmark('security.is_valid_uuid_invalid')
+def invalid_uuid(size):
+    return lambda: is_valid_uuid('e2008d2f-92f6-4e88-80dd-58f08f9581eZ')
+
+
+@benchmark('security.date_from_string')
+def parse_date(size):
+    return lambda: date_from_string('2006-06-26')
+
+
+@benchmark('security.hash_password')
+def hash_(size):
+    return lambda: hash_password('supermdp')
+
+
+@benchmark('security.check_password')
+def check(size):
+    hashed = hash_password('supermdp')
+    return lambda: check_password('supermdp', hashed)
+
+
+@benchmark('security.check_password_legacy')
+def check_legacy(size):
+    hashed = hashlib.sha256(b'supermdp').hexdigest()
+    return lambda: check_password('supermdp', hashed)
@@ -0,0 +1,80 @@
+import uuid as uuid_lib
+
+from benchmarks import benchmark
+from pandamonium.entities.data_structures import UUIDList
+
+SIZES = (10, 100, 10000)
+
+
+def make_uuids(size: int) -> list[str]:
+    """Renvoie size UUIDs, toujours les mêmes pour une taille donnée."""
+    return [str(uuid_lib.UUID(int=index * 7919 + size, version=4)) for index in range(size)]
+
+
+@benchmark('uuid_list.construct', SIZES)
+def construct(size: int):
+    chain = ''.join(make_uuids(size))
+    return lambda: UUIDList(chain)
+
+
+@benchmark('uuid_list.hydrate', SIZES)
+def hydrate(size: int):
+    chain = ''.join(make_uuids(size))
+    return lambda: UUIDList.hydrate(chain)
+
+
+@benchmark('uuid_list.from_uuids', SIZES)
+def from_uuids(size: int):
+    uuids = make_uuids(size)
+    return lambda: UUIDList.from_uuids(uuids)
+
+
+@benchmark('uuid_list.iterate', SIZES)
+def iterate(size: int):
+    uuid_list = UUIDList.from_uuids(make_uuids(size))
+    return lambda: list(uuid_list)
+
+
+@benchmark('uuid_list.contains', SIZES)
+def contains(size: int):
+    uuids = make_uuids(size)
+    uuid_list = UUIDList.from_uuids(uuids)
+    last = uuids[-1]
+    return lambda: last in uuid_list
+
+
+@benchmark('uuid_list.append_remove', SIZES)
+def append_remove(size: int):
+    uuid_list = UUIDList.from_uuids(make_uuids(size))
+    new_uuid = str(uuid_lib.UUID(int=0, version=4))
+
+    def run():
+        uuid_list.append(new_uuid)
+        uuid_list.remove(new_uuid)
+
+    return run
+
+
+@benchmark('uuid_list.delete_append', SIZES)
+def delete_append(size: int):
+    uuid_list = UUIDList.from_uuids(make_uuids(size))
+
+    def run():
+        first = uuid_list[0]
+        del uuid_list[0]
+        uuid_list.append(first)
+
+    return run
+
+
+@benchmark('uuid_list.chain_after_append', SIZES)
+def chain_after_append(size: int):
+    uuid_list = UUIDList.from_uuids(make_uuids(size))
+    new_uuid = str(uuid_lib.UUID(int=0, version=4))
+
+    def run():
+        uuid_list.append(new_uuid)
+        uuid_list.pop()
+        return uuid_list.chain
+
+    return run
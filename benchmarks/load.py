@@ -0,0 +1,543 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+import typing as tp
+
+SCENARIOS = ('steady', 'burst', 'reconnect')
+
+
+def percentile(values: list[float], ratio: float) -> float | None:
+    """Renvoie le percentile donné d'une liste de valeurs (méthode du rang le plus proche).
+
+    :param values: Valeurs, dans un ordre quelconque.
+    :param ratio: Percentile voulu, entre 0 et 1 (0.99 pour le p99).
+
+    :rtype: float | None
+    :return: Le percentile, ou None si la liste est vide."""
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(ratio * len(ordered)) - 1))]
+
+
+class Assignment:
+    """Classe représentant un client simulé : l'utilisateur sous lequel il se connecte, et le bambou et la branche
+    dans lesquels il discute."""
+
+    __slots__ = ('username', 'bamboo_uuid', 'branch_uuid')
+
+    def __init__(self, username: str, bamboo_uuid: str, branch_uuid: str):
+        self.username = username
+        self.bamboo_uuid = bamboo_uuid
+        self.branch_uuid = branch_uuid
+
+
+def load_assignments(clients: int, seed: int = 0) -> list[Assignment]:
+    """Choisit les clients simulés parmi les adhésions existant en base de données (remplie par exemple par
+    flask seed) : chaque client est un membre d'un bambou, placé dans l'une des branches de ce bambou. Les grands
+    bambous fournissent donc la plupart des clients, et leurs branches sont les plus chargées.
+
+    La base est celle que configure l'environnement (PANDAMONIUM_DATABASE_BACKEND...), comme pour le serveur.
+
+    :param clients: Nombre de clients voulus.
+    :param seed: Graine du tirage.
+
+    :rtype: list[Assignment]
+    :return: Les clients, dont au plus un par utilisateur."""
+    from pandamonium import create_app
+    from pandamonium.database import get_db
+
+    rng = random.Random(seed)
+
+    with create_app().app_context():
+        with get_db().cursor() as cursor:
+            cursor.execute(
+                'SELECT users.username, bamboo_members.bamboo_uuid FROM bamboo_members '
+                'JOIN users ON users.uuid = bamboo_members.user_uuid'
+            )
+            memberships = cursor.fetchall()
+            cursor.execute('SELECT uuid, bamboo_uuid FROM branches')
+            branches: dict[str, list[str]] = {}
+
+            for branch_uuid, bamboo_uuid in cursor.fetchall():
+                branches.setdefault(bamboo_uuid, []).append(branch_uuid)
+
+    rng.shuffle(memberships)
+    assignments, seen = [], set()
+
+    for username, bamboo_uuid in memberships:
+        if username in seen or bamboo_uuid not in branches:
+            continue
+
+        seen.add(username)
+        assignments.append(Assignment(username, bamboo_uuid, rng.choice(sorted(branches[bamboo_uuid]))))
+
+        if len(assignments) == clients:
+            break
+
+    return assignments
+
+
+class Metrics:
+    """Classe accumulant les mesures de la charge : messages envoyés, livraisons (un message est livré à chaque client
+    de sa branche, y compris à son émetteur), latences de bout en bout et erreurs."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.connected = 0
+        self.sent = 0
+        self.expected = 0
+        self.delivered = 0
+        self.errors: dict[str, int] = {}
+        self.latencies: list[float] = []
+        self.connect_times: list[float] = []
+        self.timeline: list[dict[str, tp.Any]] = []
+
+        self.__window_latencies: list[float] = []
+        self.__window_sent = 0
+        self.__window_delivered = 0
+        self.__window_start = self.start
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def message_sent(self, recipients: int):
+        self.sent += 1
+        self.expected += recipients
+        self.__window_sent += 1
+
+    def message_delivered(self, latency: float):
+        self.delivered += 1
+        self.latencies.append(latency)
+        self.__window_latencies.append(latency)
+        self.__window_delivered += 1
+
+    def snapshot(self, server: dict[str, float] | None) -> dict[str, tp.Any]:
+        """Clôt la fenêtre de mesure courante et l'ajoute à la chronologie.
+
+        :param server: Consommation du serveur pendant la fenêtre, ou None si elle n'est pas mesurée.
+
+        :rtype: dict[str, tp.Any]
+        :return: Les mesures de la fenêtre."""
+        now = time.monotonic()
+        duration = max(now - self.__window_start, 1e-9)
+        point = {
+            'time': round(now - self.start, 2),
+            'connected': self.connected,
+            'sent_per_second': self.__window_sent / duration,
+            'delivered_per_second': self.__window_delivered / duration,
+            'p50': percentile(self.__window_latencies, 0.50),
+            'p95': percentile(self.__window_latencies, 0.95),
+            'p99': percentile(self.__window_latencies, 0.99),
+            'errors': sum(self.errors.values()),
+            **(server or {}),
+        }
+        self.timeline.append(point)
+        self.__window_latencies = []
+        self.__window_sent = self.__window_delivered = 0
+        self.__window_start = now
+        return point
+
+    def summary(self) -> dict[str, tp.Any]:
+        """Renvoie le bilan de toute la charge.
+
+        :rtype: dict[str, tp.Any]"""
+        duration = max(time.monotonic() - self.start, 1e-9)
+        return {
+            'duration': round(duration, 2),
+            'sent': self.sent,
+            'expected_deliveries': self.expected,
+            'delivered': self.delivered,
+            'delivery_ratio': self.delivered / self.expected if self.expected else None,
+            'sent_per_second': self.sent / duration,
+            'delivered_per_second': self.delivered / duration,
+            'latency': {name: percentile(self.latencies, ratio)
+                        for name, ratio in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))},
+            'connect_time': {name: percentile(self.connect_times, ratio)
+                             for name, ratio in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))},
+            'errors': self.errors,
+        }
+
+
+class ServerMonitor:
+    """Classe mesurant la consommation CPU et mémoire d'un processus serveur et de ses workers (psutil requis)."""
+
+    def __init__(self, pid: int):
+        import psutil
+
+        self.__psutil = psutil
+        self.__root = psutil.Process(pid)
+        self.__processes: dict[int, tp.Any] = {}
+
+    def sample(self) -> dict[str, float]:
+        """Renvoie la consommation CPU (en %, 100 par cœur occupé) depuis l'appel précédent et la mémoire résidente
+        (en Mo) cumulées du serveur et de ses workers.
+
+        :rtype: dict[str, float]"""
+        cpu, rss = 0.0, 0
+
+        try:
+            processes = [self.__root, *self.__root.children(recursive=True)]
+        except self.__psutil.NoSuchProcess:
+            return {'server_cpu': 0.0, 'server_rss_mb': 0.0}
+
+        for process in processes:
+            # Le premier appel de cpu_percent sert de point de départ : il est ignoré.
+            known = self.__processes.setdefault(process.pid, process)
+
+            try:
+                cpu += known.cpu_percent(None)
+                rss += known.memory_info().rss
+            except self.__psutil.NoSuchProcess:
+                self.__processes.pop(process.pid, None)
+
+        return {'server_cpu': round(cpu, 1), 'server_rss_mb': round(rss / 2 ** 20, 1)}
+
+
+class SimulatedClient:
+    """Classe représentant un client Socket.IO simulé : il se connecte avec la session obtenue via /auth/login,
+    rejoint sa branche, envoie des messages et mesure le délai de livraison de tous ceux de sa branche."""
+
+    def __init__(self, url: str, assignment: Assignment, cookie: str, metrics: Metrics, rooms: dict[str, int],
+                 timeout: float):
+        self.url = url
+        self.assignment = assignment
+        self.cookie = cookie
+        self.metrics = metrics
+        self.rooms = rooms
+        self.timeout = timeout
+        self.client = None
+        self.joined = False
+
+    async def connect(self) -> bool:
+        """Connecte le client (avec une nouvelle connexion Socket.IO) puis lui fait rejoindre sa branche.
+
+        :rtype: bool
+        :return: True si le client est prêt à discuter, False sinon (l'erreur est comptée)."""
+        import socketio
+
+        start = time.monotonic()
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.client.on('user_message', self.__on_message)
+
+        try:
+            await self.client.connect(self.url, headers={'Cookie': self.cookie}, transports=['websocket'],
+                                      wait_timeout=self.timeout)
+        except Exception:
+            self.metrics.error('connect')
+            return False
+
+        try:
+            joined = await self.client.call('join_branch', {'bamboo': self.assignment.bamboo_uuid,
+                                                            'branch': self.assignment.branch_uuid},
+                                            timeout=self.timeout)
+        except Exception:
+            joined = False
+
+        if not joined:
+            self.metrics.error('join')
+            await self.client.disconnect()
+            return False
+
+        self.joined = True
+        self.metrics.connected += 1
+        self.metrics.connect_times.append(time.monotonic() - start)
+        self.rooms[self.assignment.branch_uuid] = self.rooms.get(self.assignment.branch_uuid, 0) + 1
+        return True
+
+    async def disconnect(self):
+        """Déconnecte le client."""
+        if self.joined:
+            self.joined = False
+            self.metrics.connected -= 1
+            self.rooms[self.assignment.branch_uuid] -= 1
+
+        try:
+            if self.client is not None:
+                await self.client.disconnect()
+        except Exception:
+            pass
+
+    async def send(self, index: int):
+        """Envoie un message dans la branche du client.
+
+        :param index: Numéro du message, repris dans son contenu."""
+        if not self.joined:
+            return
+
+        try:
+            await self.client.emit('user_message', {
+                'data': f'Message de charge n°{index} de {self.assignment.username}',
+                'load_sent_at': time.monotonic(),
+            })
+            self.metrics.message_sent(self.rooms[self.assignment.branch_uuid])
+        except Exception:
+            self.metrics.error('emit')
+
+    async def __on_message(self, data):
+        sent_at = data.get('load_sent_at') if isinstance(data, dict) else None
+
+        # Tous les clients tournent dans ce processus : leurs horloges monotones sont comparables.
+        if sent_at is not None:
+            self.metrics.message_delivered(time.monotonic() - sent_at)
+
+
+async def login(session, url: str, username: str, password: str) -> str | None:
+    """Se connecte via le formulaire /auth/login et renvoie le cookie de session obtenu.
+
+    :param session: Session aiohttp.
+    :param url: URL du serveur.
+    :param username: Nom de l'utilisateur.
+    :param password: Mot de passe de l'utilisateur.
+
+    :rtype: str | None
+    :return: L'en-tête Cookie à présenter lors de la connexion Socket.IO, ou None si la connexion a échoué."""
+    async with session.post(f'{url}/auth/login', data={'identifier': username, 'password': password},
+                            allow_redirects=False) as response:
+        cookie = response.cookies.get('session')
+
+        # Une connexion réussie redirige vers l'accueil ; un échec réaffiche le formulaire (200).
+        if response.status != 302 or cookie is None:
+            return None
+
+        return f'session={cookie.value}'
+
+
+async def run_scenario(options: argparse.Namespace, assignments: list[Assignment],
+                       monitor: ServerMonitor | None) -> Metrics:
+    """Exécute un scénario de charge : connexion progressive des clients, discussion pendant la durée demandée, puis
+    déconnexion.
+
+    - steady : chaque client envoie en moyenne --rate messages par seconde (arrivées de Poisson).
+    - burst : comme steady, mais toutes les --burst-interval secondes, chaque client envoie --burst-size messages
+      d'un coup.
+    - reconnect : comme steady, mais toutes les --burst-interval secondes, une proportion --reconnect-ratio des
+      clients se déconnecte puis se reconnecte en même temps.
+
+    :param options: Options de la ligne de commande.
+    :param assignments: Clients simulés.
+    :param monitor: Mesure de la consommation du serveur, ou None.
+
+    :rtype: Metrics
+    :return: Les mesures."""
+    import aiohttp
+
+    metrics = Metrics()
+    rooms: dict[str, int] = {}
+    rng = random.Random(options.seed)
+    connect_slots = asyncio.Semaphore(options.connect_concurrency)
+    clients: list[SimulatedClient] = []
+    counter = 0
+
+    async def prepare(assignment: Assignment, delay: float):
+        await asyncio.sleep(delay)
+
+        async with connect_slots:
+            try:
+                cookie = await login(http, options.url, assignment.username, options.password)
+            except Exception:
+                cookie = None
+
+            if cookie is None:
+                metrics.error('login')
+                return
+
+            client = SimulatedClient(options.url, assignment, cookie, metrics, rooms, options.timeout)
+
+            if await client.connect():
+                clients.append(client)
+
+    async def chat(client: SimulatedClient, until: float):
+        nonlocal counter
+
+        while time.monotonic() < until:
+            delay = rng.expovariate(options.rate) if options.rate > 0 else float('inf')
+            await asyncio.sleep(min(delay, until - time.monotonic()))
+
+            if time.monotonic() < until:
+                counter += 1
+                await client.send(counter)
+
+    async def disrupt(until: float):
+        nonlocal counter
+
+        while time.monotonic() + options.burst_interval < until:
+            await asyncio.sleep(options.burst_interval)
+
+            if options.scenario == 'burst':
+                for _ in range(options.burst_size):
+                    for client in list(clients):
+                        counter += 1
+                        await client.send(counter)
+            else:
+                storm = rng.sample(clients, int(len(clients) * options.reconnect_ratio))
+                await asyncio.gather(*(client.disconnect() for client in storm))
+                await asyncio.gather(*(reconnect(client) for client in storm))
+
+    async def reconnect(client: SimulatedClient):
+        async with connect_slots:
+            await client.connect()
+
+    def snapshot():
+        print(format_point(metrics.snapshot(monitor.sample() if monitor is not None else None)), flush=True)
+
+    async def report():
+        while True:
+            await asyncio.sleep(options.interval)
+            snapshot()
+
+    async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar()) as http:
+        reporter = asyncio.create_task(report())
+        ramp_step = options.ramp_up / max(len(assignments), 1)
+        await asyncio.gather(*(prepare(assignment, index * ramp_step) for index, assignment in enumerate(assignments)))
+
+        until = time.monotonic() + options.duration
+        tasks = [chat(client, until) for client in clients]
+
+        if options.scenario != 'steady':
+            tasks.append(disrupt(until))
+
+        await asyncio.gather(*tasks)
+        # Laisse arriver les derniers messages avant de déconnecter les clients.
+        await asyncio.sleep(min(options.timeout, 2.0))
+        reporter.cancel()
+        snapshot()
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+    return metrics
+
+
+def format_point(point: dict[str, tp.Any]) -> str:
+    """Formate une ligne de la chronologie."""
+    def ms(value: float | None) -> str:
+        return f'{value * 1000:7.1f}' if value is not None else '      -'
+
+    line = (f"[{point['time']:7.1f} s] clients {point['connected']:5d} | envoyés {point['sent_per_second']:8.1f}/s "
+            f"| livrés {point['delivered_per_second']:9.1f}/s | p50 {ms(point['p50'])} ms p95 {ms(point['p95'])} ms "
+            f"p99 {ms(point['p99'])} ms | erreurs {point['errors']}")
+
+    if 'server_cpu' in point:
+        line += f" | CPU {point['server_cpu']:6.1f} % RSS {point['server_rss_mb']:7.1f} Mo"
+
+    return line
+
+
+def start_server(options: argparse.Namespace) -> subprocess.Popen:
+    """Lance PANDAMONIUM localement via pandamonium.serve, puis attend qu'il accepte les connexions.
+
+    :param options: Options de la ligne de commande.
+
+    :rtype: subprocess.Popen
+    :return: Le processus principal du serveur.
+
+    :raise RuntimeError: Si le serveur n'a pas démarré à temps."""
+    process = subprocess.Popen([
+        sys.executable, '-m', 'pandamonium.serve', '--host', '127.0.0.1', '--port', str(options.port),
+        '--workers', str(options.workers), '--async-mode', options.async_mode
+    ])
+    deadline = time.monotonic() + 30
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', options.port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError('The PANDAMONIUM server did not start in time.')
+
+
+def parse_arguments(arguments: list[str] | None = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande.
+
+    :param arguments: Arguments à analyser. Si None, ceux du processus sont utilisés."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.load',
+        description='Test de charge Socket.IO de PANDAMONIUM. Les clients sont des membres de bambous tirés de la base '
+                    'de données (remplie via flask seed, dont ils partagent le mot de passe).'
+    )
+    parser.add_argument('scenario', choices=SCENARIOS, nargs='?', default='steady', help='Scénario de charge.')
+    parser.add_argument('-c', '--clients', type=int, default=1000, help='Nombre de clients simulés.')
+    parser.add_argument('-d', '--duration', type=float, default=60.0, help='Durée de la discussion, en secondes.')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='Durée de connexion des clients, en secondes.')
+    parser.add_argument('--rate', type=float, default=0.1, help='Messages par seconde et par client.')
+    parser.add_argument('--burst-interval', type=float, default=10.0,
+                        help='Intervalle entre deux rafales ou tempêtes de reconnexions, en secondes.')
+    parser.add_argument('--burst-size', type=int, default=5, help='Messages envoyés par client lors d\'une rafale.')
+    parser.add_argument('--reconnect-ratio', type=float, default=0.2,
+                        help='Proportion des clients se reconnectant lors d\'une tempête.')
+    parser.add_argument('--connect-concurrency', type=int, default=50,
+                        help='Nombre maximal de connexions (login compris) simultanées.')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Délai maximal des connexions, en secondes.')
+    parser.add_argument('--interval', type=float, default=1.0, help='Intervalle entre deux relevés, en secondes.')
+    parser.add_argument('--password', default='pandamonium', help='Mot de passe des utilisateurs.')
+    parser.add_argument('--seed', type=int, default=0, help='Graine du tirage des clients et des envois.')
+    parser.add_argument('--url', default=None, help='URL d\'un serveur déjà lancé (sinon, il est lancé localement).')
+    parser.add_argument('--server-pid', type=int, default=None,
+                        help='PID du serveur déjà lancé, pour mesurer sa consommation.')
+    parser.add_argument('-p', '--port', type=int, default=5050, help='Port du serveur lancé localement.')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Workers du serveur lancé localement.')
+    parser.add_argument('--async-mode', default='threading', help='Mode asynchrone du serveur lancé localement.')
+    parser.add_argument('-o', '--output', default=None, help='Enregistrer le bilan et la chronologie (JSON).')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """Point d'entrée : lance le serveur si besoin, exécute le scénario puis affiche le bilan.
+
+    :param arguments: Arguments de la ligne de commande. Si None, ceux du processus sont utilisés.
+
+    :rtype: int
+    :return: Le code de sortie : 1 si aucun client n'a pu se connecter, 0 sinon."""
+    options = parse_arguments(arguments)
+    assignments = load_assignments(options.clients, options.seed)
+
+    if len(assignments) < options.clients:
+        print(f'[PANDAMONIUM] Seulement {len(assignments)} clients disponibles (un par utilisateur membre d\'un '
+              f'bambou avec une branche) : lancez flask seed avec plus d\'utilisateurs.')
+
+    server = None
+
+    if options.url is None:
+        server = start_server(options)
+        options.url = f'http://127.0.0.1:{options.port}'
+
+    pid = server.pid if server is not None else options.server_pid
+    monitor = None
+
+    if pid is not None:
+        try:
+            monitor = ServerMonitor(pid)
+        except ImportError:
+            print('[PANDAMONIUM] psutil n\'est pas installé : la consommation du serveur ne sera pas mesurée.')
+
+    try:
+        metrics = asyncio.run(run_scenario(options, assignments, monitor))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary = metrics.summary()
+    print(json.dumps(summary, indent=2))
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump({'options': vars(options), 'summary': summary, 'timeline': metrics.timeline}, file, indent=2)
+
+    return 0 if metrics.connect_times else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
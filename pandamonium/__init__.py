@@ -1,3 +1,8 @@
+from pandamonium.concurrency import configure_threadpool, patch_from_environment
+
+# Le monkey-patching d'eventlet/gevent doit précéder tous les autres imports.
+patch_from_environment()
+
 import flask as fk
 import flask_socketio as sock
 
@@ -6,29 +11,94 @@ import yaml
 
 from pandamonium.routes import auth, app
 from pandamonium.commands import register_commands
-from pandamonium.database import close_db
+from pandamonium.context import LazyGlobals
+from pandamonium.database import close_db, get_pool
+from pandamonium.entities.cache import configure_cache, entity_cache
+from pandamonium.entities.data_structures import Entity
+from pandamonium.hashing import configure_hashing, hashing_pool
+from pandamonium.metrics import configure_metrics, init_metrics, metrics_registry
+from pandamonium.presence import configure_presence, presence
+from pandamonium.pubsub import socketio_options
 from pandamonium.routes.app import register_events
+from pandamonium.slow_queries import configure_slow_queries, slow_query_log
+from pandamonium.statements import statement_cache_stats
+from pandamonium.timeline import configure_timelines
+from pandamonium.write_behind import get_message_writer
 
 
 flask_app = fk.Flask(__name__, instance_relative_config=True)
+flask_app.app_ctx_globals_class = LazyGlobals
 
-with flask_app.open_resource('db_credentials.yml') as db_credentials_file:
-    db_credentials = yaml.safe_load(db_credentials_file)
+# Les identifiants ne sont nécessaires qu'avec MySQL : une base SQLite (DATABASE_BACKEND='sqlite') s'en passe.
+try:
+    with flask_app.open_resource('db_credentials.yml') as db_credentials_file:
+        db_credentials = yaml.safe_load(db_credentials_file)
+except FileNotFoundError:
+    db_credentials = None
 
 flask_app.config.from_mapping(
     SECRET_KEY='dev',
     DATABASE_CREDENTIALS=db_credentials,
 )
 
-socket = sock.SocketIO(flask_app)
 flask_app.config.from_pyfile('config.py', silent=True)
+# Permet à pandamonium.serve (ou à l'environnement) de compléter la configuration : PANDAMONIUM_<CLÉ>=<valeur JSON>.
+flask_app.config.from_prefixed_env('PANDAMONIUM')
+
+socket = sock.SocketIO(flask_app, **socketio_options(flask_app))
 
 try:
     os.makedirs(flask_app.instance_path)
 except OSError:
     pass
 
+
+def configure_app(app: fk.Flask):
+    """Configure les composants partagés par tout le processus (cache, pools, présence...) à partir de la
+    configuration de l'application.
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    configure_cache(app)
+    configure_threadpool(app.config.get('ASYNC_THREADPOOL_SIZE', 10))
+    configure_presence(app)
+    configure_hashing(app)
+    configure_metrics(app)
+    configure_slow_queries(app)
+    configure_timelines(app)
+    Entity.validate_hydrated = app.config.get('ENTITY_VALIDATE_HYDRATED', False)
+
+
+def create_app(test_config: dict | None = None) -> fk.Flask:
+    """Renvoie l'application, après avoir complété sa configuration avec celle donnée (tests, scripts). Les composants
+    partagés sont reconfigurés en conséquence ; la base de données l'est à la prochaine création de son pool.
+
+    :param test_config: Clés de configuration à remplacer.
+
+    :rtype: fk.Flask
+    :return: L'instance de l'application Flask."""
+    if test_config is not None:
+        flask_app.config.update(test_config)
+        configure_app(flask_app)
+
+    return flask_app
+
+
+def message_writer_stats() -> dict[str, int]:
+    """Renvoie les compteurs de la file d'écriture différée des messages, vides si elle est désactivée."""
+    writer = get_message_writer(flask_app)
+    return writer.stats() if writer is not None else {}
+
+
+configure_app(flask_app)
 register_commands(flask_app)
+init_metrics(flask_app)
+metrics_registry.register_stats('database_pool', lambda: get_pool(flask_app).stats())
+metrics_registry.register_stats('entity_cache', entity_cache.stats)
+metrics_registry.register_stats('hashing_pool', hashing_pool.stats)
+metrics_registry.register_stats('message_writer', message_writer_stats)
+metrics_registry.register_stats('presence', lambda: {'connections': len(presence)})
+metrics_registry.register_stats('slow_queries', slow_query_log.stats)
+metrics_registry.register_stats('statement_cache', statement_cache_stats.stats)
 flask_app.teardown_appcontext(close_db)
 flask_app.register_blueprint(auth.blueprint)
 flask_app.register_blueprint(app.blueprint)
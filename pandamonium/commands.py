@@ -1,8 +1,17 @@
 import flask as fk
+from flask.cli import with_appcontext
 
 import click
 
-from pandamonium.database import close_db, init_db
+import time
+from datetime import datetime
+
+from pandamonium.database import close_db, get_db, init_db
+from pandamonium.migrations import migrate_db
+from pandamonium.search import rebuild_index
+from pandamonium.seeding import SeedPlan, generate, load
+from pandamonium.slow_queries import read_entries, slow_query_log_path, summarize
+from pandamonium.timeline import rebuild_feeds, timelines
 
 
 def register_commands(app: fk.Flask):
@@ -10,9 +19,16 @@ def register_commands(app: fk.Flask):
 
     :param fk.Flask app: L'instance de l'application Flask."""
     app.cli.add_command(reset_db)
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(seed)
+    app.cli.add_command(slow_queries)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(rebuild_feeds_command)
+    app.cli.add_command(trim_feeds)
 
 
 @click.command('reset-db')
+@with_appcontext
 @click.option('-d', '--dev', is_flag=True, default=False, help='Générer la base de données en mode dev.')
 def reset_db(dev: bool):
     """Commande Flask qui réinitialise les données de la base de données. Insère les valeurs par défaut si le
@@ -23,8 +39,141 @@ def reset_db(dev: bool):
     init_db(set_default_values=dev)
 
     if dev:
+        # Les messages des valeurs par défaut sont insérés directement en SQL : il faut les indexer et les diffuser.
+        rebuild_index(get_db())
+        rebuild_feeds(get_db())
         click.echo('[PANDAMONIUM] Reset de la base de données effectué avec les valeurs par défaut.')
     else:
         click.echo('[PANDAMONIUM] Reset de la base de données effectué sans valeurs par défaut.')
 
     close_db()
+
+
+@click.command('migrate-db')
+@with_appcontext
+def migrate_db_command():
+    """Commande Flask qui met à niveau une base de données existante vers le schéma actuel sans perdre ses données
+    (contrairement à reset-db). Sans effet sur une base déjà à jour."""
+    for step, count in migrate_db(get_db()):
+        click.echo(f'[PANDAMONIUM] Migration {step} : {count}')
+
+    close_db()
+
+
+@click.command('seed')
+@with_appcontext
+@click.option('-u', '--users', type=int, default=1000, show_default=True, help="Nombre d'utilisateurs.")
+@click.option('-b', '--bamboos', type=int, default=100, show_default=True, help='Nombre de bambous.')
+@click.option('--branches', type=float, default=3.0, show_default=True, help='Nombre moyen de branches par bambou.')
+@click.option('-m', '--messages', type=int, default=100000, show_default=True, help='Nombre total de messages.')
+@click.option('-s', '--seed', 'seed_value', type=int, default=0, show_default=True, help='Graine du générateur.')
+@click.option('--password', default='pandamonium', show_default=True, help='Mot de passe de tous les utilisateurs.')
+@click.option('--days', type=int, default=365, show_default=True, help='Durée couverte par les données, en jours.')
+@click.option('--now', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S']), default=None,
+              help="Instant auquel les données s'arrêtent (l'instant présent par défaut).")
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Nombre de lignes par requête INSERT.')
+@click.option('-r', '--reset', is_flag=True, default=False, help='Réinitialiser la base de données avant.')
+def seed(users: int, bamboos: int, branches: float, messages: int, seed_value: int, password: str, days: int,
+         now: datetime | None, batch_size: int, reset: bool):
+    """Commande Flask qui remplit la base de données avec des données synthétiques réalistes (tailles de bambous en
+    loi de puissance, messages envoyés par rafales), pour les tests de charge. Une même graine et un même --now
+    produisent toujours les mêmes données, au hash du mot de passe près (son sel est aléatoire). Sans --now, les dates
+    sont décalées jusqu'à l'instant présent. Les utilisateurs s'appellent user000000, user000001... et partagent le même
+    mot de passe."""
+    if reset:
+        init_db(set_default_values=False)
+
+    plan = SeedPlan(users=users, bamboos=bamboos, branches=branches, messages=messages, seed=seed_value,
+                    password=password, days=days)
+
+    with get_db().cursor() as cursor:
+        report = load(cursor, generate(plan, now), batch_size)
+
+    # Les messages sont insérés en masse, sans passer par Message.instant : l'index de recherche et les fils
+    # d'actualité sont construits après.
+    start = time.perf_counter()
+    report.append(('search_index', rebuild_index(get_db(), batch_size), time.perf_counter() - start))
+    start = time.perf_counter()
+    report.append(('feed_entries', rebuild_feeds(get_db()), time.perf_counter() - start))
+
+    total_rows = sum(rows for _, rows, _ in report)
+    total_time = sum(duration for _, _, duration in report)
+
+    for table, rows, duration in report + [('total', total_rows, total_time)]:
+        click.echo(f'[PANDAMONIUM] {table:>14} : {rows:>9} lignes en {duration:7.2f} s '
+                   f'({rows / duration if duration else 0:,.0f} lignes/s)')
+
+    close_db()
+
+
+@click.command('slow-queries')
+@with_appcontext
+@click.option('-n', '--limit', type=int, default=10, show_default=True, help='Nombre de requêtes affichées.')
+@click.option('--sort', type=click.Choice(['total', 'count', 'mean', 'max']), default='total', show_default=True,
+              help='Critère de classement.')
+@click.option('-e', '--explain', is_flag=True, default=False, help="Afficher le dernier plan d'exécution capturé.")
+def slow_queries(limit: int, sort: str, explain: bool):
+    """Commande Flask qui résume le journal des requêtes lentes (SLOW_QUERY_LOG) : pour chaque requête normalisée,
+    le nombre d'occurrences et les durées cumulée, moyenne et maximale, de la plus coûteuse à la moins coûteuse."""
+    app = fk.current_app
+    summaries = summarize(read_entries(slow_query_log_path(app), app.config.get('SLOW_QUERY_LOG_BACKUPS', 5)))
+
+    if not summaries:
+        click.echo('[PANDAMONIUM] Aucune requête lente journalisée.')
+        return
+
+    summaries.sort(key=lambda summary: summary[sort], reverse=True)
+
+    for summary in summaries[:limit]:
+        click.echo(f"[PANDAMONIUM] {summary['fingerprint']} : {summary['count']:>6} fois, "
+                   f"{summary['total']:8.3f} s au total, {summary['mean'] * 1000:8.1f} ms en moyenne, "
+                   f"{summary['max'] * 1000:8.1f} ms au plus ({', '.join(sorted(summary['endpoints'])) or '-'})")
+        click.echo(f"    {summary['statement']}")
+
+        if explain and summary['explain'] is not None:
+            for row in summary['explain']:
+                click.echo(f'    | {row}')
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Nombre de messages indexés par lot.')
+def rebuild_search_index(batch_size: int):
+    """Commande Flask qui reconstruit entièrement l'index de recherche des messages à partir de la table messages (à
+    lancer après un import en masse, ou si l'index a été perdu). L'index étant vidé au début, les résultats des
+    recherches sont incomplets tant que la commande tourne."""
+    start = time.perf_counter()
+    indexed = rebuild_index(get_db(), batch_size)
+    duration = time.perf_counter() - start
+
+    click.echo(f'[PANDAMONIUM] {indexed} messages indexés en {duration:.2f} s '
+               f'({indexed / duration if duration else 0:,.0f} messages/s).')
+
+    close_db()
+
+
+@click.command('rebuild-feeds')
+@with_appcontext
+def rebuild_feeds_command():
+    """Commande Flask qui reconstruit entièrement les fils d'actualité à partir des derniers messages de chaque bambou
+    (à lancer après un import en masse, ou après avoir modifié FEED_FANOUT_LIMIT)."""
+    start = time.perf_counter()
+    written = rebuild_feeds(get_db())
+
+    click.echo(f'[PANDAMONIUM] {written} entrées de fil d\'actualité écrites en {time.perf_counter() - start:.2f} s.')
+
+    close_db()
+
+
+@click.command('trim-feeds')
+@with_appcontext
+def trim_feeds():
+    """Commande Flask qui ramène chaque fil d'actualité à ses FEED_MAX_ENTRIES entrées les plus récentes (à lancer
+    périodiquement : les fils sont aussi bornés au fil des diffusions, mais sans garantie stricte)."""
+    with get_db().cursor() as cursor:
+        removed = timelines.trim_all(cursor)
+
+    click.echo(f'[PANDAMONIUM] {removed} entrées de fil d\'actualité supprimées '
+               f'(au plus {timelines.max_entries} par fil).')
+
+    close_db()
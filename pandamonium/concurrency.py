@@ -0,0 +1,125 @@
+import functools
+import os
+import sys
+import typing as tp
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+_threadpool_size = 10
+_gevent_threadpool = None
+
+
+def patch_from_environment() -> str:
+    """Applique le monkey-patching du mode asynchrone choisi via la variable d'environnement PANDAMONIUM_ASYNC_MODE.
+    Doit être appelée avant tout autre import : c'est pourquoi le choix du mode ne peut pas venir de config.py.
+
+    :rtype: str
+    :return: Le mode asynchrone en vigueur.
+
+    :raise ValueError: Si le mode demandé n'existe pas."""
+    mode = os.environ.get('PANDAMONIUM_ASYNC_MODE', 'threading')
+
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown async mode '{mode}', expected one of {', '.join(ASYNC_MODES)}.")
+
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    return mode
+
+
+def current_mode() -> str:
+    """Renvoie le mode asynchrone en vigueur, déduit du monkey-patching effectivement appliqué.
+
+    :rtype: str
+    :return: 'eventlet', 'gevent' ou 'threading'."""
+    if 'eventlet.patcher' in sys.modules and sys.modules['eventlet.patcher'].is_monkey_patched('socket'):
+        return 'eventlet'
+
+    if 'gevent.monkey' in sys.modules and sys.modules['gevent.monkey'].is_module_patched('socket'):
+        return 'gevent'
+
+    return 'threading'
+
+
+def configure_threadpool(size: int):
+    """Fixe le nombre de threads système utilisés par run_blocking dans les modes eventlet et gevent.
+
+    :param size: Nombre maximal de threads."""
+    global _threadpool_size, _gevent_threadpool
+    _threadpool_size = size
+    _gevent_threadpool = None
+
+    if current_mode() == 'eventlet':
+        from eventlet import tpool
+        tpool.set_num_threads(size)
+
+
+def run_blocking(func: tp.Callable, *args, **kwargs) -> tp.Any:
+    """Exécute une fonction bloquante (code C, E/S ne passant pas par les modules patchés...) sans bloquer la boucle
+    d'événements : en mode eventlet ou gevent, elle est confiée à un pool de threads système borné et seule la
+    greenlet appelante attend son résultat. En mode threading, la fonction est simplement appelée.
+
+    :param func: Fonction à exécuter.
+
+    :return Le résultat de la fonction (ses exceptions sont propagées)."""
+    mode = current_mode()
+
+    if mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+
+    if mode == 'gevent':
+        global _gevent_threadpool
+
+        if _gevent_threadpool is None:
+            from gevent.threadpool import ThreadPool
+            _gevent_threadpool = ThreadPool(_threadpool_size)
+
+        return _gevent_threadpool.apply(func, args, kwargs)
+
+    return func(*args, **kwargs)
+
+
+class Offloaded:
+    """Classe enveloppant un objet dont les méthodes bloquent (connexion ou curseur d'un pilote en C) : chaque appel de
+    méthode passe par run_blocking, les attributs simples sont lus directement. Les curseurs créés par une connexion
+    enveloppée sont eux-mêmes enveloppés."""
+
+    __slots__ = ('_target', '__weakref__')
+
+    def __init__(self, target: tp.Any):
+        """Constructeur de la classe.
+
+        :param target: Objet à envelopper."""
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name: str) -> tp.Any:
+        value = getattr(self._target, name)
+
+        if not callable(value):
+            return value
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            result = run_blocking(value, *args, **kwargs)
+            return Offloaded(result) if name == 'cursor' else result
+
+        return call
+
+    def __setattr__(self, name: str, value: tp.Any):
+        run_blocking(setattr, self._target, name, value)
+
+    def __enter__(self):
+        run_blocking(self._target.__enter__)
+        return self
+
+    def __exit__(self, *exc_info):
+        return run_blocking(self._target.__exit__, *exc_info)
+
+    def __iter__(self):
+        return iter(run_blocking(self._target.fetchall))
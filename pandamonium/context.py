@@ -0,0 +1,61 @@
+import time
+import typing as tp
+
+import flask as fk
+from flask.ctx import _AppCtxGlobals
+
+_loaders: dict[str, tp.Callable[[], tp.Any]] = {}
+
+
+def lazy_global(name: str):
+    """Décorateur enregistrant une fonction chargée de calculer la valeur de fk.g.<name> la première fois que cet
+    attribut est lu pendant le contexte courant. Tant que personne ne lit l'attribut, la fonction n'est jamais appelée.
+
+    :param name: Nom de l'attribut de fk.g chargé par la fonction décorée.
+
+    :return Un décorateur enregistrant la fonction telle quelle."""
+    def decorator(loader):
+        _loaders[name] = loader
+        return loader
+
+    return decorator
+
+
+def is_static_request() -> bool:
+    """Vérifie si la requête en cours vise un fichier statique (du site ou d'un blueprint).
+
+    :rtype: bool
+    :return: True si la requête vise un fichier statique, False sinon (y compris hors requête HTTP)."""
+    if not fk.has_request_context():
+        return False
+
+    endpoint = fk.request.endpoint
+    return endpoint is not None and (endpoint == 'static' or endpoint.endswith('.static'))
+
+
+class LazyGlobals(_AppCtxGlobals):
+    """Classe remplaçant l'objet fk.g de Flask afin de charger paresseusement les attributs enregistrés via le décorateur
+    lazy_global. Les requêtes visant des fichiers statiques ne déclenchent jamais de chargement : les attributs y valent
+    None. Lorsque la requête est mesurée (fk.g.request_metrics), la durée de chaque chargement lui est ajoutée."""
+
+    def __getattr__(self, name: str) -> tp.Any:
+        if name not in _loaders:
+            return super().__getattr__(name)
+
+        if is_static_request():
+            value = None
+        elif (metrics := self.__dict__.get('request_metrics')) is None:
+            value = _loaders[name]()
+        else:
+            start = time.perf_counter()
+            value = _loaders[name]()
+            metrics.add_load(name, time.perf_counter() - start)
+
+        setattr(self, name, value)
+        return value
+
+    def get(self, name: str, default: tp.Any | None = None) -> tp.Any:
+        if name not in self.__dict__ and name in _loaders:
+            return getattr(self, name)
+
+        return super().get(name, default)
@@ -1,9 +1,30 @@
 import flask as fk
 
-import mysql.connector as connector
+import mysql.connector
 import mysql.connector.abstracts as abstracts
 
+import contextlib
 import functools
+import os
+import sqlite3
+import threading
+
+from pandamonium.concurrency import current_mode
+from pandamonium.metrics import InstrumentedConnection
+from pandamonium.pool import ConnectionPool, ThreadLocalPool, mysql_factory
+from pandamonium.slow_queries import slow_query_log
+from pandamonium.sqlite import sqlite_factory
+
+DATABASE_BACKENDS = ('mysql', 'sqlite')
+
+# Exceptions levées en cas de violation d'une contrainte (clé primaire ou unique, clé étrangère), quel que soit le
+# moteur de base de données. S'utilise directement dans une clause except.
+IntegrityError = (mysql.connector.IntegrityError, sqlite3.IntegrityError)
+# Exceptions levées par toute requête refusée par la base de données (table ou colonne inconnue, contrainte...).
+DatabaseError = (mysql.connector.DatabaseError, sqlite3.DatabaseError)
+
+_pools: dict[str, ConnectionPool | ThreadLocalPool] = {}
+_pools_lock = threading.Lock()
 
 
 def column_filter(func):
@@ -20,20 +41,122 @@ def column_filter(func):
     return wrapper
 
 
+@contextlib.contextmanager
+def transaction(connection=None):
+    """Exécute le bloc dans une transaction, validée à la fin du bloc et annulée si une exception en sort. Si une
+    transaction est déjà ouverte sur la connexion, le bloc en fait simplement partie : seul celui qui l'a ouverte la
+    valide ou l'annule.
+
+    :param connection: Connexion à la base de données. Si None, celle de la requête actuelle (get_db)."""
+    connection = connection if connection is not None else get_db()
+
+    if connection.in_transaction:
+        yield connection
+        return
+
+    connection.start_transaction()
+
+    try:
+        yield connection
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+
+def get_pool(app: fk.Flask | None = None) -> ConnectionPool | ThreadLocalPool:
+    """Renvoie le pool de connexions partagé par tout le processus pour l'application donnée, en le créant à partir de
+    sa configuration s'il n'existe pas encore.
+
+    Clé de configuration DATABASE_BACKEND : 'mysql' (par défaut) ou 'sqlite'.
+
+    Avec MySQL, clés de configuration utilisées : DATABASE_CREDENTIALS (identifiants de connexion),
+    DATABASE_POOL_SIZE (nombre maximal de connexions), DATABASE_POOL_TIMEOUT (délai d'attente maximal lors d'un
+    emprunt, en secondes), DATABASE_POOL_RECYCLE (âge maximal d'une connexion, en secondes), DATABASE_PURE_PYTHON
+    (mode eventlet/gevent uniquement, activé par défaut : utiliser le pilote MySQL écrit en Python, dont les E/S
+    passent par les sockets patchés et rendent donc la main à la boucle d'événements ; sinon, le pilote en C est
+    utilisé et tous ses appels sont confiés au pool de threads de run_blocking) et DATABASE_STATEMENT_CACHE_SIZE
+    (nombre de requêtes préparées gardées par connexion pour les curseurs créés avec prepared=True, 64 par défaut, 0
+    pour s'en passer).
+
+    Avec SQLite, chaque thread a sa propre connexion. Clés de configuration utilisées : DATABASE_PATH (chemin du
+    fichier, pandamonium.sqlite3 dans le dossier d'instance par défaut) et DATABASE_SQLITE_PRAGMAS (pragmas complétant
+    ou remplaçant ceux de sqlite.DEFAULT_PRAGMAS). En mode eventlet/gevent, les appels sont confiés au pool de threads
+    de run_blocking. DATABASE_STATEMENT_CACHE_SIZE y règle le cache de requêtes compilées de sqlite3 (128 par
+    défaut).
+
+    :param app: L'instance de l'application Flask. Si None, l'application courante est utilisée.
+
+    :rtype: ConnectionPool | ThreadLocalPool
+    :return: Le pool de connexions de l'application.
+
+    :raise ValueError: Si le moteur de base de données configuré n'existe pas."""
+    app = app if app is not None else fk.current_app._get_current_object()
+
+    with _pools_lock:
+        if app.name not in _pools:
+            backend = app.config.get('DATABASE_BACKEND', 'mysql')
+
+            if backend == 'sqlite':
+                path = app.config.get('DATABASE_PATH', os.path.join(app.instance_path, 'pandamonium.sqlite3'))
+                _pools[app.name] = ThreadLocalPool(
+                    sqlite_factory(path, app.config.get('DATABASE_SQLITE_PRAGMAS'), current_mode() != 'threading',
+                                   app.config.get('DATABASE_STATEMENT_CACHE_SIZE', 128))
+                )
+            elif backend == 'mysql':
+                credentials = app.config['DATABASE_CREDENTIALS']
+                offload = False
+
+                if current_mode() != 'threading':
+                    pure = app.config.get('DATABASE_PURE_PYTHON', True)
+                    credentials = {**credentials, 'use_pure': pure}
+                    offload = not pure
+
+                _pools[app.name] = ConnectionPool(
+                    mysql_factory(credentials, offload, app.config.get('DATABASE_STATEMENT_CACHE_SIZE', 64)),
+                    size=app.config.get('DATABASE_POOL_SIZE', 10),
+                    timeout=app.config.get('DATABASE_POOL_TIMEOUT', 5.0),
+                    recycle=app.config.get('DATABASE_POOL_RECYCLE', 3600.0)
+                )
+            else:
+                raise ValueError(f"Unknown database backend '{backend}', expected one of "
+                                 f"{', '.join(DATABASE_BACKENDS)}.")
+
+        return _pools[app.name]
+
+
+def dispose_pool(app: fk.Flask | None = None):
+    """Ferme puis oublie le pool de connexions de l'application donnée : le prochain appel à get_pool en créera un
+    nouveau à partir de la configuration (utile aux tests, qui changent de base de données).
+
+    :param app: L'instance de l'application Flask. Si None, l'application courante est utilisée."""
+    app = app if app is not None else fk.current_app._get_current_object()
+
+    with _pools_lock:
+        pool = _pools.pop(app.name, None)
+
+    if pool is not None:
+        pool.close()
+
+
 def get_db() -> abstracts.MySQLConnectionAbstract:
-    """Crée une instance de Connection représentant la connexion à la base de données. Si la connexion n'a pas encore
-    été établie, elle le devient. Sinon, elle est renvoyée telle quelle.
+    """Emprunte une connexion au pool de l'application, le temps du contexte courant. Si la connexion n'a pas encore été
+    empruntée, elle le devient. Sinon, elle est renvoyée telle quelle. Lorsque les métriques ou le journal des requêtes
+    lentes sont activés, la connexion est enveloppée afin que ses requêtes soient mesurées.
+
+    :rtype: MySQLConnectionAbstract
+    :return: Instance de la connexion à la base de données.
 
-    :rtype: MySQLCursorAbstract
-    :return: Instance de la connexion à la base de données."""
+    :raise PoolExhaustedError: Si aucune connexion ne s'est libérée à temps dans le pool."""
     if 'db' not in fk.g:
-        fk.g.db = connector.connect(**fk.current_app.config['DATABASE_CREDENTIALS'])
-        fk.g.db.autocommit = True
+        connection = get_pool().acquire()
+        metrics = fk.g.get('request_metrics')
+        query_log = slow_query_log if slow_query_log.enabled else None
+
+        if metrics is not None or query_log is not None:
+            connection = InstrumentedConnection(connection, metrics, query_log)
 
-        if fk.g.db.is_connected():
-            print('[PANDAMONIUM] Successfully connected to database!')
-        else:
-            raise RuntimeError('Unable to connect to the database.')
+        fk.g.db = connection
 
     return fk.g.db
 
@@ -43,22 +166,31 @@ def init_db(set_default_values: bool):
     set_default_values est défini sur True.
 
     :param bool set_default_values: Activer/désactiver la création de valeurs par défaut dans la base de données."""
-    with fk.current_app.open_resource('schema_dev.sql' if set_default_values else 'schema.sql') as resource:
-        sql_statements = filter(
-            lambda line: not (line.startswith('--') or line.startswith('/*') or not line.strip()),
-            resource.read().decode().split('\n')
-        )
-
     db = get_db()
 
     with db.cursor() as cursor:
-        for sql_statement in sql_statements:
+        for sql_statement in schema_statements('schema_dev.sql' if set_default_values else 'schema.sql'):
             cursor.execute(sql_statement)
 
 
+def schema_statements(filename: str = 'schema.sql') -> list[str]:
+    """Renvoie les requêtes d'un fichier de schéma de l'application (une requête par ligne, commentaires exclus).
+
+    :param filename: Nom du fichier de schéma, relatif au dossier de l'application.
+
+    :rtype: list[str]"""
+    with fk.current_app.open_resource(filename) as resource:
+        return [line for line in resource.read().decode().split('\n')
+                if not (line.startswith('--') or line.startswith('/*') or not line.strip())]
+
+
 def close_db(e=None):
-    """Ferme la connexion à la base de données."""
+    """Rend la connexion à la base de données au pool de l'application, après avoir journalisé ses requêtes lentes."""
     db = fk.g.pop('db', None)
 
+    if isinstance(db, InstrumentedConnection):
+        db.finish()
+        db = db.connection
+
     if db is not None:
-        db.close()
+        get_pool().release(db)
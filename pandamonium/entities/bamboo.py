@@ -2,10 +2,13 @@ import abc
 
 from datetime import date, datetime
 
-from pandamonium.database import get_db
-from pandamonium.entities.data_structures import Entity, UUIDList
+from pandamonium.database import get_db, transaction
+from pandamonium.entities.cache import cached_fetch, invalidates_cache
+from pandamonium.entities.data_structures import Column, Entity, Schema, UUIDList
+from pandamonium.entities.relationship import memberships
 from pandamonium.entities.user import User
 from pandamonium.security import max_size_filter
+from pandamonium.timeline import MEMBER_ENTRY, timelines
 
 
 class Bamboo(Entity, abc.ABC):
@@ -14,32 +17,40 @@ class Bamboo(Entity, abc.ABC):
     Différentes "branches" de discussion peuvent être créése, des rôles et permissions peuvent être
     attribués aux différents membres par le créateur ou les administrateurs du bambou."""
 
+    __slots__ = ()
+
+    table_name = 'bamboos'
+    version_column = 'version'
+    schema = Schema(
+        Column('name', max_size_filter(50, "Le nom de votre bambou est trop long.")),
+        Column('creation_date'),
+        Column('owner_uuid'),
+        Column('version')
+    )
+
     def __init__(self,
                  uuid: str | None,
                  name: str | None,
                  owner_uuid: str | None,
-                 members: str | None = None,
-                 creation_date: date | None = datetime.now().date()):
+                 creation_date: date | None = datetime.now().date(),
+                 version: int = 0):
         """Constructeur de la classe.
 
         :param uuid: UUID du bamboo.
         :param name: Nom du bamboo.
         :param owner_uuid: UUID du User étant propriétaire du bamboo.
-        :param members: Chaîne d'UUIDs des membres du bamboo.
-        :param creation_date: Date de création du bamboo."""
+        :param creation_date: Date de création du bamboo.
+        :param version: Version de la ligne en base de données, incrémentée à chaque mise à jour."""
         super().__init__(
-            'bamboos',
             uuid,
-            name=(
-                name,
-                max_size_filter(50, "Le nom de votre bambou est trop long.")
-            ),
+            name=name,
             creation_date=creation_date,
-            members=UUIDList(members),
-            owner_uuid=owner_uuid
+            owner_uuid=owner_uuid,
+            version=version
         )
 
     @classmethod
+    @cached_fetch
     def fetch_by(cls, uuid: str):
         """Crée une instance de Bamboo à partir de son UUID. Ne renvoie rien si le bamboo n'est pas trouvé en base de
         données avec l'UUID fourni.
@@ -50,26 +61,14 @@ class Bamboo(Entity, abc.ABC):
         :return: Instance de la classe Bamboo si le bamboo existe en base de données avec l'UUID fourni, sinon None."""
         db = get_db()
 
-        with db.cursor() as curs:
-            curs.execute(
-                'SELECT name, creation_date, members, owner_uuid FROM bamboos WHERE uuid = %s',
-                [uuid]
-            )
-
+        with db.cursor(dictionary=True, prepared=True) as curs:
+            curs.execute('SELECT * FROM bamboos WHERE uuid = %s', [uuid])
             bamboo = curs.fetchone()
 
-            if bamboo is None:
-                return None
-
-            return cls(
-                uuid,
-                bamboo[0],
-                bamboo[1],
-                bamboo[2],
-                bamboo[3]
-            )
+            return cls._from_row(bamboo) if bamboo is not None else None
 
     @classmethod
+    @invalidates_cache
     def instant(cls, name: str, owner_uuid: str):
         """Constructeur créant à la fois une nouvelle instance de la classe actuelle tout en la créant en base de
         données.
@@ -79,42 +78,86 @@ class Bamboo(Entity, abc.ABC):
 
         :rtype Bamboo | None
         :return Instance de la classe Bamboo si les données entrées sont valides, sinon None."""
-        bamboo = Bamboo(None, name, owner_uuid, owner_uuid)
+        bamboo = Bamboo(None, name, owner_uuid)
 
         if bamboo.valid:
-            db = get_db()
-
-            with db.cursor() as curs:
-                curs.execute(
-                    'INSERT INTO bamboos(uuid, name, creation_date, owner_uuid, members) VALUES (%s, %s, %s, %s, %s)',
-                    (
-                        bamboo.get_column('uuid'),
-                        name,
-                        bamboo.get_column('creation_date'),
-                        owner_uuid,
-                        owner_uuid
+            # Un bambou dont le propriétaire ne serait pas membre lui resterait fermé.
+            with transaction() as db:
+                with db.cursor(prepared=True) as curs:
+                    curs.execute(
+                        'INSERT INTO bamboos(uuid, name, creation_date, owner_uuid) VALUES (%s, %s, %s, %s)',
+                        (
+                            bamboo.get_column('uuid'),
+                            name,
+                            bamboo.get_column('creation_date'),
+                            owner_uuid
+                        )
                     )
-                )
 
-                return bamboo
+                bamboo.add_member(owner_uuid)
+
+            return bamboo
 
         return None
 
-    def _update(self, name: str):
-        """Met à jour le nom du bamboo actuel.
+    def get_members(self, after: str | None = None, limit: int | None = 50) -> UUIDList:
+        """Renvoie une page des UUIDs des membres du bambou, triés par UUID.
 
-        :param name: Nouveau nom du bamboo."""
-        if self.get_column('name') != name:
-            self.set_column('name', name)
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
 
-            if self.valid:
-                db = get_db()
+        :rtype: UUIDList
+        :return: Les UUIDs des membres de la page demandée."""
+        return memberships.targets(self.get_column('uuid'), after, limit)
 
-                with db.cursor() as curs:
-                    curs.execute(
-                        'UPDATE bamboos SET name = %s WHERE uuid = %s',
-                        (name, self.get_column('uuid'))
-                    )
+    def count_members(self) -> int:
+        """Renvoie le nombre de membres du bambou.
+
+        :rtype: int
+        :return: Le nombre de membres du bambou."""
+        return memberships.count(self.get_column('uuid'))
+
+    def has_member(self, user_uuid: str) -> bool:
+        """Vérifie si l'utilisateur donné est membre du bambou.
+
+        :param user_uuid: UUID de l'utilisateur.
+
+        :rtype: bool
+        :return: True si l'utilisateur est membre du bambou, False sinon."""
+        return memberships.contains(self.get_column('uuid'), user_uuid)
+
+    def add_member(self, user_uuid: str) -> bool:
+        """Ajoute l'utilisateur donné aux membres du bambou, et annonce son arrivée dans le fil d'actualité des autres
+        membres.
+
+        :param user_uuid: UUID de l'utilisateur.
+
+        :rtype: bool
+        :return: True si l'utilisateur a été ajouté, False s'il était déjà membre ou s'il n'existe pas."""
+        # Le nouveau membre et l'annonce de son arrivée sont écrits ensemble ou pas du tout.
+        with transaction() as db:
+            if not memberships.add(self.get_column('uuid'), user_uuid):
+                return False
+
+            timelines.forget_size(self.get_column('uuid'))
+
+            with db.cursor() as cursor:
+                timelines.fan_out(cursor, MEMBER_ENTRY, self.get_column('uuid'), user_uuid, user_uuid)
+
+        return True
+
+    def remove_member(self, user_uuid: str) -> bool:
+        """Retire l'utilisateur donné des membres du bambou.
+
+        :param user_uuid: UUID de l'utilisateur.
+
+        :rtype: bool
+        :return: True si l'utilisateur a été retiré, False s'il n'était pas membre."""
+        if not memberships.remove(self.get_column('uuid'), user_uuid):
+            return False
+
+        timelines.forget_size(self.get_column('uuid'))
+        return True
 
     def get_branches(self):
         """Renvoie une liste contenant les UUIDs de toutes les branches faisant partie de l'instance.
@@ -128,9 +171,4 @@ class Bamboo(Entity, abc.ABC):
                 (self.get_column('uuid'),)
             )
 
-            branch_uuids = UUIDList()
-
-            for result in curs.fetchall():
-                branch_uuids += result['uuid']
-
-            return branch_uuids
+            return UUIDList.hydrate(''.join(result['uuid'] for result in curs.fetchall()))
@@ -2,7 +2,8 @@ import abc
 
 from pandamonium.database import get_db
 
-from pandamonium.entities.data_structures import Entity
+from pandamonium.entities.cache import cached_fetch, invalidates_cache
+from pandamonium.entities.data_structures import Column, Entity, Schema
 from pandamonium.security import max_size_filter
 
 
@@ -11,6 +12,14 @@ class Branch(Entity, abc.ABC):
     Une branche est un endroit où les utilisateurs, les pandas, peuvent envoyer des messages au sein d'un bambou.
     Un bambou peut contenir une ou plusieurs branches."""
 
+    __slots__ = ()
+
+    table_name = 'branches'
+    schema = Schema(
+        Column('name', max_size_filter(50, "Le nom de la branche est trop long (50 caractères max).")),
+        Column('bamboo_uuid')
+    )
+
     def __init__(self,
                  uuid: str | None,
                  name: str | None,
@@ -21,16 +30,13 @@ class Branch(Entity, abc.ABC):
         :param bamboo_uuid: UUID du bamboo dans lequel se trouve la branche.
         :param name: Nom de la branche."""
         super().__init__(
-            'branches',
             uuid,
-            name=(
-                name,
-                max_size_filter(50, "Le nom de la branche est trop long (50 caractères max).")
-            ),
+            name=name,
             bamboo_uuid=bamboo_uuid
         )
 
     @classmethod
+    @invalidates_cache
     def instant(cls, name: str, bamboo_uuid: str):
         """Constructeur créant à la fois une nouvelle instance de la classe actuelle tout en la créant en base de
         données.
@@ -45,7 +51,7 @@ class Branch(Entity, abc.ABC):
         if branch.valid:
             db = get_db()
 
-            with db.cursor() as curs:
+            with db.cursor(prepared=True) as curs:
                 curs.execute(
                     'INSERT INTO branches(uuid, name, bamboo_uuid) VALUES (%s, %s, %s)',
                     (
@@ -60,6 +66,7 @@ class Branch(Entity, abc.ABC):
         return None
 
     @classmethod
+    @cached_fetch
     def fetch_by(cls, uuid: str):
         """Crée une instance de Branch à partir de son UUID. Ne renvoie rien si le bamboo n'est pas trouvé en base de
         données avec l'UUID fourni.
@@ -70,35 +77,8 @@ class Branch(Entity, abc.ABC):
         :return: Instance de la classe Bamboo si le bamboo existe en base de données avec l'UUID fourni, sinon None."""
         db = get_db()
 
-        with db.cursor() as curs:
-            curs.execute(
-                'SELECT name, bamboo_uuid FROM branches WHERE uuid = %s',
-                (uuid,)
-            )
-
+        with db.cursor(dictionary=True, prepared=True) as curs:
+            curs.execute('SELECT * FROM branches WHERE uuid = %s', (uuid,))
             branch = curs.fetchone()
 
-            if branch is None:
-                return None
-
-            return cls(
-                uuid,
-                branch[0],
-                branch[1]
-            )
-
-    def _update(self, name: str):
-        """Met à jour le nom de la branche actuelle.
-
-        :param name: Nouveau nom de la branche."""
-        if self.get_column('name') != name:
-            self.set_column('name', name)
-
-            if self.valid:
-                db = get_db()
-
-                with db.cursor() as curs:
-                    curs.execute(
-                        'UPDATE branches SET name = %s WHERE uuid = %s',
-                        (name, self.get_column('uuid'))
-                    )
+            return cls._from_row(branch) if branch is not None else None
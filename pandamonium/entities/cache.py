@@ -0,0 +1,317 @@
+import collections
+import contextlib
+import copy
+import functools
+import inspect
+import threading
+import time
+import typing as tp
+
+import flask as fk
+
+CacheKey = tuple[type, str, tp.Any]
+
+
+class IdentityMap:
+    """Classe représentant la carte d'identité des entités chargées pendant une requête : une même ligne de la base de
+    données n'y est représentée que par une seule instance, retrouvable par son UUID ou par l'une de ses clés
+    secondaires (username, email...)."""
+
+    def __init__(self):
+        """Constructeur de la classe."""
+        self.__entities: dict[CacheKey, tp.Any] = {}
+
+    def get(self, key: CacheKey) -> tp.Any | None:
+        """Renvoie l'entité enregistrée sous la clé donnée.
+
+        :param key: Clé (classe, nom de colonne, valeur) de l'entité recherchée.
+
+        :return L'entité si elle a déjà été chargée pendant la requête, sinon None."""
+        return self.__entities.get(key)
+
+    def add(self, entity) -> tp.Any:
+        """Enregistre l'entité donnée sous chacune de ses clés. Si une instance représentant la même ligne est déjà
+        présente, c'est celle-ci qui est conservée et renvoyée.
+
+        :param entity: Entité à enregistrer.
+
+        :return L'instance faisant référence pour la ligne de l'entité donnée."""
+        cls = type(entity)
+        entity = self.__entities.get((cls, 'uuid', entity.get_column('uuid')), entity)
+
+        for key in entity_keys(entity):
+            self.__entities[key] = entity
+
+        return entity
+
+    def discard(self, entity):
+        """Retire l'entité donnée de la carte d'identité.
+
+        :param entity: Entité à retirer."""
+        for key in entity_keys(entity):
+            if self.__entities.get(key) is entity:
+                del self.__entities[key]
+
+    def __len__(self):
+        """Renvoie le nombre de clés enregistrées."""
+        return len(self.__entities)
+
+
+class EntityCache:
+    """Classe représentant le cache d'entités partagé entre les requêtes d'un même processus.
+
+    Le cache est borné en nombre d'entités (éviction LRU) et chaque entrée expire après un délai (TTL). Une entité y est
+    retrouvable par son UUID ou par l'une de ses clés secondaires. Les instances stockées sont des copies : une
+    modification faite pendant une requête n'altère donc pas le cache tant qu'elle n'a pas été écrite en base de données,
+    et l'écriture invalide l'entrée. Chaque processus ayant son propre cache, le TTL borne la durée pendant laquelle une
+    modification faite par un autre processus peut rester invisible."""
+
+    def __init__(self, size: int = 1024, ttl: float = 60.0, enabled: bool = True):
+        """Constructeur de la classe.
+
+        :param size: Nombre maximal d'entités conservées.
+        :param ttl: Durée de vie (en secondes) d'une entrée.
+        :param enabled: Activer/désactiver le cache."""
+        self.size = size
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self.__entries: collections.OrderedDict[CacheKey, tuple[float, tp.Any, list[CacheKey]]] = \
+            collections.OrderedDict()
+        self.__aliases: dict[CacheKey, CacheKey] = {}
+        self.__lock = threading.Lock()
+        self.__stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key: CacheKey) -> tp.Any | None:
+        """Renvoie une copie de l'entité enregistrée sous la clé donnée.
+
+        :param key: Clé (classe, nom de colonne, valeur) de l'entité recherchée.
+
+        :return Une copie de l'entité si elle est présente et n'a pas expiré, sinon None."""
+        if not self.enabled:
+            return None
+
+        with self.__lock:
+            primary_key = self.__aliases.get(key)
+            entry = self.__entries.get(primary_key) if primary_key is not None else None
+
+            if entry is None:
+                self.__stats['misses'] += 1
+                return None
+
+            expires_at, entity, _ = entry
+
+            if expires_at < time.monotonic():
+                self.__stats['expirations'] += 1
+                self.__stats['misses'] += 1
+                self.__remove(primary_key)
+                return None
+
+            self.__entries.move_to_end(primary_key)
+            self.__stats['hits'] += 1
+
+        return copy.deepcopy(entity)
+
+    def put(self, entity):
+        """Enregistre une copie de l'entité donnée sous chacune de ses clés, en évinçant les entités les moins récemment
+        utilisées si le cache est plein.
+
+        :param entity: Entité à enregistrer."""
+        if not self.enabled or self.size <= 0:
+            return
+
+        keys = entity_keys(entity)
+        snapshot = copy.deepcopy(entity)
+
+        with self.__lock:
+            primary_key = keys[0]
+            self.__remove(primary_key)
+            self.__entries[primary_key] = (time.monotonic() + self.ttl, snapshot, keys)
+
+            for key in keys:
+                self.__aliases[key] = primary_key
+
+            while len(self.__entries) > self.size:
+                self.__remove(next(iter(self.__entries)))
+                self.__stats['evictions'] += 1
+
+    def invalidate(self, entity):
+        """Retire du cache l'entité donnée, quelles que soient les clés sous lesquelles elle a été enregistrée.
+
+        :param entity: Entité à retirer."""
+        with self.__lock:
+            if self.__remove((type(entity), 'uuid', entity.get_column('uuid'))):
+                self.__stats['invalidations'] += 1
+
+    def clear(self):
+        """Vide entièrement le cache."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__aliases.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Renvoie les statistiques du cache.
+
+        :rtype: dict[str, int]
+        :return: Un dictionnaire contenant les nombres de hits, de misses, d'évictions, d'expirations, d'invalidations
+            ainsi que le nombre d'entités présentes."""
+        with self.__lock:
+            return {**self.__stats, 'entries': len(self.__entries)}
+
+    @contextlib.contextmanager
+    def disabled(self):
+        """Gestionnaire de contexte désactivant temporairement le cache (utile dans les tests)."""
+        enabled, self.enabled = self.enabled, False
+
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+    def __remove(self, primary_key: CacheKey) -> bool:
+        """Retire l'entrée de clé primaire donnée ainsi que tous ses alias. Le verrou doit être détenu.
+
+        :param primary_key: Clé (classe, 'uuid', valeur) de l'entité.
+
+        :return True si une entrée a été retirée, False sinon."""
+        entry = self.__entries.pop(primary_key, None)
+
+        if entry is None:
+            return False
+
+        for key in entry[2]:
+            if self.__aliases.get(key) == primary_key:
+                del self.__aliases[key]
+
+        return True
+
+
+entity_cache = EntityCache()
+
+
+def configure_cache(app: fk.Flask):
+    """Configure le cache d'entités du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : ENTITY_CACHE_ENABLED (désactivé par défaut en mode TESTING), ENTITY_CACHE_SIZE
+    (nombre maximal d'entités) et ENTITY_CACHE_TTL (durée de vie d'une entrée, en secondes).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    entity_cache.enabled = app.config.get('ENTITY_CACHE_ENABLED', not app.testing)
+    entity_cache.size = app.config.get('ENTITY_CACHE_SIZE', 1024)
+    entity_cache.ttl = app.config.get('ENTITY_CACHE_TTL', 60.0)
+    entity_cache.clear()
+
+
+def entity_keys(entity) -> list[CacheKey]:
+    """Renvoie les clés sous lesquelles l'entité donnée peut être retrouvée : son UUID puis les colonnes listées dans
+    l'attribut de classe cache_keys.
+
+    :param entity: Entité visée."""
+    cls = type(entity)
+    keys = []
+
+    for name in cls.cache_keys:
+        value = entity.get_column(name)
+
+        if value is not None:
+            keys.append((cls, name, value))
+
+    return keys
+
+
+def get_identity_map() -> IdentityMap | None:
+    """Renvoie la carte d'identité du contexte courant, en la créant si besoin.
+
+    :rtype: IdentityMap | None
+    :return: La carte d'identité du contexte courant, ou None en dehors de tout contexte d'application."""
+    if not fk.has_app_context():
+        return None
+
+    if 'identity_map' not in fk.g:
+        fk.g.identity_map = IdentityMap()
+
+    return fk.g.identity_map
+
+
+def lookup(key: CacheKey) -> tp.Any | None:
+    """Cherche une entité dans la carte d'identité de la requête, puis dans le cache d'entités du processus. Une entité
+    trouvée dans ce dernier est ajoutée à la carte d'identité.
+
+    :param key: Clé (classe, nom de colonne, valeur) de l'entité recherchée.
+
+    :return L'entité si elle a été trouvée, sinon None."""
+    identity_map = get_identity_map()
+    entity = identity_map.get(key) if identity_map is not None else None
+
+    if entity is None:
+        entity = entity_cache.get(key)
+
+        if entity is not None and identity_map is not None:
+            entity = identity_map.add(entity)
+
+    return entity
+
+
+def remember(entity) -> tp.Any:
+    """Enregistre une entité tout juste lue en base de données dans le cache d'entités et dans la carte d'identité.
+
+    :param entity: Entité lue en base de données.
+
+    :return L'instance faisant référence pour cette entité pendant la requête."""
+    entity_cache.put(entity)
+    identity_map = get_identity_map()
+
+    return identity_map.add(entity) if identity_map is not None else entity
+
+
+def cached_fetch(fetch_by):
+    """Décorateur des méthodes de classe fetch_by des entités. Le premier argument non vide de l'appel sert de clé : si
+    une entité a déjà été chargée avec cette clé pendant la requête, elle est renvoyée sans interroger la base de
+    données. Sinon, le cache d'entités du processus est consulté avant de se résoudre à interroger la base.
+
+    :param fetch_by: Fonction fetch_by (non encore transformée en méthode de classe).
+
+    :return Une nouvelle fonction consultant la carte d'identité avant d'appeler celle de base."""
+    signature = inspect.signature(fetch_by)
+
+    @functools.wraps(fetch_by)
+    def wrapper(cls, *args, **kwargs):
+        bound = signature.bind(cls, *args, **kwargs)
+        key = next(((cls, name, value) for name, value in list(bound.arguments.items())[1:] if value), None)
+        identity_map = get_identity_map()
+
+        if key is None or identity_map is None:
+            return fetch_by(cls, *args, **kwargs)
+
+        entity = lookup(key)
+
+        if entity is None:
+            entity = fetch_by(cls, *args, **kwargs)
+
+            if entity is not None:
+                entity = remember(entity)
+
+        return entity
+
+    return wrapper
+
+
+def invalidates_cache(method):
+    """Décorateur des méthodes écrivant une entité en base de données (_update, instant). Une fois l'écriture faite,
+    l'entité concernée est retirée du cache d'entités : soit l'instance sur laquelle la méthode est appelée, soit
+    l'entité renvoyée lorsqu'il s'agit d'une méthode de classe.
+
+    :param method: Méthode d'écriture (non encore transformée en méthode de classe).
+
+    :return Une nouvelle fonction invalidant le cache après avoir appelé celle de base."""
+    @functools.wraps(method)
+    def wrapper(self_or_cls, *args, **kwargs):
+        result = method(self_or_cls, *args, **kwargs)
+        entity = result if isinstance(self_or_cls, type) else self_or_cls
+
+        if entity is not None:
+            entity_cache.invalidate(entity)
+
+        return result
+
+    return wrapper
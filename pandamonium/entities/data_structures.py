@@ -1,53 +1,42 @@
 import abc
+import bisect
+import re
 import typing as tp
 from uuid import uuid4
 
 from pandamonium.database import get_db
+from pandamonium.entities.cache import invalidates_cache, lookup, remember
+from pandamonium.entities.loader import get_loader
 from pandamonium.security import set_security_error, is_valid_uuid
 
+UUID_CHAIN_PATTERN = re.compile('(?:[a-f0-9]{8}-(?:[a-f0-9]{4}-){3}[a-f0-9]{12})*')
+
 
 class Column:
-    """Classe représentant un 'filtre' spécifique face à une valeur donnée d'une colonne d'une table quelconque."""
+    """Classe représentant la définition d'une colonne d'une table quelconque : son nom, son index et le 'filtre' qui
+    sera utilisé sur les valeurs qui lui sont données. Une colonne est définie une seule fois, au niveau de la classe de
+    l'entité, et partagée par toutes ses instances."""
+
+    __slots__ = ('name', 'index', 'constraint')
 
-    def __init__(self,
-                 name: str,
-                 value: tp.Any,
-                 index: int,
-                 constraint: tp.Callable[[tp.Any], str | None] = lambda val: None):
+    def __init__(self, name: str, constraint: tp.Callable[[tp.Any], str | None] | None = None):
         """Constructeur de la classe.
 
-        :param name: Colonne visée par le filtre.
-        :param value: Valeur de la colonne.
-        :param index: Index de la colonne par rapport à sa table (débute à 0).
+        :param name: Nom de la colonne.
         :param constraint: Filtre (lambda avec single param) qui sera utilisé sur les données à tester."""
         self.name = name
-        self.valid = True
-        self.index = index
-        self.__constraint = constraint
-
-        if self.__value_fits(value):
-            self.__value = value
-        else:
-            self.__value = None
-            self.valid = False
-
-    @property
-    def value(self):
-        return self.__value
+        self.index = -1
+        self.constraint = constraint
 
-    @value.setter
-    def value(self, value: tp.Any):
-        if self.__value_fits(value):
-            self.__value = value
-        else:
-            self.valid = False
-
-    def __value_fits(self, value) -> bool:
+    def check(self, value: tp.Any) -> bool:
         """Méthode vérifiant si la valeur donnée est valide pour la colonne actuelle.
         Si ce n'est pas le cas, l'erreur obtenue est insérée dans le gestionnaire d'erreur de l'application.
 
         :param value: Valeur à essayer."""
-        message = self.__constraint(value)
+        if self.constraint is None:
+            return True
+
+        message = self.constraint(value)
 
         if message is not None:
             set_security_error(message)
@@ -56,62 +45,184 @@ class Column:
         return True
 
 
+class Schema:
+    """Classe représentant l'ensemble ordonné des colonnes d'une table. La colonne uuid (clé primaire) y est toujours
+    ajoutée en premier, à l'index 0."""
+
+    __slots__ = ('columns', 'names', 'indexes')
+
+    def __init__(self, *columns: Column):
+        """Constructeur de la classe.
+
+        :param columns: Colonnes de la table, hors uuid, dans l'ordre de leur index."""
+        self.columns = (Column('uuid'),) + columns
+        self.names = tuple(column.name for column in self.columns)
+        self.indexes = {name: index for index, name in enumerate(self.names)}
+
+        for index, column in enumerate(self.columns):
+            column.index = index
+
+    def __len__(self):
+        """Renvoie le nombre de colonnes de la table."""
+        return len(self.columns)
+
+
+class ColumnValue:
+    """Classe représentant la valeur d'une colonne pour une instance donnée. Les instances de cette classe ne sont créées
+    qu'à la demande (via Entity.columns ou Entity.get_column_instance) : les valeurs sont stockées dans l'entité."""
+
+    __slots__ = ('entity', 'column')
+
+    def __init__(self, entity: 'Entity', column: Column):
+        """Constructeur de la classe.
+
+        :param entity: Instance à laquelle appartient la valeur.
+        :param column: Définition de la colonne."""
+        self.entity = entity
+        self.column = column
+
+    @property
+    def name(self) -> str:
+        return self.column.name
+
+    @property
+    def index(self) -> int:
+        return self.column.index
+
+    @property
+    def value(self):
+        return self.entity.get_column(self.column.name)
+
+    @value.setter
+    def value(self, value: tp.Any):
+        self.entity.set_column(self.column.name, value)
+
+    @property
+    def valid(self) -> bool:
+        return not self.entity.is_column_invalid(self.column.name)
+
+    @property
+    def dirty(self) -> bool:
+        return self.entity.is_column_dirty(self.column.name)
+
+
 class Entity(abc.ABC):
     """Classe représentant une table de la base de données dont les instances ont besoin d'être différenciée des autres
-    par un UUID."""
+    par un UUID.
 
-    def __init__(self, entity_name: str, uuid: str | None, **columns):
-        """Constructeur de la classe.
+    Le schéma de la table (noms, index et contraintes des colonnes) est défini une seule fois par classe via l'attribut
+    schema. Chaque instance ne stocke que la liste de ses valeurs, ainsi que deux masques de bits indiquant les colonnes
+    modifiées et les colonnes invalides. Les classes filles doivent déclarer __slots__ = () pour conserver cette
+    compacité."""
+
+    __slots__ = ('valid', '_values', '_dirty', '_invalid')
+
+    # Nom de la table de la base de données dans laquelle sont stockées les instances.
+    table_name: str
+
+    # Colonnes de la table, partagées par toutes les instances.
+    schema: Schema
+
+    # Colonnes permettant de retrouver une instance dans les caches d'entités (l'UUID en premier).
+    cache_keys: tuple[str, ...] = ('uuid',)
+
+    # Nombre maximal d'UUIDs envoyés dans une même requête par fetch_many.
+    fetch_many_chunk_size = 500
+
+    # Colonne entière incrémentée à chaque mise à jour, servant à détecter les écritures concurrentes (None pour
+    # désactiver ce contrôle).
+    version_column: str | None = None
+
+    # Réactive la vérification des contraintes sur les lignes chargées depuis la base de données (mode debug).
+    validate_hydrated = False
+
+    def __init__(self, uuid: str | None, **values):
+        """Constructeur de la classe. Chaque valeur est vérifiée par la contrainte de sa colonne : dès qu'une valeur est
+        invalide, elle est remplacée par None, l'instance devient invalide et les contraintes suivantes ne sont plus
+        évaluées.
 
-        :param entity_name: Nom de la table.
         :param uuid: UUID (clé primaire) de la première colonne.
-        :param columns: Noms des colonnes de la table, associés à leur valeur ou à une paire valeur-contrainte (sous
-            forme de tuple)."""
-        self.name = entity_name
+        :param values: Noms des colonnes de la table, associés à leur valeur."""
         self.valid = True
-        self.__columns = {'uuid': Column('uuid', uuid if uuid is not None else str(uuid4()), 0)}
+        self._dirty = 0
+        self._invalid = 0
+        self._values = row = [uuid if uuid is not None else str(uuid4())]
 
-        for index, (entity_name, column) in enumerate(columns.items(), 1):
-            if isinstance(column, tuple):
-                self.__columns[entity_name] = Column(entity_name, column[0], index, column[1])
-            else:
-                self.__columns[entity_name] = Column(entity_name, column, index)
+        for column in self.schema.columns[1:]:
+            value = values.get(column.name)
 
-            if not self.__columns[entity_name].valid:
+            if self.valid and not column.check(value):
                 self.valid = False
-                break
+                self._invalid |= 1 << column.index
+                value = None
+
+            row.append(value)
+
+    def __deepcopy__(self, memo):
+        """Renvoie une copie indépendante de l'instance. Les valeurs des colonnes étant immuables, seule la liste qui les
+        contient est recopiée."""
+        clone = object.__new__(type(self))
+        clone.valid = self.valid
+        clone._values = self._values[:]
+        clone._dirty = self._dirty
+        clone._invalid = self._invalid
+        return clone
 
     @property
-    def columns(self):
-        return self.__columns
+    def columns(self) -> dict[str, ColumnValue]:
+        return {column.name: ColumnValue(self, column) for column in self.schema.columns}
 
-    def get_column(self, name: str) -> Column | None:
+    def get_column(self, name: str) -> tp.Any | None:
         """Obtenir une colonne à partir de son nom.
 
         :param name: Nom de la colonne.
 
         :return La valeur de la colonne portant le nom donné en argument, ou None si elle n'existe pas."""
-        column = self.get_column_instance(name)
-        return column.value if column is not None else None
+        index = self.schema.indexes.get(name)
+        return self._values[index] if index is not None else None
 
-    def get_column_instance(self, name: str) -> Column | None:
+    def get_column_instance(self, name: str) -> ColumnValue | None:
         """Obtenir une colonne à partir de son nom.
 
         :param name: Nom de la colonne.
 
-        :return L'instance de Column portant le nom donné en argument, ou None si elle n'existe pas."""
-        return self.__columns[name] if name in self.__columns else None
+        :return L'instance de ColumnValue portant le nom donné en argument, ou None si elle n'existe pas."""
+        index = self.schema.indexes.get(name)
+        return ColumnValue(self, self.schema.columns[index]) if index is not None else None
 
     def set_column(self, name: str, value):
-        """Écrase la valeur de la colonne portant le nom donné en argument.
+        """Écrase la valeur de la colonne portant le nom donné en argument, si celle-ci respecte la contrainte de la
+        colonne. La colonne est alors marquée comme modifiée.
 
         :param name: Nom de la colonne.
         :param value: Valeur de la colonne."""
-        if name in self.__columns:
-            self.__columns[name].value = value
+        index = self.schema.indexes.get(name)
 
-            if not self.__columns[name].valid:
-                self.valid = False
+        if index is None:
+            return
+
+        if self.schema.columns[index].check(value):
+            if value != self._values[index]:
+                self._values[index] = value
+                self._dirty |= 1 << index
+        else:
+            self._invalid |= 1 << index
+            self.valid = False
+
+    def is_column_dirty(self, name: str) -> bool:
+        """Vérifie si la colonne portant le nom donné a été modifiée depuis le chargement de l'instance ou sa dernière
+        mise à jour.
+
+        :param name: Nom de la colonne."""
+        index = self.schema.indexes.get(name)
+        return index is not None and bool(self._dirty >> index & 1)
+
+    def is_column_invalid(self, name: str) -> bool:
+        """Vérifie si une valeur invalide a été donnée à la colonne portant le nom donné.
+
+        :param name: Nom de la colonne."""
+        index = self.schema.indexes.get(name)
+        return index is not None and bool(self._invalid >> index & 1)
 
     @classmethod
     @abc.abstractmethod
@@ -127,57 +238,232 @@ class Entity(abc.ABC):
         de données via une requête SQL de type SELECT."""
         pass
 
-    def update(self):
-        """Méthode permettant de mettre à jour certaines valeurs de l'instance de la table actuelle."""
-        fetched_column = self.fetch_by(self.get_column('uuid'))
-        values = {}
+    @classmethod
+    def _from_row(cls, row: dict[str, tp.Any]):
+        """Constructeur créant une instance de la classe actuelle à partir d'une ligne de sa table, obtenue via un curseur
+        de type dictionnaire.
 
-        for name, column in fetched_column.columns.items():
-            if self.get_column(name) != column.value:
-                values[name] = self.get_column(name)
+        Les données venant de la base de données ont déjà été validées lors de leur insertion : contrairement au
+        constructeur public, les contraintes des colonnes ne sont donc pas évaluées et le gestionnaire d'erreur du module
+        security n'est jamais touché. L'attribut de classe validate_hydrated permet de réactiver la vérification.
 
-        self._update(values)
+        :param row: Ligne de la table, associant chaque nom de colonne à sa valeur.
 
-    @abc.abstractmethod
-    def _update(self, new_values: dict[str, tp.Any]):
+        :raise ValueError: Si validate_hydrated est activé et qu'une valeur ne respecte pas la contrainte de sa
+            colonne."""
+        entity = object.__new__(cls)
+        entity.valid = True
+        entity._dirty = 0
+        entity._invalid = 0
+        entity._values = [row[name] for name in cls.schema.names]
+
+        if cls.validate_hydrated:
+            entity.__check_hydrated()
+
+        return entity
+
+    def __check_hydrated(self):
+        """Vérifie que chaque valeur d'une instance chargée depuis la base de données respecte la contrainte de sa
+        colonne, sans passer par le gestionnaire d'erreur du module security.
+
+        :raise ValueError: Si une valeur ne respecte pas la contrainte de sa colonne."""
+        for column, value in zip(self.schema.columns, self._values):
+            message = column.constraint(value) if column.constraint is not None else None
+
+            if message is not None:
+                raise ValueError(f"The column '{column.name}' of the row '{self._values[0]}' from table "
+                                 f"'{self.table_name}' is invalid: {message}")
+
+    @classmethod
+    def fetch_many(cls, uuids: tp.Iterable[str]) -> list:
+        """Crée les instances de la classe actuelle correspondant aux UUIDs donnés en une seule requête SQL de type
+        SELECT ... WHERE uuid IN (...) (découpée par paquets si la liste est longue). Les instances déjà présentes dans
+        la carte d'identité de la requête ou dans le cache d'entités ne sont pas redemandées à la base de données.
+
+        :param uuids: UUIDs des instances à récupérer.
+
+        :rtype: list
+        :return: Les instances trouvées, dans l'ordre des UUIDs donnés. Les UUIDs introuvables sont ignorés."""
+        uuids = list(uuids)
+        found = {}
+        missing = []
+
+        for uuid in dict.fromkeys(uuids):
+            entity = lookup((cls, 'uuid', uuid))
+
+            if entity is None:
+                missing.append(uuid)
+            else:
+                found[uuid] = entity
+
+        for start in range(0, len(missing), cls.fetch_many_chunk_size):
+            chunk = missing[start:start + cls.fetch_many_chunk_size]
+
+            with get_db().cursor(dictionary=True) as cursor:
+                cursor.execute(
+                    f'SELECT * FROM {cls.table_name} WHERE uuid IN ({", ".join(["%s"] * len(chunk))})',
+                    chunk
+                )
+
+                for row in cursor.fetchall():
+                    found[row['uuid']] = remember(cls._from_row(row))
+
+        return [found[uuid] for uuid in uuids if uuid in found]
+
+    @classmethod
+    def fetch_later(cls, uuid: str):
+        """Demande le chargement différé de l'instance de la classe actuelle portant l'UUID donné. Tous les chargements
+        différés d'une même classe demandés pendant la requête sont regroupés en un seul appel à fetch_many, effectué la
+        première fois que l'une des instances est réellement utilisée.
+
+        :param uuid: UUID de l'instance.
+
+        :rtype: LazyEntity
+        :return: Un mandataire se comportant comme l'instance une fois celle-ci chargée."""
+        return get_loader().load(cls, uuid)
+
+    @property
+    def dirty_columns(self) -> dict[str, tp.Any]:
+        """Renvoie les colonnes modifiées depuis le chargement de l'instance ou sa dernière mise à jour.
+
+        :rtype: dict[str, tp.Any]
+        :return: Un dictionnaire associant le nom de chaque colonne modifiée à sa nouvelle valeur."""
+        return {name: value for index, (name, value) in enumerate(zip(self.schema.names, self._values))
+                if self._dirty >> index & 1}
+
+    def update(self) -> bool:
+        """Méthode permettant d'écrire en base de données les colonnes modifiées de l'instance de la table actuelle, en
+        une seule requête UPDATE et sans relire la ligne au préalable.
+
+        Si une erreur survient, elle doit être gérée en utilisant les fonctions du module security.
+
+        :rtype: bool
+        :return: True si les modifications ont été écrites (ou s'il n'y en avait aucune), False sinon."""
+        if not self.valid:
+            return False
+
+        values = self.dirty_columns
+
+        if not values:
+            return True
+
+        if not self._update(values):
+            return False
+
+        self._dirty = 0
+
+        return True
+
+    @invalidates_cache
+    def _update(self, new_values: dict[str, tp.Any]) -> bool:
         """Méthode permettant de mettre à jour certaines valeurs de l'instance de la table actuelle.
-        Cette méthode ne doit être utilisée que par les classes filles, qui doivent la redéfinir.
+        Les classes filles peuvent la redéfinir pour compléter les valeurs écrites ou gérer leurs propres erreurs.
 
-        :param new_values: Nouvelles valeurs à attribuer aux colonnes de la table."""
-        pass
+        Si l'entité possède une colonne de version, la requête ne s'applique que si la version en base de données est
+        toujours celle de l'instance, puis l'incrémente : une écriture concurrente est alors détectée au lieu d'être
+        silencieusement écrasée.
+
+        :param new_values: Nouvelles valeurs à attribuer aux colonnes de la table.
+
+        :rtype: bool
+        :return: True si la ligne a été mise à jour, False si elle a été modifiée entre-temps par quelqu'un d'autre.
+
+        :raise ValueError: Si aucune valeur n'a été fournie."""
+        if not new_values:
+            raise ValueError("Une requête UPDATE ne peut pas être exécutée si aucun changement de valeur n'est "
+                             "exécuté dans la base de données.")
+
+        assignments = [f'{name} = %s' for name in new_values]
+        values = list(new_values.values())
+        condition = 'uuid = %s'
+        values.append(self.get_column('uuid'))
+
+        if self.version_column is not None:
+            assignments.append(f'{self.version_column} = {self.version_column} + 1')
+            condition += f' AND {self.version_column} = %s'
+            values.append(self.get_column(self.version_column))
+
+        with get_db().cursor() as cursor:
+            cursor.execute(f'UPDATE {self.table_name} SET {", ".join(assignments)} WHERE {condition}', values)
+
+            if self.version_column is not None:
+                if cursor.rowcount == 0:
+                    set_security_error("Ces données ont été modifiées entre-temps par quelqu'un d'autre. Veuillez "
+                                       "réessayer.")
+                    return False
+
+                self._values[self.schema.indexes[self.version_column]] += 1
+
+        return True
 
 
 class UUIDList:
-    """Classe représentant une chaîne d'UUIDs."""
+    """Classe représentant une liste d'UUIDs.
 
-    def __init__(self, chain: str = ''):
+    Les UUIDs sont stockés sous forme compacte (16 octets chacun) dans un unique tampon. Un index (UUID -> positions) est
+    construit à la première recherche par valeur, ce qui rend ensuite les tests d'appartenance et les suppressions par
+    valeur en temps constant. Une suppression ne fait que marquer l'emplacement comme libre : les accès par index sautent
+    les emplacements libres (recherche dichotomique dans leur liste triée), et le tampon n'est compacté, ce qui oblige
+    à reconstruire l'index, que lorsque les emplacements libres deviennent majoritaires. La forme textuelle (UUIDs de 36
+    caractères concaténés, utilisée dans la base de données) est recalculée uniquement après une modification."""
+
+    def __init__(self, chain: str | None = ''):
         """Constructeur de la classe UUIDList.
 
         :param chain: Chaîne d'UUIDs, sous forme de chaîne de caractères.
 
         :raise ValueError: Si un UUID est mal formé."""
-        chain_length = len(chain)
+        chain = chain or ''
 
-        if chain_length % 36 != 0:
+        if len(chain) % 36 != 0:
             raise ValueError('The UUID chain is malformed.')
 
-        self.chain = chain
-        self.length = chain_length // 36
+        if UUID_CHAIN_PATTERN.fullmatch(chain) is None:
+            invalid_uuid = next(uuid for uuid in UUIDList.__split(chain) if not is_valid_uuid(uuid))
+            raise ValueError(f"'{invalid_uuid}' is not a valid UUID.")
 
-        for uuid in self:
-            if not is_valid_uuid(uuid):
-                raise ValueError(f"'{uuid}' is not a valid UUID.")
+        self.__buffer = bytearray.fromhex(chain.replace('-', ''))
+        self.__free_slots: list[int] = []
+        self.__index: dict[bytes, list[int]] | None = None
+        self.__chain: str | None = chain
 
-    def __iter__(self):
-        """Transforme la classe actuelle en Iterable."""
-        index = 0
+    @classmethod
+    def hydrate(cls, chain: str | None):
+        """Crée une liste à partir d'une chaîne d'UUIDs venant de la base de données, sans la valider.
+
+        :param chain: Chaîne d'UUIDs, sous forme de chaîne de caractères.
+
+        :raise ValueError: Si la chaîne contient des caractères non hexadécimaux."""
+        chain = chain or ''
+        uuid_list = cls.__new__(cls)
+        uuid_list.__buffer = bytearray.fromhex(chain.replace('-', ''))
+        uuid_list.__free_slots = []
+        uuid_list.__index = None
+        uuid_list.__chain = chain
+        return uuid_list
+
+    @classmethod
+    def from_uuids(cls, uuids: tp.Iterable[str]):
+        """Crée une liste à partir d'UUIDs donnés un par un, en ne validant la chaîne obtenue qu'une seule fois.
+
+        :param uuids: UUIDs de la liste.
+
+        :raise ValueError: Si un UUID est mal formé."""
+        return cls(''.join(uuids))
 
-        while index < self.length:
-            start = self.__get_targeted_index(index)
-            end = self.__get_targeted_index(index + 1)
+    @property
+    def chain(self) -> str:
+        """Renvoie la liste sous forme de chaîne d'UUIDs concaténés."""
+        return str(self)
 
-            yield self.chain[start:end]
-            index += 1
+    @property
+    def length(self) -> int:
+        """Renvoie le nombre d'UUIDs se trouvant dans la liste des UUIDs."""
+        return len(self)
+
+    def __iter__(self):
+        """Transforme la classe actuelle en Iterable."""
+        return UUIDList.__split(str(self))
 
     def __getitem__(self, index: int):
         """Obtenir l'UUID d'index demandé.
@@ -185,8 +471,8 @@ class UUIDList:
         :param index: Index de l'UUID demandé.
 
         :raise IndexError: Si l'index est en dehors de la plage de données."""
-        target_index = self.__get_targeted_index(index)
-        return self.chain[target_index:target_index + 36]
+        slot = self.__get_targeted_slot(index)
+        return UUIDList.__format(self.__buffer[slot * 16:(slot + 1) * 16])
 
     def __setitem__(self, index: int, uuid: str):
         """Remplacer la valeur de l'UUID à l'index donné avec le nouvel UUID donné.
@@ -196,16 +482,37 @@ class UUIDList:
 
         :raise IndexError: Si l'index est en dehors de la plage de données.
         :raise ValueError: Si l'UUID donné est mal formé."""
-        target_index = self.__get_targeted_index(index)
+        packed_uuid = UUIDList.__pack(uuid)
+        slot = self.__get_targeted_slot(index)
 
-        if not is_valid_uuid(uuid):
-            raise ValueError(f"'{uuid}' is not a valid UUID.")
+        if self.__index is not None:
+            self.__unindex(bytes(self.__buffer[slot * 16:(slot + 1) * 16]), slot)
+            self.__index.setdefault(packed_uuid, []).append(slot)
 
-        self.chain[target_index:target_index + 36] = uuid
+        self.__buffer[slot * 16:(slot + 1) * 16] = packed_uuid
+        self.__chain = None
 
     def __len__(self):
         """Renvoie le nombre d'UUIDs se trouvant dans la liste des UUIDs."""
-        return self.length
+        return len(self.__buffer) // 16 - len(self.__free_slots)
+
+    def __contains__(self, uuid: str) -> bool:
+        """Vérifie si l'UUID donné se trouve dans la liste, en temps constant une fois l'index construit.
+
+        :param uuid: UUID recherché."""
+        if not isinstance(uuid, str) or not is_valid_uuid(uuid):
+            return False
+
+        return UUIDList.__pack(uuid) in self.__get_index()
+
+    def __eq__(self, other) -> bool:
+        """Deux listes d'UUIDs sont égales si elles contiennent les mêmes UUIDs dans le même ordre."""
+        if not isinstance(other, UUIDList):
+            return NotImplemented
+
+        return str(self) == str(other)
+
+    __hash__ = None
 
     def __repr__(self):
         """Renvoie une représentation de l'objet actuel sous forme de chaîne de caractères (str)."""
@@ -214,18 +521,27 @@ class UUIDList:
 
     def __str__(self):
         """Renvoie le contenu de la liste d'UUIDs en brut."""
-        return self.chain
+        if self.__chain is None:
+            hex_chain = self.__compacted_copy().hex()
+            self.__chain = ''.join(
+                f'{hex_chain[i:i + 8]}-{hex_chain[i + 8:i + 12]}-{hex_chain[i + 12:i + 16]}-'
+                f'{hex_chain[i + 16:i + 20]}-{hex_chain[i + 20:i + 32]}'
+                for i in range(0, len(hex_chain), 32)
+            )
+
+        return self.__chain
 
     def __add__(self, uuid: str):
-        """Ajoute un nouvel UUID à la fin de la chaîne.
+        """Renvoie une nouvelle liste contenant les UUIDs de la liste actuelle suivis du nouvel UUID.
 
         :param uuid: Nouvel UUID.
 
         :raise ValueError: Si l'UUID donné est mal formé."""
-        if not is_valid_uuid(uuid):
-            raise ValueError(f"'{uuid}' is not a valid UUID.")
-
-        return UUIDList(self.chain + uuid)
+        packed_uuid = UUIDList.__pack(uuid)
+        new_list = UUIDList()
+        new_list.__buffer = self.__compacted_copy() + packed_uuid
+        new_list.__chain = None
+        return new_list
 
     def __radd__(self, uuid: str):
         """Ajoute un nouvel UUID à la fin de la chaîne.
@@ -235,30 +551,116 @@ class UUIDList:
         :raise ValueError: Si l'UUID donné est mal formé."""
         return self.__add__(uuid)
 
+    def __iadd__(self, uuid: str):
+        """Ajoute un nouvel UUID à la fin de la liste actuelle, sans la recopier.
+
+        :param uuid: Nouvel UUID.
+
+        :raise ValueError: Si l'UUID donné est mal formé."""
+        self.append(uuid)
+        return self
+
     def __delitem__(self, index: int):
         """Supprime l'UUID visé par l'index donné.
 
         :param index: Index de l'UUID à supprimer.
 
         :raise IndexError: Si l'index est en dehors de la plage de données."""
-        start = self.__get_targeted_index(index)
-        end = self.__get_targeted_index(index + 1)
-        slice_to_delete = self.chain[start:end]
+        slot = self.__get_targeted_slot(index)
 
-        self.chain = self.chain.replace(slice_to_delete, '')
-        self.length -= 1
+        if self.__index is not None:
+            self.__unindex(bytes(self.__buffer[slot * 16:(slot + 1) * 16]), slot)
 
-    def __get_targeted_index(self, index: int) -> int:
-        """Transforme l'index donné en index correspondant à la chaîne d'UUIDs, soit index * 36, si celui-ci existe.
+        self.__free(slot)
+
+    def __get_targeted_slot(self, index: int) -> int:
+        """Transforme l'index donné (éventuellement négatif) en emplacement dans le tampon d'UUIDs, si celui-ci existe.
         Sinon, une exception de type IndexError est lancée.
 
         :param index: Index de l'utilisateur.
 
         :raise IndexError: Si l'index est en dehors de la plage de données."""
-        if not 0 <= index <= self.length:
-            raise IndexError(f"The index with value {index} is out of range for length {self.length}!")
+        length = len(self)
+
+        if not -length <= index < length:
+            raise IndexError(f"The index with value {index} is out of range for length {length}!")
+
+        index %= length
+        slot = index
+
+        # Plus petit emplacement tel que slot = index + nombre d'emplacements libres jusqu'à slot : celui-ci est occupé.
+        while (next_slot := index + bisect.bisect_right(self.__free_slots, slot)) != slot:
+            slot = next_slot
+
+        return slot
+
+    def __get_index(self) -> dict[bytes, list[int]]:
+        """Renvoie l'index associant chaque UUID (sous forme compacte) à ses emplacements, en le construisant si besoin."""
+        if self.__index is None:
+            self.__index = {}
+            free_slots = set(self.__free_slots)
+
+            for slot in range(len(self.__buffer) // 16):
+                if slot not in free_slots:
+                    self.__index.setdefault(bytes(self.__buffer[slot * 16:(slot + 1) * 16]), []).append(slot)
+
+        return self.__index
 
-        return index * 36
+    def __unindex(self, packed_uuid: bytes, slot: int):
+        """Retire l'emplacement donné de l'index de l'UUID donné."""
+        slots = self.__index[packed_uuid]
+        slots.remove(slot)
+
+        if not slots:
+            del self.__index[packed_uuid]
+
+    def __free(self, slot: int):
+        """Marque l'emplacement donné comme libre, puis compacte le tampon si les emplacements libres sont majoritaires."""
+        bisect.insort(self.__free_slots, slot)
+        self.__chain = None
+
+        if len(self.__free_slots) * 2 > len(self.__buffer) // 16:
+            self.__compact()
+
+    def __compact(self):
+        """Retire les emplacements libres du tampon. L'index devra être reconstruit."""
+        if self.__free_slots:
+            self.__buffer = self.__compacted_copy()
+            self.__free_slots.clear()
+            self.__index = None
+
+    def __compacted_copy(self) -> bytearray:
+        """Renvoie une copie du tampon sans ses emplacements libres."""
+        if not self.__free_slots:
+            return self.__buffer[:]
+
+        free_slots = set(self.__free_slots)
+        return bytearray().join(
+            self.__buffer[slot * 16:(slot + 1) * 16]
+            for slot in range(len(self.__buffer) // 16)
+            if slot not in free_slots
+        )
+
+    @staticmethod
+    def __pack(uuid: str) -> bytes:
+        """Transforme un UUID textuel en ses 16 octets.
+
+        :raise ValueError: Si l'UUID donné est mal formé."""
+        if not is_valid_uuid(uuid):
+            raise ValueError(f"'{uuid}' is not a valid UUID.")
+
+        return bytes.fromhex(uuid.replace('-', ''))
+
+    @staticmethod
+    def __format(packed_uuid: bytes | bytearray) -> str:
+        """Transforme les 16 octets d'un UUID en sa forme textuelle."""
+        hex_uuid = packed_uuid.hex()
+        return f'{hex_uuid[:8]}-{hex_uuid[8:12]}-{hex_uuid[12:16]}-{hex_uuid[16:20]}-{hex_uuid[20:]}'
+
+    @staticmethod
+    def __split(chain: str):
+        """Découpe une chaîne d'UUIDs concaténés en UUIDs de 36 caractères."""
+        return (chain[i:i + 36] for i in range(0, len(chain), 36))
 
     def append(self, uuid: str):
         """Ajoute un nouvel UUID à la fin de la chaîne.
@@ -266,11 +668,29 @@ class UUIDList:
         :param uuid: Nouvel UUID.
 
         :raise ValueError: Si l'UUID donné est mal formé."""
-        if not is_valid_uuid(uuid):
-            raise ValueError(f"'{uuid}' is not a valid UUID.")
+        packed_uuid = UUIDList.__pack(uuid)
+
+        if self.__index is not None:
+            self.__index.setdefault(packed_uuid, []).append(len(self.__buffer) // 16)
+
+        self.__buffer += packed_uuid
+        self.__chain = None
+
+    def remove(self, uuid: str):
+        """Supprime la première occurrence de l'UUID donné, en temps constant une fois l'index construit.
+
+        :param uuid: UUID à supprimer.
+
+        :raise ValueError: Si l'UUID ne se trouve pas dans la liste."""
+        packed_uuid = UUIDList.__pack(uuid) if isinstance(uuid, str) and is_valid_uuid(uuid) else None
+        slots = self.__get_index().get(packed_uuid) if packed_uuid is not None else None
+
+        if not slots:
+            raise ValueError(f"'{uuid}' is not in the UUID list.")
 
-        self.chain += uuid
-        self.length += 1
+        slot = min(slots)
+        self.__unindex(packed_uuid, slot)
+        self.__free(slot)
 
     def pop(self, index: int = None):
         """Supprime l'UUID à l'index donné s'il existe, sinon supprime le dernier de la liste des UUIDs.
@@ -279,10 +699,10 @@ class UUIDList:
 
         :raise IndexError: Si l'index est en dehors de la plage de données ou si un pop est effectué sur une liste
             vide."""
-        if self.length == 0:
+        if len(self) == 0:
             raise IndexError("You cannot pop an empty list.")
 
-        target_index = index if index is not None else self.length - 1
+        target_index = index if index is not None else len(self) - 1
         elem = self.__getitem__(target_index)
 
         self.__delitem__(target_index)
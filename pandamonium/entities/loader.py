@@ -0,0 +1,106 @@
+import typing as tp
+
+import flask as fk
+
+
+class EntityLoader:
+    """Classe regroupant les chargements d'entités demandés pendant une requête (motif "dataloader").
+
+    Les UUIDs demandés via load() sont mis en attente par classe d'entité. Dès que l'une des entités en attente est
+    réellement utilisée, toutes celles de la même classe sont chargées d'un coup via fetch_many : le rendu d'une page
+    affichant N entités ne coûte donc qu'une requête SQL par classe, au lieu de N."""
+
+    def __init__(self):
+        """Constructeur de la classe."""
+        self.__pending: dict[type, dict[str, None]] = {}
+        self.__loaded: dict[tuple[type, str], tp.Any] = {}
+        self.batches = 0
+
+    def load(self, cls: type, uuid: str) -> 'LazyEntity':
+        """Met en attente le chargement de l'entité de la classe et de l'UUID donnés.
+
+        :param cls: Classe de l'entité.
+        :param uuid: UUID de l'entité.
+
+        :rtype: LazyEntity
+        :return: Un mandataire de l'entité, chargée lors de sa première utilisation."""
+        if (cls, uuid) not in self.__loaded:
+            self.__pending.setdefault(cls, {})[uuid] = None
+
+        return LazyEntity(self, cls, uuid)
+
+    def resolve(self, cls: type, uuid: str) -> tp.Any | None:
+        """Renvoie l'entité de la classe et de l'UUID donnés, en chargeant au passage toutes les entités de la même
+        classe encore en attente.
+
+        :param cls: Classe de l'entité.
+        :param uuid: UUID de l'entité.
+
+        :return L'entité, ou None si elle n'existe pas en base de données."""
+        if (cls, uuid) not in self.__loaded:
+            self.dispatch(cls)
+
+        return self.__loaded.get((cls, uuid))
+
+    def dispatch(self, cls: type):
+        """Charge en une seule fois toutes les entités en attente de la classe donnée.
+
+        :param cls: Classe des entités à charger."""
+        uuids = list(self.__pending.pop(cls, {}))
+
+        if not uuids:
+            return
+
+        self.batches += 1
+        entities = {entity.get_column('uuid'): entity for entity in cls.fetch_many(uuids)}
+
+        for uuid in uuids:
+            self.__loaded[(cls, uuid)] = entities.get(uuid)
+
+
+class LazyEntity:
+    """Classe représentant une entité dont le chargement a été différé par un EntityLoader. Tout accès à un attribut
+    déclenche le chargement (groupé) puis est transmis à l'entité."""
+
+    def __init__(self, loader: EntityLoader, cls: type, uuid: str):
+        """Constructeur de la classe.
+
+        :param loader: Chargeur ayant mis l'entité en attente.
+        :param cls: Classe de l'entité.
+        :param uuid: UUID de l'entité."""
+        self.__loader = loader
+        self.__cls = cls
+        self.__uuid = uuid
+
+    def resolve(self) -> tp.Any | None:
+        """Renvoie l'entité chargée, ou None si elle n'existe pas en base de données."""
+        return self.__loader.resolve(self.__cls, self.__uuid)
+
+    def __getattr__(self, name: str) -> tp.Any:
+        entity = self.resolve()
+
+        if entity is None:
+            raise AttributeError(f"{self.__cls.__name__} '{self.__uuid}' does not exist.")
+
+        return getattr(entity, name)
+
+    def __bool__(self):
+        return self.resolve() is not None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.__cls.__name__} '{self.__uuid}'>"
+
+
+def get_loader() -> EntityLoader:
+    """Renvoie le chargeur d'entités du contexte courant, en le créant si besoin. En dehors de tout contexte
+    d'application, un nouveau chargeur est renvoyé à chaque appel.
+
+    :rtype: EntityLoader
+    :return: Le chargeur d'entités du contexte courant."""
+    if not fk.has_app_context():
+        return EntityLoader()
+
+    if 'entity_loader' not in fk.g:
+        fk.g.entity_loader = EntityLoader()
+
+    return fk.g.entity_loader
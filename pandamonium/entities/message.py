@@ -1,14 +1,44 @@
 import abc
+import typing as tp
 from datetime import date, datetime
 
-from pandamonium.database import get_db
-from pandamonium.entities.data_structures import Entity
-from pandamonium.security import max_size_filter
+from pandamonium.database import get_db, column_filter, transaction
+from pandamonium.entities.cache import cached_fetch, invalidates_cache
+from pandamonium.entities.data_structures import Column, Entity, Schema
+from pandamonium.search import index_messages
+from pandamonium.timeline import fan_out_messages
+from pandamonium.write_behind import MESSAGES_INSERT_REQUEST, get_message_writer
+
+
+@column_filter
+def content_filter(content: str) -> str | None:
+    """Filtre pour une donnée de type contenu de message.
+
+    :param content: Contenu du message entré par l'utilisateur.
+
+    :return: None si le message n'est pas vide et fait au plus 2000 caractères, sinon un message d'erreur."""
+    if not content.strip():
+        return "Votre message est trop court pour être envoyé."
+
+    if len(content) > 2000:
+        return "Votre message est trop long (2000 caractères maximum)."
 
 
 class Message(Entity, abc.ABC):
     """Classe représentant un message envoyé dans la branche d'un bamboo."""
 
+    __slots__ = ()
+
+    table_name = 'messages'
+    schema = Schema(
+        Column('content', content_filter),
+        Column('date_sent'),
+        Column('modified'),
+        Column('sender_uuid'),
+        Column('branch_uuid'),
+        Column('response_to_message_uuid')
+    )
+
     def __init__(self,
                  uuid: str | None,
                  content: str | None,
@@ -27,12 +57,8 @@ class Message(Entity, abc.ABC):
         :param branch_uuid: UUID de la branche dans lequel le message a été envoyé.
         :param response_to_message_uuid: UUID du message répondu, si le message actuel est une réponse à un autre."""
         super().__init__(
-            'message',
             uuid,
-            content=(
-                content,
-                max_size_filter(1, "Votre message est trop court pour être envoyé.")
-            ),
+            content=content,
             date_sent=date_sent,
             modified=modified,
             sender_uuid=sender_uuid,
@@ -41,7 +67,13 @@ class Message(Entity, abc.ABC):
         )
 
     @classmethod
-    def instant(cls, content: str, sender_uuid: str, branch_uuid: str, response_to_message_uuid: str | None = None):
+    @invalidates_cache
+    def instant(cls,
+                content: str,
+                sender_uuid: str,
+                branch_uuid: str,
+                response_to_message_uuid: str | None = None,
+                deferred: bool = False):
         """Constructeur créant à la fois une nouvelle instance de la classe actuelle tout en la créant en base de
         données.
 
@@ -49,29 +81,42 @@ class Message(Entity, abc.ABC):
         :param sender_uuid: UUID de l'utilisateur ayant envoyé le message.
         :param branch_uuid: UUID de la branche dans lequel le message a été envoyé.
         :param response_to_message_uuid: UUID du message répondu, si le message actuel est une réponse à un autre.
+        :param deferred: Confier l'écriture à la file d'écriture différée des messages si elle est activée
+            (MESSAGE_WRITE_BEHIND). Le message reçoit tout de même son UUID et sa date immédiatement, mais n'est écrit
+            en base de données (indexé pour la recherche et diffusé dans les fils d'actualité) qu'avec le lot suivant.
+            Si la file est pleine, il est écrit immédiatement.
 
         :rtype Message | None
         :return Instance de la classe Message si les données entrées sont valides, sinon None."""
-        db = get_db()
         message = Message(None, content, datetime.now(), False, sender_uuid, branch_uuid, response_to_message_uuid)
 
-        with db.cursor() as cursor:
-            cursor.execute(
-                'INSERT INTO messages VALUES (%s, %s, %s, %s, %s, %s, %s)',
-                (
-                    message.get_column('uuid'),
-                    content,
-                    message.get_column('date_sent'),
-                    False,
-                    sender_uuid,
-                    branch_uuid,
-                    response_to_message_uuid,
-                )
-            )
-
-            return message
+        if not message.valid:
+            return None
+
+        row = tuple(message.get_column(name) for name in cls.schema.names)
+
+        if deferred:
+            writer = get_message_writer()
+
+            if writer is not None and writer.submit(row):
+                return message
+
+        # Le message, son indexation et sa diffusion sont écrits ensemble ou pas du tout.
+        with transaction() as db:
+            with db.cursor(prepared=True) as cursor:
+                cursor.execute(MESSAGES_INSERT_REQUEST, row)
+
+            # Les requêtes des données dérivées varient avec le nombre de termes ou de membres : préparées, elles
+            # évinceraient du cache les requêtes fixes.
+            with db.cursor() as cursor:
+                index_messages(cursor, [(message.get_column('uuid'), content, branch_uuid)], replace=False)
+                fan_out_messages(cursor, [(message.get_column('uuid'), branch_uuid, message.get_column('date_sent'),
+                                           sender_uuid)])
+
+        return message
 
     @classmethod
+    @cached_fetch
     def fetch_by(cls, uuid: str):
         """Crée une instance de Message à partir de son UUID. Ne renvoie rien si le message n'est pas trouvé en base de
         données avec l'UUID fourni.
@@ -80,38 +125,62 @@ class Message(Entity, abc.ABC):
 
         :rtype Message | None
         :return: Instance de la classe Message si le bamboo existe en base de données avec l'UUID fourni, sinon None."""
-        with get_db().cursor(dictionary=True) as cursor:
+        with get_db().cursor(dictionary=True, prepared=True) as cursor:
             cursor.execute('SELECT * FROM messages WHERE uuid = %s', (uuid,))
             fetched_message = cursor.fetchone()
 
-            if fetched_message is None:
-                return None
+            return cls._from_row(fetched_message) if fetched_message is not None else None
+
+    @classmethod
+    def fetch_page(cls, branch_uuid: str, before: tuple[datetime, str] | None = None, limit: int = 50) -> list:
+        """Renvoie une page de l'historique d'une branche, du message le plus récent au plus ancien.
+
+        La pagination se fait par clé (keyset) sur le couple (date_sent, uuid) et s'appuie sur l'index
+        messages_by_branch_date : la page suivante commence juste après le dernier message de la page précédente, ce
+        qui rend le coût d'une page indépendant de sa profondeur dans l'historique (pas d'OFFSET).
+
+        :param branch_uuid: UUID de la branche.
+        :param before: Couple (date_sent, uuid) du dernier message de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal de messages renvoyés.
 
-            return cls(
-                uuid,
-                fetched_message['content'],
-                fetched_message['date_sent'],
-                fetched_message['modified'],
-                fetched_message['sender_uuid'],
-                fetched_message['branch_uuid'],
-                fetched_message['response_to_message_uuid']
-            )
+        :rtype: list[Message]
+        :return: Les messages de la page, du plus récent au plus ancien."""
+        request = 'SELECT * FROM messages WHERE branch_uuid = %s'
+        values = [branch_uuid]
 
-    def _update(self, new_content: str):
-        """Met à jour le contenu du message actuel. Il devient alors modifié.
+        if before is not None:
+            # Écriture équivalente à (date_sent, uuid) < before, mais dont la borne sur date_sent reste exploitable par
+            # l'index quel que soit le moteur.
+            request += ' AND date_sent <= %s AND (date_sent < %s OR uuid < %s)'
+            values += [before[0], before[0], before[1]]
 
-        :param new_content: Nouveau contenu du message."""
-        self.set_column('content', new_content)
+        request += ' ORDER BY date_sent DESC, uuid DESC LIMIT %s'
+        values.append(limit)
 
-        if self.valid:
+        with get_db().cursor(dictionary=True) as cursor:
+            cursor.execute(request, values)
+            return [cls._from_row(row) for row in cursor.fetchall()]
+
+    def _update(self, new_values: dict[str, tp.Any]) -> bool:
+        """Met à jour les colonnes modifiées du message actuel. Si son contenu a changé, il devient alors modifié et
+        est réindexé pour la recherche.
+
+        :param new_values: Nouvelles valeurs à attribuer aux colonnes de la table.
+
+        :rtype: bool
+        :return: True si le message a été mis à jour, False sinon."""
+        if 'content' in new_values and not self.get_column('modified'):
             self.set_column('modified', True)
+            new_values = {**new_values, 'modified': True}
+
+        # Le message et son indexation sont modifiés ensemble ou pas du tout.
+        with transaction() as db:
+            if not super()._update(new_values):
+                return False
+
+            if 'content' in new_values or 'branch_uuid' in new_values:
+                with db.cursor() as cursor:
+                    index_messages(cursor, [(self.get_column('uuid'), self.get_column('content'),
+                                             self.get_column('branch_uuid'))])
 
-            with get_db().cursor() as cursor:
-                cursor.execute(
-                    'UPDATE messages SET content = %s, modified = %s WHERE uuid = %s',
-                    (
-                        new_content,
-                        True,
-                        self.get_column('uuid')
-                    )
-                )
+        return True
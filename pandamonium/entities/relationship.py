@@ -0,0 +1,139 @@
+from datetime import datetime
+
+from pandamonium.database import IntegrityError, get_db
+from pandamonium.entities.data_structures import UUIDList
+
+
+class Relationship:
+    """Classe représentant une table de liaison entre deux entités (amis, relations, membres d'un bambou...).
+
+    Chaque ligne associe une source à une cible. La clé primaire (source, cible) et l'index inverse (cible, source)
+    rendent les tests d'appartenance, les ajouts et les suppressions logarithmiques dans les deux sens, sans limite sur
+    le nombre de liens d'une même source."""
+
+    def __init__(self, table: str, source_column: str, target_column: str):
+        """Constructeur de la classe.
+
+        :param table: Nom de la table de liaison.
+        :param source_column: Nom de la colonne contenant l'UUID de la source.
+        :param target_column: Nom de la colonne contenant l'UUID de la cible."""
+        self.table = table
+        self.source_column = source_column
+        self.target_column = target_column
+
+    def add(self, source_uuid: str, target_uuid: str) -> bool:
+        """Crée le lien entre la source et la cible données.
+
+        :param source_uuid: UUID de la source.
+        :param target_uuid: UUID de la cible.
+
+        :rtype: bool
+        :return: True si le lien a été créé, False s'il existait déjà ou si l'une des entités n'existe pas."""
+        with get_db().cursor() as cursor:
+            try:
+                cursor.execute(
+                    f'INSERT INTO {self.table}({self.source_column}, {self.target_column}, creation_date) '
+                    f'VALUES (%s, %s, %s)',
+                    (source_uuid, target_uuid, datetime.now())
+                )
+            except IntegrityError:
+                return False
+
+        return True
+
+    def remove(self, source_uuid: str, target_uuid: str) -> bool:
+        """Supprime le lien entre la source et la cible données.
+
+        :param source_uuid: UUID de la source.
+        :param target_uuid: UUID de la cible.
+
+        :rtype: bool
+        :return: True si le lien a été supprimé, False s'il n'existait pas."""
+        with get_db().cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE {self.source_column} = %s AND {self.target_column} = %s',
+                (source_uuid, target_uuid)
+            )
+
+            return cursor.rowcount > 0
+
+    def contains(self, source_uuid: str, target_uuid: str) -> bool:
+        """Vérifie si la source et la cible données sont liées (recherche sur la clé primaire).
+
+        :param source_uuid: UUID de la source.
+        :param target_uuid: UUID de la cible.
+
+        :rtype: bool
+        :return: True si le lien existe, False sinon."""
+        with get_db().cursor() as cursor:
+            cursor.execute(
+                f'SELECT 1 FROM {self.table} WHERE {self.source_column} = %s AND {self.target_column} = %s',
+                (source_uuid, target_uuid)
+            )
+
+            return cursor.fetchone() is not None
+
+    def targets(self, source_uuid: str, after: str | None = None, limit: int | None = None) -> UUIDList:
+        """Renvoie les cibles liées à la source donnée, triées par UUID. La pagination se fait par clé (keyset) : la page
+        suivante commence après le dernier UUID de la page précédente.
+
+        :param source_uuid: UUID de la source.
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
+
+        :rtype: UUIDList
+        :return: Les UUIDs des cibles."""
+        return self.__page(self.source_column, self.target_column, source_uuid, after, limit)
+
+    def sources(self, target_uuid: str, after: str | None = None, limit: int | None = None) -> UUIDList:
+        """Renvoie les sources liées à la cible donnée (via l'index inverse), triées par UUID. La pagination se fait par
+        clé (keyset) : la page suivante commence après le dernier UUID de la page précédente.
+
+        :param target_uuid: UUID de la cible.
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
+
+        :rtype: UUIDList
+        :return: Les UUIDs des sources."""
+        return self.__page(self.target_column, self.source_column, target_uuid, after, limit)
+
+    def count(self, source_uuid: str) -> int:
+        """Renvoie le nombre de cibles liées à la source donnée.
+
+        :param source_uuid: UUID de la source.
+
+        :rtype: int
+        :return: Le nombre de liens de la source."""
+        with get_db().cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table} WHERE {self.source_column} = %s', (source_uuid,))
+            return cursor.fetchone()[0]
+
+    def __page(self, by_column: str, selected_column: str, uuid: str, after: str | None, limit: int | None) -> UUIDList:
+        """Renvoie une page d'UUIDs de la colonne selected_column pour les lignes où by_column vaut l'UUID donné.
+
+        :param by_column: Colonne filtrée.
+        :param selected_column: Colonne renvoyée.
+        :param uuid: Valeur recherchée dans la colonne filtrée.
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer."""
+        request = f'SELECT {selected_column} FROM {self.table} WHERE {by_column} = %s'
+        values = [uuid]
+
+        if after is not None:
+            request += f' AND {selected_column} > %s'
+            values.append(after)
+
+        request += f' ORDER BY {selected_column}'
+
+        if limit is not None:
+            request += ' LIMIT %s'
+            values.append(limit)
+
+        with get_db().cursor() as cursor:
+            cursor.execute(request, values)
+            return UUIDList.hydrate(''.join(row[0] for row in cursor.fetchall()))
+
+
+friendships = Relationship('user_friends', 'user_uuid', 'friend_uuid')
+relations = Relationship('user_relations', 'user_uuid', 'relation_uuid')
+memberships = Relationship('bamboo_members', 'bamboo_uuid', 'user_uuid')
@@ -1,7 +1,7 @@
 import abc
 
 from pandamonium.database import column_filter
-from pandamonium.entities.data_structures import Entity
+from pandamonium.entities.data_structures import Column, Entity, Schema
 from pandamonium.security import max_size_filter
 
 
@@ -12,10 +12,26 @@ def hierarchy_filter(hierarchy: int):
     :param hierarchy: Emplacement du rôle dans la hiérarchie des rôles.
 
     :return: None si le numéro donné est compris entre 0 et 100, sinon un message d'erreur."""
-    return 0 <= hierarchy <= 100
+    if not 0 <= hierarchy <= 100:
+        return "La hiérarchie d'un rôle doit être comprise entre 0 et 100."
 
 
 class Role(Entity, abc.ABC):
+    __slots__ = ()
+
+    schema = Schema(
+        Column('name', max_size_filter(50, "Le nom donné à ce rôle est trop long (50 caractères maximum).")),
+        Column('color'),
+        Column('hierarchy', hierarchy_filter),
+        Column('admin'),
+        Column('perm_managing_channels'),
+        Column('perm_managing_roles'),
+        Column('perm_delete'),
+        Column('perm_ban'),
+        Column('perm_kick'),
+        Column('perm_mute')
+    )
+
     def __init__(self,
                  uuid: str | None,
                  name: str | None,
@@ -46,14 +62,10 @@ class Role(Entity, abc.ABC):
         :param perm_mute: Autorisation de la permission de rendre muet des utilisateurs.
         """
         super().__init__(
-            'user',
             uuid,
-            entity_name=(
-                name,
-                max_size_filter(50, "Le nom donné à ce rôle est trop long (50 caractères maximum).")
-            ),
+            name=name,
             color=color,
-            hierarchy=(hierarchy, hierarchy_filter),
+            hierarchy=hierarchy,
             admin=admin,
             perm_managing_channels=perm_managing_channels,
             perm_managing_roles=perm_managing_roles,
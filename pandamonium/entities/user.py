@@ -3,12 +3,15 @@ import flask as fk
 from datetime import datetime, date
 import re
 import abc
-from mysql.connector import IntegrityError
 import typing as tp
 
-from pandamonium.database import get_db, column_filter
-from pandamonium.entities.data_structures import Entity, UUIDList
-from pandamonium.security import check_password, set_security_error, hash_password, max_size_filter
+from pandamonium.database import IntegrityError, get_db, column_filter, transaction
+from pandamonium.entities.cache import cached_fetch, invalidates_cache
+from pandamonium.entities.data_structures import Column, Entity, Schema, UUIDList
+from pandamonium.entities.relationship import friendships, memberships, relations
+from pandamonium import hashing
+from pandamonium.security import get_security_error, max_size_filter, needs_rehash, set_security_error
+from pandamonium.timeline import FRIEND_ENTRY, timelines
 
 
 @column_filter
@@ -58,9 +61,51 @@ def date_of_birth_filter(date_of_birth: date) -> str | None:
         return "Vous êtes trop jeune pour inscrire sur PANDAMONIUM."
 
 
+OVERLOAD_ERROR = "Le serveur est momentanément surchargé. Veuillez réessayer dans quelques instants."
+
+
+def check_plain_password(password: str) -> bool:
+    """Vérifie le format d'un mot de passe en clair, avant qu'il ne soit hashé ou comparé.
+
+    Si une erreur survient, elle doit être gérée en utilisant les fonctions du module security.
+
+    :param password: Mot de passe entré par l'utilisateur.
+
+    :rtype: bool
+    :return: True si le mot de passe a un format correct, False sinon."""
+    error = password_filter(password)
+
+    if error is not None:
+        set_security_error(error)
+        return False
+
+    return True
+
+
 class User(Entity, abc.ABC):
     """Classe représentant un utilisateur unique du site web."""
 
+    __slots__ = ()
+
+    table_name = 'users'
+    cache_keys = ('uuid', 'username', 'email')
+    version_column = 'version'
+    schema = Schema(
+        Column('username', username_filter),
+        Column('email', email_filter),
+        # Contient le mot de passe hashé : le mot de passe en clair est vérifié par password_filter avant le hashage.
+        Column('password'),
+        Column('date_of_birth', date_of_birth_filter),
+        Column('registration_date'),
+        Column('last_connection_date'),
+        Column('pronouns', max_size_filter(50, "Vos pronoms sont trop longs.")),
+        Column('public_display_name', max_size_filter(50, "Votre pseudo public est trop long.")),
+        Column('public_bio', max_size_filter(300, "Votre bio publique est trop longue.")),
+        Column('private_display_name', max_size_filter(50, "Votre pseudo privé est trop long.")),
+        Column('private_bio', max_size_filter(300, "Votre bio privée est trop longue.")),
+        Column('version')
+    )
+
     def __init__(self,
                  uuid: str | None,
                  username: str | None,
@@ -72,10 +117,8 @@ class User(Entity, abc.ABC):
                  private_display_name: str | None,
                  public_bio: str = None,
                  private_bio: str = None,
-                 friends: str = None,
-                 relations: str = None,
-                 bamboos: str = None,
-                 registration_date: date = datetime.now().date()):
+                 registration_date: date = datetime.now().date(),
+                 version: int = 0):
         """Constructeur de la classe User.
 
         :param uuid: UUID de l'utilisateur.
@@ -88,53 +131,26 @@ class User(Entity, abc.ABC):
         :param public_bio: Bio de l'utilisateur en visibilité publique.
         :param private_display_name: Nom de l'utilisateur en visibilité privée.
         :param private_bio: Bio de l'utilisateur en visibilité privée.
-        :param friends: Liste d'amis de l'utilisateur.
-        :param relations: Relations professionnelles de l'utilisateur.
-        :param registration_date: Date d'inscription de l'utilisateur, sous forme d'objet date."""
+        :param registration_date: Date d'inscription de l'utilisateur, sous forme d'objet date.
+        :param version: Version de la ligne en base de données, incrémentée à chaque mise à jour."""
         super().__init__(
-            'user',
             uuid,
-            username=(username, username_filter),
-            email=(email, email_filter),
-            password=(password, password_filter),
-            date_of_birth=(date_of_birth, date_of_birth_filter),
-            friends=(
-                UUIDList(friends) if friends is not None else UUIDList(),
-                max_size_filter(3600, "Vous avez trop d'amis (100 maximum).")
-            ),
-            relations=(
-                UUIDList(relations) if relations is not None else UUIDList(),
-                max_size_filter(3600, "Vous avez trop de connaissances (100 maximum).")
-            ),
-            bamboos=(
-                UUIDList(bamboos) if bamboos is not None else UUIDList(),
-                max_size_filter(3600, "Vous avez trop de bambous (100 maximum).")
-            ),
+            username=username,
+            email=email,
+            password=password,
+            date_of_birth=date_of_birth,
             registration_date=registration_date,
             last_connection_date=datetime.now(),
-            pronouns=(
-                pronouns,
-                max_size_filter(50, "Vos pronoms sont trop longs.")
-            ),
-            public_display_name=(
-                public_display_name,
-                max_size_filter(50, "Votre pseudo public est trop long.")
-            ),
-            public_bio=(
-                public_bio,
-                max_size_filter(300, "Votre bio publique est trop longue.")
-            ),
-            private_display_name=(
-                private_display_name,
-                max_size_filter(50, "Votre pseudo privé est trop long.")
-            ),
-            private_bio=(
-                private_bio,
-                max_size_filter(300, "Votre bio privée est trop longue.")
-            )
+            pronouns=pronouns,
+            public_display_name=public_display_name,
+            public_bio=public_bio,
+            private_display_name=private_display_name,
+            private_bio=private_bio,
+            version=version
         )
 
     @classmethod
+    @invalidates_cache
     def instant(cls,
                 username: str,
                 email: str,
@@ -158,11 +174,14 @@ class User(Entity, abc.ABC):
         :return Instance de la classe User si les données entrées sont valides, sinon None."""
         db = get_db()
 
+        if not check_plain_password(password):
+            return None
+
         user = User(
             None,
             username,
             email,
-            hash_password(password),
+            None,
             date_of_birth,
             pronouns,
             public_display_name,
@@ -170,7 +189,13 @@ class User(Entity, abc.ABC):
         )
 
         if user.valid:
-            with db.cursor() as cursor:
+            try:
+                user.set_column('password', hashing.hashing_pool.hash(password))
+            except hashing.HashingPoolBusyError:
+                set_security_error(OVERLOAD_ERROR)
+                return None
+
+            with db.cursor(prepared=True) as cursor:
                 try:
                     cursor.execute(
                         'INSERT INTO users ('
@@ -204,6 +229,7 @@ class User(Entity, abc.ABC):
         return None
 
     @classmethod
+    @cached_fetch
     def fetch_by(cls, uuid: str = '', username: str = '', email: str = ''):
         """Crée une instance de User à partir du username ou de l'email renseigné (ignoré si le username est fourni). Ne
         renvoie rien si l'utilisateur n'est pas trouvé en base de données avec l'identifiant fourni.
@@ -233,26 +259,11 @@ class User(Entity, abc.ABC):
             raise ValueError("Tentative de récupérer un utilisateur dans la base de données sans fournir de valeur sur "
                              "laquelle s'appuyer.")
 
-        with get_db().cursor(dictionary=True) as cursor:
+        with get_db().cursor(dictionary=True, prepared=True) as cursor:
             cursor.execute(request, [param])
             fetched_user = cursor.fetchone()
 
-        return cls(
-            fetched_user['uuid'],
-            fetched_user['username'],
-            fetched_user['email'],
-            fetched_user['password'],
-            fetched_user['date_of_birth'],
-            fetched_user['pronouns'],
-            fetched_user['public_display_name'],
-            fetched_user['private_display_name'],
-            fetched_user['public_bio'],
-            fetched_user['private_bio'],
-            fetched_user['friends'],
-            fetched_user['relations'],
-            fetched_user['bamboos'],
-            fetched_user['registration_date'],
-        ) if fetched_user is not None else None
+        return cls._from_row(fetched_user) if fetched_user is not None else None
 
     @classmethod
     def login(cls, identifier: str, password: str):
@@ -266,72 +277,145 @@ class User(Entity, abc.ABC):
 
         :rtype: User | None
         :return: Instance de User si toutes les conditions sont remplies, sinon None."""
-        user = User('', None, None, password, None, None, None, None)
-
-        if not user.valid:
+        if not check_plain_password(password):
             return None
 
-        user.set_column('username', identifier)
-
-        if user.valid:
+        if username_filter(identifier) is None:
             user = User.fetch_by(username=identifier)
+        elif email_filter(identifier) is None:
+            user = User.fetch_by(email=identifier)
         else:
-            user.set_column('email', identifier)
+            set_security_error(f"L'identifiant {identifier} est invalide.")
+            return None
 
-            if user.valid:
-                user = User.fetch_by(email=identifier)
-            else:
-                set_security_error(f"L'identifiant {identifier} est invalide.")
-                return None
+        if user is None:
+            set_security_error(f"Aucun utilisateur trouvé avec l'identifiant {identifier}.")
+            return None
 
-        if user is not None:
-            if check_password(password, user.get_column('password')):
-                user.create_session()
-                return user
-            else:
+        hashed_password = user.get_column('password')
+
+        try:
+            if not hashing.hashing_pool.verify(password, hashed_password):
                 set_security_error(f"Mot de passe incorrect pour l'identifiant {identifier}.")
                 return None
+        except hashing.HashingPoolBusyError:
+            set_security_error(OVERLOAD_ERROR)
+            return None
 
-        set_security_error(f"Aucun utilisateur trouvé avec l'identifiant {identifier}.")
-        return None
+        # Les anciens hashs (SHA-256, ou scrypt avec des paramètres dépassés) sont remplacés dès que le mot de passe en
+        # clair est connu. Un échec n'empêche pas la connexion : le hash sera remplacé la fois suivante.
+        if needs_rehash(hashed_password):
+            try:
+                user.set_column('password', hashing.hashing_pool.hash(password))
+
+                if not user.update():
+                    get_security_error()
+            except hashing.HashingPoolBusyError:
+                pass
 
-    def _update(self, new_values: dict[str, tp.Any]):
-        """Met à jour les données de l'utilisateur actuel en prenant en compte seulement les colonnes dont les valeurs
-        sont non None.
+        user.create_session()
+        return user
+
+    def _update(self, new_values: dict[str, tp.Any]) -> bool:
+        """Met à jour les données de l'utilisateur actuel en ne prenant en compte que les colonnes modifiées.
 
         Si une erreur survient, elle doit être gérée en utilisant les fonctions du module security.
 
         :param new_values: Nouvelles valeurs à attribuer aux colonnes de la table.
 
-        :raise ValueError: Si l'utilisateur n'existe pas en base de données ou si aucune donnée n'a été fournie en
-            arguments."""
-        request = 'UPDATE users SET '
-        values = []
+        :rtype: bool
+        :return: True si les données ont été mises à jour, False sinon.
 
-        for name, value in new_values.items():
-            request += f'{name} = %s, '
+        :raise ValueError: Si aucune donnée n'a été fournie en arguments."""
+        try:
+            return super()._update(new_values)
+        except IntegrityError:
+            set_security_error("Une erreur est survenue lors de la mise à jour de vos données. Le nom "
+                               "d'utilisateur ou l'email est peut-être déjà pris par un autre compte.")
+            return False
 
-            val = value.chain if isinstance(value, UUIDList) else value
-            print("Putain de valeur:", val)
-            values.append(val)
+    def get_friends(self, after: str | None = None, limit: int | None = None) -> UUIDList:
+        """Renvoie les UUIDs des amis de l'utilisateur, triés par UUID.
 
-        if len(values) == 1:
-            raise ValueError("Une requête UPDATE ne peut pas être exécutée si aucun changement de valeur n'est "
-                             "exécuté dans la base de données.")
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
 
-        request = request[:len(request) - 2] + ' WHERE uuid = %s'
-        values.append(self.get_column('uuid'))
+        :rtype: UUIDList
+        :return: Les UUIDs des amis de l'utilisateur."""
+        return friendships.targets(self.get_column('uuid'), after, limit)
 
-        print(f"Request '{request}', values: {values}")
+    def add_friend(self, friend_uuid: str) -> bool:
+        """Ajoute un utilisateur aux amis de l'utilisateur actuel, et l'en informe dans son fil d'actualité.
 
-        db = get_db()
+        :param friend_uuid: UUID de l'ami.
 
-        with db.cursor() as cursor:
-            try:
-                cursor.execute(request, values)
-            except IntegrityError:
-                set_security_error("Une erreur est survenue lors de la mise à jour de vos données. Le nom "
-                                   "d'utilisateur ou l'email est peut-être déjà pris par un autre compte.")
+        :rtype: bool
+        :return: True si l'ami a été ajouté, False s'il l'était déjà ou s'il n'existe pas."""
+        # Le lien et l'entrée du fil de l'ami sont écrits ensemble ou pas du tout.
+        with transaction() as db:
+            if not friendships.add(self.get_column('uuid'), friend_uuid):
+                return False
+
+            with db.cursor() as cursor:
+                timelines.push(cursor, friend_uuid, FRIEND_ENTRY, self.get_column('uuid'), self.get_column('uuid'))
+
+        return True
+
+    def remove_friend(self, friend_uuid: str) -> bool:
+        """Retire un utilisateur des amis de l'utilisateur actuel.
+
+        :param friend_uuid: UUID de l'ami.
+
+        :rtype: bool
+        :return: True si l'ami a été retiré, False s'il n'en faisait pas partie."""
+        return friendships.remove(self.get_column('uuid'), friend_uuid)
+
+    def is_friend(self, user_uuid: str) -> bool:
+        """Vérifie si l'utilisateur donné fait partie des amis de l'utilisateur actuel.
+
+        :param user_uuid: UUID de l'utilisateur.
+
+        :rtype: bool
+        :return: True si c'est un ami, False sinon."""
+        return friendships.contains(self.get_column('uuid'), user_uuid)
+
+    def get_relations(self, after: str | None = None, limit: int | None = None) -> UUIDList:
+        """Renvoie les UUIDs des relations professionnelles de l'utilisateur, triés par UUID.
+
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
+
+        :rtype: UUIDList
+        :return: Les UUIDs des relations de l'utilisateur."""
+        return relations.targets(self.get_column('uuid'), after, limit)
+
+    def add_relation(self, relation_uuid: str) -> bool:
+        """Ajoute un utilisateur aux relations professionnelles de l'utilisateur actuel.
+
+        :param relation_uuid: UUID de la relation.
+
+        :rtype: bool
+        :return: True si la relation a été ajoutée, False si elle l'était déjà ou si elle n'existe pas."""
+        return relations.add(self.get_column('uuid'), relation_uuid)
+
+    def remove_relation(self, relation_uuid: str) -> bool:
+        """Retire un utilisateur des relations professionnelles de l'utilisateur actuel.
+
+        :param relation_uuid: UUID de la relation.
+
+        :rtype: bool
+        :return: True si la relation a été retirée, False si elle n'en faisait pas partie."""
+        return relations.remove(self.get_column('uuid'), relation_uuid)
+
+    def get_bamboos(self, after: str | None = None, limit: int | None = None) -> UUIDList:
+        """Renvoie les UUIDs des bambous dont l'utilisateur est membre, triés par UUID.
+
+        :param after: Dernier UUID de la page précédente, ou None pour la première page.
+        :param limit: Nombre maximal d'UUIDs renvoyés, ou None pour tous les renvoyer.
+
+        :rtype: UUIDList
+        :return: Les UUIDs des bambous de l'utilisateur."""
+        return memberships.sources(self.get_column('uuid'), after, limit)
 
     def create_session(self):
         """Initialise une nouvelle session à partir de l'utilisateur actuel."""
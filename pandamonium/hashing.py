@@ -0,0 +1,199 @@
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+import typing as tp
+
+import flask as fk
+
+from pandamonium.concurrency import run_blocking
+from pandamonium.security import check_password, hash_password
+
+
+class HashingPoolBusyError(RuntimeError):
+    """Exception levée lorsque trop de calculs de mots de passe sont déjà en attente dans le pool."""
+    pass
+
+
+def _timed(func: tp.Callable, *args) -> tuple[tp.Any, float]:
+    """Exécute une fonction dans un processus du pool et mesure sa durée.
+
+    :param func: Fonction à exécuter.
+
+    :rtype: tuple[tp.Any, float]
+    :return: Le résultat de la fonction et sa durée d'exécution, en secondes."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPool:
+    """Classe représentant le pool de processus chargé de hasher et de vérifier les mots de passe.
+
+    Le calcul de scrypt est volontairement lent : exécuté dans le worker qui traite la requête, il bloquerait toutes
+    les requêtes et toutes les connexions Socket.IO servies par ce worker. Il est donc confié à des processus dédiés,
+    en nombre borné. Le nombre de calculs en cours ou en attente est lui aussi borné : au-delà, l'appelant attend une
+    place pendant au plus timeout secondes, puis reçoit une HashingPoolBusyError plutôt que d'allonger la file."""
+
+    def __init__(self, workers: int = 2, max_pending: int = 32, timeout: float = 5.0):
+        """Constructeur de la classe.
+
+        :param workers: Nombre de processus. Avec 0, les calculs sont faits directement par l'appelant (tests,
+            scripts).
+        :param max_pending: Nombre maximal de calculs en cours ou en attente.
+        :param timeout: Délai d'attente maximal (en secondes) d'une place dans la file."""
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self.__executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self.__lock = threading.Lock()
+        self.__slot_freed = threading.Condition(self.__lock)
+        self.__pending = 0
+        self.__stats = {
+            'hashes': 0,
+            'verifications': 0,
+            'rejected': 0,
+            'peak_pending': 0,
+            'compute_time': 0.0,
+            'max_compute_time': 0.0,
+            'total_time': 0.0,
+            'max_total_time': 0.0,
+        }
+
+    def hash(self, password: str) -> str:
+        """Hashe un mot de passe dans le pool.
+
+        :param password: Mot de passe à hasher.
+
+        :rtype: str
+        :return: Le mot de passe hashé.
+
+        :raise HashingPoolBusyError: Si la file est pleine."""
+        self.__count('hashes')
+        return self.__run(hash_password, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """Vérifie un mot de passe dans le pool.
+
+        :param password: Mot de passe à vérifier.
+        :param hashed_password: Mot de passe hashé.
+
+        :rtype: bool
+        :return: True si les mots de passe correspondent, False sinon.
+
+        :raise HashingPoolBusyError: Si la file est pleine."""
+        self.__count('verifications')
+        return self.__run(check_password, password, hashed_password)
+
+    def stats(self) -> dict[str, int | float]:
+        """Renvoie les compteurs du pool.
+
+        :rtype: dict[str, int | float]
+        :return: Un dictionnaire contenant les nombres de hashs, de vérifications et de refus, le nombre de calculs en
+            cours et le plus haut atteint, ainsi que les temps de calcul (dans les processus) et totaux (attente
+            comprise), cumulés et maximaux, en secondes."""
+        with self.__lock:
+            return {**self.__stats, 'pending': self.__pending, 'max_pending': self.max_pending}
+
+    def configure(self, workers: int, max_pending: int, timeout: float):
+        """Change les limites du pool, y compris pendant que des calculs sont en cours : ceux-ci se terminent normalement,
+        les nouvelles limites s'appliquent aux appels suivants. Si le nombre de processus change, les processus existants
+        s'arrêtent après avoir fini leurs calculs, et les suivants seront créés à la demande.
+
+        :param workers: Nombre de processus (0 pour calculer directement).
+        :param max_pending: Nombre maximal de calculs en cours ou en attente.
+        :param timeout: Délai d'attente maximal (en secondes) d'une place dans la file."""
+        with self.__lock:
+            executor = None
+
+            if workers != self.workers:
+                executor, self.__executor = self.__executor, None
+
+            self.workers = workers
+            self.max_pending = max_pending
+            self.timeout = timeout
+            self.__slot_freed.notify_all()
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Arrête les processus du pool."""
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __run(self, func: tp.Callable, *args) -> tp.Any:
+        """Exécute une fonction dans le pool dès qu'une place se libère dans la file, et attend son résultat sans bloquer
+        la boucle d'événements en mode eventlet/gevent.
+
+        :param func: Fonction à exécuter.
+
+        :raise HashingPoolBusyError: Si aucune place ne s'est libérée à temps."""
+        start = time.perf_counter()
+
+        with self.__lock:
+            if not self.__slot_freed.wait_for(lambda: self.__pending < self.max_pending, timeout=self.timeout):
+                self.__stats['rejected'] += 1
+                raise HashingPoolBusyError(f'More than {self.max_pending} password computations are already pending.')
+
+            self.__pending += 1
+            self.__stats['peak_pending'] = max(self.__stats['peak_pending'], self.__pending)
+
+        try:
+            if self.workers <= 0:
+                result, compute_time = _timed(func, *args)
+            else:
+                result, compute_time = run_blocking(self.__get_executor().submit(_timed, func, *args).result)
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+                self.__slot_freed.notify()
+
+        total_time = time.perf_counter() - start
+
+        with self.__lock:
+            self.__stats['compute_time'] += compute_time
+            self.__stats['max_compute_time'] = max(self.__stats['max_compute_time'], compute_time)
+            self.__stats['total_time'] += total_time
+            self.__stats['max_total_time'] = max(self.__stats['max_total_time'], total_time)
+
+        return result
+
+    def __get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Renvoie l'exécuteur du pool, en le créant si besoin. Les processus sont créés par spawn : un fork hériterait
+        de l'état des threads (ou du monkey-patching) du worker."""
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+
+            return self.__executor
+
+    def __count(self, name: str):
+        """Incrémente le compteur donné en argument."""
+        with self.__lock:
+            self.__stats[name] += 1
+
+
+hashing_pool = HashingPool()
+
+
+def configure_hashing(app: fk.Flask):
+    """Configure le pool de hashage du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : PASSWORD_HASH_WORKERS (nombre de processus, 0 pour calculer directement ; 0 par
+    défaut en mode TESTING, 2 sinon), PASSWORD_HASH_MAX_PENDING (nombre maximal de calculs en cours ou en attente) et
+    PASSWORD_HASH_TIMEOUT (attente maximale d'une place dans la file, en secondes).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    hashing_pool.configure(
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 0 if app.testing else 2),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 5.0)
+    )
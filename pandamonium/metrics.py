@@ -0,0 +1,391 @@
+import bisect
+import re
+import threading
+import time
+import typing as tp
+
+import flask as fk
+
+from pandamonium.context import is_static_request
+
+# Bornes supérieures des intervalles des histogrammes de durées (en secondes) et de comptes (requêtes, lignes).
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+METRIC_NAME_PATTERN = re.compile('[^a-zA-Z0-9_]')
+
+
+class Histogram:
+    """Classe représentant un histogramme cumulatif au sens de Prometheus : nombre d'observations inférieures ou égales
+    à chaque borne, somme et nombre total des observations."""
+
+    def __init__(self, buckets: tp.Sequence[float]):
+        """Constructeur de la classe.
+
+        :param buckets: Bornes supérieures des intervalles, dans l'ordre croissant."""
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Ajoute une observation. Le verrou du registre doit être détenu.
+
+        :param value: Valeur observée."""
+        index = bisect.bisect_left(self.buckets, value)
+
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Renvoie, pour chaque borne (+Inf comprise), le nombre d'observations qui lui sont inférieures ou égales.
+
+        :rtype: list[tuple[str, int]]"""
+        total, samples = 0, []
+
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            samples.append((format_value(bound), total))
+
+        samples.append(('+Inf', self.count))
+        return samples
+
+
+class RequestMetrics:
+    """Classe accumulant les mesures d'une requête HTTP : requêtes SQL, temps passé en base, lignes lues, chargements
+    paresseux de fk.g et rendu des templates."""
+
+    __slots__ = ('start', 'queries', 'db_time', 'rows', 'load_time', 'loads', 'render_time', 'render_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.load_time = 0.0
+        self.loads: list[str] = []
+        self.render_time = 0.0
+        self.render_start: float | None = None
+
+    def add_load(self, name: str, duration: float):
+        """Note le chargement paresseux d'un attribut de fk.g (requêtes SQL comprises).
+
+        :param name: Nom de l'attribut chargé.
+        :param duration: Durée du chargement, en secondes."""
+        self.loads.append(name)
+        self.load_time += duration
+
+    def server_timing(self, total: float) -> str:
+        """Renvoie la valeur de l'en-tête Server-Timing décrivant la requête.
+
+        :param total: Durée totale de la requête, en secondes.
+
+        :rtype: str"""
+        timings = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"']
+
+        if self.loads:
+            timings.append(f'load;dur={self.load_time * 1000:.2f};desc="{", ".join(self.loads)}"')
+
+        if self.render_time:
+            timings.append(f'render;dur={self.render_time * 1000:.2f}')
+
+        timings.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(timings)
+
+
+class InstrumentedCursor:
+    """Classe enveloppant un curseur pour mesurer la durée de ses requêtes et compter les lignes lues. Les autres
+    attributs sont ceux du curseur enveloppé."""
+
+    def __init__(self, cursor, owner: 'InstrumentedConnection'):
+        """Constructeur de la classe.
+
+        :param cursor: Curseur enveloppé.
+        :param owner: Connexion instrumentée ayant créé le curseur."""
+        self._cursor = cursor
+        self._owner = owner
+
+    def execute(self, operation: str, params: tp.Sequence | None = None):
+        start = time.perf_counter()
+
+        try:
+            return self._cursor.execute(operation, params)
+        finally:
+            self._owner.count_query(operation, params, time.perf_counter() - start)
+
+    def executemany(self, operation: str, seq_params: tp.Iterable[tp.Sequence]):
+        start = time.perf_counter()
+
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            self._owner.count_query(operation, None, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._owner.count_rows(0 if row is None else 1, time.perf_counter() - start)
+        return row
+
+    def fetchmany(self, size: int = 1) -> list:
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._owner.count_rows(len(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchall(self) -> list:
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._owner.count_rows(len(rows), time.perf_counter() - start)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+
+class InstrumentedConnection:
+    """Classe enveloppant une connexion pour que ses curseurs soient instrumentés : leurs requêtes alimentent les
+    mesures de la requête HTTP en cours et/ou le journal des requêtes lentes. La connexion enveloppée, seule connue du
+    pool, reste accessible via l'attribut connection."""
+
+    def __init__(self, connection, metrics: RequestMetrics | None = None, query_log=None):
+        """Constructeur de la classe.
+
+        :param connection: Connexion enveloppée.
+        :param metrics: Mesures de la requête HTTP en cours, ou None.
+        :param query_log: Journal des requêtes lentes (slow_queries.SlowQueryLog), ou None."""
+        self.connection = connection
+        self.metrics = metrics
+        self.query_log = query_log
+        # Requêtes lentes dont l'EXPLAIN attend que la connexion soit libre (les curseurs non bufferisés de
+        # mysql.connector interdisent toute autre requête tant que leurs lignes n'ont pas été lues).
+        self.slow_queries: list[tuple[str, tp.Sequence | None, float, str | None]] = []
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self.connection.cursor(*args, **kwargs), self)
+
+    def count_query(self, operation: str, params: tp.Sequence | None, duration: float):
+        """Note une requête exécutée par l'un des curseurs.
+
+        :param operation: Requête exécutée.
+        :param params: Valeurs de ses paramètres (None pour executemany).
+        :param duration: Durée de l'exécution, en secondes."""
+        if self.metrics is not None:
+            self.metrics.queries += 1
+            self.metrics.db_time += duration
+
+        if self.query_log is not None and self.query_log.record(operation, duration):
+            endpoint = fk.request.endpoint if fk.has_request_context() else None
+            self.slow_queries.append((operation, params, duration, endpoint))
+
+    def count_rows(self, rows: int, duration: float):
+        """Note des lignes lues par l'un des curseurs, ainsi que la durée de leur lecture (les pilotes non bufferisés
+        lisent les lignes à la demande).
+
+        :param rows: Nombre de lignes lues.
+        :param duration: Durée de la lecture, en secondes."""
+        if self.metrics is not None:
+            self.metrics.rows += rows
+            self.metrics.db_time += duration
+
+    def finish(self):
+        """Journalise les requêtes lentes, avant que la connexion ne soit rendue au pool."""
+        slow_queries, self.slow_queries = self.slow_queries, []
+
+        for operation, params, duration, endpoint in slow_queries:
+            self.query_log.capture(self.connection, operation, params, duration, endpoint)
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self.connection, name)
+
+
+class MetricsRegistry:
+    """Classe agrégeant les mesures des requêtes par endpoint, sous forme d'histogrammes, et les statistiques des
+    composants du processus, puis les exposant au format texte de Prometheus.
+
+    Chaque processus (worker) a son propre registre : Prometheus doit interroger chacun d'eux, ou leurs mesures doivent
+    être sommées par le proxy qui les expose."""
+
+    def __init__(self, prefix: str = 'pandamonium'):
+        """Constructeur de la classe.
+
+        :param prefix: Préfixe du nom de toutes les métriques."""
+        self.prefix = prefix
+        self.enabled = False
+        self.server_timing = True
+
+        self.__histograms: dict[str, dict[tuple[tuple[str, str], ...], Histogram]] = {}
+        self.__requests: dict[tuple[tuple[str, str], ...], int] = {}
+        self.__stats: dict[str, tp.Callable[[], dict[str, int | float]]] = {}
+        self.__lock = threading.Lock()
+
+    def register_stats(self, name: str, stats: tp.Callable[[], dict[str, int | float]]):
+        """Enregistre une fonction renvoyant les statistiques d'un composant (méthode stats() d'un pool, d'un cache...),
+        exposées comme des jauges <prefix>_<name>_<clé> à chaque lecture du registre.
+
+        :param name: Nom du composant.
+        :param stats: Fonction sans argument renvoyant un dictionnaire clé -> valeur numérique."""
+        self.__stats[name] = stats
+
+    def observe_request(self, endpoint: str, method: str, status: int, metrics: RequestMetrics, total: float):
+        """Ajoute les mesures d'une requête terminée aux histogrammes de son endpoint.
+
+        :param endpoint: Endpoint de la requête.
+        :param method: Méthode HTTP.
+        :param status: Code de statut de la réponse.
+        :param metrics: Mesures de la requête.
+        :param total: Durée totale de la requête, en secondes."""
+        labels = (('endpoint', endpoint), ('method', method))
+
+        with self.__lock:
+            key = (*labels, ('status', str(status)))
+            self.__requests[key] = self.__requests.get(key, 0) + 1
+
+            for name, buckets, value in (
+                ('request_duration_seconds', DURATION_BUCKETS, total),
+                ('request_db_seconds', DURATION_BUCKETS, metrics.db_time),
+                ('request_queries', COUNT_BUCKETS, metrics.queries),
+                ('request_rows', COUNT_BUCKETS, metrics.rows),
+            ):
+                histograms = self.__histograms.setdefault(name, {})
+
+                if labels not in histograms:
+                    histograms[labels] = Histogram(buckets)
+
+                histograms[labels].observe(value)
+
+    def render(self) -> str:
+        """Renvoie toutes les métriques au format texte de Prometheus (version 0.0.4).
+
+        :rtype: str"""
+        lines = []
+
+        with self.__lock:
+            lines.append(f'# TYPE {self.prefix}_requests_total counter')
+            lines.extend(f'{self.prefix}_requests_total{format_labels(labels)} {count}'
+                         for labels, count in sorted(self.__requests.items()))
+
+            for name, histograms in sorted(self.__histograms.items()):
+                lines.append(f'# TYPE {self.prefix}_{name} histogram')
+
+                for labels, histogram in sorted(histograms.items()):
+                    lines.extend(f'{self.prefix}_{name}_bucket{format_labels((*labels, ("le", bound)))} {count}'
+                                 for bound, count in histogram.cumulative())
+                    lines.append(f'{self.prefix}_{name}_sum{format_labels(labels)} {format_value(histogram.sum)}')
+                    lines.append(f'{self.prefix}_{name}_count{format_labels(labels)} {histogram.count}')
+
+            stats = list(self.__stats.items())
+
+        # Les statistiques sont lues hors du verrou : chaque composant a le sien.
+        for component, read in stats:
+            for key, value in read().items():
+                if isinstance(value, (int, float)):
+                    name = METRIC_NAME_PATTERN.sub('_', f'{self.prefix}_{component}_{key}')
+                    lines.append(f'# TYPE {name} gauge')
+                    lines.append(f'{name} {format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Oublie toutes les mesures des requêtes (les statistiques enregistrées sont conservées)."""
+        with self.__lock:
+            self.__histograms.clear()
+            self.__requests.clear()
+
+
+def format_value(value: int | float) -> str:
+    """Formate une valeur numérique pour Prometheus."""
+    return str(int(value)) if isinstance(value, bool) or float(value).is_integer() else repr(float(value))
+
+
+def format_labels(labels: tp.Iterable[tuple[str, str]]) -> str:
+    """Formate des étiquettes pour Prometheus, en échappant leurs valeurs."""
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+def escape_label(value: str) -> str:
+    """Échappe la valeur d'une étiquette Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics_registry = MetricsRegistry()
+
+
+def configure_metrics(app: fk.Flask):
+    """Configure le registre des métriques du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : METRICS_ENABLED (active l'instrumentation des requêtes et l'endpoint des
+    métriques, désactivé par défaut) et METRICS_SERVER_TIMING (ajoute l'en-tête Server-Timing aux réponses, activé par
+    défaut lorsque les métriques le sont).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    metrics_registry.enabled = app.config.get('METRICS_ENABLED', False)
+    metrics_registry.server_timing = app.config.get('METRICS_SERVER_TIMING', True)
+    metrics_registry.reset()
+
+
+def init_metrics(app: fk.Flask):
+    """Installe l'instrumentation des requêtes et l'endpoint des métriques (clé de configuration METRICS_ENDPOINT,
+    /metrics par défaut) dans l'application. Doit être appelée avant l'enregistrement des blueprints, pour que les
+    mesures commencent avant tout autre traitement. Tant que les métriques sont désactivées, chaque requête ne coûte
+    qu'un test et l'endpoint répond 404.
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    @app.before_request
+    def start_request_metrics():
+        if metrics_registry.enabled and not is_static_request():
+            fk.g.request_metrics = RequestMetrics()
+
+    @app.after_request
+    def record_request_metrics(response: fk.Response) -> fk.Response:
+        metrics = fk.g.get('request_metrics')
+
+        if metrics is None:
+            return response
+
+        total = time.perf_counter() - metrics.start
+        metrics_registry.observe_request(fk.request.endpoint or '<unmatched>', fk.request.method,
+                                         response.status_code, metrics, total)
+
+        if metrics_registry.server_timing:
+            response.headers['Server-Timing'] = metrics.server_timing(total)
+
+        return response
+
+    def template_started(sender, template, context, **extra):
+        metrics = fk.g.get('request_metrics')
+
+        if metrics is not None:
+            metrics.render_start = time.perf_counter()
+
+    def template_finished(sender, template, context, **extra):
+        metrics = fk.g.get('request_metrics')
+
+        if metrics is not None and metrics.render_start is not None:
+            metrics.render_time += time.perf_counter() - metrics.render_start
+            metrics.render_start = None
+
+    # Les signaux ne gardent que des références faibles : les fonctions doivent vivre aussi longtemps que l'application.
+    app.extensions['pandamonium_metrics'] = (template_started, template_finished)
+    fk.before_render_template.connect(template_started, app)
+    fk.template_rendered.connect(template_finished, app)
+
+    def expose_metrics():
+        if not metrics_registry.enabled:
+            fk.abort(404)
+
+        return fk.Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule(app.config.get('METRICS_ENDPOINT', '/metrics'), 'metrics', expose_metrics)
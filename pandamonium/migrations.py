@@ -0,0 +1,139 @@
+import re
+
+from pandamonium.database import DatabaseError, IntegrityError, schema_statements
+from pandamonium.entities.relationship import Relationship, friendships, memberships, relations
+from pandamonium.security import is_valid_uuid
+
+CREATE_TABLE_PATTERN = re.compile(r'CREATE TABLE (\w+)\(')
+CREATE_INDEX_PATTERN = re.compile(r'CREATE INDEX \w+ ON (\w+)\(')
+
+# Anciennes colonnes contenant des chaînes d'UUIDs concaténés : (table, colonne, table de liaison, la ligne est-elle la
+# source du lien ?). users.bamboos donnait les bambous d'un utilisateur, dont il est la cible dans bamboo_members.
+LEGACY_CHAINS: tuple[tuple[str, str, Relationship, bool], ...] = (
+    ('users', 'friends', friendships, True),
+    ('users', 'relations', relations, True),
+    ('users', 'bamboos', memberships, False),
+    ('bamboos', 'members', memberships, True),
+)
+
+# Tables dont les lignes portent une colonne de version (contrôle des écritures concurrentes).
+VERSIONED_TABLES = ('users', 'bamboos')
+
+
+def table_columns(cursor, table: str) -> list[str] | None:
+    """Renvoie les noms des colonnes de la table donnée.
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param table: Nom de la table.
+
+    :rtype: list[str] | None
+    :return: Les noms des colonnes, ou None si la table n'existe pas."""
+    try:
+        cursor.execute(f'SELECT * FROM {table} LIMIT 0')
+    except DatabaseError:
+        return None
+
+    cursor.fetchall()
+    return [column[0] for column in cursor.description]
+
+
+def create_missing_tables(cursor) -> list[str]:
+    """Crée, avec leurs index, les tables de schema.sql absentes de la base de données. Les tables existantes ne sont
+    pas modifiées.
+
+    :param cursor: Curseur de la connexion à la base de données.
+
+    :rtype: list[str]
+    :return: Les noms des tables créées."""
+    created = []
+
+    for statement in schema_statements('schema.sql'):
+        if (match := CREATE_TABLE_PATTERN.match(statement)) is not None and table_columns(cursor, match[1]) is None:
+            cursor.execute(statement)
+            created.append(match[1])
+        elif (match := CREATE_INDEX_PATTERN.match(statement)) is not None and match[1] in created:
+            cursor.execute(statement)
+
+    return created
+
+
+def migrate_relationship_chains(cursor) -> int:
+    """Recopie dans les tables de liaison (user_friends, user_relations, bamboo_members) les liens stockés dans les
+    anciennes colonnes users.friends, users.relations, users.bamboos et bamboos.members, puis supprime ces colonnes. Le
+    propriétaire de chaque bambou en devient membre. Les liens déjà présents, ou visant une entité disparue, sont
+    ignorés.
+
+    :param cursor: Curseur de la connexion à la base de données.
+
+    :rtype: int
+    :return: Le nombre de liens créés."""
+    links: dict[Relationship, dict[tuple[str, str], None]] = {}
+    legacy = [(table, column, relationship, is_source) for table, column, relationship, is_source in LEGACY_CHAINS
+              if column in (table_columns(cursor, table) or ())]
+
+    for table, column, relationship, is_source in legacy:
+        cursor.execute(f'SELECT uuid, {column} FROM {table} WHERE {column} IS NOT NULL')
+
+        for uuid, chain in cursor.fetchall():
+            for linked_uuid in (chain[i:i + 36] for i in range(0, len(chain), 36)):
+                if is_valid_uuid(linked_uuid):
+                    link = (uuid, linked_uuid) if is_source else (linked_uuid, uuid)
+                    links.setdefault(relationship, {})[link] = None
+
+    if legacy:
+        cursor.execute('SELECT uuid, owner_uuid FROM bamboos')
+        links.setdefault(memberships, {}).update(dict.fromkeys(cursor.fetchall()))
+
+    created = 0
+
+    for relationship, pairs in links.items():
+        for source_uuid, target_uuid in pairs:
+            try:
+                cursor.execute(
+                    f'INSERT INTO {relationship.table}({relationship.source_column}, {relationship.target_column}, '
+                    'creation_date) VALUES (%s, %s, NULL)',
+                    (source_uuid, target_uuid)
+                )
+                created += 1
+            except IntegrityError:
+                pass
+
+    for table, column, _, _ in legacy:
+        cursor.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+
+    return created
+
+
+def add_version_columns(cursor) -> int:
+    """Ajoute la colonne version (initialisée à 0) aux tables de VERSIONED_TABLES qui en sont dépourvues.
+
+    :param cursor: Curseur de la connexion à la base de données.
+
+    :rtype: int
+    :return: Le nombre de colonnes ajoutées."""
+    added = 0
+
+    for table in VERSIONED_TABLES:
+        columns = table_columns(cursor, table)
+
+        if columns is not None and 'version' not in columns:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN version INT NOT NULL DEFAULT 0')
+            added += 1
+
+    return added
+
+
+def migrate_db(connection) -> list[tuple[str, int]]:
+    """Met à niveau une base de données créée avec un ancien schema.sql, sans perte de données : création des tables
+    manquantes, puis reprise des anciennes données. Chaque étape est sans effet sur une base déjà à jour.
+
+    :param connection: Connexion à la base de données.
+
+    :rtype: list[tuple[str, int]]
+    :return: Le nom de chaque étape et le nombre de tables ou de lignes concernées."""
+    with connection.cursor() as cursor:
+        return [
+            ('tables', len(create_missing_tables(cursor))),
+            ('relationships', migrate_relationship_chains(cursor)),
+            ('versions', add_version_columns(cursor)),
+        ]
@@ -0,0 +1,362 @@
+import threading
+import time
+import typing as tp
+import weakref
+
+import mysql.connector as connector
+import mysql.connector.abstracts as abstracts
+
+from pandamonium.concurrency import Offloaded, run_blocking
+from pandamonium.statements import StatementCachingConnection
+
+
+class PoolExhaustedError(RuntimeError):
+    """Exception levée lorsqu'aucune connexion ne s'est libérée dans le pool avant la fin du délai d'attente."""
+    pass
+
+
+class PoolClosedError(RuntimeError):
+    """Exception levée lors d'un emprunt à un pool fermé."""
+    pass
+
+
+class PooledConnection:
+    """Classe représentant une connexion gérée par un ConnectionPool, accompagnée de sa date de création."""
+
+    def __init__(self, connection: abstracts.MySQLConnectionAbstract):
+        """Constructeur de la classe.
+
+        :param connection: Connexion à la base de données."""
+        self.connection = connection
+        self.created_at = time.monotonic()
+
+    def age(self) -> float:
+        """Renvoie l'âge de la connexion, en secondes."""
+        return time.monotonic() - self.created_at
+
+
+class ConnectionPool:
+    """Classe représentant un pool de connexions à la base de données partagé par tout le processus.
+
+    Les connexions sont créées à la demande jusqu'à atteindre la taille maximale du pool. Au-delà, les emprunteurs
+    attendent qu'une connexion soit rendue, dans la limite du délai d'attente configuré. Chaque connexion empruntée est
+    vérifiée (liveness) et recyclée si elle est trop vieille. Les échanges réseau (vérification, rollback, fermeture)
+    se font toujours hors du verrou du pool : une connexion lente ne bloque pas les autres emprunteurs."""
+
+    def __init__(self,
+                 factory: tp.Callable[[], abstracts.MySQLConnectionAbstract],
+                 size: int = 10,
+                 timeout: float = 5.0,
+                 recycle: float = 3600.0):
+        """Constructeur de la classe.
+
+        :param factory: Fonction sans argument créant une nouvelle connexion à la base de données.
+        :param size: Nombre maximal de connexions ouvertes simultanément.
+        :param timeout: Délai d'attente maximal (en secondes) lors de l'emprunt d'une connexion.
+        :param recycle: Âge maximal (en secondes) d'une connexion avant qu'elle ne soit fermée puis recréée."""
+        if size < 1:
+            raise ValueError('The pool size must be at least 1.')
+
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self.__factory = factory
+        self.__idle: list[PooledConnection] = []
+        self.__borrowed: dict[int, PooledConnection] = {}
+        self.__pending = 0
+        self.__closed = False
+        self.__condition = threading.Condition()
+
+        self.__stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'exhausted': 0,
+            'created': 0,
+            'recycled': 0,
+            'discarded': 0,
+        }
+
+    def acquire(self) -> abstracts.MySQLConnectionAbstract:
+        """Emprunte une connexion au pool. Si aucune connexion n'est disponible et que le pool est plein, attend
+        qu'une connexion soit rendue.
+
+        :rtype: MySQLConnectionAbstract
+        :return: Une connexion vivante à la base de données.
+
+        :raise PoolExhaustedError: Si aucune connexion ne s'est libérée avant la fin du délai d'attente.
+        :raise PoolClosedError: Si le pool a été fermé."""
+        with self.__condition:
+            if not self.__closed and not self.__idle and self.__in_use() >= self.size:
+                self.__stats['waits'] += 1
+                start = time.monotonic()
+                available = self.__condition.wait_for(
+                    lambda: self.__closed or self.__idle or self.__in_use() < self.size,
+                    timeout=self.timeout
+                )
+                self.__stats['wait_time'] += time.monotonic() - start
+
+                if not available:
+                    self.__stats['exhausted'] += 1
+                    raise PoolExhaustedError(f'No database connection available after {self.timeout} seconds.')
+
+            if self.__closed:
+                raise PoolClosedError('The connection pool is closed.')
+
+            pooled = self.__idle.pop() if self.__idle else None
+            # La place est réservée avant de relâcher le verrou, le temps d'ouvrir ou de vérifier la connexion.
+            self.__pending += 1
+            self.__stats['checkouts'] += 1
+
+        checked_out = None
+
+        try:
+            checked_out = self.__checkout(pooled)
+        finally:
+            with self.__condition:
+                self.__pending -= 1
+
+                if checked_out is not None:
+                    self.__borrowed[id(checked_out.connection)] = checked_out
+
+                self.__condition.notify()
+
+        return checked_out.connection
+
+    def release(self, connection: abstracts.MySQLConnectionAbstract):
+        """Rend une connexion empruntée au pool. Une éventuelle transaction laissée ouverte est annulée ; la connexion
+        est fermée si cette annulation échoue ou si le pool a été fermé entre-temps. Sa vivacité n'est vérifiée qu'au
+        prochain emprunt.
+
+        :param connection: Connexion précédemment obtenue via acquire()."""
+        with self.__condition:
+            pooled = self.__borrowed.pop(id(connection), None)
+
+            if pooled is None:
+                return
+
+            # La place reste réservée pendant le rollback, effectué hors du verrou.
+            self.__pending += 1
+            closed = self.__closed
+
+        reusable = not closed and self.__reset(connection)
+
+        with self.__condition:
+            self.__pending -= 1
+            # Le pool a pu être fermé pendant le rollback.
+            reusable = reusable and not self.__closed
+
+            if reusable:
+                self.__idle.append(pooled)
+            elif not closed:
+                self.__stats['discarded'] += 1
+
+            self.__condition.notify()
+
+        if not reusable:
+            self.__close(connection)
+
+    def close(self):
+        """Ferme toutes les connexions inactives du pool. Les connexions empruntées seront fermées lors de leur
+        retour, et tout nouvel emprunt lèvera PoolClosedError."""
+        with self.__condition:
+            self.__closed = True
+            idle, self.__idle = self.__idle, []
+            self.__condition.notify_all()
+
+        for pooled in idle:
+            self.__close(pooled.connection)
+
+    def stats(self) -> dict[str, int | float]:
+        """Renvoie les compteurs du pool, utiles pour le dimensionner en fonction du nombre de workers.
+
+        :rtype: dict[str, int | float]
+        :return: Un dictionnaire contenant les compteurs d'emprunts, d'attentes, de temps d'attente cumulé,
+            d'épuisement, ainsi que le nombre de connexions ouvertes, empruntées et inactives."""
+        with self.__condition:
+            return {
+                **self.__stats,
+                'size': self.size,
+                'borrowed': self.__in_use(),
+                'idle': len(self.__idle),
+            }
+
+    def __in_use(self) -> int:
+        """Renvoie le nombre de connexions empruntées ou en cours d'ouverture."""
+        return len(self.__borrowed) + self.__pending
+
+    def __checkout(self, pooled: PooledConnection | None) -> PooledConnection:
+        """Prépare la connexion empruntée : la recycle si elle est trop vieille, la remplace si elle est morte, et en
+        ouvre une nouvelle si aucune n'était inactive.
+
+        :param pooled: Connexion inactive prise dans le pool, ou None s'il faut en ouvrir une nouvelle."""
+        if pooled is not None and pooled.age() > self.recycle:
+            self.__count('recycled')
+            self.__close(pooled.connection)
+            pooled = None
+
+        if pooled is not None and not self.__is_alive(pooled.connection):
+            self.__count('discarded')
+            self.__close(pooled.connection)
+            pooled = None
+
+        if pooled is None:
+            pooled = PooledConnection(self.__factory())
+            self.__count('created')
+
+        return pooled
+
+    def __count(self, name: str):
+        """Incrémente le compteur donné en argument."""
+        with self.__condition:
+            self.__stats[name] += 1
+
+    @staticmethod
+    def __is_alive(connection: abstracts.MySQLConnectionAbstract) -> bool:
+        """Vérifie que la connexion répond toujours."""
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def __reset(connection: abstracts.MySQLConnectionAbstract) -> bool:
+        """Annule une éventuelle transaction laissée ouverte par l'emprunteur précédent.
+
+        :rtype: bool
+        :return: False si la connexion n'a pas pu être remise à zéro (elle doit alors être fermée)."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            return False
+
+        return True
+
+    @staticmethod
+    def __close(connection: abstracts.MySQLConnectionAbstract):
+        """Ferme une connexion en ignorant les erreurs réseau."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class ThreadLocalPool:
+    """Classe représentant un ensemble de connexions à la base de données dont chacune appartient à un thread (ou à
+    une greenlet en mode eventlet/gevent) : un thread emprunte toujours la même connexion, ouverte à sa première
+    demande et fermée à sa fin. Aucun emprunteur n'attend jamais, ce qui convient aux bases embarquées (SQLite) dont
+    les connexions ne coûtent presque rien à ouvrir et ne doivent pas être partagées par des threads concurrents.
+
+    Expose la même interface que ConnectionPool."""
+
+    def __init__(self, factory: tp.Callable[[], abstracts.MySQLConnectionAbstract]):
+        """Constructeur de la classe.
+
+        :param factory: Fonction sans argument créant une nouvelle connexion à la base de données."""
+        self.__factory = factory
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        # Références faibles : la connexion d'un thread terminé est fermée avec lui par le ramasse-miettes.
+        self.__connections: weakref.WeakSet = weakref.WeakSet()
+        self.__borrowed = 0
+
+        self.__stats = {
+            'checkouts': 0,
+            'created': 0,
+            'discarded': 0,
+        }
+
+    def acquire(self) -> abstracts.MySQLConnectionAbstract:
+        """Renvoie la connexion du thread courant, en l'ouvrant si besoin.
+
+        :rtype: MySQLConnectionAbstract
+        :return: Une connexion à la base de données."""
+        connection = getattr(self.__local, 'connection', None)
+
+        if connection is not None and not connection.is_connected():
+            self.__count('discarded')
+            connection = None
+
+        if connection is None:
+            connection = self.__factory()
+            self.__local.connection = connection
+            self.__count('created')
+
+            with self.__lock:
+                self.__connections.add(connection)
+
+        with self.__lock:
+            self.__stats['checkouts'] += 1
+            self.__borrowed += 1
+
+        return connection
+
+    def release(self, connection: abstracts.MySQLConnectionAbstract):
+        """Signale que le thread courant n'utilise plus sa connexion. Celle-ci reste ouverte pour son prochain emprunt.
+
+        :param connection: Connexion précédemment obtenue via acquire()."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            pass
+
+        with self.__lock:
+            self.__borrowed -= 1
+
+    def close(self):
+        """Ferme toutes les connexions encore ouvertes, y compris celles des autres threads."""
+        with self.__lock:
+            connections = list(self.__connections)
+            self.__connections.clear()
+
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, int | float]:
+        """Renvoie les compteurs du pool.
+
+        :rtype: dict[str, int | float]
+        :return: Un dictionnaire contenant les compteurs d'emprunts, de connexions ouvertes et écartées, ainsi que le
+            nombre de connexions ouvertes et empruntées."""
+        with self.__lock:
+            return {
+                **self.__stats,
+                'open': len(self.__connections),
+                'borrowed': self.__borrowed,
+            }
+
+    def __count(self, name: str):
+        """Incrémente le compteur donné en argument."""
+        with self.__lock:
+            self.__stats[name] += 1
+
+
+def mysql_factory(credentials: dict[str, tp.Any],
+                  offload: bool = False,
+                  statement_cache_size: int = 0) -> tp.Callable[[], abstracts.MySQLConnectionAbstract]:
+    """Renvoie une fonction créant une nouvelle connexion MySQL en mode autocommit à partir des identifiants donnés.
+
+    :param credentials: Identifiants de connexion à la base de données.
+    :param offload: Exécuter tous les appels à la connexion et à ses curseurs dans le pool de threads de run_blocking,
+        pour les pilotes dont les E/S ne rendent pas la main à la boucle d'événements.
+    :param statement_cache_size: Nombre maximal de requêtes préparées gardées par connexion, pour les curseurs créés
+        avec prepared=True. Si 0, ces curseurs sont de simples curseurs texte.
+
+    :raise RuntimeError: Si la connexion n'a pas pu être établie."""
+    def factory():
+        connection = run_blocking(connector.connect, **credentials) if offload else connector.connect(**credentials)
+        connection.autocommit = True
+
+        if not connection.is_connected():
+            raise RuntimeError('Unable to connect to the database.')
+
+        print('[PANDAMONIUM] Successfully connected to database!')
+        return StatementCachingConnection(Offloaded(connection) if offload else connection, statement_cache_size)
+
+    return factory
@@ -0,0 +1,336 @@
+import math
+import threading
+import time
+
+import flask as fk
+
+
+class TimerWheel:
+    """Classe représentant une roue temporelle : les échéances sont rangées dans des cases correspondant chacune à un
+    intervalle de tick secondes. Repousser une échéance ou en faire expirer une coûte O(1), quel que soit le nombre
+    d'échéances suivies : à chaque tick, seule la case courante est examinée.
+
+    Les anciennes positions d'une échéance repoussée ne sont pas retirées de leur case : elles sont simplement ignorées
+    lorsque cette case est examinée."""
+
+    def __init__(self, ttl: float, tick: float = 1.0):
+        """Constructeur de la classe.
+
+        :param ttl: Délai (en secondes) après lequel une clé non repoussée expire.
+        :param tick: Durée (en secondes) couverte par chaque case de la roue."""
+        self.ttl = ttl
+        self.tick = tick
+
+        # Deux cases de plus que nécessaire : une échéance ne fait jamais le tour complet de la roue.
+        self.__slots: list[set] = [set() for _ in range(math.ceil(ttl / tick) + 2)]
+        self.__deadlines: dict = {}
+        self.__current: int | None = None
+
+    def schedule(self, key, now: float):
+        """Fixe (ou repousse) l'échéance de la clé donnée à now + ttl.
+
+        :param key: Clé suivie.
+        :param now: Instant présent (time.monotonic())."""
+        if self.__current is None:
+            self.__current = self.__tick_of(now) - 1
+
+        deadline = now + self.ttl
+        self.__deadlines[key] = deadline
+        self.__slots[self.__tick_of(deadline) % len(self.__slots)].add(key)
+
+    def cancel(self, key):
+        """Arrête de suivre la clé donnée.
+
+        :param key: Clé suivie."""
+        self.__deadlines.pop(key, None)
+
+    def advance(self, now: float) -> list:
+        """Examine les cases des ticks entièrement écoulés à l'instant donné.
+
+        :param now: Instant présent (time.monotonic()).
+
+        :rtype: list
+        :return: Les clés dont l'échéance est passée. Elles ne sont plus suivies."""
+        target = self.__tick_of(now)
+
+        if self.__current is None:
+            self.__current = target - 1
+
+        slots_count = len(self.__slots)
+        expired = []
+
+        # Au-delà d'un tour complet, chaque case a déjà été examinée une fois : inutile de continuer.
+        for tick in range(max(self.__current + 1, target - slots_count), target):
+            slot = self.__slots[tick % slots_count]
+            kept = set()
+
+            for key in slot:
+                deadline = self.__deadlines.get(key)
+
+                if deadline is None:
+                    continue
+
+                deadline_tick = self.__tick_of(deadline)
+
+                if deadline_tick <= tick:
+                    del self.__deadlines[key]
+                    expired.append(key)
+                elif deadline_tick % slots_count == tick % slots_count:
+                    kept.add(key)
+
+            slot.clear()
+            slot.update(kept)
+
+        self.__current = max(self.__current, target - 1)
+        return expired
+
+    def __len__(self):
+        """Renvoie le nombre de clés suivies."""
+        return len(self.__deadlines)
+
+    def __tick_of(self, instant: float) -> int:
+        """Renvoie le numéro du tick contenant l'instant donné."""
+        return int(instant // self.tick)
+
+
+class PresenceSession:
+    """Classe représentant une connexion Socket.IO suivie par le registre de présence."""
+
+    __slots__ = ('user_uuid', 'scopes')
+
+    def __init__(self, user_uuid: str):
+        """Constructeur de la classe.
+
+        :param user_uuid: UUID de l'utilisateur connecté."""
+        self.user_uuid = user_uuid
+        self.scopes: tuple[str, ...] = ()
+
+
+class PresenceRegistry:
+    """Classe représentant le registre des utilisateurs en ligne, tenu en mémoire par chaque processus.
+
+    Chaque connexion (sid) est rattachée à des portées : l'UUID du bambou et celui de la branche qu'elle affiche. Pour
+    chaque portée, le registre compte les connexions de chaque utilisateur (un utilisateur peut avoir plusieurs
+    onglets ouverts) : savoir qui est en ligne dans une portée coûte donc O(k) pour k utilisateurs présents. Une
+    connexion qui n'envoie plus de battement de cœur expire via une roue temporelle.
+
+    Les changements sont accumulés par portée et ne sont publiés que sous forme de différences : un utilisateur parti
+    puis revenu entre deux publications n'apparaît pas."""
+
+    def __init__(self, ttl: float = 60.0, tick: float = 1.0):
+        """Constructeur de la classe.
+
+        :param ttl: Délai (en secondes) sans battement de cœur après lequel une connexion expire.
+        :param tick: Précision (en secondes) de l'expiration."""
+        self.__lock = threading.Lock()
+        self.__reset(ttl, tick)
+
+    def configure(self, ttl: float, tick: float):
+        """Change les délais du registre, en oubliant toutes les connexions suivies.
+
+        :param ttl: Délai (en secondes) sans battement de cœur après lequel une connexion expire.
+        :param tick: Précision (en secondes) de l'expiration."""
+        with self.__lock:
+            self.__reset(ttl, tick)
+
+    def connect(self, sid: str, user_uuid: str, name: str, now: float | None = None):
+        """Enregistre une nouvelle connexion.
+
+        :param sid: Identifiant de la connexion Socket.IO.
+        :param user_uuid: UUID de l'utilisateur connecté.
+        :param name: Nom affiché de l'utilisateur.
+        :param now: Instant présent (time.monotonic() par défaut)."""
+        with self.__lock:
+            self.__remove(sid)
+            self.__sessions[sid] = PresenceSession(user_uuid)
+            self.__names[user_uuid] = name
+            self.__wheel.schedule(sid, time.monotonic() if now is None else now)
+
+    def locate(self, sid: str, *scopes: str, now: float | None = None) -> bool:
+        """Rattache une connexion aux portées données (bambou, branche), à la place des précédentes.
+
+        :param sid: Identifiant de la connexion Socket.IO.
+        :param scopes: UUIDs des portées.
+        :param now: Instant présent (time.monotonic() par défaut).
+
+        :rtype: bool
+        :return: True si la connexion est suivie, False sinon."""
+        with self.__lock:
+            session = self.__sessions.get(sid)
+
+            if session is None:
+                return False
+
+            self.__leave(session)
+            session.scopes = tuple(scope for scope in scopes if scope)
+            self.__enter(session)
+            self.__wheel.schedule(sid, time.monotonic() if now is None else now)
+            return True
+
+    def heartbeat(self, sid: str, now: float | None = None) -> bool:
+        """Repousse l'expiration d'une connexion.
+
+        :param sid: Identifiant de la connexion Socket.IO.
+        :param now: Instant présent (time.monotonic() par défaut).
+
+        :rtype: bool
+        :return: True si la connexion est suivie, False si elle a déjà expiré."""
+        with self.__lock:
+            if sid not in self.__sessions:
+                return False
+
+            self.__wheel.schedule(sid, time.monotonic() if now is None else now)
+            return True
+
+    def disconnect(self, sid: str):
+        """Oublie une connexion.
+
+        :param sid: Identifiant de la connexion Socket.IO."""
+        with self.__lock:
+            self.__remove(sid)
+
+    def expire(self, now: float | None = None) -> list[str]:
+        """Oublie les connexions dont le dernier battement de cœur est trop ancien.
+
+        :param now: Instant présent (time.monotonic() par défaut).
+
+        :rtype: list[str]
+        :return: Les identifiants des connexions expirées."""
+        with self.__lock:
+            expired = self.__wheel.advance(time.monotonic() if now is None else now)
+
+            for sid in expired:
+                self.__remove(sid)
+
+            return expired
+
+    def online(self, scope: str) -> list[dict[str, str]]:
+        """Renvoie les utilisateurs en ligne dans la portée donnée.
+
+        :param scope: UUID du bambou ou de la branche.
+
+        :rtype: list[dict[str, str]]
+        :return: Les utilisateurs en ligne, sous la forme {'uuid': ..., 'name': ...}."""
+        with self.__lock:
+            return [self.__describe(user_uuid) for user_uuid in self.__scopes.get(scope, ())]
+
+    def drain(self) -> dict[str, dict[str, list[dict[str, str]]]]:
+        """Renvoie puis oublie les changements accumulés depuis l'appel précédent.
+
+        :rtype: dict[str, dict[str, list[dict[str, str]]]]
+        :return: Pour chaque portée ayant réellement changé, les utilisateurs arrivés ('joined') et partis ('left')."""
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+            diffs = {}
+
+            for scope, initial_states in pending.items():
+                online = self.__scopes.get(scope, {})
+                joined = [self.__describe(user) for user, was in initial_states.items() if not was and user in online]
+                left = [self.__describe(user) for user, was in initial_states.items() if was and user not in online]
+
+                if joined or left:
+                    diffs[scope] = {'joined': joined, 'left': left}
+
+            self.__forget_names()
+            return diffs
+
+    def __len__(self):
+        """Renvoie le nombre de connexions suivies."""
+        return len(self.__sessions)
+
+    def __reset(self, ttl: float, tick: float):
+        """Vide le registre et recrée sa roue temporelle."""
+        self.__sessions: dict[str, PresenceSession] = {}
+        self.__scopes: dict[str, dict[str, int]] = {}
+        self.__names: dict[str, str] = {}
+        self.__pending: dict[str, dict[str, bool]] = {}
+        self.__wheel = TimerWheel(ttl, tick)
+
+    def __remove(self, sid: str):
+        """Oublie une connexion. Le verrou doit être détenu."""
+        session = self.__sessions.pop(sid, None)
+        self.__wheel.cancel(sid)
+
+        if session is not None:
+            self.__leave(session)
+
+    def __enter(self, session: PresenceSession):
+        """Ajoute la connexion aux compteurs de ses portées. Le verrou doit être détenu."""
+        for scope in session.scopes:
+            users = self.__scopes.setdefault(scope, {})
+
+            if session.user_uuid not in users:
+                self.__mark(scope, session.user_uuid, False)
+
+            users[session.user_uuid] = users.get(session.user_uuid, 0) + 1
+
+    def __leave(self, session: PresenceSession):
+        """Retire la connexion des compteurs de ses portées. Le verrou doit être détenu."""
+        for scope in session.scopes:
+            users = self.__scopes[scope]
+            users[session.user_uuid] -= 1
+
+            if users[session.user_uuid] == 0:
+                self.__mark(scope, session.user_uuid, True)
+                del users[session.user_uuid]
+
+                if not users:
+                    del self.__scopes[scope]
+
+    def __mark(self, scope: str, user_uuid: str, was_online: bool):
+        """Note l'état d'un utilisateur dans une portée avant son premier changement depuis la dernière publication."""
+        self.__pending.setdefault(scope, {}).setdefault(user_uuid, was_online)
+
+    def __describe(self, user_uuid: str) -> dict[str, str]:
+        """Renvoie la description publiée d'un utilisateur."""
+        return {'uuid': user_uuid, 'name': self.__names.get(user_uuid, '')}
+
+    def __forget_names(self):
+        """Oublie les noms des utilisateurs n'ayant plus aucune connexion. Le verrou doit être détenu."""
+        connected = {session.user_uuid for session in self.__sessions.values()}
+
+        for user_uuid in [user_uuid for user_uuid in self.__names if user_uuid not in connected]:
+            del self.__names[user_uuid]
+
+
+presence = PresenceRegistry()
+
+
+def configure_presence(app: fk.Flask):
+    """Configure le registre de présence du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : PRESENCE_TTL (délai sans battement de cœur après lequel une connexion expire, en
+    secondes) et PRESENCE_TICK (intervalle entre deux publications des changements, qui est aussi la précision de
+    l'expiration, en secondes).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    presence.configure(app.config.get('PRESENCE_TTL', 60.0), app.config.get('PRESENCE_TICK', 1.0))
+
+
+_publisher_started = False
+_publisher_lock = threading.Lock()
+
+
+def start_publisher(socket, interval: float):
+    """Démarre, une seule fois par processus, la tâche de fond qui fait expirer les connexions silencieuses puis publie
+    les différences de présence dans la room de chaque portée concernée (événement 'presence').
+
+    :param socket: L'instance de flask_socketio.SocketIO.
+    :param interval: Intervalle (en secondes) entre deux publications."""
+    global _publisher_started
+
+    with _publisher_lock:
+        if _publisher_started:
+            return
+
+        _publisher_started = True
+
+    def publish():
+        while True:
+            socket.sleep(interval)
+            presence.expire()
+
+            for scope, diff in presence.drain().items():
+                socket.emit('presence', {'scope': scope, **diff}, to=scope)
+
+    socket.start_background_task(publish)
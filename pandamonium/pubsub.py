@@ -0,0 +1,341 @@
+import os
+import socket
+import struct
+import threading
+import time
+import typing as tp
+
+import flask as fk
+import socketio
+
+from pandamonium.concurrency import current_mode
+
+FRAME_HEADER = struct.Struct('!I')
+
+PUBLISHER = b'P'
+SUBSCRIBER = b'S'
+
+
+def send_frame(connection: socket.socket, payload: bytes):
+    """Envoie une trame (taille sur 4 octets suivie du contenu) sur la connexion donnée.
+
+    :param connection: Connexion au broker.
+    :param payload: Contenu de la trame."""
+    connection.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def recv_exactly(connection: socket.socket, size: int) -> bytes | None:
+    """Lit exactement size octets sur la connexion donnée.
+
+    :param connection: Connexion au broker.
+    :param size: Nombre d'octets à lire.
+
+    :rtype: bytes | None
+    :return: Les octets lus, ou None si la connexion a été fermée entre-temps."""
+    chunks = []
+
+    while size > 0:
+        chunk = connection.recv(size)
+
+        if not chunk:
+            return None
+
+        chunks.append(chunk)
+        size -= len(chunk)
+
+    return b''.join(chunks)
+
+
+def recv_frame(connection: socket.socket) -> bytes | None:
+    """Lit une trame envoyée via send_frame sur la connexion donnée.
+
+    :param connection: Connexion au broker.
+
+    :rtype: bytes | None
+    :return: Le contenu de la trame, ou None si la connexion a été fermée."""
+    header = recv_exactly(connection, FRAME_HEADER.size)
+
+    if header is None:
+        return None
+
+    return recv_exactly(connection, FRAME_HEADER.unpack(header)[0])
+
+
+def socket_path(url: str) -> str:
+    """Renvoie le chemin du socket UNIX désigné par une URL de la forme unix:///chemin/du/socket.
+
+    :param url: URL du broker.
+
+    :raise ValueError: Si l'URL ne désigne pas un socket UNIX."""
+    if not url.startswith('unix://'):
+        raise ValueError(f"Unexpected message queue URL: '{url}'")
+
+    return url[len('unix://'):]
+
+
+class Broker:
+    """Classe représentant un broker de publication/abonnement local, écoutant sur un socket UNIX.
+
+    Chaque client se présente en envoyant un octet : PUBLISHER ou SUBSCRIBER. Toute trame reçue d'un client est
+    retransmise telle quelle à tous les abonnés, y compris à l'émetteur s'il est aussi abonné. Le broker remplace un
+    service externe (Redis, RabbitMQ...) lorsque tous les processus tournent sur la même machine."""
+
+    def __init__(self, path: str):
+        """Constructeur de la classe.
+
+        :param path: Chemin du socket UNIX sur lequel écouter."""
+        self.path = path
+
+        self.__server: socket.socket | None = None
+        self.__subscribers: dict[socket.socket, threading.Lock] = {}
+        self.__publishers: set[socket.socket] = set()
+        self.__lock = threading.Lock()
+        self.__closed = threading.Event()
+
+    def start(self) -> 'Broker':
+        """Ouvre le socket d'écoute puis accepte les clients dans un thread dédié.
+
+        :rtype: Broker
+        :return: Le broker lui-même."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__server.bind(self.path)
+        self.__server.listen()
+
+        threading.Thread(target=self.__accept, name='pubsub-broker', daemon=True).start()
+        return self
+
+    def close(self):
+        """Ferme le socket d'écoute et les connexions de tous les clients."""
+        self.__closed.set()
+
+        if self.__server is not None:
+            # Comme pour les clients, shutdown réveille le thread bloqué dans accept.
+            try:
+                self.__server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            self.__server.close()
+
+        with self.__lock:
+            clients = [*self.__subscribers, *self.__publishers]
+            self.__subscribers.clear()
+            self.__publishers.clear()
+
+        for client in clients:
+            # shutdown réveille le thread bloqué en lecture sur la connexion, ce que close ne fait pas.
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+            client.close()
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __accept(self):
+        """Boucle acceptant les nouveaux clients."""
+        while not self.__closed.is_set():
+            try:
+                connection, _ = self.__server.accept()
+            except OSError:
+                return
+
+            if self.__closed.is_set():
+                connection.close()
+                return
+
+            threading.Thread(target=self.__serve, args=(connection,), daemon=True).start()
+
+    def __serve(self, connection: socket.socket):
+        """Gère un client : enregistre les abonnés, retransmet les trames des éditeurs.
+
+        :param connection: Connexion du client."""
+        role = recv_exactly(connection, 1)
+
+        if role == SUBSCRIBER:
+            with self.__lock:
+                self.__subscribers[connection] = threading.Lock()
+
+            # Un abonné n'envoie rien : la lecture ne sert qu'à détecter sa déconnexion.
+            try:
+                recv_exactly(connection, 1)
+            except OSError:
+                pass
+
+            self.__unsubscribe(connection)
+            return
+
+        if role == PUBLISHER:
+            with self.__lock:
+                self.__publishers.add(connection)
+
+            try:
+                while (payload := recv_frame(connection)) is not None:
+                    self.__broadcast(payload)
+            except OSError:
+                pass
+
+            with self.__lock:
+                self.__publishers.discard(connection)
+
+        connection.close()
+
+    def __broadcast(self, payload: bytes):
+        """Retransmet une trame à tous les abonnés, en oubliant ceux dont la connexion est rompue.
+
+        :param payload: Contenu de la trame."""
+        with self.__lock:
+            subscribers = list(self.__subscribers.items())
+
+        for subscriber, lock in subscribers:
+            try:
+                with lock:
+                    send_frame(subscriber, payload)
+            except OSError:
+                self.__unsubscribe(subscriber)
+
+    def __unsubscribe(self, connection: socket.socket):
+        """Retire un abonné et ferme sa connexion.
+
+        :param connection: Connexion de l'abonné."""
+        with self.__lock:
+            self.__subscribers.pop(connection, None)
+
+        connection.close()
+
+
+class UnixSocketManager(socketio.PubSubManager):
+    """Gestionnaire de clients Socket.IO partageant ses événements (emits, rooms...) avec ceux des autres processus via
+    un Broker local. À utiliser avec une URL de la forme unix:///chemin/du/socket.
+
+    Si le broker s'arrête ou redémarre, l'abonnement est rouvert dès qu'il est de nouveau joignable, après des attentes
+    doublant à chaque échec (de retry_delay à max_retry_delay secondes). Les événements publiés entre-temps sont
+    perdus."""
+
+    name = 'unix'
+
+    def __init__(self,
+                 url: str,
+                 channel: str = 'socketio',
+                 write_only: bool = False,
+                 logger=None,
+                 json=None,
+                 retry_delay: float = 1.0,
+                 max_retry_delay: float = 60.0):
+        """Constructeur de la classe.
+
+        :param url: URL du broker, de la forme unix:///chemin/du/socket.
+        :param channel: Canal sur lequel les processus échangent leurs événements.
+        :param write_only: Ne faire qu'émettre des événements, sans en recevoir.
+        :param logger: Logger à utiliser. Si None, celui du serveur est utilisé.
+        :param json: Module JSON à utiliser si write_only vaut True.
+        :param retry_delay: Attente (en secondes) avant la première tentative de reconnexion au broker.
+        :param max_retry_delay: Attente maximale (en secondes) entre deux tentatives de reconnexion."""
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = socket_path(url)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.__publisher: socket.socket | None = None
+        self.__publisher_lock = threading.Lock()
+
+    def _publish(self, data: tp.Any):
+        """Publie un événement à destination de tous les processus (y compris celui-ci, qui l'ignore)."""
+        payload = self.json.dumps({'channel': self.channel, 'data': data}).encode()
+
+        with self.__publisher_lock:
+            # La connexion est ouverte paresseusement, donc dans le processus qui l'utilise (après un éventuel fork).
+            for attempt in range(2):
+                if self.__publisher is None:
+                    self.__publisher = self.__connect(PUBLISHER)
+
+                try:
+                    send_frame(self.__publisher, payload)
+                    return
+                except OSError:
+                    self.__publisher.close()
+                    self.__publisher = None
+
+                    if attempt == 1:
+                        raise
+
+    def _listen(self) -> tp.Iterator[tp.Any]:
+        """Renvoie un à un les événements publiés sur le canal, par n'importe quel processus. La connexion au broker est
+        rouverte chaque fois qu'elle est perdue : l'itération ne se termine jamais d'elle-même."""
+        retry_delay = self.retry_delay
+
+        while True:
+            try:
+                subscriber = self.__connect(SUBSCRIBER)
+            except OSError as exception:
+                self._get_logger().error('Cannot connect to the pubsub broker at %s (%s), retrying in %s s',
+                                         self.path, exception, retry_delay)
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                continue
+
+            retry_delay = self.retry_delay
+
+            try:
+                yield from self.__receive(subscriber)
+            except OSError as exception:
+                self._get_logger().error('Lost the pubsub broker at %s (%s), reconnecting', self.path, exception)
+            else:
+                self._get_logger().warning('Pubsub broker at %s closed the connection, reconnecting', self.path)
+            finally:
+                subscriber.close()
+
+    def __receive(self, subscriber: socket.socket) -> tp.Iterator[tp.Any]:
+        """Renvoie un à un les événements du canal reçus sur la connexion donnée, jusqu'à sa fermeture.
+
+        :param subscriber: Connexion d'abonné au broker."""
+        while True:
+            payload = recv_frame(subscriber)
+
+            if payload is None:
+                return
+
+            message = self.json.loads(payload)
+
+            if isinstance(message, dict) and message.get('channel') == self.channel:
+                yield message['data']
+
+    def __connect(self, role: bytes) -> socket.socket:
+        """Ouvre une connexion au broker avec le rôle donné.
+
+        :param role: PUBLISHER ou SUBSCRIBER."""
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.path)
+        connection.sendall(role)
+        return connection
+
+
+def socketio_options(app: fk.Flask) -> dict[str, tp.Any]:
+    """Renvoie les options à passer à SocketIO pour l'application donnée.
+
+    Clés de configuration utilisées : SOCKETIO_MESSAGE_QUEUE (URL du service de publication/abonnement partagé par les
+    processus : unix:///chemin pour le Broker local, ou toute URL acceptée par flask_socketio, comme redis://...) et
+    SOCKETIO_TRANSPORTS (transports autorisés, par exemple ['websocket'] lorsque plusieurs processus se partagent le
+    port sans affinité de session). Le mode asynchrone de SocketIO suit celui appliqué par patch_from_environment.
+
+    :param fk.Flask app: L'instance de l'application Flask.
+
+    :rtype: dict[str, tp.Any]
+    :return: Les options de SocketIO."""
+    options = {'async_mode': current_mode()}
+    url = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+
+    if url is not None and url.startswith('unix://'):
+        options['client_manager'] = UnixSocketManager(url)
+    elif url is not None:
+        options['message_queue'] = url
+
+    if app.config.get('SOCKETIO_TRANSPORTS') is not None:
+        options['transports'] = app.config['SOCKETIO_TRANSPORTS']
+
+    return options
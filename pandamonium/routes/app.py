@@ -1,24 +1,18 @@
 import flask as fk
 import flask_socketio as sock
 
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.branch import Branch
 from pandamonium.entities.message import Message
 from pandamonium.entities.user import User
+from pandamonium.presence import presence, start_publisher
 from pandamonium.routes.auth import login_required
 from pandamonium.routes import bamboo
+from pandamonium.timeline import MESSAGE_ENTRY, Entry, timelines
 
 blueprint = fk.Blueprint('app', __name__, url_prefix='/app')
 
-
-@blueprint.before_app_request
-def before_request():
-    """Fonction qui charge les données de l'utilisateur à partir de son nom stocké dans la session du client. Celle-ci
-    s'exécute avant de charger une quelconque page du blueprint courant."""
-    username = fk.session.get('username')
-
-    if username is None:
-        fk.g.user = None
-    else:
-        fk.g.user = User.fetch_by(username=username)
+FEED_PAGE_SIZE = 30
 
 
 blueprint.register_blueprint(bamboo.blueprint)
@@ -28,22 +22,169 @@ blueprint.register_blueprint(bamboo.blueprint)
 @blueprint.route('/feed')
 @login_required
 def feed():
-    """Retourne le feed de l'utilisateur."""
-    return fk.render_template('app/feed.html')
+    """Retourne le feed de l'utilisateur : les derniers messages et événements de ses bambous et de ses amis, lus dans
+    son fil d'actualité précalculé.
+
+    Paramètre de la requête : before (curseur renvoyé par la page précédente, absent pour la première page)."""
+    try:
+        before = bamboo.decode_history_cursor(fk.request.args.get('before'))
+    except ValueError:
+        fk.abort(400)
+
+    entries = timelines.read(fk.g.user.get_column('uuid'), before, FEED_PAGE_SIZE)
+    last = entries[-1] if len(entries) == FEED_PAGE_SIZE else None
+
+    return fk.render_template(
+        'app/feed.html',
+        entries=hydrate_entries(entries),
+        next=f'{last[0].isoformat()}_{last[1]}' if last is not None else None
+    )
+
+
+def hydrate_entries(entries: list[Entry]) -> list[dict]:
+    """Charge les messages, utilisateurs et bambous cités par des entrées du fil d'actualité, en une requête par
+    table. Les entrées dont le message ou le bambou a été supprimé sont ignorées.
+
+    :param entries: Entrées renvoyées par Timelines.read.
+
+    :rtype: list[dict]"""
+    messages = {message.get_column('uuid'): message
+                for message in Message.fetch_many(subject for _, _, _, kind, subject, _ in entries
+                                                  if kind == MESSAGE_ENTRY)}
+    users = {user.get_column('uuid'): user
+             for user in User.fetch_many(actor for _, _, actor, _, _, _ in entries if actor is not None)}
+    bamboos = {bamboo_.get_column('uuid'): bamboo_
+               for bamboo_ in Bamboo.fetch_many(bamboo_uuid for *_, bamboo_uuid in entries if bamboo_uuid is not None)}
+    hydrated = []
+
+    for created, _, actor, kind, subject, bamboo_uuid in entries:
+        if kind == MESSAGE_ENTRY and subject not in messages or bamboo_uuid is not None and bamboo_uuid not in bamboos:
+            continue
+
+        hydrated.append({
+            'kind': kind,
+            'created': created,
+            'actor': display_name(users[actor]) if actor in users else None,
+            'bamboo': bamboos.get(bamboo_uuid),
+            'message': messages.get(subject),
+        })
+
+    return hydrated
 
 
 def register_events(socket: sock.SocketIO):
     """Enregistre tous les events de messagerie existants dans l'application PANDAMONIUM.
 
     :param sock.SocketIO socket: L'instance de l'application Flask SocketIO."""
+    socket.on_event('connect', user_connected)
+    socket.on_event('disconnect', user_disconnected)
     socket.on_event('user_logged', user_logged)
+    socket.on_event('heartbeat', heartbeat)
+    socket.on_event('who_is_online', who_is_online)
+    socket.on_event('join_branch', join_branch)
     socket.on_event('user_message', user_message)
 
 
+def user_connected(auth=None):
+    """Enregistre la nouvelle connexion dans le registre de présence."""
+    if fk.g.user is None:
+        return
+
+    start_publisher(fk.current_app.extensions['socketio'], fk.current_app.config.get('PRESENCE_TICK', 1.0))
+    presence.connect(fk.request.sid, fk.g.user.get_column('uuid'), display_name(fk.g.user))
+
+
+def user_disconnected(*args):
+    """Retire la connexion du registre de présence."""
+    presence.disconnect(fk.request.sid)
+
+
 def user_logged(data):
-    print('Yup', data)
+    return heartbeat()
+
+
+def heartbeat(data=None) -> bool:
+    """Repousse l'expiration de la connexion dans le registre de présence. Une connexion ayant déjà expiré (client
+    suspendu, réseau coupé...) y est réinscrite avec son bambou et sa branche courants.
+
+    :rtype: bool
+    :return: True si l'utilisateur est connecté, False sinon."""
+    if fk.g.user is None:
+        return False
+
+    if not presence.heartbeat(fk.request.sid):
+        presence.connect(fk.request.sid, fk.g.user.get_column('uuid'), display_name(fk.g.user))
+        presence.locate(fk.request.sid, fk.session.get('bamboo'), fk.session.get('branch'))
+
+    return True
+
+
+def who_is_online(data) -> list[dict[str, str]]:
+    """Renvoie les utilisateurs en ligne dans un bambou ou une branche dont le client occupe la room.
+
+    :param data: Dictionnaire contenant l'UUID du bambou ou de la branche ('scope').
+
+    :rtype: list[dict[str, str]]
+    :return: Les utilisateurs en ligne, sous la forme {'uuid': ..., 'name': ...}."""
+    scope = data.get('scope') if isinstance(data, dict) else None
+
+    if scope is None or scope == fk.request.sid or scope not in sock.rooms():
+        return []
+
+    return presence.online(scope)
+
+
+def display_name(user) -> str:
+    """Renvoie le nom public d'un utilisateur."""
+    return user.get_column('public_display_name') or user.get_column('username')
+
+
+def join_branch(data) -> bool:
+    """Fait rejoindre au client les rooms du bambou et de la branche donnés, après avoir quitté celles qu'il occupait
+    auparavant. Les messages d'une branche ne sont envoyés qu'aux clients présents dans sa room (clé : UUID de la
+    branche), et les événements concernant tout un bambou à ceux de la room du bambou (clé : UUID du bambou).
+
+    :param data: Dictionnaire contenant les UUIDs du bambou ('bamboo') et de la branche ('branch', facultatif).
+
+    :rtype: bool
+    :return: True si les rooms ont été rejointes, False si l'utilisateur n'a pas accès au bambou ou à la branche."""
+    if fk.g.user is None or not isinstance(data, dict):
+        return False
+
+    bamboo = Bamboo.fetch_by(data.get('bamboo')) if data.get('bamboo') else None
+    branch = Branch.fetch_by(data.get('branch')) if data.get('branch') else None
+
+    if bamboo is None or not bamboo.has_member(fk.g.user.get_column('uuid')):
+        return False
+
+    if branch is not None and branch.get_column('bamboo_uuid') != bamboo.get_column('uuid'):
+        return False
+
+    rooms = {bamboo.get_column('uuid')}
+
+    if branch is not None:
+        rooms.add(branch.get_column('uuid'))
+
+    for room in sock.rooms():
+        if room != fk.request.sid and room not in rooms:
+            sock.leave_room(room)
+
+    for room in rooms:
+        sock.join_room(room)
+
+    # La session du socket détermine la branche dans laquelle sont écrits les messages suivants.
+    fk.session['bamboo'] = bamboo.get_column('uuid')
+    fk.session['branch'] = branch.get_column('uuid') if branch is not None else None
+    presence.locate(fk.request.sid, *rooms)
+    return True
 
 
 def user_message(data):
-    Message.instant(data['data'], fk.g.user.get_column('uuid'), fk.g.branch.get_column('uuid'))
-    sock.emit('user_message', data, broadcast=True)
+    if fk.g.user is None or fk.g.branch is None:
+        return
+
+    branch_uuid = fk.g.branch.get_column('uuid')
+    message = Message.instant(data['data'], fk.g.user.get_column('uuid'), branch_uuid, deferred=True)
+
+    if message is not None:
+        sock.emit('user_message', data, to=branch_uuid)
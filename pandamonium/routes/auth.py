@@ -2,22 +2,26 @@ import functools
 
 import flask as fk
 
+from pandamonium.context import lazy_global
 from pandamonium.security import get_security_error, date_from_string, is_security_error
 from pandamonium.entities.user import User
 
 blueprint = fk.Blueprint('auth', __name__, url_prefix='/auth')
 
 
-@blueprint.before_app_request
+@lazy_global('user')
 def load_user():
     """Fonction qui charge les données de l'utilisateur à partir de son nom stocké dans la session du client. Celle-ci
-    s'exécute avant de charger une quelconque page du blueprint courant."""
-    username = fk.session.get('username')
+    ne s'exécute que lorsque fk.g.user est lu pour la première fois pendant la requête.
+
+    :rtype: User | None
+    :return: L'utilisateur connecté, ou None s'il n'y en a pas."""
+    username = fk.session.get('username') if fk.has_request_context() else None
 
     if username is None:
-        fk.g.user = None
-    else:
-        fk.g.user = User.fetch_by(username=username)
+        return None
+
+    return User.fetch_by(username=username)
 
 
 @blueprint.route('/register', methods=('GET', 'POST'))
@@ -1,44 +1,64 @@
 import functools
+from datetime import datetime
 
 import flask as fk
 
+from pandamonium.context import lazy_global
 from pandamonium.entities.bamboo import Bamboo
-from pandamonium.entities.user import User
 from pandamonium.entities.branch import Branch
+from pandamonium.entities.message import Message
+from pandamonium.entities.user import User
 from pandamonium.routes.auth import login_required
+from pandamonium.search import search
+from pandamonium.security import is_valid_uuid
 
 blueprint = fk.Blueprint('bamboo', __name__, url_prefix='/bamboo')
 
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
 
-@blueprint.before_app_request
-def load_user():
-    """Fonction qui charge les données de l'utilisateur à partir de son nom stocké dans la session du client. Celle-ci
-    s'exécute avant de charger une quelconque page du blueprint courant."""
-    username = fk.session.get('username')
 
-    if username is None:
-        fk.g.user = None
-    else:
-        fk.g.user = User.fetch_by(username=username)
+def session_value(name: str) -> str | None:
+    """Renvoie la valeur stockée dans la session du client sous le nom donné, seulement si un utilisateur est connecté.
+
+    :param name: Nom de la valeur dans la session.
+
+    :rtype: str | None
+    :return: La valeur stockée, ou None si elle n'existe pas ou si personne n'est connecté."""
+    if not fk.has_request_context() or fk.session.get('username') is None:
+        return None
+
+    return fk.session.get(name)
+
+
+@lazy_global('bamboo')
+def load_bamboo():
+    """Fonction qui charge le bambou courant à partir de son UUID stocké dans la session du client. Celle-ci ne
+    s'exécute que lorsque fk.g.bamboo est lu pour la première fois pendant la requête.
 
-        user_bamboo = fk.session.get('bamboo')
-        user_branch = fk.session.get('branch')
+    :rtype: Bamboo | None
+    :return: Le bambou courant, ou None s'il n'y en a pas."""
+    user_bamboo = session_value('bamboo')
+    return Bamboo.fetch_by(user_bamboo) if user_bamboo is not None else None
 
-        if user_bamboo is None:
-            fk.g.bamboo = None
-        else:
-            fk.g.bamboo = Bamboo.fetch_by(user_bamboo)
 
-        if user_branch is None:
-            fk.g.branch = None
-        else:
-            fk.g.branch = Branch.fetch_by(user_branch)
+@lazy_global('branch')
+def load_branch():
+    """Fonction qui charge la branche courante à partir de son UUID stocké dans la session du client. Celle-ci ne
+    s'exécute que lorsque fk.g.branch est lu pour la première fois pendant la requête.
+
+    :rtype: Branch | None
+    :return: La branche courante, ou None s'il n'y en a pas."""
+    user_branch = session_value('branch')
+    return Branch.fetch_by(user_branch) if user_branch is not None else None
 
 
 @blueprint.route('/')
 @login_required
 def bamboos():
-    user_bamboos = [Bamboo.fetch_by(bamboo_uuid) for bamboo_uuid in fk.g.user.get_column('bamboos')]
+    user_bamboos = Bamboo.fetch_many(fk.g.user.get_bamboos())
 
     return fk.render_template(
         'app/bamboos.html',
@@ -50,7 +70,175 @@ def bamboos():
 @blueprint.route('/<bamboo_uuid>/<branch_uuid>')
 @login_required
 def bamboo_page(bamboo_uuid, branch_uuid=None):
-    return fk.render_template('app/bamboo.html')
+    bamboo = Bamboo.fetch_by(bamboo_uuid)
+
+    if bamboo is None:
+        fk.abort(404)
+
+    if not bamboo.has_member(fk.g.user.get_column('uuid')):
+        fk.abort(403)
+
+    if branch_uuid is not None:
+        branch = Branch.fetch_by(branch_uuid)
+
+        if branch is None or branch.get_column('bamboo_uuid') != bamboo_uuid:
+            fk.abort(404)
+    else:
+        branch = None
+
+    # Le bambou et la branche affichés deviennent les courants : ce sont eux que rejoindra le socket de la page.
+    fk.session['bamboo'] = bamboo_uuid
+    fk.session['branch'] = branch_uuid
+    fk.g.bamboo = bamboo
+    fk.g.branch = branch
+
+    branches = Branch.fetch_many(bamboo.get_branches())
+
+    history_url = None
+
+    if branch_uuid is not None:
+        history_url = fk.url_for('app.bamboo.branch_history', bamboo_uuid=bamboo_uuid, branch_uuid=branch_uuid)
+
+    return fk.render_template(
+        'app/bamboo.html',
+        branches=branches,
+        history_url=history_url
+    )
+
+
+def encode_history_cursor(message: Message) -> str:
+    """Renvoie le curseur désignant la position du message donné dans l'historique de sa branche.
+
+    :param message: Dernier message d'une page de l'historique.
+
+    :rtype: str
+    :return: Le curseur, de la forme date_sent_uuid."""
+    return f"{message.get_column('date_sent').isoformat()}_{message.get_column('uuid')}"
+
+
+def decode_history_cursor(cursor: str | None) -> tuple[datetime, str] | None:
+    """Renvoie le couple (date_sent, uuid) désigné par un curseur créé avec encode_history_cursor.
+
+    :param cursor: Curseur donné par le client, ou None pour la première page.
+
+    :rtype: tuple[datetime, str] | None
+    :return: Le couple (date_sent, uuid), ou None si aucun curseur n'est donné.
+
+    :raise ValueError: Si le curseur est mal formé."""
+    if not cursor:
+        return None
+
+    date_sent, _, uuid = cursor.partition('_')
+
+    if not is_valid_uuid(uuid):
+        raise ValueError(f"Invalid history cursor: '{cursor}'")
+
+    return datetime.fromisoformat(date_sent), uuid
+
+
+@blueprint.route('/<bamboo_uuid>/<branch_uuid>/history')
+@login_required
+def branch_history(bamboo_uuid, branch_uuid):
+    """Renvoie au format JSON une page de l'historique de la branche donnée, du message le plus récent au plus ancien.
+
+    Paramètres de la requête : before (curseur renvoyé par la page précédente, absent pour la première page) et limit
+    (nombre de messages, HISTORY_MAX_PAGE_SIZE au maximum)."""
+    branch = Branch.fetch_by(branch_uuid)
+
+    if branch is None or branch.get_column('bamboo_uuid') != bamboo_uuid:
+        fk.abort(404)
+
+    bamboo = Bamboo.fetch_by(bamboo_uuid)
+
+    if bamboo is None or not bamboo.has_member(fk.g.user.get_column('uuid')):
+        fk.abort(403)
+
+    try:
+        before = decode_history_cursor(fk.request.args.get('before'))
+    except ValueError:
+        fk.abort(400)
+
+    limit = max(1, min(fk.request.args.get('limit', HISTORY_PAGE_SIZE, type=int), HISTORY_MAX_PAGE_SIZE))
+    messages = Message.fetch_page(branch_uuid, before, limit)
+
+    return fk.jsonify(
+        messages=serialize_messages(messages),
+        next=encode_history_cursor(messages[-1]) if len(messages) == limit else None
+    )
+
+
+@blueprint.route('/<bamboo_uuid>/search')
+@login_required
+def search_messages(bamboo_uuid):
+    """Renvoie au format JSON une page des messages du bambou donné correspondant le mieux à une recherche, du plus
+    pertinent au moins pertinent.
+
+    Paramètres de la requête : q (texte de la recherche), branch (UUID d'une branche du bambou, pour n'y chercher
+    que), page (numéro de la page, à partir de 1) et limit (nombre de messages, SEARCH_MAX_PAGE_SIZE au maximum)."""
+    bamboo = Bamboo.fetch_by(bamboo_uuid)
+
+    if bamboo is None:
+        fk.abort(404)
+
+    if not bamboo.has_member(fk.g.user.get_column('uuid')):
+        fk.abort(403)
+
+    branch_uuids = list(bamboo.get_branches())
+    branch_uuid = fk.request.args.get('branch')
+
+    if branch_uuid is not None:
+        if branch_uuid not in branch_uuids:
+            fk.abort(404)
+
+        branch_uuids = [branch_uuid]
+
+    page = max(1, fk.request.args.get('page', 1, type=int))
+    limit = max(1, min(fk.request.args.get('limit', SEARCH_PAGE_SIZE, type=int), SEARCH_MAX_PAGE_SIZE))
+    results, total = search(fk.request.args.get('q', ''), branch_uuids, page, limit)
+    scores = dict(results)
+    messages = Message.fetch_many(uuid for uuid, _ in results)
+
+    return fk.jsonify(
+        messages=[{**serialized, 'score': round(scores[serialized['uuid']], 4)}
+                  for serialized in serialize_messages(messages)],
+        total=total,
+        next=page + 1 if page * limit < total else None
+    )
+
+
+def serialize_messages(messages: list[Message]) -> list[dict]:
+    """Transforme des messages en dictionnaires sérialisables en JSON, accompagnés de la description de leur auteur.
+    Les auteurs sont tous chargés en une seule requête.
+
+    :param messages: Messages à sérialiser.
+
+    :rtype: list[dict]"""
+    senders = {message.get_column('sender_uuid'): User.fetch_later(message.get_column('sender_uuid'))
+               for message in messages}
+
+    def serialize_sender(sender_uuid: str) -> dict | None:
+        sender = senders[sender_uuid].resolve()
+
+        if sender is None:
+            return None
+
+        return {
+            'uuid': sender_uuid,
+            'username': sender.get_column('username'),
+            'display_name': sender.get_column('public_display_name') or sender.get_column('username'),
+        }
+
+    return [
+        {
+            'uuid': message.get_column('uuid'),
+            'content': message.get_column('content'),
+            'date_sent': message.get_column('date_sent').isoformat(),
+            'modified': bool(message.get_column('modified')),
+            'response_to': message.get_column('response_to_message_uuid'),
+            'sender': serialize_sender(message.get_column('sender_uuid')),
+        }
+        for message in messages
+    ]
 
 
 @blueprint.route('/create')
@@ -63,10 +251,8 @@ def creation_form():
 @login_required
 def creation_execution():
     bamboo_created = Bamboo.instant(fk.request.form['bamboo_name'], fk.g.user.get_column('uuid'))
-    fk.g.user.get_column('bamboos').append(bamboo_created.get_column('uuid'))
-    fk.g.user.update()
     fk.session['bamboo'] = bamboo_created.get_column('uuid')
-    return fk.redirect(fk.url_for('app.bamboo.bamboo_page'))
+    return fk.redirect(fk.url_for('app.bamboo.bamboo_page', bamboo_uuid=bamboo_created.get_column('uuid')))
 
 
 def bamboo_required(view):
@@ -13,16 +13,35 @@
 -- Structure de la table `utilisateur`
 --
 
-DROP TABLE IF EXISTS users;
-DROP TABLE IF EXISTS bamboos;
-DROP TABLE IF EXISTS category;
-DROP TABLE IF EXISTS branches;
+DROP TABLE IF EXISTS feed_entries;
+DROP TABLE IF EXISTS user_friends;
+DROP TABLE IF EXISTS user_relations;
+DROP TABLE IF EXISTS bamboo_members;
+DROP TABLE IF EXISTS search_postings;
+DROP TABLE IF EXISTS search_documents;
 DROP TABLE IF EXISTS messages;
-CREATE TABLE users(uuid VARCHAR(36), username VARCHAR(50) NOT NULL, email VARCHAR(50), password VARCHAR(512), date_of_birth DATE, friends VARCHAR(3600), relations VARCHAR(3600), bamboos VARCHAR(3600), registration_date DATE, last_connection_date DATETIME, pronouns VARCHAR(50), public_display_name VARCHAR(50), public_bio VARCHAR(300), private_display_name VARCHAR(50), private_bio VARCHAR(300), PRIMARY KEY(uuid), UNIQUE(username), UNIQUE(email));
-CREATE TABLE bamboos(uuid VARCHAR(36), name VARCHAR(50) NOT NULL, creation_date DATE, members TEXT, owner_uuid VARCHAR(36) NOT NULL, PRIMARY KEY(uuid), FOREIGN KEY(owner_uuid) REFERENCES users(uuid));
+DROP TABLE IF EXISTS branches;
+DROP TABLE IF EXISTS category;
+DROP TABLE IF EXISTS bamboos;
+DROP TABLE IF EXISTS users;
+CREATE TABLE users(uuid VARCHAR(36), username VARCHAR(50) NOT NULL, email VARCHAR(50), password VARCHAR(512), date_of_birth DATE, registration_date DATE, last_connection_date DATETIME, pronouns VARCHAR(50), public_display_name VARCHAR(50), public_bio VARCHAR(300), private_display_name VARCHAR(50), private_bio VARCHAR(300), version INT NOT NULL DEFAULT 0, PRIMARY KEY(uuid), UNIQUE(username), UNIQUE(email));
+CREATE TABLE bamboos(uuid VARCHAR(36), name VARCHAR(50) NOT NULL, creation_date DATE, owner_uuid VARCHAR(36) NOT NULL, version INT NOT NULL DEFAULT 0, PRIMARY KEY(uuid), FOREIGN KEY(owner_uuid) REFERENCES users(uuid));
 /*CREATE TABLE category(uuid VARCHAR(36), name VARCHAR(20), bamboo_uuid VARCHAR(36) NOT NULL, PRIMARY KEY(uuid), FOREIGN KEY(bamboo_uuid) REFERENCES bamboos(uuid));*/
 CREATE TABLE branches(uuid VARCHAR(36), name VARCHAR(30) NOT NULL, bamboo_uuid VARCHAR(36) NOT NULL, PRIMARY KEY(uuid), FOREIGN KEY(bamboo_uuid) REFERENCES bamboos(uuid));
 CREATE TABLE messages(uuid VARCHAR(36), content VARCHAR(2000) NOT NULL, date_sent DATETIME, modified BOOLEAN NOT NULL, sender_uuid VARCHAR(36) NOT NULL, branch_uuid VARCHAR(36) NOT NULL, response_to_message_uuid VARCHAR(36), PRIMARY KEY(uuid), FOREIGN KEY(sender_uuid) REFERENCES users(uuid), FOREIGN KEY(branch_uuid) REFERENCES branches(uuid), FOREIGN KEY(response_to_message_uuid) REFERENCES messages(uuid));
+CREATE INDEX messages_by_branch_date ON messages(branch_uuid, date_sent, uuid);
+CREATE TABLE search_documents(message_uuid VARCHAR(36), branch_uuid VARCHAR(36) NOT NULL, length INT NOT NULL, PRIMARY KEY(message_uuid), FOREIGN KEY(message_uuid) REFERENCES messages(uuid));
+CREATE INDEX search_documents_by_branch ON search_documents(branch_uuid, message_uuid);
+CREATE TABLE search_postings(term VARCHAR(64) NOT NULL, message_uuid VARCHAR(36) NOT NULL, frequency INT NOT NULL, PRIMARY KEY(term, message_uuid), FOREIGN KEY(message_uuid) REFERENCES messages(uuid));
+CREATE INDEX search_postings_by_message ON search_postings(message_uuid);
+CREATE TABLE user_friends(user_uuid VARCHAR(36) NOT NULL, friend_uuid VARCHAR(36) NOT NULL, creation_date DATETIME, PRIMARY KEY(user_uuid, friend_uuid), FOREIGN KEY(user_uuid) REFERENCES users(uuid), FOREIGN KEY(friend_uuid) REFERENCES users(uuid));
+CREATE INDEX user_friends_by_friend ON user_friends(friend_uuid, user_uuid);
+CREATE TABLE user_relations(user_uuid VARCHAR(36) NOT NULL, relation_uuid VARCHAR(36) NOT NULL, creation_date DATETIME, PRIMARY KEY(user_uuid, relation_uuid), FOREIGN KEY(user_uuid) REFERENCES users(uuid), FOREIGN KEY(relation_uuid) REFERENCES users(uuid));
+CREATE INDEX user_relations_by_relation ON user_relations(relation_uuid, user_uuid);
+CREATE TABLE bamboo_members(bamboo_uuid VARCHAR(36) NOT NULL, user_uuid VARCHAR(36) NOT NULL, creation_date DATETIME, PRIMARY KEY(bamboo_uuid, user_uuid), FOREIGN KEY(bamboo_uuid) REFERENCES bamboos(uuid), FOREIGN KEY(user_uuid) REFERENCES users(uuid));
+CREATE INDEX bamboo_members_by_user ON bamboo_members(user_uuid, bamboo_uuid);
+CREATE TABLE feed_entries(owner_uuid VARCHAR(36) NOT NULL, entry_uuid VARCHAR(36) NOT NULL, created DATETIME NOT NULL, kind VARCHAR(20) NOT NULL, actor_uuid VARCHAR(36), bamboo_uuid VARCHAR(36), subject_uuid VARCHAR(36) NOT NULL, PRIMARY KEY(owner_uuid, entry_uuid));
+CREATE INDEX feed_entries_by_owner ON feed_entries(owner_uuid, created, entry_uuid);
 
 /*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;
 /*!40101 SET CHARACTER_SET_RESULTS=@OLD_CHARACTER_SET_RESULTS */;
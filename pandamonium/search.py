@@ -0,0 +1,235 @@
+import collections
+import math
+import re
+import typing as tp
+import unicodedata
+
+from pandamonium.database import get_db
+
+# (uuid, contenu, UUID de la branche) d'un message à indexer.
+Document = tuple[str, str, str]
+
+# Paramètres de BM25 : saturation de la fréquence d'un terme et poids de la normalisation par la longueur du message.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 16
+# Un terme présent dans plus de cette proportion des messages visés ne départage presque pas les messages (IDF proche
+# de son minimum) : ses postings ne sont pas lus, sauf si tous les termes de la recherche sont dans ce cas.
+MAX_TERM_DOCUMENT_RATIO = 0.5
+# Nombre maximal de postings lus par recherche : au-delà, seule une partie des messages trouvés est classée.
+MAX_CANDIDATE_ROWS = 10000
+
+ELISION_PATTERN = re.compile(r"\b(?:[cdjlmnst]|qu|jusqu|lorsqu|puisqu|quoiqu)['’]")
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+
+STOP_WORDS = frozenset((
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'cet', 'cette', 'dans', 'de', 'des', 'du', 'elle', 'elles', 'en', 'est',
+    'et', 'eux', 'il', 'ils', 'je', 'la', 'le', 'les', 'leur', 'leurs', 'lui', 'ma', 'mais', 'me', 'mes', 'moi', 'mon',
+    'ne', 'nos', 'notre', 'nous', 'on', 'ou', 'par', 'pas', 'pour', 'qu', 'que', 'qui', 'sa', 'se', 'ses', 'son',
+    'sur', 'ta', 'te', 'tes', 'toi', 'ton', 'tu', 'un', 'une', 'vos', 'votre', 'vous', 'y',
+))
+
+POSTINGS_INSERT_REQUEST = 'INSERT INTO search_postings(term, message_uuid, frequency) VALUES (%s, %s, %s)'
+DOCUMENTS_INSERT_REQUEST = 'INSERT INTO search_documents(message_uuid, branch_uuid, length) VALUES (%s, %s, %s)'
+
+
+def fold(text: str) -> str:
+    """Replie la casse et retire les accents d'un texte : « Été à l'Œil » devient « ete a l'oeil ».
+
+    :param text: Texte à replier.
+
+    :rtype: str"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold().translate(LIGATURES))
+    return ''.join(character for character in decomposed if not unicodedata.combining(character))
+
+
+def stem(term: str) -> str:
+    """Ramène un terme replié à une forme commune à son singulier et à son pluriel (racinisation légère, limitée aux
+    pluriels réguliers du français).
+
+    :param term: Terme replié.
+
+    :rtype: str"""
+    if len(term) > 4 and term.endswith('eaux'):
+        return term[:-1]
+
+    if len(term) > 3 and term.endswith('s') and not term.endswith('ss') and not term.isdigit():
+        return term[:-1]
+
+    return term
+
+
+def tokenize(text: str) -> list[str]:
+    """Découpe un texte en termes indexables : casse et accents repliés, élisions (l', qu'...) et mots vides retirés,
+    pluriels réguliers ramenés au singulier. Une recherche est découpée de la même façon que les messages.
+
+    :param text: Texte à découper.
+
+    :rtype: list[str]
+    :return: Les termes du texte, dans l'ordre, avec répétitions."""
+    terms = []
+
+    for token in TOKEN_PATTERN.findall(ELISION_PATTERN.sub(' ', fold(text))):
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit()):
+            terms.append(stem(token)[:MAX_TERM_LENGTH])
+
+    return terms
+
+
+def index_messages(cursor, documents: tp.Iterable[Document], replace: bool = True) -> int:
+    """Ajoute des messages à l'index inversé : une ligne par terme distinct de chaque message (search_postings) et une
+    ligne par message donnant sa branche et son nombre de termes (search_documents).
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param documents: UUID, contenu et UUID de la branche de chaque message.
+    :param replace: Retirer d'abord les messages de l'index (nécessaire si leur contenu a changé). Inutile pour des
+        messages qui viennent d'être créés.
+
+    :rtype: int
+    :return: Le nombre de messages indexés."""
+    documents = list(documents)
+
+    if not documents:
+        return 0
+
+    if replace:
+        unindex_messages(cursor, [uuid for uuid, _, _ in documents])
+
+    rows, postings = [], []
+
+    for uuid, content, branch_uuid in documents:
+        frequencies = collections.Counter(tokenize(content))
+        rows.append((uuid, branch_uuid, sum(frequencies.values())))
+        postings.extend((term, uuid, frequency) for term, frequency in frequencies.items())
+
+    cursor.executemany(DOCUMENTS_INSERT_REQUEST, rows)
+
+    if postings:
+        cursor.executemany(POSTINGS_INSERT_REQUEST, postings)
+
+    return len(documents)
+
+
+def unindex_messages(cursor, uuids: list[str]):
+    """Retire des messages de l'index inversé.
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param uuids: UUIDs des messages."""
+    placeholders = ', '.join(['%s'] * len(uuids))
+    cursor.execute(f'DELETE FROM search_postings WHERE message_uuid IN ({placeholders})', uuids)
+    cursor.execute(f'DELETE FROM search_documents WHERE message_uuid IN ({placeholders})', uuids)
+
+
+def rebuild_index(connection, batch_size: int = 1000) -> int:
+    """Reconstruit entièrement l'index inversé à partir de la table messages, lot par lot (une transaction par lot).
+
+    L'index est vidé au début : tant que la reconstruction n'est pas terminée, les recherches ne trouvent qu'une partie
+    des messages. Les messages envoyés pendant ce temps sont indexés normalement ; s'ils le sont avant que leur lot soit
+    atteint, ils sont réindexés avec lui.
+
+    :param connection: Connexion à la base de données.
+    :param batch_size: Nombre de messages lus puis indexés par lot.
+
+    :rtype: int
+    :return: Le nombre de messages indexés."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM search_postings')
+        cursor.execute('DELETE FROM search_documents')
+
+        indexed, last_uuid = 0, ''
+
+        while True:
+            connection.start_transaction()
+
+            try:
+                cursor.execute('SELECT uuid, content, branch_uuid FROM messages WHERE uuid > %s ORDER BY uuid LIMIT %s',
+                               (last_uuid, batch_size))
+                batch = cursor.fetchall()
+                # Un message peut avoir été indexé par son envoi depuis le vidage de l'index.
+                indexed += index_messages(cursor, batch, replace=True)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+            if not batch:
+                return indexed
+
+            last_uuid = batch[-1][0]
+
+
+def search(query: str,
+           branch_uuids: tp.Sequence[str],
+           page: int = 1,
+           limit: int = 20) -> tuple[list[tuple[str, float]], int]:
+    """Recherche les messages des branches données correspondant le mieux à la recherche donnée, classés par BM25.
+
+    Seuls les messages contenant au moins un terme de la recherche sont renvoyés. Le nombre total de messages et leur
+    longueur moyenne, tout comme la fréquence documentaire de chaque terme, sont ceux des branches visées.
+
+    Le coût d'une recherche est borné : les termes présents dans plus de MAX_TERM_DOCUMENT_RATIO des messages visés
+    sont ignorés (sauf le plus rare d'entre eux si la recherche ne contient que de tels termes), et au plus
+    MAX_CANDIDATE_ROWS postings sont lus. Dans ce dernier cas, le classement et le total ne portent que sur les messages
+    lus.
+
+    :param query: Texte de la recherche.
+    :param branch_uuids: UUIDs des branches dans lesquelles chercher.
+    :param page: Numéro de la page de résultats, à partir de 1.
+    :param limit: Nombre de résultats par page.
+
+    :rtype: tuple[list[tuple[str, float]], int]
+    :return: L'UUID et le score des messages de la page, du plus pertinent au moins pertinent, ainsi que le nombre
+        total de messages trouvés."""
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+    if not terms or not branch_uuids:
+        return [], 0
+
+    branch_placeholders = ', '.join(['%s'] * len(branch_uuids))
+
+    def scope(term_count: int) -> str:
+        return ('FROM search_postings p JOIN search_documents d ON d.message_uuid = p.message_uuid '
+                f'WHERE p.term IN ({", ".join(["%s"] * term_count)}) AND d.branch_uuid IN ({branch_placeholders})')
+
+    with get_db().cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*), AVG(length) FROM search_documents WHERE branch_uuid IN ({branch_placeholders})',
+            list(branch_uuids)
+        )
+        documents, average_length = cursor.fetchone()
+
+        # Chaque couple (terme, message) est unique : la fréquence documentaire d'un terme est son nombre de lignes.
+        cursor.execute(
+            f'SELECT p.term, COUNT(*) {scope(len(terms))} GROUP BY p.term',
+            terms + list(branch_uuids)
+        )
+        document_frequencies = dict(cursor.fetchall())
+
+        if not document_frequencies:
+            return [], 0
+
+        selected = [term for term, frequency in document_frequencies.items()
+                    if frequency <= MAX_TERM_DOCUMENT_RATIO * documents]
+        selected = selected or [min(document_frequencies, key=lambda term: (document_frequencies[term], term))]
+
+        cursor.execute(
+            f'SELECT p.term, p.message_uuid, p.frequency, d.length {scope(len(selected))} LIMIT %s',
+            selected + list(branch_uuids) + [MAX_CANDIDATE_ROWS]
+        )
+        postings = cursor.fetchall()
+
+    average_length = float(average_length) or 1.0
+    scores: dict[str, float] = collections.defaultdict(float)
+
+    for term, uuid, frequency, length in postings:
+        frequency_in_scope = document_frequencies[term]
+        idf = math.log(1 + (documents - frequency_in_scope + 0.5) / (frequency_in_scope + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        scores[uuid] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    start = (page - 1) * limit
+    return ranked[start:start + limit], len(ranked)
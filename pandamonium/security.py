@@ -1,10 +1,21 @@
+import base64
 import hashlib as hl
+import hmac
+import os
 import re
 import typing
 
 import flask as fk
 from datetime import datetime, date
 
+PASSWORD_SCHEME = 'scrypt'
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_SALT_SIZE = 16
+SCRYPT_KEY_SIZE = 32
+SCRYPT_MAXMEM = 64 * 1024 * 1024
+
 
 def set_security_error(message: str):
     """Crée un message d'erreur inséré dans le cache d'erreur du module security.
@@ -30,23 +41,55 @@ def is_security_error() -> bool:
     return 'security_error' in fk.g
 
 
-def hash_password(password: str) -> str:
-    """Fonction qui transforme un mot de passe sous le hash utilisant la méthode SHA256.
+def hash_password(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    """Fonction qui transforme un mot de passe en hash via scrypt, avec un sel aléatoire. Le calcul est volontairement
+    lent : en dehors des scripts, il doit passer par le pool de processus du module hashing.
 
     :param password: le mot de passe à hasher.
+    :param n: facteur de coût (mémoire et temps) de scrypt, puissance de 2.
+    :param r: taille de bloc de scrypt.
+    :param p: facteur de parallélisme de scrypt.
     :rtype str
-    :return: le mot de passe hashé."""
-    return hl.sha256(password.encode()).hexdigest()
+    :return: le mot de passe hashé, de la forme scrypt$n$r$p$sel$hash."""
+    salt = os.urandom(SCRYPT_SALT_SIZE)
+    digest = hl.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=SCRYPT_MAXMEM, dklen=SCRYPT_KEY_SIZE)
+    return '$'.join((PASSWORD_SCHEME, str(n), str(r), str(p), base64.b64encode(salt).decode(),
+                     base64.b64encode(digest).decode()))
 
 
-def check_password(password: str, hashed_password: str) -> bool:
-    """Fonction qui vérifie que le mot de passe donné soit égal au mot de passe déjà hashé.
+def check_password(password: str, hashed_password: str | None) -> bool:
+    """Fonction qui vérifie que le mot de passe donné soit égal au mot de passe déjà hashé. Les anciens hashs SHA256
+    (sans sel) restent acceptés. Un compte sans mot de passe (hash absent ou vide) n'est jamais accepté.
 
     :param password: le mot de passe à vérifier.
-    :param hashed_password: le mot de passe hashé.
+    :param hashed_password: le mot de passe hashé, ou None.
     :rtype bool
     :return: True si les mots de passe correspondent, False sinon."""
-    return hash_password(password) == hashed_password
+    if not hashed_password:
+        return False
+
+    if not hashed_password.startswith(PASSWORD_SCHEME + '$'):
+        return hmac.compare_digest(hl.sha256(password.encode()).hexdigest(), hashed_password)
+
+    try:
+        _, n, r, p, salt, digest = hashed_password.split('$')
+        expected = base64.b64decode(digest)
+        computed = hl.scrypt(password.encode(), salt=base64.b64decode(salt), n=int(n), r=int(r), p=int(p),
+                             maxmem=SCRYPT_MAXMEM, dklen=len(expected))
+    except ValueError:
+        return False
+
+    return hmac.compare_digest(computed, expected)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Fonction qui vérifie si un hash doit être recalculé : ancien hash SHA256, ou paramètres de scrypt différents de
+    ceux utilisés actuellement.
+
+    :param hashed_password: le mot de passe hashé.
+    :rtype bool
+    :return: True si le hash doit être recalculé lors de la prochaine connexion réussie, False sinon."""
+    return not hashed_password.startswith(f'{PASSWORD_SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$')
 
 
 def date_from_string(str_date: str) -> date:
@@ -0,0 +1,247 @@
+import itertools
+import random
+import time
+import typing as tp
+import uuid as uuid_lib
+from datetime import date, datetime, timedelta
+
+from pandamonium.security import hash_password
+
+Row = tuple[tp.Any, ...]
+
+USERS_COLUMNS = ('uuid', 'username', 'email', 'password', 'date_of_birth', 'registration_date',
+                 'last_connection_date', 'pronouns', 'public_display_name', 'private_display_name')
+BAMBOOS_COLUMNS = ('uuid', 'name', 'creation_date', 'owner_uuid')
+MEMBERS_COLUMNS = ('bamboo_uuid', 'user_uuid', 'creation_date')
+BRANCHES_COLUMNS = ('uuid', 'name', 'bamboo_uuid')
+MESSAGES_COLUMNS = ('uuid', 'content', 'date_sent', 'modified', 'sender_uuid', 'branch_uuid',
+                    'response_to_message_uuid')
+
+PRONOUNS = ('il/lui', 'elle/elle', 'iel/iel', 'il/elle', None)
+WORDS = ('bambou', 'panda', 'salut', 'ça', 'va', 'quoi', 'de', 'neuf', 'demain', 'réunion', 'projet', 'merci',
+         'ok', 'génial', 'je', 'tu', 'on', 'pense', 'que', 'oui', 'non', 'peut-être', 'ce', 'soir', 'code', 'bug',
+         'déploiement', 'café', 'pause', 'photo', 'voir', 'lien', 'super', 'à', 'plus', 'tard', 'été', 'écrit')
+
+
+class SeedPlan:
+    """Classe décrivant le volume et la forme des données générées par generate().
+
+    La taille des bambous suit une loi de Pareto : la plupart des bambous ne comptent que quelques membres, quelques-uns
+    en rassemblent une grande part. Les messages sont répartis entre les bambous selon leur nombre de membres, et
+    envoyés par rafales : des conversations dont les messages se suivent à quelques secondes d'intervalle, séparées
+    par de longs silences."""
+
+    def __init__(self,
+                 users: int = 1000,
+                 bamboos: int = 100,
+                 branches: float = 3.0,
+                 messages: int = 100000,
+                 seed: int = 0,
+                 password: str = 'pandamonium',
+                 bamboo_size_alpha: float = 1.2,
+                 bamboo_min_size: int = 2,
+                 burst_size: float = 8.0,
+                 burst_gap: float = 20.0,
+                 reply_ratio: float = 0.1,
+                 days: int = 365):
+        """Constructeur de la classe.
+
+        :param users: Nombre d'utilisateurs.
+        :param bamboos: Nombre de bambous.
+        :param branches: Nombre moyen de branches par bambou (au moins une).
+        :param messages: Nombre total de messages.
+        :param seed: Graine du générateur : un même plan produit toujours les mêmes données.
+        :param password: Mot de passe commun à tous les utilisateurs générés.
+        :param bamboo_size_alpha: Exposant de la loi de Pareto des tailles de bambous (plus il est petit, plus les
+            grands bambous sont fréquents).
+        :param bamboo_min_size: Taille minimale d'un bambou.
+        :param burst_size: Nombre moyen de messages par rafale.
+        :param burst_gap: Intervalle moyen (en secondes) entre deux messages d'une même rafale.
+        :param reply_ratio: Proportion des messages répondant à un message précédent de leur rafale.
+        :param days: Durée (en jours, jusqu'à maintenant) sur laquelle les données sont étalées."""
+        self.users = users
+        self.bamboos = bamboos
+        self.branches = branches
+        self.messages = messages
+        self.seed = seed
+        self.password = password
+        self.bamboo_size_alpha = bamboo_size_alpha
+        self.bamboo_min_size = bamboo_min_size
+        self.burst_size = burst_size
+        self.burst_gap = burst_gap
+        self.reply_ratio = reply_ratio
+        self.days = days
+
+
+class SeedData:
+    """Classe contenant les lignes générées pour chaque table, dans l'ordre où elles doivent être insérées. Les
+    messages sont produits à la demande par un générateur, pour ne jamais les avoir tous en mémoire."""
+
+    def __init__(self, users: list[Row], bamboos: list[Row], members: list[Row], branches: list[Row],
+                 messages: tp.Iterator[Row]):
+        self.users = users
+        self.bamboos = bamboos
+        self.members = members
+        self.branches = branches
+        self.messages = messages
+
+    def tables(self) -> list[tuple[str, tuple[str, ...], tp.Iterable[Row]]]:
+        """Renvoie, dans l'ordre d'insertion, le nom, les colonnes et les lignes de chaque table.
+
+        :rtype: list[tuple[str, tuple[str, ...], tp.Iterable[Row]]]"""
+        return [
+            ('users', USERS_COLUMNS, self.users),
+            ('bamboos', BAMBOOS_COLUMNS, self.bamboos),
+            ('bamboo_members', MEMBERS_COLUMNS, self.members),
+            ('branches', BRANCHES_COLUMNS, self.branches),
+            ('messages', MESSAGES_COLUMNS, self.messages),
+        ]
+
+
+def generate(plan: SeedPlan, now: datetime | None = None) -> SeedData:
+    """Génère les données décrites par le plan donné.
+
+    :param plan: Plan de génération.
+    :param now: Instant auquel les données s'arrêtent. Si None, l'instant présent (arrondi à la seconde) est utilisé.
+
+    :rtype: SeedData
+    :return: Les lignes de chaque table."""
+    rng = random.Random(plan.seed)
+    now = now if now is not None else datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=plan.days)
+
+    def new_uuid() -> str:
+        return str(uuid_lib.UUID(int=rng.getrandbits(128), version=4))
+
+    def instant_between(first: datetime, last: datetime) -> datetime:
+        return first + timedelta(seconds=int(rng.random() * max((last - first).total_seconds(), 0)))
+
+    # Toutes les lignes partagent le même hash : scrypt est bien trop lent pour hasher un mot de passe par utilisateur.
+    password = hash_password(plan.password)
+    users = []
+
+    for index in range(plan.users):
+        registration = instant_between(start, now)
+        users.append((
+            new_uuid(),
+            f'user{index:06d}',
+            f'user{index:06d}@seed.pandamonium.fr',
+            password,
+            date(now.year - rng.randint(16, 60), rng.randint(1, 12), rng.randint(1, 28)),
+            registration.date(),
+            instant_between(registration, now),
+            rng.choice(PRONOUNS),
+            f'Utilisateur {index}',
+            f'User {index}'
+        ))
+
+    bamboos, members, branches = [], [], []
+    # Pour chaque bambou : ses membres (UUID et date d'arrivée) et ses branches.
+    bamboo_members: list[list[tuple[str, datetime]]] = []
+    bamboo_branches: list[list[str]] = []
+
+    for index in range(plan.bamboos if users else 0):
+        size = min(len(users), int(plan.bamboo_min_size * rng.paretovariate(plan.bamboo_size_alpha)))
+        chosen = rng.sample(users, size)
+        created = instant_between(start, now)
+        bamboo_uuid = new_uuid()
+        bamboos.append((bamboo_uuid, f'Bambou {index}', created.date(), chosen[0][0]))
+
+        joined = [(user[0], created if position == 0 else instant_between(created, now))
+                  for position, user in enumerate(chosen)]
+        members.extend((bamboo_uuid, user_uuid, joined_date) for user_uuid, joined_date in joined)
+        bamboo_members.append(joined)
+
+        count = 1 + (int(rng.expovariate(1 / (plan.branches - 1))) if plan.branches > 1 else 0)
+        uuids = [new_uuid() for _ in range(count)]
+        branches.extend((branch_uuid, f'branche-{position}', bamboo_uuid) for position, branch_uuid in enumerate(uuids))
+        bamboo_branches.append(uuids)
+
+    def messages() -> tp.Iterator[Row]:
+        # Les messages de chaque bambou sont proportionnels à son nombre de membres.
+        total_members = sum(len(joined) for joined in bamboo_members)
+        remaining = plan.messages
+        remaining_members = total_members
+
+        for joined, branch_uuids in zip(bamboo_members, bamboo_branches):
+            count = round(remaining * len(joined) / remaining_members) if remaining_members else 0
+            remaining -= count
+            remaining_members -= len(joined)
+            # Les membres les plus bavards envoient l'essentiel des messages.
+            weights = list(itertools.accumulate(rng.paretovariate(1.5) for _ in joined))
+            first = min(joined_date for _, joined_date in joined)
+
+            while count > 0:
+                burst = min(count, 1 + int(rng.expovariate(1 / max(plan.burst_size - 1, 1e-9))))
+                count -= burst
+                sent = instant_between(first, now)
+                branch_uuid = rng.choice(branch_uuids)
+                previous = []
+
+                for _ in range(burst):
+                    sent = min(now, sent + timedelta(seconds=1 + int(rng.expovariate(1 / plan.burst_gap))))
+                    message_uuid = new_uuid()
+                    response = rng.choice(previous) if previous and rng.random() < plan.reply_ratio else None
+                    yield (
+                        message_uuid,
+                        ' '.join(rng.choices(WORDS, k=rng.randint(1, 20))),
+                        sent,
+                        rng.random() < 0.02,
+                        rng.choices(joined, cum_weights=weights)[0][0],
+                        branch_uuid,
+                        response
+                    )
+                    previous.append(message_uuid)
+
+    return SeedData(users, bamboos, members, branches, messages())
+
+
+def bulk_insert(cursor, table: str, columns: tuple[str, ...], rows: tp.Iterable[Row], batch_size: int = 1000) -> int:
+    """Insère des lignes par lots, chaque lot étant écrit en une seule requête INSERT à plusieurs lignes.
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param table: Nom de la table.
+    :param columns: Noms des colonnes, dans l'ordre des valeurs de chaque ligne.
+    :param rows: Lignes à insérer.
+    :param batch_size: Nombre maximal de lignes par requête.
+
+    :rtype: int
+    :return: Le nombre de lignes insérées."""
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    prefix = f'INSERT INTO {table}({", ".join(columns)}) VALUES '
+    full_request = None
+    inserted = 0
+    rows = iter(rows)
+
+    while batch := list(itertools.islice(rows, batch_size)):
+        if len(batch) == batch_size:
+            # Tous les lots complets partagent la même requête : inutile de la reconstruire à chaque fois.
+            full_request = full_request or prefix + ', '.join([placeholders] * batch_size)
+            request = full_request
+        else:
+            request = prefix + ', '.join([placeholders] * len(batch))
+
+        cursor.execute(request, [value for row in batch for value in row])
+        inserted += len(batch)
+
+    return inserted
+
+
+def load(cursor, data: SeedData, batch_size: int = 1000) -> list[tuple[str, int, float]]:
+    """Insère les données générées, table par table.
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param data: Données générées par generate().
+    :param batch_size: Nombre maximal de lignes par requête.
+
+    :rtype: list[tuple[str, int, float]]
+    :return: Pour chaque table, son nom, le nombre de lignes insérées et la durée de l'insertion (génération
+        comprise pour les messages), en secondes."""
+    report = []
+
+    for table, columns, rows in data.tables():
+        start = time.perf_counter()
+        inserted = bulk_insert(cursor, table, columns, rows, batch_size)
+        report.append((table, inserted, time.perf_counter() - start))
+
+    return report
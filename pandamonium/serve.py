@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from pandamonium.concurrency import ASYNC_MODES, current_mode
+from pandamonium.pubsub import Broker
+
+
+def parse_arguments(arguments: list[str] | None = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande.
+
+    :param arguments: Arguments à analyser. Si None, ceux du processus sont utilisés."""
+    parser = argparse.ArgumentParser(
+        prog='python -m pandamonium.serve',
+        description='Lance PANDAMONIUM sur plusieurs processus partageant le même port.'
+    )
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='Nombre de processus.')
+    parser.add_argument('--host', default='127.0.0.1', help="Adresse d'écoute.")
+    parser.add_argument('-p', '--port', type=int, default=5000, help="Port d'écoute.")
+    parser.add_argument('--broker', default=None, help='Chemin du socket UNIX du broker (temporaire par défaut).')
+    parser.add_argument('--async-mode', choices=ASYNC_MODES, default=os.environ.get('PANDAMONIUM_ASYNC_MODE', 'threading'),
+                        help='Mode asynchrone des workers.')
+    parser.add_argument('--worker-fd', type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(arguments)
+
+
+def run_worker(fd: int):
+    """Corps d'un processus worker : sert les requêtes reçues sur le socket d'écoute hérité du processus principal. Le
+    noyau répartit les nouvelles connexions entre les workers.
+
+    :param fd: Descripteur du socket d'écoute partagé par tous les workers."""
+    # SIGTERM interrompt serve_forever comme un Ctrl+C : le processus se termine normalement et les fonctions
+    # enregistrées via atexit (file d'écriture différée...) s'exécutent.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    from pandamonium import flask_app
+
+    listener = socket.socket(fileno=fd)
+    mode = current_mode()
+    print(f'[PANDAMONIUM] Worker {os.getpid()} ready ({mode}).')
+
+    try:
+        if mode == 'eventlet':
+            import eventlet.wsgi
+            eventlet.wsgi.server(listener, flask_app, log_output=False)
+        elif mode == 'gevent':
+            import gevent
+            from gevent.pywsgi import WSGIServer
+            server = WSGIServer(listener, flask_app, log=None)
+            # Le signal doit être traité par la boucle de gevent pour que l'arrêt ne soit pas vu comme une erreur.
+            gevent.signal_handler(signal.SIGTERM, server.stop)
+            server.serve_forever()
+        else:
+            from werkzeug.serving import make_server
+            host, port = listener.getsockname()[:2]
+            make_server(host, port, flask_app, threaded=True, fd=fd).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def spawn_worker(listener: socket.socket) -> subprocess.Popen:
+    """Lance un nouveau processus worker. Chaque worker est un nouvel interpréteur : l'application y est importée après
+    que le processus principal a complété la configuration via l'environnement.
+
+    :param listener: Socket d'écoute partagé par tous les workers.
+
+    :rtype: subprocess.Popen
+    :return: Le processus worker."""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'pandamonium.serve', '--worker-fd', str(listener.fileno())],
+        pass_fds=(listener.fileno(),)
+    )
+
+
+def main(arguments: list[str] | None = None):
+    """Point d'entrée : démarre le broker local, ouvre le socket d'écoute puis lance et surveille les workers. Un
+    worker qui s'arrête de lui-même est relancé, jusqu'à ce que le processus principal reçoive SIGINT ou SIGTERM.
+
+    Les workers communiquent leurs événements Socket.IO via le broker (SOCKETIO_MESSAGE_QUEUE) et n'acceptent que le
+    transport websocket (SOCKETIO_TRANSPORTS) : une session en long-polling ne survivrait pas au passage de ses
+    requêtes d'un worker à l'autre. Avec --async-mode eventlet ou gevent, chaque worker sert toutes ses connexions
+    depuis une seule boucle d'événements au lieu d'un thread par connexion.
+
+    :param arguments: Arguments de la ligne de commande. Si None, ceux du processus sont utilisés."""
+    options = parse_arguments(arguments)
+
+    if options.worker_fd is not None:
+        run_worker(options.worker_fd)
+        return
+
+    broker_path = options.broker or os.path.join(tempfile.gettempdir(), f'pandamonium-{os.getpid()}.sock')
+    broker = Broker(broker_path).start()
+
+    os.environ['PANDAMONIUM_SOCKETIO_MESSAGE_QUEUE'] = f'unix://{broker_path}'
+    os.environ['PANDAMONIUM_SOCKETIO_TRANSPORTS'] = json.dumps(['websocket'])
+    # Lu par le paquet pandamonium dès son import dans chaque worker, avant tout autre module.
+    os.environ['PANDAMONIUM_ASYNC_MODE'] = options.async_mode
+
+    listener = socket.create_server((options.host, options.port), backlog=1024)
+    workers = {}
+
+    for _ in range(max(1, options.workers)):
+        worker = spawn_worker(listener)
+        workers[worker.pid] = worker
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+        for worker in list(workers.values()):
+            worker.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f'[PANDAMONIUM] Serving on http://{options.host}:{options.port} with {len(workers)} workers.')
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        if workers.pop(pid, None) is None:
+            continue
+
+        if not stopping:
+            print(f'[PANDAMONIUM] Worker {pid} exited with status {status}, restarting it.')
+            time.sleep(0.5)
+            worker = spawn_worker(listener)
+            workers[worker.pid] = worker
+
+    listener.close()
+    broker.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+import typing as tp
+from datetime import datetime
+
+import flask as fk
+
+EXPLAIN_PREFIXES = {'mysql': 'EXPLAIN ', 'sqlite': 'EXPLAIN QUERY PLAN '}
+EXPLAINABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+COMMENT_PATTERN = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b|%s")
+LIST_PATTERN = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+ROWS_PATTERN = re.compile(r'\(\?\+\)(?:\s*,\s*\(\?\+\))+')
+SPACES_PATTERN = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(operation: str) -> tuple[str, str]:
+    """Normalise une requête afin que toutes ses exécutions, quels que soient leurs paramètres, partagent la même
+    empreinte : commentaires retirés, littéraux et paramètres remplacés par ?, listes de valeurs (IN, VALUES à
+    plusieurs lignes) réduites à (?+) et espaces fusionnés.
+
+    :param operation: Requête au format de mysql.connector.
+
+    :rtype: tuple[str, str]
+    :return: L'empreinte (16 caractères hexadécimaux) et la requête normalisée."""
+    normalized = LITERAL_PATTERN.sub('?', COMMENT_PATTERN.sub(' ', operation))
+    normalized = SPACES_PATTERN.sub(' ', normalized).strip()
+    normalized = ROWS_PATTERN.sub('(?+)', LIST_PATTERN.sub('(?+)', normalized))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+class SlowQueryLog:
+    """Classe agrégeant le nombre et la durée des requêtes SQL par empreinte, et journalisant les requêtes dépassant
+    le seuil configuré dans un fichier à rotation (une ligne JSON par requête lente, sans ses paramètres). Le plan
+    d'exécution (EXPLAIN) d'une requête lente est joint au journal, au plus une fois par empreinte et par intervalle."""
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.1
+        self.explain_interval = 300.0
+        self.explain_prefix: str | None = EXPLAIN_PREFIXES['mysql']
+        self.path: str | None = None
+
+        self.__fingerprints: dict[str, list] = {}
+        self.__explained: dict[str, float] = {}
+        self.__stats = {'queries': 0, 'slow': 0, 'explains': 0, 'explain_errors': 0}
+        self.__logger = logging.getLogger('pandamonium.slow_queries')
+        self.__logger.propagate = False
+        self.__lock = threading.Lock()
+
+    def configure(self, path: str, threshold: float, explain_interval: float, explain_prefix: str | None,
+                  max_bytes: int, backups: int):
+        """Active le journal, dans le fichier donné, et oublie les agrégats précédents.
+
+        :param path: Chemin du fichier du journal.
+        :param threshold: Durée (en secondes) au-delà de laquelle une requête est lente.
+        :param explain_interval: Intervalle minimal (en secondes) entre deux EXPLAIN d'une même empreinte.
+        :param explain_prefix: Préfixe transformant une requête en demande de plan d'exécution, ou None pour ne
+            jamais en demander.
+        :param max_bytes: Taille maximale du fichier avant sa rotation, en octets.
+        :param backups: Nombre d'anciens fichiers conservés."""
+        self.disable()
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                       encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+
+        with self.__lock:
+            self.__logger.addHandler(handler)
+            self.__logger.setLevel(logging.INFO)
+            self.path = path
+            self.threshold = threshold
+            self.explain_interval = explain_interval
+            self.explain_prefix = explain_prefix
+            self.enabled = True
+
+    def disable(self):
+        """Désactive le journal, ferme son fichier et oublie les agrégats."""
+        with self.__lock:
+            self.enabled = False
+
+            for handler in list(self.__logger.handlers):
+                self.__logger.removeHandler(handler)
+                handler.close()
+
+            self.__fingerprints.clear()
+            self.__explained.clear()
+            self.__stats = dict.fromkeys(self.__stats, 0)
+
+    def record(self, operation: str, duration: float) -> bool:
+        """Ajoute une exécution aux agrégats de son empreinte.
+
+        :param operation: Requête exécutée.
+        :param duration: Durée de l'exécution, en secondes.
+
+        :rtype: bool
+        :return: True si la requête est lente et doit être journalisée via capture(), False sinon."""
+        key, statement = fingerprint(operation)
+        slow = duration >= self.threshold
+
+        with self.__lock:
+            aggregate = self.__fingerprints.get(key)
+
+            if aggregate is None:
+                aggregate = self.__fingerprints[key] = [statement, 0, 0.0, 0.0, 0]
+
+            aggregate[1] += 1
+            aggregate[2] += duration
+            aggregate[3] = max(aggregate[3], duration)
+            self.__stats['queries'] += 1
+
+            if slow:
+                aggregate[4] += 1
+                self.__stats['slow'] += 1
+
+        return slow
+
+    def capture(self, connection, operation: str, params: tp.Sequence | None, duration: float, endpoint: str | None):
+        """Journalise une requête lente, accompagnée de son plan d'exécution si aucun n'a été capturé pour son
+        empreinte depuis explain_interval secondes. La connexion ne doit avoir aucun résultat en attente de lecture.
+
+        :param connection: Connexion (non instrumentée) ayant exécuté la requête.
+        :param operation: Requête exécutée.
+        :param params: Valeurs de ses paramètres, utilisées pour l'EXPLAIN mais jamais journalisées.
+        :param duration: Durée de l'exécution, en secondes.
+        :param endpoint: Endpoint de la requête HTTP l'ayant exécutée, ou None."""
+        key, statement = fingerprint(operation)
+        entry = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'fingerprint': key,
+            'statement': statement,
+            'duration': round(duration, 6),
+            'endpoint': endpoint,
+        }
+
+        if self.__should_explain(key, operation, params):
+            try:
+                with connection.cursor(dictionary=True) as cursor:
+                    cursor.execute(self.explain_prefix + operation, params)
+                    entry['explain'] = cursor.fetchall()
+
+                self.__count('explains')
+            except Exception as error:
+                entry['explain_error'] = str(error)
+                self.__count('explain_errors')
+
+        self.__logger.info(json.dumps(entry, default=str, ensure_ascii=False))
+
+    def top(self, limit: int = 10) -> list[dict[str, tp.Any]]:
+        """Renvoie les empreintes ayant cumulé le plus de temps depuis la configuration du journal.
+
+        :param limit: Nombre maximal d'empreintes renvoyées.
+
+        :rtype: list[dict[str, tp.Any]]"""
+        with self.__lock:
+            aggregates = sorted(self.__fingerprints.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+
+        return [{'fingerprint': key, 'statement': statement, 'count': count, 'total': total, 'max': maximum,
+                 'slow': slow} for key, (statement, count, total, maximum, slow) in aggregates]
+
+    def stats(self) -> dict[str, int]:
+        """Renvoie les compteurs du journal.
+
+        :rtype: dict[str, int]
+        :return: Un dictionnaire contenant les nombres de requêtes mesurées, de requêtes lentes, d'EXPLAIN capturés
+            et en échec, ainsi que le nombre d'empreintes distinctes."""
+        with self.__lock:
+            return {**self.__stats, 'fingerprints': len(self.__fingerprints)}
+
+    def __should_explain(self, key: str, operation: str, params: tp.Sequence | None) -> bool:
+        """Vérifie si le plan d'exécution de la requête doit être capturé, et réserve la capture le cas échéant."""
+        if self.explain_prefix is None or (params is None and '%s' in operation):
+            return False
+
+        if not operation.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+            return False
+
+        now = time.monotonic()
+
+        with self.__lock:
+            if now - self.__explained.get(key, -self.explain_interval) < self.explain_interval:
+                return False
+
+            self.__explained[key] = now
+            return True
+
+    def __count(self, name: str):
+        """Incrémente le compteur donné en argument."""
+        with self.__lock:
+            self.__stats[name] += 1
+
+
+slow_query_log = SlowQueryLog()
+
+
+def configure_slow_queries(app: fk.Flask):
+    """Configure le journal des requêtes lentes du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : SLOW_QUERY_LOG (active le journal, désactivé par défaut), SLOW_QUERY_THRESHOLD
+    (durée à partir de laquelle une requête est lente, en secondes), SLOW_QUERY_EXPLAIN (capturer les plans
+    d'exécution, activé par défaut), SLOW_QUERY_EXPLAIN_INTERVAL (intervalle minimal entre deux EXPLAIN d'une même
+    requête, en secondes), SLOW_QUERY_LOG_PATH (slow_queries.log dans le dossier d'instance par défaut),
+    SLOW_QUERY_LOG_MAX_BYTES et SLOW_QUERY_LOG_BACKUPS (rotation du fichier).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    if not app.config.get('SLOW_QUERY_LOG', False):
+        slow_query_log.disable()
+        return
+
+    explain = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    slow_query_log.configure(
+        slow_query_log_path(app),
+        threshold=app.config.get('SLOW_QUERY_THRESHOLD', 0.1),
+        explain_interval=app.config.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300.0),
+        explain_prefix=EXPLAIN_PREFIXES.get(app.config.get('DATABASE_BACKEND', 'mysql')) if explain else None,
+        max_bytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backups=app.config.get('SLOW_QUERY_LOG_BACKUPS', 5)
+    )
+
+
+def slow_query_log_path(app: fk.Flask) -> str:
+    """Renvoie le chemin du journal des requêtes lentes de l'application."""
+    return app.config.get('SLOW_QUERY_LOG_PATH', os.path.join(app.instance_path, 'slow_queries.log'))
+
+
+def read_entries(path: str, backups: int = 5) -> tp.Iterator[dict[str, tp.Any]]:
+    """Lit les entrées d'un journal des requêtes lentes et de ses anciens fichiers, des plus anciennes aux plus
+    récentes. Les lignes illisibles (fichier tronqué pendant une rotation...) sont ignorées.
+
+    :param path: Chemin du fichier du journal.
+    :param backups: Nombre maximal d'anciens fichiers à lire.
+
+    :rtype: tp.Iterator[dict[str, tp.Any]]"""
+    for file_path in [f'{path}.{index}' for index in range(backups, 0, -1)] + [path]:
+        if not os.path.exists(file_path):
+            continue
+
+        with open(file_path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries: tp.Iterable[dict[str, tp.Any]]) -> list[dict[str, tp.Any]]:
+    """Agrège des entrées du journal par empreinte, de la plus coûteuse (durée cumulée) à la moins coûteuse.
+
+    :param entries: Entrées lues par read_entries().
+
+    :rtype: list[dict[str, tp.Any]]
+    :return: Pour chaque empreinte : la requête normalisée, le nombre d'occurrences, les durées cumulée, moyenne et
+        maximale, les endpoints concernés et le dernier plan d'exécution capturé."""
+    summaries: dict[str, dict[str, tp.Any]] = {}
+
+    for entry in entries:
+        summary = summaries.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'statement': entry['statement'],
+            'count': 0,
+            'total': 0.0,
+            'max': 0.0,
+            'endpoints': set(),
+            'explain': None,
+            'last_seen': None,
+        })
+        summary['count'] += 1
+        summary['total'] += entry['duration']
+        summary['max'] = max(summary['max'], entry['duration'])
+        summary['last_seen'] = entry['time']
+
+        if entry.get('endpoint'):
+            summary['endpoints'].add(entry['endpoint'])
+
+        if 'explain' in entry:
+            summary['explain'] = entry['explain']
+
+    for summary in summaries.values():
+        summary['mean'] = summary['total'] / summary['count']
+
+    return sorted(summaries.values(), key=lambda summary: summary['total'], reverse=True)
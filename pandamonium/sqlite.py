@@ -0,0 +1,204 @@
+import functools
+import re
+import sqlite3
+import typing as tp
+from datetime import date, datetime
+
+from pandamonium.concurrency import Offloaded
+
+DEFAULT_PRAGMAS: dict[str, tp.Any] = {
+    # Les lecteurs ne bloquent plus l'écrivain (et inversement) : indispensable avec plusieurs threads.
+    'journal_mode': 'WAL',
+    # En mode WAL, NORMAL ne synchronise le disque qu'aux checkpoints : une coupure de courant peut perdre les
+    # dernières transactions, jamais corrompre la base.
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+PLACEHOLDER_PATTERN = re.compile('%(s|%)')
+
+
+def _register_types():
+    """Enregistre la conversion des dates et des booléens, stockés en texte (ISO 8601) et en entiers par SQLite, selon
+    le type déclaré des colonnes. Les conversions par défaut de sqlite3 sont obsolètes depuis Python 3.12."""
+    sqlite3.register_adapter(date, date.isoformat)
+    sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+    sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+    sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+    sqlite3.register_converter('BOOLEAN', lambda value: value not in (b'0', b''))
+
+
+_register_types()
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(operation: str) -> str:
+    """Traduit une requête écrite pour mysql.connector (paramètres %s, pourcentages littéraux doublés) en requête
+    SQLite (paramètres ?). Les requêtes étant presque toutes des constantes, la traduction est mise en cache.
+
+    :param operation: Requête au format de mysql.connector.
+
+    :rtype: str
+    :return: La requête au format de sqlite3."""
+    return PLACEHOLDER_PATTERN.sub(lambda match: '?' if match.group(1) == 's' else '%', operation)
+
+
+class SQLiteCursor:
+    """Classe enveloppant un curseur sqlite3 pour qu'il s'utilise comme un curseur de mysql.connector : paramètres
+    %s, gestionnaire de contexte et lignes sous forme de dictionnaires avec dictionary=True."""
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False):
+        """Constructeur de la classe.
+
+        :param cursor: Curseur sqlite3.
+        :param dictionary: Renvoyer les lignes sous forme de dictionnaires (colonne -> valeur)."""
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation: str, params: tp.Sequence | None = None):
+        """Exécute une requête paramétrée.
+
+        :param operation: Requête au format de mysql.connector.
+        :param params: Valeurs des paramètres."""
+        self._cursor.execute(translate(operation), tuple(params) if params is not None else ())
+
+    def executemany(self, operation: str, seq_params: tp.Iterable[tp.Sequence]):
+        """Exécute une requête paramétrée pour chaque jeu de valeurs donné.
+
+        :param operation: Requête au format de mysql.connector.
+        :param seq_params: Jeux de valeurs des paramètres."""
+        self._cursor.executemany(translate(operation), (tuple(params) for params in seq_params))
+
+    def fetchone(self) -> tuple | dict | None:
+        row = self._cursor.fetchone()
+        return self.__convert(row) if row is not None and self._dictionary else row
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self.__convert_all(self._cursor.fetchmany(size))
+
+    def fetchall(self) -> list:
+        return self.__convert_all(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __convert(self, row: tuple) -> dict[str, tp.Any]:
+        """Transforme une ligne en dictionnaire."""
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def __convert_all(self, rows: list[tuple]) -> list:
+        """Transforme des lignes en dictionnaires si le curseur le demande."""
+        if not self._dictionary or not rows:
+            return rows
+
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+
+class SQLiteConnection:
+    """Classe enveloppant une connexion sqlite3 pour qu'elle s'utilise comme une connexion de mysql.connector en mode
+    autocommit : chaque requête est validée immédiatement, sauf entre start_transaction() et commit()/rollback()."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        """Constructeur de la classe.
+
+        :param connection: Connexion sqlite3 ouverte avec isolation_level=None."""
+        self._connection = connection
+        self._closed = False
+
+    @property
+    def autocommit(self) -> bool:
+        return True
+
+    @autocommit.setter
+    def autocommit(self, value: bool):
+        # La connexion est toujours en autocommit hors transaction explicite, comme celles de mysql_factory.
+        pass
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._connection.in_transaction
+
+    def cursor(self, dictionary: bool = False, **kwargs) -> SQLiteCursor:
+        """Crée un curseur.
+
+        :param dictionary: Renvoyer les lignes sous forme de dictionnaires (colonne -> valeur).
+
+        :rtype: SQLiteCursor"""
+        return SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def start_transaction(self):
+        self._connection.execute('BEGIN')
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def is_connected(self) -> bool:
+        return not self._closed
+
+    def close(self):
+        self._closed = True
+        self._connection.close()
+
+
+def sqlite_factory(path: str,
+                   pragmas: dict[str, tp.Any] | None = None,
+                   offload: bool = False,
+                   statement_cache_size: int = 128) -> tp.Callable[[], SQLiteConnection]:
+    """Renvoie une fonction ouvrant une nouvelle connexion à la base SQLite donnée, configurée par les pragmas donnés
+    (complétant DEFAULT_PRAGMAS).
+
+    :param path: Chemin du fichier de la base de données (ou URI commençant par file:).
+    :param pragmas: Pragmas à appliquer à chaque connexion, en plus ou à la place de ceux par défaut.
+    :param offload: Exécuter tous les appels à la connexion et à ses curseurs dans le pool de threads de run_blocking :
+        en mode eventlet/gevent, sqlite3 bloque la boucle d'événements pendant chaque requête.
+    :param statement_cache_size: Nombre de requêtes compilées gardées par connexion (cache interne de sqlite3, qui
+        rend inutile l'option prepared des curseurs)."""
+    pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+
+    def factory():
+        connection = sqlite3.connect(
+            path,
+            timeout=pragmas['busy_timeout'] / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            # Chaque connexion n'est utilisée que par un thread à la fois, mais peut être fermée par un autre.
+            check_same_thread=False,
+            cached_statements=statement_cache_size,
+            uri=path.startswith('file:')
+        )
+
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+
+        return Offloaded(SQLiteConnection(connection)) if offload else SQLiteConnection(connection)
+
+    return factory
@@ -0,0 +1,208 @@
+import collections
+import threading
+import typing as tp
+
+import mysql.connector.abstracts as abstracts
+
+
+class StatementCacheStats:
+    """Classe regroupant les compteurs de tous les caches de requêtes préparées du processus."""
+
+    def __init__(self):
+        self.__stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'prepared': 0}
+        self.__lock = threading.Lock()
+
+    def count(self, name: str, delta: int = 1):
+        """Modifie le compteur donné en argument."""
+        with self.__lock:
+            self.__stats[name] += delta
+
+    def stats(self) -> dict[str, int | float]:
+        """Renvoie les compteurs des caches.
+
+        :rtype: dict[str, int | float]
+        :return: Un dictionnaire contenant les nombres de hits, de misses et d'évictions, le taux de hits ainsi que le
+            nombre de requêtes actuellement préparées sur le serveur."""
+        with self.__lock:
+            lookups = self.__stats['hits'] + self.__stats['misses']
+            return {**self.__stats, 'hit_rate': self.__stats['hits'] / lookups if lookups else 0.0}
+
+    def reset(self):
+        """Remet les compteurs d'accès à zéro (le nombre de requêtes préparées est conservé)."""
+        with self.__lock:
+            self.__stats.update(hits=0, misses=0, evictions=0)
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+class StatementCache:
+    """Classe représentant le cache des requêtes préparées d'une connexion : un curseur préparé (protocole binaire de
+    MySQL) par texte de requête, les moins récemment utilisés étant fermés, et leur requête libérée sur le serveur,
+    au-delà de la taille maximale."""
+
+    def __init__(self, connection: abstracts.MySQLConnectionAbstract, size: int,
+                 stats: StatementCacheStats = statement_cache_stats):
+        """Constructeur de la classe.
+
+        :param connection: Connexion créant les curseurs préparés.
+        :param size: Nombre maximal de requêtes préparées (le serveur en limite le total via max_prepared_stmt_count).
+        :param stats: Compteurs partagés dans lesquels le cache comptabilise ses accès."""
+        self.size = size
+        self.__connection = connection
+        self.__stats = stats
+        self.__cursors: collections.OrderedDict[tuple[str, bool], tuple[str, tp.Any]] = collections.OrderedDict()
+
+    def get(self, operation: str, dictionary: bool) -> tuple[str, tp.Any]:
+        """Renvoie le curseur préparé pour la requête donnée, en le créant si besoin.
+
+        :param operation: Requête au format de mysql.connector.
+        :param dictionary: Le curseur renvoie-t-il les lignes sous forme de dictionnaires ?
+
+        :rtype: tuple[str, tp.Any]
+        :return: Le texte de la requête tel qu'il a été préparé, et le curseur. Les curseurs de mysql.connector ne
+            réutilisent leur requête préparée que si on leur redonne exactement le même objet str."""
+        key = (operation, dictionary)
+        entry = self.__cursors.get(key)
+
+        if entry is not None:
+            self.__cursors.move_to_end(key)
+            self.__stats.count('hits')
+            return entry
+
+        self.__stats.count('misses')
+        entry = (operation, self.__connection.cursor(prepared=True, dictionary=dictionary))
+        self.__cursors[key] = entry
+        self.__stats.count('prepared')
+
+        while len(self.__cursors) > self.size:
+            _, (_, evicted) = self.__cursors.popitem(last=False)
+            self.__stats.count('evictions')
+            self.__close(evicted)
+
+        return entry
+
+    def clear(self):
+        """Ferme tous les curseurs préparés."""
+        while self.__cursors:
+            _, (_, cursor) = self.__cursors.popitem()
+            self.__close(cursor)
+
+    def __len__(self):
+        return len(self.__cursors)
+
+    def __close(self, cursor):
+        """Ferme un curseur préparé, ce qui libère sa requête sur le serveur, en ignorant les erreurs réseau."""
+        self.__stats.count('prepared', -1)
+
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+class PreparedCursor:
+    """Classe représentant un curseur dont chaque requête passe par le cache des requêtes préparées de sa connexion.
+    Les lignes sont lues dès l'exécution : le curseur préparé, partagé, est aussitôt libre pour la requête suivante."""
+
+    def __init__(self, cache: StatementCache, dictionary: bool = False):
+        """Constructeur de la classe.
+
+        :param cache: Cache des requêtes préparées de la connexion.
+        :param dictionary: Renvoyer les lignes sous forme de dictionnaires (colonne -> valeur)."""
+        self._cache = cache
+        self._dictionary = dictionary
+        self._cursor = None
+        self._rows: collections.deque = collections.deque()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount if self._cursor is not None else -1
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self._cursor.lastrowid if self._cursor is not None else None
+
+    @property
+    def description(self):
+        return self._cursor.description if self._cursor is not None else None
+
+    def execute(self, operation: str, params: tp.Sequence | None = None):
+        """Exécute une requête paramétrée à l'aide de sa version préparée.
+
+        :param operation: Requête au format de mysql.connector.
+        :param params: Valeurs des paramètres."""
+        prepared_operation, self._cursor = self._cache.get(operation, self._dictionary)
+        self._cursor.execute(prepared_operation, tuple(params) if params is not None else ())
+        self._rows = collections.deque(self._cursor.fetchall() if self._cursor.description else ())
+
+    def executemany(self, operation: str, seq_params: tp.Iterable[tp.Sequence]):
+        """Exécute une requête paramétrée pour chaque jeu de valeurs donné.
+
+        :param operation: Requête au format de mysql.connector.
+        :param seq_params: Jeux de valeurs des paramètres."""
+        for params in seq_params:
+            self.execute(operation, params)
+
+    def fetchone(self) -> tuple | dict | None:
+        return self._rows.popleft() if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> list:
+        return [self._rows.popleft() for _ in range(min(size, len(self._rows)))]
+
+    def fetchall(self) -> list:
+        rows, self._rows = list(self._rows), collections.deque()
+        return rows
+
+    def close(self):
+        # Le curseur préparé appartient au cache : seules les lignes restantes sont oubliées.
+        self._rows.clear()
+        self._cursor = None
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StatementCachingConnection:
+    """Classe enveloppant une connexion MySQL afin que ses curseurs créés avec prepared=True utilisent le cache des
+    requêtes préparées de la connexion. Les autres attributs sont ceux de la connexion enveloppée."""
+
+    def __init__(self, connection: abstracts.MySQLConnectionAbstract, size: int,
+                 stats: StatementCacheStats = statement_cache_stats):
+        """Constructeur de la classe.
+
+        :param connection: Connexion enveloppée.
+        :param size: Nombre maximal de requêtes préparées par la connexion. Si 0, les curseurs créés avec
+            prepared=True sont de simples curseurs texte.
+        :param stats: Compteurs partagés dans lesquels le cache comptabilise ses accès."""
+        self.connection = connection
+        self.statements = StatementCache(connection, size, stats)
+
+    def cursor(self, *args, prepared: bool = False, dictionary: bool = False, **kwargs):
+        """Crée un curseur. Avec prepared=True et un cache non vide, le curseur passe par les requêtes préparées.
+
+        :param prepared: Utiliser les requêtes préparées (protocole binaire).
+        :param dictionary: Renvoyer les lignes sous forme de dictionnaires (colonne -> valeur)."""
+        if prepared and self.statements.size > 0:
+            return PreparedCursor(self.statements, dictionary)
+
+        return self.connection.cursor(*args, dictionary=dictionary, **kwargs)
+
+    def close(self):
+        self.statements.clear()
+        self.connection.close()
+
+    def __getattr__(self, name: str) -> tp.Any:
+        return getattr(self.connection, name)
+
+    def __setattr__(self, name: str, value: tp.Any):
+        if name in ('connection', 'statements'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.connection, name, value)
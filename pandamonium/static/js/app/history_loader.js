@@ -0,0 +1,45 @@
+const historyButton = document.getElementById('load_history')
+const historyContainer = document.querySelector('.messages')
+
+let historyCursor = null
+let historyLoading = false
+
+function loadHistory() {
+    if (historyButton === null || historyLoading) {
+        return
+    }
+
+    historyLoading = true
+
+    const url = new URL(historyButton.dataset.historyUrl, window.location.origin)
+
+    if (historyCursor !== null) {
+        url.searchParams.set('before', historyCursor)
+    }
+
+    fetch(url)
+        .then((response) => response.json())
+        .then((page) => {
+            // Les messages arrivent du plus récent au plus ancien : chacun est inséré au-dessus du précédent.
+            for (const data of page['messages']) {
+                const message = document.createElement('p')
+                const sender = data['sender'] !== null ? data['sender']['display_name'] : '?'
+                message.textContent = `${sender} : ${data['content']}`
+                historyContainer.prepend(message)
+            }
+
+            historyCursor = page['next']
+
+            if (historyCursor === null) {
+                historyButton.remove()
+            }
+        })
+        .finally(() => {
+            historyLoading = false
+        })
+}
+
+if (historyButton !== null) {
+    historyButton.addEventListener('click', loadHistory)
+    loadHistory()
+}
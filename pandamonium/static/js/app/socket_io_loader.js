@@ -1,13 +1,59 @@
-const socket = io()
+const messages = document.querySelector('.messages')
+// Transports imposés par le serveur (websocket seul lorsque plusieurs processus se partagent le port).
+const transports = JSON.parse(messages.dataset.transports || 'null')
+const socket = io(transports !== null ? {transports: transports} : {})
+
+const chatBox = document.getElementById('chatbox')
+const sendButton = document.getElementById('send')
+const onlineList = document.querySelector('.online_users')
+const onlineUsers = new Map()
+
+// Doit rester nettement inférieur à PRESENCE_TTL côté serveur.
+const HEARTBEAT_INTERVAL = 20000
+
+function renderOnlineUsers() {
+    onlineList.replaceChildren(...[...onlineUsers.values()].map((name) => {
+        const item = document.createElement('li')
+        item.textContent = name
+        return item
+    }))
+}
+
+function joinBranch(bambooUuid, branchUuid) {
+    messages.dataset.bambooUuid = bambooUuid
+    messages.dataset.branchUuid = branchUuid || ''
+    socket.emit('join_branch', {bamboo: bambooUuid, branch: branchUuid || null}, (joined) => {
+        if (!joined) {
+            return
+        }
+
+        // Liste complète une seule fois, puis uniquement les différences publiées par le serveur.
+        socket.emit('who_is_online', {scope: bambooUuid}, (users) => {
+            onlineUsers.clear()
+            users.forEach((user) => onlineUsers.set(user['uuid'], user['name']))
+            renderOnlineUsers()
+        })
+    })
+}
+
+socket.on('presence', (diff) => {
+    if (diff['scope'] !== messages.dataset.bambooUuid) {
+        return
+    }
+
+    diff['joined'].forEach((user) => onlineUsers.set(user['uuid'], user['name']))
+    diff['left'].forEach((user) => onlineUsers.delete(user['uuid']))
+    renderOnlineUsers()
+})
+
+setInterval(() => socket.emit('heartbeat'), HEARTBEAT_INTERVAL)
 
 socket.on('connect', () => {
     socket.emit('user_logged', {data: 'User connected'})
+    // Les rooms sont perdues à chaque reconnexion : elles sont donc rejointes à chaque connexion.
+    joinBranch(messages.dataset.bambooUuid, messages.dataset.branchUuid)
 })
 
-const messages = document.querySelector('.messages')
-const chatBox = document.getElementById('chatbox')
-const sendButton = document.getElementById('send')
-
 sendButton.addEventListener('click', (e) => {
     const message = chatBox.value.trim()
     console.log(message)
@@ -21,4 +67,4 @@ socket.on('user_message', (data) => {
     const message = document.createElement('p')
     message.textContent = data['data']
     messages.appendChild(message)
-})
\ No newline at end of file
+})
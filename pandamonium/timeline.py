@@ -0,0 +1,349 @@
+import collections
+import heapq
+import threading
+import time
+import typing as tp
+import uuid as uuid_lib
+from datetime import datetime
+
+import flask as fk
+
+from pandamonium.database import get_db
+
+# Types des entrées du fil d'actualité.
+MESSAGE_ENTRY = 'message'
+MEMBER_ENTRY = 'member'
+FRIEND_ENTRY = 'friend'
+
+ENTRY_COLUMNS = ('owner_uuid', 'entry_uuid', 'created', 'kind', 'actor_uuid', 'bamboo_uuid', 'subject_uuid')
+ENTRY_INSERT_REQUEST = f'INSERT INTO feed_entries({", ".join(ENTRY_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s, %s)'
+# Fan-out sur écriture : une seule requête copie l'entrée dans la liste de chaque membre du bambou, sauf son auteur.
+FAN_OUT_REQUEST = (
+    f'INSERT INTO feed_entries({", ".join(ENTRY_COLUMNS)}) '
+    'SELECT user_uuid, %s, %s, %s, %s, bamboo_uuid, %s FROM bamboo_members WHERE bamboo_uuid = %s AND user_uuid <> %s'
+)
+
+# (date, UUID de l'entrée, UUID de l'auteur, type, UUID de l'objet, UUID du bambou) d'une entrée du fil.
+Entry = tuple[datetime, str, str | None, str, str, str | None]
+
+
+class Timelines:
+    """Classe gérant les fils d'actualité précalculés des utilisateurs (table feed_entries).
+
+    Chaque événement (message, arrivée d'un membre, ajout d'un ami) est copié à l'écriture dans la liste de chacun de
+    ses destinataires (fan-out on write). Dans les bambous de plus de fanout_limit membres, un message copié autant de
+    fois coûterait trop cher : l'événement n'est alors écrit qu'une fois, dans la liste du bambou, que ses membres lisent
+    avec la leur (fan-out on read). La lecture d'une page du fil parcourt, dans l'index feed_entries_by_owner, la liste
+    de l'utilisateur et celle de chacun de ses bambous qui en possède une (les seuls grands bambous), chacune bornée à
+    la taille de la page, puis fusionne ces listes déjà triées.
+
+    Les listes sont bornées : toutes les trim_every diffusions d'un bambou, les listes de ses membres (ou, en fan-out on
+    read, celle du bambou) sont ramenées à max_entries entrées ; la commande trim-feeds borne toutes les listes.
+
+    Le mode de diffusion de chaque bambou est gardé en mémoire pendant size_ttl secondes (au plus size_cache bambous),
+    pour ne pas recompter ses membres à chaque message. Un mode périmé reste correct : la lecture parcourt toujours les
+    deux sortes de listes."""
+
+    def __init__(self,
+                 fanout_limit: int = 500,
+                 max_entries: int = 200,
+                 trim_every: int = 20,
+                 size_ttl: float = 60.0,
+                 size_cache: int = 4096):
+        """Constructeur de la classe.
+
+        :param fanout_limit: Nombre de membres au-delà duquel un bambou passe au fan-out on read.
+        :param max_entries: Nombre maximal d'entrées conservées par liste.
+        :param trim_every: Nombre de diffusions d'un bambou entre deux bornages des listes de ses membres.
+        :param size_ttl: Durée (en secondes) pendant laquelle le mode de diffusion d'un bambou est gardé en mémoire.
+        :param size_cache: Nombre maximal de bambous dont le mode de diffusion est gardé en mémoire."""
+        self.fanout_limit = fanout_limit
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self.size_ttl = size_ttl
+        self.size_cache = size_cache
+
+        self.__fan_outs: dict[str, int] = {}
+        self.__sizes: collections.OrderedDict[str, tuple[float, bool]] = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def fan_out(self, cursor, kind: str, bamboo_uuid: str, actor_uuid: str | None, subject_uuid: str,
+                created: datetime | None = None) -> bool:
+        """Diffuse un événement d'un bambou à ses membres.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param kind: Type de l'entrée.
+        :param bamboo_uuid: UUID du bambou.
+        :param actor_uuid: UUID de l'utilisateur à l'origine de l'événement, qui ne le reçoit pas.
+        :param subject_uuid: UUID de l'objet de l'événement (message, nouveau membre...).
+        :param created: Date de l'événement. Si None, l'instant présent est utilisé.
+
+        :rtype: bool
+        :return: True si l'événement a été copié dans la liste de chaque membre, False s'il a été écrit dans la liste
+            du bambou (fan-out on read)."""
+        created = created if created is not None else datetime.now()
+        entry_uuid = str(uuid_lib.uuid4())
+
+        if self.is_large(cursor, bamboo_uuid):
+            cursor.execute(ENTRY_INSERT_REQUEST, (bamboo_uuid, entry_uuid, created, kind, actor_uuid, bamboo_uuid,
+                                                  subject_uuid))
+
+            if self.__should_trim(bamboo_uuid):
+                self.trim(cursor, bamboo_uuid)
+
+            return False
+
+        cursor.execute(FAN_OUT_REQUEST, (entry_uuid, created, kind, actor_uuid, subject_uuid, bamboo_uuid,
+                                         actor_uuid or ''))
+
+        if self.__should_trim(bamboo_uuid):
+            self.trim_members(cursor, bamboo_uuid)
+
+        return True
+
+    def push(self, cursor, owner_uuid: str, kind: str, actor_uuid: str | None, subject_uuid: str,
+             bamboo_uuid: str | None = None, created: datetime | None = None):
+        """Ajoute un événement à la liste d'un seul utilisateur.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param owner_uuid: UUID du destinataire.
+        :param kind: Type de l'entrée.
+        :param actor_uuid: UUID de l'utilisateur à l'origine de l'événement.
+        :param subject_uuid: UUID de l'objet de l'événement.
+        :param bamboo_uuid: UUID du bambou concerné, le cas échéant.
+        :param created: Date de l'événement. Si None, l'instant présent est utilisé."""
+        created = created if created is not None else datetime.now()
+        cursor.execute(ENTRY_INSERT_REQUEST, (owner_uuid, str(uuid_lib.uuid4()), created, kind, actor_uuid,
+                                              bamboo_uuid, subject_uuid))
+
+    def is_large(self, cursor, bamboo_uuid: str) -> bool:
+        """Vérifie si le bambou donné compte plus de fanout_limit membres. Le comptage s'arrête à fanout_limit + 1 :
+        son coût ne dépend pas de la taille du bambou. Son résultat est gardé en mémoire pendant size_ttl secondes.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param bamboo_uuid: UUID du bambou.
+
+        :rtype: bool"""
+        now = time.monotonic()
+
+        with self.__lock:
+            entry = self.__sizes.get(bamboo_uuid)
+
+            if entry is not None and entry[0] > now:
+                self.__sizes.move_to_end(bamboo_uuid)
+                return entry[1]
+
+        cursor.execute('SELECT COUNT(*) FROM (SELECT 1 FROM bamboo_members WHERE bamboo_uuid = %s LIMIT %s) members',
+                       (bamboo_uuid, self.fanout_limit + 1))
+        large = cursor.fetchone()[0] > self.fanout_limit
+
+        with self.__lock:
+            self.__sizes[bamboo_uuid] = (now + self.size_ttl, large)
+            self.__sizes.move_to_end(bamboo_uuid)
+
+            while len(self.__sizes) > self.size_cache:
+                self.__sizes.popitem(last=False)
+
+        return large
+
+    def forget_size(self, bamboo_uuid: str | None = None):
+        """Oublie le mode de diffusion gardé en mémoire pour le bambou donné, après un changement de ses membres.
+
+        :param bamboo_uuid: UUID du bambou, ou None pour oublier celui de tous les bambous."""
+        with self.__lock:
+            if bamboo_uuid is None:
+                self.__sizes.clear()
+            else:
+                self.__sizes.pop(bamboo_uuid, None)
+
+    def read(self, user_uuid: str, before: tuple[datetime, str] | None = None, limit: int = 50) -> list[Entry]:
+        """Renvoie une page du fil d'actualité d'un utilisateur, de l'entrée la plus récente à la plus ancienne : sa
+        propre liste et celles des bambous dont il est membre (fan-out on read), sans ses propres actions.
+
+        La pagination se fait par clé (keyset) sur le couple (created, entry_uuid). Chaque liste est lue par un parcours
+        d'intervalle de l'index feed_entries_by_owner, limité à la taille de la page ; seuls les bambous possédant une
+        liste (ceux qui sont ou ont été en fan-out on read) sont lus.
+
+        :param user_uuid: UUID de l'utilisateur.
+        :param before: Couple (created, entry_uuid) de la dernière entrée de la page précédente, ou None pour la
+            première page.
+        :param limit: Nombre maximal d'entrées renvoyées.
+
+        :rtype: list[Entry]
+        :return: La date, l'UUID, l'auteur, le type et l'objet de chaque entrée, avec le bambou concerné."""
+        with get_db().cursor() as cursor:
+            cursor.execute(
+                'SELECT m.bamboo_uuid FROM bamboo_members m WHERE m.user_uuid = %s '
+                'AND EXISTS (SELECT 1 FROM feed_entries f WHERE f.owner_uuid = m.bamboo_uuid)',
+                (user_uuid,)
+            )
+            owners = [user_uuid] + [bamboo_uuid for bamboo_uuid, in cursor.fetchall()]
+            lists = [self.__read_list(cursor, owner_uuid, user_uuid, before, limit) for owner_uuid in owners]
+
+        if len(lists) == 1:
+            return lists[0]
+
+        entries = heapq.merge(*lists, key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [entry for entry, _ in zip(entries, range(limit))]
+
+    @staticmethod
+    def __read_list(cursor, owner_uuid: str, user_uuid: str, before: tuple[datetime, str] | None,
+                    limit: int) -> list[Entry]:
+        """Renvoie les limit entrées les plus récentes de la liste donnée, antérieures à before et dont l'utilisateur
+        donné n'est pas l'auteur.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param owner_uuid: UUID du propriétaire de la liste (utilisateur ou bambou).
+        :param user_uuid: UUID du lecteur.
+        :param before: Couple (created, entry_uuid) de la dernière entrée déjà lue, ou None.
+        :param limit: Nombre maximal d'entrées renvoyées.
+
+        :rtype: list[Entry]"""
+        request = (
+            'SELECT created, entry_uuid, actor_uuid, kind, subject_uuid, bamboo_uuid FROM feed_entries '
+            'WHERE owner_uuid = %s AND (actor_uuid IS NULL OR actor_uuid <> %s)'
+        )
+        values = [owner_uuid, user_uuid]
+
+        if before is not None:
+            request += ' AND created <= %s AND (created < %s OR entry_uuid < %s)'
+            values += [before[0], before[0], before[1]]
+
+        request += ' ORDER BY created DESC, entry_uuid DESC LIMIT %s'
+        values.append(limit)
+        cursor.execute(request, values)
+        return cursor.fetchall()
+
+    def trim(self, cursor, owner_uuid: str) -> int:
+        """Ramène la liste donnée à ses max_entries entrées les plus récentes.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param owner_uuid: UUID du propriétaire de la liste (utilisateur ou bambou).
+
+        :rtype: int
+        :return: Le nombre d'entrées supprimées."""
+        cursor.execute(
+            'SELECT created, entry_uuid FROM feed_entries WHERE owner_uuid = %s '
+            'ORDER BY created DESC, entry_uuid DESC LIMIT 1 OFFSET %s',
+            (owner_uuid, self.max_entries - 1)
+        )
+        oldest_kept = cursor.fetchone()
+
+        if oldest_kept is None:
+            return 0
+
+        cursor.execute(
+            'DELETE FROM feed_entries WHERE owner_uuid = %s AND created <= %s AND (created < %s OR entry_uuid < %s)',
+            (owner_uuid, oldest_kept[0], oldest_kept[0], oldest_kept[1])
+        )
+        return cursor.rowcount
+
+    def trim_members(self, cursor, bamboo_uuid: str) -> int:
+        """Borne les listes des membres du bambou donné qui dépassent max_entries entrées.
+
+        :param cursor: Curseur de la connexion à la base de données.
+        :param bamboo_uuid: UUID du bambou.
+
+        :rtype: int
+        :return: Le nombre d'entrées supprimées."""
+        cursor.execute(
+            'SELECT owner_uuid FROM feed_entries '
+            'WHERE owner_uuid IN (SELECT user_uuid FROM bamboo_members WHERE bamboo_uuid = %s) '
+            'GROUP BY owner_uuid HAVING COUNT(*) > %s',
+            (bamboo_uuid, self.max_entries)
+        )
+        return sum(self.trim(cursor, owner_uuid) for owner_uuid, in cursor.fetchall())
+
+    def trim_all(self, cursor) -> int:
+        """Borne toutes les listes qui dépassent max_entries entrées.
+
+        :param cursor: Curseur de la connexion à la base de données.
+
+        :rtype: int
+        :return: Le nombre d'entrées supprimées."""
+        cursor.execute('SELECT owner_uuid FROM feed_entries GROUP BY owner_uuid HAVING COUNT(*) > %s',
+                       (self.max_entries,))
+        return sum(self.trim(cursor, owner_uuid) for owner_uuid, in cursor.fetchall())
+
+    def __should_trim(self, bamboo_uuid: str) -> bool:
+        """Compte une diffusion du bambou donné, et vérifie si les listes de ses membres doivent être bornées."""
+        with self.__lock:
+            count = self.__fan_outs.get(bamboo_uuid, 0) + 1
+            self.__fan_outs[bamboo_uuid] = count % self.trim_every
+
+            return count >= self.trim_every
+
+
+timelines = Timelines()
+
+
+def configure_timelines(app: fk.Flask):
+    """Configure les fils d'actualité du processus à partir de la configuration de l'application.
+
+    Clés de configuration utilisées : FEED_FANOUT_LIMIT (nombre de membres au-delà duquel un bambou passe au fan-out on
+    read), FEED_MAX_ENTRIES (nombre maximal d'entrées par liste), FEED_TRIM_EVERY (nombre de diffusions d'un bambou
+    entre deux bornages des listes de ses membres) et FEED_SIZE_TTL (durée, en secondes, pendant laquelle le mode de
+    diffusion d'un bambou est gardé en mémoire).
+
+    :param fk.Flask app: L'instance de l'application Flask."""
+    timelines.fanout_limit = app.config.get('FEED_FANOUT_LIMIT', 500)
+    timelines.max_entries = app.config.get('FEED_MAX_ENTRIES', 200)
+    timelines.trim_every = max(1, app.config.get('FEED_TRIM_EVERY', 20))
+    timelines.size_ttl = app.config.get('FEED_SIZE_TTL', 60.0)
+    timelines.forget_size()
+
+
+def fan_out_messages(cursor, rows: tp.Iterable[tuple[str, str, datetime, str]]):
+    """Diffuse des messages tout juste écrits aux membres de leur bambou.
+
+    :param cursor: Curseur de la connexion à la base de données.
+    :param rows: UUID, UUID de la branche, date d'envoi et UUID de l'auteur de chaque message."""
+    rows = list(rows)
+
+    if not rows:
+        return
+
+    branch_uuids = list(dict.fromkeys(branch_uuid for _, branch_uuid, _, _ in rows))
+    cursor.execute(f'SELECT uuid, bamboo_uuid FROM branches WHERE uuid IN ({", ".join(["%s"] * len(branch_uuids))})',
+                   branch_uuids)
+    bamboos = dict(cursor.fetchall())
+
+    for message_uuid, branch_uuid, date_sent, sender_uuid in rows:
+        if branch_uuid in bamboos:
+            timelines.fan_out(cursor, MESSAGE_ENTRY, bamboos[branch_uuid], sender_uuid, message_uuid, date_sent)
+
+
+def rebuild_feeds(connection) -> int:
+    """Reconstruit entièrement les fils d'actualité à partir de la table messages : les max_entries derniers messages
+    de chaque bambou sont rediffusés à ses membres, un bambou par transaction. Les autres événements (arrivées de
+    membres, ajouts d'amis) n'ont pas d'autre trace en base de données et sont perdus.
+
+    :param connection: Connexion à la base de données.
+
+    :rtype: int
+    :return: Le nombre d'entrées écrites."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM feed_entries')
+        cursor.execute('SELECT uuid FROM bamboos')
+
+        for bamboo_uuid, in cursor.fetchall():
+            cursor.execute(
+                'SELECT m.uuid, m.date_sent, m.sender_uuid FROM messages m JOIN branches b ON b.uuid = m.branch_uuid '
+                'WHERE b.bamboo_uuid = %s ORDER BY m.date_sent DESC, m.uuid DESC LIMIT %s',
+                (bamboo_uuid, timelines.max_entries)
+            )
+            messages = cursor.fetchall()
+            connection.start_transaction()
+
+            try:
+                for message_uuid, date_sent, sender_uuid in reversed(messages):
+                    timelines.fan_out(cursor, MESSAGE_ENTRY, bamboo_uuid, sender_uuid, message_uuid, date_sent)
+
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+        timelines.trim_all(cursor)
+        cursor.execute('SELECT COUNT(*) FROM feed_entries')
+        return cursor.fetchone()[0]
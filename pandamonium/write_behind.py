@@ -0,0 +1,325 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+import typing as tp
+
+import flask as fk
+
+from pandamonium.database import get_pool
+from pandamonium.search import index_messages
+from pandamonium.timeline import fan_out_messages
+
+Row = tuple[tp.Any, ...]
+
+POLL_INTERVAL = 0.1
+
+logger = logging.getLogger('pandamonium.write_behind')
+
+MESSAGES_INSERT_REQUEST = 'INSERT INTO messages VALUES (%s, %s, %s, %s, %s, %s, %s)'
+
+_writers: dict[str, 'WriteBehindQueue'] = {}
+_writers_lock = threading.Lock()
+
+
+class WriteBehindQueue:
+    """Classe représentant une file d'écriture différée (write-behind) vidée par un thread dédié.
+
+    Les lignes soumises sont regroupées puis écrites par lots : un lot part dès qu'il atteint batch_size lignes, ou
+    flush_interval secondes après l'arrivée de sa première ligne. La file est bornée : quand elle est pleine, submit()
+    attend au plus put_timeout secondes puis refuse la ligne, et c'est alors à l'appelant de l'écrire lui-même
+    (backpressure). Les lignes restantes sont écrites lors de l'arrêt de la file, y compris à la fin du processus.
+
+    Un lot dont l'écriture échoue est réessayé jusqu'à retries fois, après des attentes doublant à chaque fois à partir
+    de retry_delay secondes (erreur passagère : connexion perdue, pool épuisé...). Entre deux essais, les lignes sont
+    écrites une à une afin qu'une ligne invalide ne bloque pas le reste de son lot. Seules les lignes ayant échoué à
+    chaque essai sont abandonnées, et journalisées une à une."""
+
+    def __init__(self,
+                 write: tp.Callable[[list[Row]], None],
+                 batch_size: int = 100,
+                 flush_interval: float = 0.05,
+                 queue_size: int = 10000,
+                 put_timeout: float = 0.1,
+                 retries: int = 3,
+                 retry_delay: float = 0.2,
+                 name: str = 'write-behind'):
+        """Constructeur de la classe.
+
+        :param write: Fonction écrivant un lot de lignes en une seule transaction. Elle doit lever une exception si le
+            lot n'a pas pu être écrit.
+        :param batch_size: Nombre maximal de lignes par lot.
+        :param flush_interval: Délai maximal (en secondes) entre l'arrivée d'une ligne et l'écriture de son lot.
+        :param queue_size: Nombre maximal de lignes en attente d'écriture.
+        :param put_timeout: Délai d'attente maximal (en secondes) d'une soumission lorsque la file est pleine.
+        :param retries: Nombre de nouveaux essais d'écriture des lignes d'un lot ayant échoué.
+        :param retry_delay: Attente (en secondes) avant le premier nouvel essai, doublée à chaque essai suivant.
+        :param name: Nom du thread d'écriture."""
+        if batch_size < 1:
+            raise ValueError('The batch size must be at least 1.')
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.__write = write
+        self.__queue: queue.Queue[Row] = queue.Queue(maxsize=queue_size)
+        self.__stopping = threading.Event()
+        self.__lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name=name, daemon=True)
+
+        self.__stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'written': 0,
+            'batches': 0,
+            'largest_batch': 0,
+            'retries': 0,
+            'failed': 0,
+        }
+
+    def start(self):
+        """Démarre le thread d'écriture. La file est vidée à la fin du processus."""
+        self.__thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float | None = 10.0):
+        """Arrête le thread d'écriture après qu'il a écrit toutes les lignes en attente. Les lignes soumises entre-temps
+        sont écrites par l'appelant.
+
+        Si le thread n'a pas fini à l'issue du délai (écriture lente, nouveaux essais en cours), l'appelant n'écrit
+        rien : le thread videra lui-même la file avant de se terminer, sans que deux écritures aient lieu en même temps.
+
+        :param timeout: Délai d'attente maximal (en secondes) de la fin du thread, ou None pour l'attendre sans limite."""
+        self.__stopping.set()
+
+        if self.__thread is threading.current_thread():
+            return
+
+        if self.__thread.is_alive():
+            self.__thread.join(timeout)
+
+            if self.__thread.is_alive():
+                logger.warning('Write-behind thread %s still running after %s s, leaving it to drain the queue '
+                               '(%d rows pending).', self.__thread.name, timeout, self.__queue.qsize())
+                return
+
+        self.__drain()
+
+    def submit(self, row: Row) -> bool:
+        """Soumet une ligne à écrire.
+
+        :param row: Valeurs de la ligne, dans l'ordre des colonnes de la table.
+
+        :rtype: bool
+        :return: True si la ligne sera écrite par la file, False si la file est pleine ou arrêtée : l'appelant doit
+            alors l'écrire lui-même."""
+        if self.__stopping.is_set():
+            return self.__reject()
+
+        try:
+            self.__queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            return self.__reject()
+
+        self.__count('submitted')
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """Renvoie les compteurs de la file.
+
+        :rtype: dict[str, int]
+        :return: Un dictionnaire contenant les nombres de lignes soumises, refusées, écrites et en échec, le nombre de
+            lots, la taille du plus gros lot ainsi que le nombre de lignes en attente."""
+        with self.__lock:
+            return {**self.__stats, 'pending': self.__queue.qsize()}
+
+    def __run(self):
+        """Boucle du thread d'écriture : attend une première ligne, complète son lot jusqu'à batch_size lignes ou
+        jusqu'à l'échéance de flush_interval, puis l'écrit. Les attentes sont découpées en tranches de POLL_INTERVAL
+        secondes au plus afin de remarquer rapidement l'arrêt de la file."""
+        while not self.__stopping.is_set():
+            try:
+                batch = [self.__queue.get(timeout=min(self.flush_interval, POLL_INTERVAL))]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size and not self.__stopping.is_set():
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                try:
+                    batch.append(self.__queue.get(timeout=min(remaining, POLL_INTERVAL)))
+                except queue.Empty:
+                    pass
+
+            self.__flush(batch)
+
+        self.__drain()
+
+    def __drain(self):
+        """Écrit immédiatement toutes les lignes encore en attente."""
+        while True:
+            batch = []
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not batch:
+                return
+
+            self.__flush(batch)
+
+    def __flush(self, batch: list[Row]):
+        """Écrit un lot en une seule transaction. En cas d'échec, les lignes sont écrites une à une, puis celles qui ont
+        échoué sont réessayées jusqu'à retries fois avec une attente exponentielle. Les lignes encore en échec sont
+        abandonnées et journalisées.
+
+        :param batch: Lignes à écrire."""
+        pending = batch
+
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                self.__count('retries')
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+            try:
+                self.__write(pending)
+                pending = []
+                break
+            except Exception as exception:
+                logger.warning('Write-behind batch of %d rows failed (attempt %d of %d): %s', len(pending),
+                               attempt + 1, self.retries + 1, exception)
+
+            if len(pending) > 1:
+                pending = [row for row in pending if not self.__write_row(row)]
+
+            if not pending:
+                break
+
+        for row in pending:
+            logger.error('Write-behind row dropped after %d attempts: %r', self.retries + 1, row)
+
+        with self.__lock:
+            self.__stats['batches'] += 1
+            self.__stats['written'] += len(batch) - len(pending)
+            self.__stats['failed'] += len(pending)
+            self.__stats['largest_batch'] = max(self.__stats['largest_batch'], len(batch))
+
+    def __write_row(self, row: Row) -> bool:
+        """Écrit une seule ligne.
+
+        :rtype: bool
+        :return: True si la ligne a été écrite, False sinon."""
+        try:
+            self.__write([row])
+            return True
+        except Exception:
+            return False
+
+    def __reject(self) -> bool:
+        """Compte une ligne refusée."""
+        self.__count('rejected')
+        return False
+
+    def __count(self, name: str):
+        """Incrémente le compteur donné en argument."""
+        with self.__lock:
+            self.__stats[name] += 1
+
+
+def insert_rows(app: fk.Flask,
+                request: str,
+                after: tp.Callable[[tp.Any, list[Row]], tp.Any] | None = None) -> tp.Callable[[list[Row]], None]:
+    """Renvoie une fonction écrivant un lot de lignes avec la requête donnée, via executemany et en une seule
+    transaction, sur une connexion empruntée au pool de l'application.
+
+    :param app: L'instance de l'application Flask.
+    :param request: Requête INSERT paramétrée pour une seule ligne.
+    :param after: Fonction appelée avec le curseur et les lignes après leur écriture, dans la même transaction (mise à
+        jour de données dérivées)."""
+    def write(rows: list[Row]):
+        pool = get_pool(app)
+        connection = pool.acquire()
+
+        try:
+            connection.start_transaction()
+
+            with connection.cursor() as cursor:
+                cursor.executemany(request, rows)
+
+                if after is not None:
+                    after(cursor, rows)
+
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            pool.release(connection)
+
+    return write
+
+
+def index_message_rows(cursor, rows: list[Row]):
+    """Indexe pour la recherche un lot de messages tout juste écrits par la file des messages.
+
+    :param cursor: Curseur de la transaction ayant écrit les messages.
+    :param rows: Lignes des messages, dans l'ordre des colonnes de MESSAGES_INSERT_REQUEST."""
+    index_messages(cursor, [(row[0], row[1], row[5]) for row in rows], replace=False)
+
+
+def publish_message_rows(cursor, rows: list[Row]):
+    """Met à jour les données dérivées d'un lot de messages tout juste écrits par la file des messages : index de
+    recherche et fils d'actualité des membres de leurs bambous.
+
+    :param cursor: Curseur de la transaction ayant écrit les messages.
+    :param rows: Lignes des messages, dans l'ordre des colonnes de MESSAGES_INSERT_REQUEST."""
+    index_message_rows(cursor, rows)
+    fan_out_messages(cursor, [(row[0], row[5], row[2], row[4]) for row in rows])
+
+
+def get_message_writer(app: fk.Flask | None = None) -> WriteBehindQueue | None:
+    """Renvoie la file d'écriture différée des messages de l'application, en la créant et en la démarrant si besoin.
+
+    Clés de configuration utilisées : MESSAGE_WRITE_BEHIND (active l'écriture différée, désactivée par défaut),
+    MESSAGE_BATCH_SIZE (nombre maximal de messages par lot), MESSAGE_FLUSH_INTERVAL (délai maximal avant l'écriture
+    d'un message, en secondes), MESSAGE_QUEUE_SIZE (nombre maximal de messages en attente), MESSAGE_QUEUE_TIMEOUT
+    (attente maximale d'une soumission lorsque la file est pleine, en secondes), MESSAGE_WRITE_RETRIES (nombre de
+    nouveaux essais d'un lot en échec) et MESSAGE_RETRY_DELAY (attente avant le premier nouvel essai, en secondes).
+
+    :param app: L'instance de l'application Flask. Si None, l'application courante est utilisée.
+
+    :rtype: WriteBehindQueue | None
+    :return: La file des messages, ou None si l'écriture différée est désactivée."""
+    app = app if app is not None else fk.current_app._get_current_object()
+
+    if not app.config.get('MESSAGE_WRITE_BEHIND', False):
+        return None
+
+    with _writers_lock:
+        if app.name not in _writers:
+            writer = WriteBehindQueue(
+                insert_rows(app, MESSAGES_INSERT_REQUEST, publish_message_rows),
+                batch_size=app.config.get('MESSAGE_BATCH_SIZE', 100),
+                flush_interval=app.config.get('MESSAGE_FLUSH_INTERVAL', 0.05),
+                queue_size=app.config.get('MESSAGE_QUEUE_SIZE', 10000),
+                put_timeout=app.config.get('MESSAGE_QUEUE_TIMEOUT', 0.1),
+                retries=app.config.get('MESSAGE_WRITE_RETRIES', 3),
+                retry_delay=app.config.get('MESSAGE_RETRY_DELAY', 0.2),
+                name=f'{app.name}-message-writer'
+            )
+            writer.start()
+            _writers[app.name] = writer
+
+        return _writers[app.name]
@@ -1,17 +1,36 @@
+from datetime import date
+
 import pytest
 
 from pandamonium import create_app
+from pandamonium.database import dispose_pool
+from pandamonium.entities.user import User
 
 
 @pytest.fixture()
-def app():
-    """Lance l'application en mode test."""
-    app = create_app()
-    app.config.update({"TESTING": True})
+def app(tmp_path):
+    """Lance l'application en mode test, sur une base SQLite propre à chaque test."""
+    app = create_app({
+        "TESTING": True,
+        "DATABASE_BACKEND": "sqlite",
+        "DATABASE_PATH": str(tmp_path / "pandamonium.sqlite3"),
+    })
 
     yield app
 
+    dispose_pool(app)
+
 
 @pytest.fixture()
 def runner(app):
     yield app.test_cli_runner()
+
+
+@pytest.fixture()
+def make_user(app):
+    """Renvoie une fonction créant un utilisateur valide, de mot de passe supermdp, à partir de son nom d'utilisateur.
+    S'utilise dans un contexte de l'application, une fois la base de données initialisée."""
+    def make_user(username: str) -> User:
+        return User.instant(username, f'{username}@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', username, '')
+
+    return make_user
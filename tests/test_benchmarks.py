@@ -0,0 +1,48 @@
+from benchmarks import BENCHMARKS, compare, load, measure, run, save
+
+
+def test_measure_calibrates_loops():
+    result = measure(lambda: None, repeat=3, min_time=0.01)
+
+    assert result['loops'] > 1
+    assert 0 < result['best'] <= result['median']
+
+
+def test_run_filters_benchmarks_by_pattern(tmp_path):
+    results = run('uuid_list.contains*', repeat=1, min_time=0.001)
+
+    assert sorted(results) == ['uuid_list.contains[10000]', 'uuid_list.contains[100]', 'uuid_list.contains[10]']
+    assert 'security.hash_password' in BENCHMARKS
+
+    save(results, tmp_path / 'baseline.json')
+    assert load(tmp_path / 'baseline.json') == results
+
+
+def test_compare_flags_regressions():
+    baseline = {'fast': {'best': 1.0}, 'slow': {'best': 1.0}, 'removed': {'best': 1.0}}
+    results = {'fast': {'best': 1.1}, 'slow': {'best': 1.5}, 'new': {'best': 1.0}}
+
+    assert compare(results, baseline, threshold=0.2) == [
+        ('fast', 1.0, 1.1, 1.1, False),
+        ('slow', 1.0, 1.5, 1.5, True),
+    ]
+
+
+def test_load_percentiles_and_delivery_ratio():
+    from benchmarks.load import Metrics, percentile
+
+    assert percentile([], 0.5) is None
+    assert percentile([5, 1, 4, 2, 3], 0.5) == 3
+    assert percentile(list(range(1, 101)), 0.99) == 99
+
+    metrics = Metrics()
+    metrics.message_sent(recipients=3)
+    metrics.message_delivered(0.01)
+    metrics.message_delivered(0.03)
+    metrics.error('connect')
+
+    point = metrics.snapshot(None)
+    summary = metrics.summary()
+    assert point['p50'] == 0.01 and point['errors'] == 1
+    assert summary['delivery_ratio'] == 2 / 3
+    assert summary['latency']['max'] == 0.03
@@ -0,0 +1,78 @@
+import time
+
+from pandamonium.entities.cache import EntityCache
+
+
+class FakeEntity:
+    """Entité factice permettant de tester le cache sans base de données."""
+
+    cache_keys = ('uuid', 'username')
+
+    def __init__(self, uuid, username):
+        self.values = {'uuid': uuid, 'username': username}
+
+    def get_column(self, name):
+        return self.values.get(name)
+
+
+def test_entities_are_found_by_every_key():
+    """Vérifie qu'une entité est retrouvable par son UUID comme par ses clés secondaires, sous forme de copie."""
+    cache = EntityCache(size=10)
+    entity = FakeEntity('a', 'alice')
+    cache.put(entity)
+
+    by_uuid = cache.get((FakeEntity, 'uuid', 'a'))
+    by_username = cache.get((FakeEntity, 'username', 'alice'))
+
+    assert by_uuid.values == entity.values
+    assert by_username.values == entity.values
+    assert by_uuid is not entity
+    assert cache.stats()['hits'] == 2
+
+
+def test_least_recently_used_entity_is_evicted():
+    """Vérifie que l'entité la moins récemment utilisée est évincée quand le cache est plein."""
+    cache = EntityCache(size=2)
+    cache.put(FakeEntity('a', 'alice'))
+    cache.put(FakeEntity('b', 'bob'))
+    cache.get((FakeEntity, 'uuid', 'a'))
+    cache.put(FakeEntity('c', 'carol'))
+
+    assert cache.get((FakeEntity, 'uuid', 'b')) is None
+    assert cache.get((FakeEntity, 'username', 'bob')) is None
+    assert cache.get((FakeEntity, 'uuid', 'a')) is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_misses():
+    """Vérifie qu'une entrée expirée n'est plus renvoyée."""
+    cache = EntityCache(size=10, ttl=0.01)
+    cache.put(FakeEntity('a', 'alice'))
+    time.sleep(0.02)
+
+    assert cache.get((FakeEntity, 'uuid', 'a')) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_invalidation_removes_stale_secondary_keys():
+    """Vérifie que l'invalidation retire aussi les anciennes clés secondaires d'une entité modifiée."""
+    cache = EntityCache(size=10)
+    entity = FakeEntity('a', 'alice')
+    cache.put(entity)
+
+    entity.values['username'] = 'alicia'
+    cache.invalidate(entity)
+
+    assert cache.get((FakeEntity, 'username', 'alice')) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    """Vérifie que le cache désactivé ne stocke ni ne renvoie rien."""
+    cache = EntityCache(size=10)
+
+    with cache.disabled():
+        cache.put(FakeEntity('a', 'alice'))
+        assert cache.get((FakeEntity, 'uuid', 'a')) is None
+
+    assert cache.stats()['entries'] == 0
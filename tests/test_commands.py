@@ -1,5 +1,7 @@
 from flask.testing import FlaskCliRunner
 
+from pandamonium.database import get_db
+
 
 def test_reset_db(runner: FlaskCliRunner):
     """Fonction de test de la commande 'reset-db [--blank]'.
@@ -10,3 +12,22 @@ def test_reset_db(runner: FlaskCliRunner):
 
     result = runner.invoke(args=['reset-db'])
     assert 'sans' in result.output
+
+
+def test_seed_is_reproducible_with_now(app, runner: FlaskCliRunner):
+    """Vérifie qu'une même graine et un même --now produisent les mêmes lignes."""
+    args = ['seed', '--reset', '-u', '20', '-b', '4', '-m', '50', '-s', '7', '--now', '2026-01-01']
+    snapshots = []
+
+    for _ in range(2):
+        result = runner.invoke(args=args)
+        assert result.exit_code == 0, result.output
+
+        with app.app_context(), get_db().cursor() as cursor:
+            cursor.execute('SELECT uuid, date_sent, sender_uuid, branch_uuid FROM messages ORDER BY uuid')
+            messages = cursor.fetchall()
+            cursor.execute('SELECT uuid, registration_date, last_connection_date FROM users ORDER BY uuid')
+            snapshots.append((messages, cursor.fetchall()))
+
+    assert snapshots[0] == snapshots[1]
+    assert max(date_sent for _, date_sent, _, _ in snapshots[0][0]).year == 2025
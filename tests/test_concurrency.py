@@ -0,0 +1,55 @@
+from pandamonium.concurrency import Offloaded, current_mode, run_blocking
+
+
+class FakeCursor:
+    """Curseur factice."""
+
+    def __init__(self):
+        self.rowcount = 0
+        self.closed = False
+
+    def execute(self, request, values=()):
+        self.rowcount = len(values)
+
+    def fetchall(self):
+        return [(1,), (2,)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+
+class FakeConnection:
+    """Connexion factice."""
+
+    def __init__(self):
+        self.autocommit = False
+        self.cursors = []
+
+    def cursor(self):
+        self.cursors.append(FakeCursor())
+        return self.cursors[-1]
+
+
+def test_run_blocking_calls_directly_in_threading_mode():
+    """Vérifie qu'en mode threading, run_blocking se contente d'appeler la fonction."""
+    assert current_mode() == 'threading'
+    assert run_blocking(lambda a, b=0: a + b, 1, b=2) == 3
+
+
+def test_offloaded_connections_wrap_their_cursors():
+    """Vérifie qu'une connexion enveloppée se comporte comme la connexion d'origine, curseurs compris."""
+    raw = FakeConnection()
+    connection = Offloaded(raw)
+    connection.autocommit = True
+
+    with connection.cursor() as cursor:
+        assert isinstance(cursor, Offloaded)
+        cursor.execute('SELECT %s, %s', (1, 2))
+        assert cursor.rowcount == 2
+        assert list(cursor) == [(1,), (2,)]
+
+    assert raw.autocommit
+    assert raw.cursors[0].closed
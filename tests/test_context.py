@@ -0,0 +1,46 @@
+import flask as fk
+
+from pandamonium.context import _loaders, lazy_global
+
+
+def test_lazy_globals_load_once_and_only_when_read(app):
+    calls = []
+
+    @lazy_global('answer')
+    def load_answer():
+        calls.append(1)
+        return 42
+
+    try:
+        with app.test_request_context('/auth/login'):
+            assert calls == []
+            assert 'answer' not in fk.g
+            assert fk.g.answer == 42
+            assert fk.g.get('answer') == 42
+            assert len(calls) == 1
+
+        # Chaque requête a son propre fk.g : le chargement est refait.
+        with app.test_request_context('/auth/login'):
+            assert fk.g.get('answer') == 42
+            assert len(calls) == 2
+    finally:
+        del _loaders['answer']
+
+
+def test_static_requests_never_load(app):
+    calls = []
+
+    @lazy_global('answer')
+    def load_answer():
+        calls.append(1)
+        return 42
+
+    try:
+        with app.test_request_context('/static/style.css'):
+            assert fk.request.endpoint == 'static'
+            assert fk.g.answer is None
+            assert fk.g.user is None
+
+        assert calls == []
+    finally:
+        del _loaders['answer']
@@ -0,0 +1,164 @@
+import random
+import uuid
+
+import pytest
+
+from pandamonium.entities.data_structures import UUIDList
+
+
+def make_uuids(count: int) -> list[str]:
+    """Génère count UUIDs aléatoires."""
+    return [str(uuid.uuid4()) for _ in range(count)]
+
+
+def test_chain_round_trip():
+    """Vérifie que la forme textuelle stockée en base de données est conservée telle quelle."""
+    uuids = make_uuids(5)
+    uuid_list = UUIDList(''.join(uuids))
+
+    assert str(uuid_list) == ''.join(uuids)
+    assert uuid_list.chain == ''.join(uuids)
+    assert list(uuid_list) == uuids
+    assert len(uuid_list) == uuid_list.length == 5
+    assert uuid_list[0] == uuids[0]
+    assert uuid_list[-1] == uuids[-1]
+    assert len(UUIDList(None)) == 0
+
+
+def test_malformed_chains_are_rejected():
+    """Vérifie que les chaînes mal formées sont refusées."""
+    with pytest.raises(ValueError):
+        UUIDList('abc')
+
+    with pytest.raises(ValueError):
+        UUIDList(make_uuids(1)[0] + 'Z' * 36)
+
+    with pytest.raises(ValueError):
+        UUIDList().append('not-a-uuid')
+
+
+def test_append_contains_and_remove():
+    """Vérifie l'ajout, le test d'appartenance et la suppression par valeur."""
+    uuids = make_uuids(4)
+    uuid_list = UUIDList()
+
+    for element in uuids:
+        uuid_list.append(element)
+
+    assert uuids[2] in uuid_list
+    assert 'not-a-uuid' not in uuid_list
+
+    uuid_list.remove(uuids[2])
+
+    assert uuids[2] not in uuid_list
+    assert list(uuid_list) == [uuids[0], uuids[1], uuids[3]]
+
+    with pytest.raises(ValueError):
+        uuid_list.remove(uuids[2])
+
+
+def test_delete_pop_and_set_by_index():
+    """Vérifie la suppression, le pop et le remplacement par index, y compris après des suppressions par valeur."""
+    uuids = make_uuids(6)
+    uuid_list = UUIDList.from_uuids(uuids)
+
+    uuid_list.remove(uuids[1])
+    del uuid_list[0]
+
+    assert uuid_list[0] == uuids[2]
+    assert uuid_list.pop() == uuids[5]
+    assert uuid_list.pop(0) == uuids[2]
+
+    replacement = make_uuids(1)[0]
+    uuid_list[1] = replacement
+
+    assert list(uuid_list) == [uuids[3], replacement]
+    assert replacement in uuid_list
+    assert uuids[4] not in uuid_list
+
+    with pytest.raises(IndexError):
+        uuid_list[2]
+
+
+def test_add_returns_a_new_list():
+    """Vérifie que l'opérateur + renvoie une nouvelle liste alors que += modifie la liste en place."""
+    first, second = make_uuids(2)
+    uuid_list = UUIDList(first)
+    added = uuid_list + second
+
+    assert list(added) == [first, second]
+    assert list(uuid_list) == [first]
+
+    same_list = uuid_list
+    uuid_list += second
+
+    assert uuid_list is same_list
+    assert uuid_list == added
+
+
+def test_hydrate_skips_validation():
+    """Vérifie que la chaîne venant de la base de données est reprise telle quelle, sans passer par la regex."""
+    uuids = make_uuids(3)
+    uuid_list = UUIDList.hydrate(''.join(uuids))
+
+    assert list(uuid_list) == uuids
+    assert uuids[1] in uuid_list
+    assert len(UUIDList.hydrate(None)) == 0
+
+
+def test_indexed_access_keeps_free_slots_and_index():
+    """Vérifie que les accès par index après une suppression ne compactent pas le tampon ni ne jettent l'index."""
+    uuids = make_uuids(10)
+    uuid_list = UUIDList.from_uuids(uuids)
+    uuid_list.remove(uuids[3])
+    index = uuid_list._UUIDList__index
+
+    assert uuid_list[3] == uuids[4]
+    uuid_list[-1] = uuids[3]
+    del uuid_list[0]
+
+    assert uuid_list._UUIDList__free_slots == [0, 3]
+    assert uuid_list._UUIDList__index is index
+    assert uuids[3] in uuid_list and uuids[9] not in uuid_list
+
+
+def test_random_operations_match_a_list():
+    """Compare une UUIDList à une liste Python sur une suite aléatoire d'opérations."""
+    rng = random.Random(0)
+    pool = make_uuids(30)
+    expected = pool[:20]
+    uuid_list = UUIDList.from_uuids(expected)
+
+    for _ in range(500):
+        operation = rng.choice(('append', 'remove', 'del', 'pop', 'set', 'get', 'contains'))
+
+        if operation == 'append':
+            value = rng.choice(pool)
+            expected.append(value)
+            uuid_list.append(value)
+        elif not expected:
+            continue
+        elif operation == 'remove':
+            value = rng.choice(expected)
+            expected.remove(value)
+            uuid_list.remove(value)
+        elif operation == 'del':
+            index = rng.randrange(-len(expected), len(expected))
+            del expected[index]
+            del uuid_list[index]
+        elif operation == 'pop':
+            assert uuid_list.pop() == expected.pop()
+        elif operation == 'set':
+            index, value = rng.randrange(len(expected)), rng.choice(pool)
+            expected[index] = value
+            uuid_list[index] = value
+        elif operation == 'get':
+            index = rng.randrange(-len(expected), len(expected))
+            assert uuid_list[index] == expected[index]
+        else:
+            value = rng.choice(pool)
+            assert (value in uuid_list) == (value in expected)
+
+        assert len(uuid_list) == len(expected)
+
+    assert list(uuid_list) == expected
@@ -0,0 +1,191 @@
+import copy
+from datetime import date
+
+import pytest
+
+from pandamonium.database import get_db, init_db
+from pandamonium.entities import data_structures
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.cache import entity_cache
+from pandamonium.entities.loader import EntityLoader
+from pandamonium.entities.user import User
+from pandamonium.migrations import migrate_db
+from pandamonium.security import get_security_error, is_security_error
+
+
+def test_entities_have_no_instance_dict():
+    bamboo = Bamboo._from_row(dict.fromkeys(Bamboo.schema.names))
+
+    assert not hasattr(bamboo, '__dict__')
+
+    with pytest.raises(AttributeError):
+        bamboo.nickname = 'pandas'
+
+
+def test_from_row_round_trip(app):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner = User.instant('tartur', 'tartur@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', 'Tartur', 'A')
+        bamboo = Bamboo.instant('Les pandas', owner.get_column('uuid'))
+        row = dict(zip(Bamboo.schema.names, (bamboo.get_column(name) for name in Bamboo.schema.names)))
+
+        hydrated = Bamboo._from_row(row)
+
+        assert type(hydrated) is Bamboo
+        assert hydrated.valid and not hydrated.dirty_columns
+        assert [hydrated.get_column(name) for name in Bamboo.schema.names] == list(row.values())
+        assert hydrated.get_column('unknown') is None
+
+
+def test_fetch_many_keeps_order_and_skips_missing(app, make_user, monkeypatch):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        uuids = [make_user(f'user{i}').get_column('uuid') for i in range(5)]
+
+    monkeypatch.setattr(User, 'fetch_many_chunk_size', 2)
+    entity_cache.clear()
+    queries = []
+    monkeypatch.setattr(data_structures, 'get_db', lambda: queries.append(1) or get_db())
+
+    with app.test_request_context():
+        missing = '00000000-0000-4000-8000-000000000000'
+        requested = [uuids[3], missing, uuids[0], uuids[3], uuids[4], uuids[1], uuids[2]]
+        users = User.fetch_many(requested)
+
+        # Ordre des UUIDs demandés conservé, UUIDs introuvables ignorés, paquets de 2 UUIDs distincts.
+        assert [user.get_column('uuid') for user in users] == [uuid for uuid in requested if uuid != missing]
+        # Les doublons désignent la même instance (carte d'identité de la requête).
+        assert users[0] is users[2]
+        assert len(queries) == 3
+        assert User.fetch_many([]) == []
+
+
+class FakeEntity:
+    """Entité factice comptant les appels à fetch_many."""
+
+    calls: list[list[str]] = []
+
+    def __init__(self, uuid: str):
+        self.uuid = uuid
+
+    def get_column(self, name: str) -> str:
+        return self.uuid
+
+    @classmethod
+    def fetch_many(cls, uuids):
+        cls.calls.append(list(uuids))
+        return [cls(uuid) for uuid in uuids if uuid != 'absent']
+
+
+def test_loader_batches_pending_loads():
+    FakeEntity.calls = []
+    loader = EntityLoader()
+    first, second, absent = (loader.load(FakeEntity, uuid) for uuid in ('a', 'b', 'absent'))
+
+    assert FakeEntity.calls == []
+    assert first.get_column('uuid') == 'a'
+    assert FakeEntity.calls == [['a', 'b', 'absent']]
+    assert second.resolve().uuid == 'b'
+    assert not absent and absent.resolve() is None
+
+    with pytest.raises(AttributeError):
+        absent.get_column('uuid')
+
+    # Une entité déjà chargée n'est plus redemandée.
+    assert loader.load(FakeEntity, 'a').get_column('uuid') == 'a'
+    assert loader.load(FakeEntity, 'c').get_column('uuid') == 'c'
+    assert FakeEntity.calls == [['a', 'b', 'absent'], ['c']]
+    assert loader.batches == 2
+
+
+class RecordingConnection:
+    """Connexion enregistrant les requêtes exécutées par ses curseurs."""
+
+    def __init__(self, connection, statements: list[str]):
+        self.connection = connection
+        self.statements = statements
+
+    def cursor(self, *args, **kwargs):
+        connection = self
+
+        class RecordingCursor:
+            def __init__(self, cursor):
+                self.cursor = cursor
+
+            def execute(self, operation, params=None):
+                connection.statements.append(operation)
+                return self.cursor.execute(operation, params)
+
+            def __getattr__(self, name):
+                return getattr(self.cursor, name)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                self.cursor.close()
+
+        return RecordingCursor(self.connection.cursor(*args, **kwargs))
+
+
+def test_update_writes_only_dirty_columns(app, make_user, monkeypatch):
+    statements = []
+    monkeypatch.setattr(data_structures, 'get_db', lambda: RecordingConnection(get_db(), statements))
+
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner = make_user('tartur').get_column('uuid')
+        bamboo = Bamboo.instant('Les pandas', owner)
+
+        assert bamboo.update()
+        assert statements == []
+
+        bamboo.set_column('name', 'Les pandas roux')
+        assert bamboo.dirty_columns == {'name': 'Les pandas roux'}
+        assert bamboo.update()
+        assert statements == ['UPDATE bamboos SET name = %s, version = version + 1 WHERE uuid = %s AND version = %s']
+        assert not bamboo.dirty_columns and bamboo.get_column('version') == 1
+
+        # Réécrire la même valeur ne rend pas la colonne modifiée.
+        bamboo.set_column('name', 'Les pandas roux')
+        assert bamboo.update()
+        assert len(statements) == 1
+
+
+def test_stale_version_is_rejected(app, make_user):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner = make_user('tartur').get_column('uuid')
+        bamboo = Bamboo.instant('Les pandas', owner)
+        stale = copy.deepcopy(bamboo)
+
+        bamboo.set_column('name', 'Les pandas roux')
+        assert bamboo.update()
+
+        stale.set_column('name', 'Les pandas géants')
+        assert not stale.update()
+        assert is_security_error()
+        assert 'modifiées entre-temps' in get_security_error()
+        # La modification refusée reste en attente, et la ligne garde la valeur écrite en premier.
+        assert stale.dirty_columns == {'name': 'Les pandas géants'}
+        assert stale.get_column('version') == 0
+
+    with app.test_request_context():
+        entity_cache.clear()
+        assert Bamboo.fetch_many([bamboo.get_column('uuid')])[0].get_column('name') == 'Les pandas roux'
+
+
+def test_migration_adds_version_columns(app, make_user):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner = make_user('tartur').get_column('uuid')
+        bamboo = Bamboo.instant('Les pandas', owner).get_column('uuid')
+
+        with get_db().cursor() as cursor:
+            cursor.execute('ALTER TABLE bamboos DROP COLUMN version')
+
+        assert dict(migrate_db(get_db()))['versions'] == 1
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT version FROM bamboos WHERE uuid = %s', (bamboo,))
+            assert cursor.fetchone()[0] == 0
@@ -0,0 +1,50 @@
+from pandamonium import socket
+from pandamonium.database import init_db
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.branch import Branch
+
+
+def connect(app, username: str):
+    """Connecte un client Socket.IO partageant la session d'un client HTTP authentifié."""
+    client = app.test_client()
+    client.post('/auth/login', data={'identifier': username, 'password': 'supermdp'})
+    return socket.test_client(app, flask_test_client=client)
+
+
+def create_bamboo(make_user):
+    """Crée un bambou à deux branches dont tartur et panda sont membres, ainsi qu'un utilisateur extérieur."""
+    init_db(set_default_values=False)
+    users = [make_user(name) for name in ('tartur', 'panda', 'intrus')]
+    bamboo = Bamboo.instant('Les pandas', users[0].get_column('uuid'))
+    bamboo.add_member(users[1].get_column('uuid'))
+    branches = [Branch.instant(name, bamboo.get_column('uuid')).get_column('uuid') for name in ('général', 'projets')]
+    return bamboo.get_column('uuid'), branches
+
+
+def test_join_branch_switches_rooms(app, make_user):
+    with app.test_request_context():
+        bamboo, (general, projects) = create_bamboo(make_user)
+
+    tartur, panda, intruder = connect(app, 'tartur'), connect(app, 'panda'), connect(app, 'intrus')
+
+    assert intruder.emit('join_branch', {'bamboo': bamboo, 'branch': general}, callback=True) is False
+    assert tartur.emit('join_branch', {'bamboo': bamboo, 'branch': general}, callback=True) is True
+    assert panda.emit('join_branch', {'bamboo': bamboo, 'branch': general}, callback=True) is True
+    # panda quitte la room de la branche générale en rejoignant celle des projets.
+    assert panda.emit('join_branch', {'bamboo': bamboo, 'branch': projects}, callback=True) is True
+
+    for client in (tartur, panda, intruder):
+        client.get_received()
+
+    tartur.emit('user_message', {'data': 'Bonjour la générale'})
+
+    assert [event['args'][0]['data'] for event in tartur.get_received() if event['name'] == 'user_message'] == \
+        ['Bonjour la générale']
+    assert not [event for event in panda.get_received() if event['name'] == 'user_message']
+    assert not [event for event in intruder.get_received() if event['name'] == 'user_message']
+
+    panda.emit('user_message', {'data': 'Du nouveau côté projets'})
+
+    assert [event['args'][0]['data'] for event in panda.get_received() if event['name'] == 'user_message'] == \
+        ['Du nouveau côté projets']
+    assert not [event for event in tartur.get_received() if event['name'] == 'user_message']
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+from pandamonium import hashing
+from pandamonium.database import get_db, init_db
+from pandamonium.entities.cache import entity_cache
+from pandamonium.entities.user import User
+from pandamonium.hashing import HashingPool, HashingPoolBusyError
+from pandamonium.security import check_password, hash_password, needs_rehash
+
+
+def test_scrypt_round_trip():
+    hashed = hash_password('supermdp')
+
+    assert hashed.startswith('scrypt$')
+    assert hashed != hash_password('supermdp')
+    assert check_password('supermdp', hashed)
+    assert not check_password('supermdp!', hashed)
+    assert not needs_rehash(hashed)
+
+
+def test_legacy_sha256_is_accepted_then_rehashed():
+    legacy = hashlib.sha256(b'supermdp').hexdigest()
+
+    assert check_password('supermdp', legacy)
+    assert not check_password('autremdp', legacy)
+    assert needs_rehash(legacy)
+    assert needs_rehash(hash_password('supermdp', n=2 ** 10))
+
+
+def test_missing_hashes_never_match():
+    assert not check_password('supermdp', None)
+    assert not check_password('', '')
+    assert not HashingPool(workers=0).verify('supermdp', None)
+
+
+def test_inline_pool_counts_calls():
+    pool = HashingPool(workers=0)
+    hashed = pool.hash('supermdp')
+
+    assert pool.verify('supermdp', hashed)
+    assert not pool.verify('autremdp', hashed)
+
+    stats = pool.stats()
+    assert stats['hashes'] == 1
+    assert stats['verifications'] == 2
+    assert stats['pending'] == 0
+    assert stats['peak_pending'] == 1
+    assert stats['max_compute_time'] > 0
+
+
+def test_full_pool_rejects_callers():
+    pool = HashingPool(workers=0, max_pending=1, timeout=0.01)
+    thread = threading.Thread(target=pool.hash, args=('supermdp',))
+    thread.start()
+
+    deadline = time.monotonic() + 2.0
+
+    while pool.stats()['pending'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    with pytest.raises(HashingPoolBusyError):
+        pool.hash('autremdp')
+
+    thread.join()
+    assert pool.stats()['rejected'] == 1
+    assert pool.verify('supermdp', pool.hash('supermdp'))
+
+
+def test_configure_while_busy():
+    """Vérifie que les limites peuvent être changées pendant un calcul, sans perturber ce calcul."""
+    pool = HashingPool(workers=0, max_pending=1, timeout=0.01)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(pool.hash('supermdp')))
+    thread.start()
+
+    deadline = time.monotonic() + 2.0
+
+    while pool.stats()['pending'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    pool.configure(workers=0, max_pending=2, timeout=0.01)
+    assert pool.verify('autremdp', hash_password('autremdp'))
+
+    pool.configure(workers=0, max_pending=1, timeout=0.01)
+    thread.join()
+
+    assert check_password('supermdp', results[0])
+    assert pool.stats()['pending'] == 0
+    assert pool.stats()['rejected'] == 0
+    assert pool.verify('supermdp', results[0])
+
+
+def test_busy_rehash_does_not_block_login(app, make_user, monkeypatch):
+    """Vérifie qu'un pool saturé au moment de remplacer un ancien hash n'empêche pas la connexion."""
+    legacy = hashlib.sha256(b'supermdp').hexdigest()
+
+    def busy(password):
+        raise HashingPoolBusyError('Busy.')
+
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        user = make_user('tartur')
+
+        with get_db().cursor() as cursor:
+            cursor.execute('UPDATE users SET password = %s WHERE uuid = %s', (legacy, user.get_column('uuid')))
+
+        entity_cache.clear()
+
+        with monkeypatch.context() as patch:
+            patch.setattr(hashing.hashing_pool, 'hash', busy)
+            assert User.login('tartur', 'supermdp') is not None
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT password FROM users WHERE uuid = %s', (user.get_column('uuid'),))
+            assert cursor.fetchone()[0] == legacy
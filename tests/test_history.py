@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from pandamonium.entities.message import Message
+from pandamonium.routes.bamboo import decode_history_cursor, encode_history_cursor
+
+
+def test_history_cursor_round_trip():
+    """Vérifie qu'un curseur désigne bien le couple (date_sent, uuid) du message dont il est issu."""
+    message_uuid = str(uuid.uuid4())
+    date_sent = datetime(2024, 3, 1, 12, 30, 15)
+    message = Message._from_row({
+        'uuid': message_uuid,
+        'content': 'Bonjour',
+        'date_sent': date_sent,
+        'modified': False,
+        'sender_uuid': str(uuid.uuid4()),
+        'branch_uuid': str(uuid.uuid4()),
+        'response_to_message_uuid': None,
+    })
+
+    assert decode_history_cursor(encode_history_cursor(message)) == (date_sent, message_uuid)
+    assert decode_history_cursor(None) is None
+
+
+def test_malformed_history_cursors_are_rejected():
+    """Vérifie qu'un curseur mal formé est refusé."""
+    with pytest.raises(ValueError):
+        decode_history_cursor('2024-03-01T12:30:15_not-a-uuid')
+
+    with pytest.raises(ValueError):
+        decode_history_cursor(f'yesterday_{uuid.uuid4()}')
@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+
+from pandamonium.database import init_db
+from pandamonium.entities.user import User
+from pandamonium.metrics import Histogram, MetricsRegistry, RequestMetrics, configure_metrics
+
+
+@pytest.fixture()
+def metrics_app(app):
+    """Active les métriques le temps du test, sur une base contenant un utilisateur."""
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        User.instant('tartur', 'tartur@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', 'Tartur', 'Arthur')
+
+    app.config['METRICS_ENABLED'] = True
+    configure_metrics(app)
+
+    yield app
+
+    app.config['METRICS_ENABLED'] = False
+    configure_metrics(app)
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram((1, 5, 10))
+
+    for value in (0, 1, 3, 7, 50):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [('1', 2), ('5', 3), ('10', 4), ('+Inf', 5)]
+    assert histogram.sum == 61
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    metrics = RequestMetrics()
+    metrics.queries, metrics.rows, metrics.db_time = 3, 12, 0.002
+    registry.observe_request('auth.login_page', 'POST', 200, metrics, 0.004)
+    registry.register_stats('pool', lambda: {'borrowed': 2, 'wait_time': 0.5})
+
+    text = registry.render()
+
+    assert 'pandamonium_requests_total{endpoint="auth.login_page",method="POST",status="200"} 1' in text
+    assert 'pandamonium_request_queries_bucket{endpoint="auth.login_page",method="POST",le="5"} 1' in text
+    assert 'pandamonium_request_rows_bucket{endpoint="auth.login_page",method="POST",le="10"} 0' in text
+    assert 'pandamonium_request_db_seconds_sum{endpoint="auth.login_page",method="POST"} 0.002' in text
+    assert 'pandamonium_pool_borrowed 2' in text
+    assert 'pandamonium_pool_wait_time 0.5' in text
+
+
+def test_requests_are_instrumented(metrics_app):
+    client = metrics_app.test_client()
+    response = client.post('/auth/login', data={'identifier': 'tartur', 'password': 'mauvais'})
+
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert '1 queries, 1 rows' in timing
+    assert 'render;dur=' in timing
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'pandamonium_requests_total{endpoint="auth.login_page",method="POST",status="200"} 1' in text
+    assert 'pandamonium_request_duration_seconds_count{endpoint="auth.login_page",method="POST"} 1' in text
+    assert 'pandamonium_database_pool_checkouts' in text
+
+
+def test_disabled_metrics_leave_no_trace(app):
+    client = app.test_client()
+
+    assert 'Server-Timing' not in client.get('/auth/login').headers
+    assert client.get('/metrics').status_code == 404
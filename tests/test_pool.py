@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from pandamonium.pool import ConnectionPool, PoolClosedError, PoolExhaustedError
+
+
+class FakeConnection:
+    """Connexion factice permettant de tester le pool sans base de données."""
+
+    def __init__(self):
+        self.connected = True
+        self.in_transaction = False
+        self.rolled_back = False
+
+    def is_connected(self):
+        return self.connected
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.connected = False
+
+
+def test_connections_are_reused():
+    """Vérifie qu'une connexion rendue au pool est réutilisée au prochain emprunt."""
+    pool = ConnectionPool(FakeConnection, size=2)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert first is second
+    assert pool.stats()['created'] == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_dead_and_stale_connections_are_replaced():
+    """Vérifie que les connexions mortes ou trop vieilles sont remplacées lors de l'emprunt."""
+    pool = ConnectionPool(FakeConnection, size=1, recycle=3600.0)
+
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.connected = False
+
+    assert pool.acquire() is not connection
+    assert pool.stats()['discarded'] == 1
+
+    stale_pool = ConnectionPool(FakeConnection, size=1, recycle=0.0)
+    stale = stale_pool.acquire()
+    stale_pool.release(stale)
+
+    assert stale_pool.acquire() is not stale
+    assert stale_pool.stats()['recycled'] == 1
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    """Vérifie qu'une transaction laissée ouverte est annulée lors du retour de la connexion."""
+    pool = ConnectionPool(FakeConnection, size=1)
+
+    connection = pool.acquire()
+    connection.in_transaction = True
+    pool.release(connection)
+
+    assert connection.rolled_back
+
+
+def test_exhausted_pool_times_out():
+    """Vérifie qu'un emprunt sur un pool plein échoue après le délai d'attente."""
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['exhausted'] == 1
+    assert stats['wait_time'] > 0
+
+
+def test_waiting_borrower_gets_released_connection():
+    """Vérifie qu'un emprunteur en attente récupère la connexion dès qu'elle est rendue."""
+    pool = ConnectionPool(FakeConnection, size=1, timeout=5.0)
+    connection = pool.acquire()
+    borrowed = []
+
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    waiter.start()
+    pool.release(connection)
+    waiter.join(timeout=5.0)
+
+    assert borrowed == [connection]
+    assert pool.stats()['exhausted'] == 0
+
+
+def test_closed_pool_closes_returned_connections():
+    """Vérifie qu'un pool fermé refuse les emprunts et ferme les connexions qui lui sont rendues."""
+    pool = ConnectionPool(FakeConnection, size=2)
+    idle, borrowed = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close()
+
+    assert not idle.connected
+
+    pool.release(borrowed)
+
+    assert not borrowed.connected
+    assert pool.stats()['idle'] == 0
+
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+
+
+def test_slow_release_does_not_block_the_pool():
+    """Vérifie que le rollback d'une connexion rendue se fait hors du verrou du pool."""
+    rolling_back, resume = threading.Event(), threading.Event()
+
+    class SlowConnection(FakeConnection):
+        def rollback(self):
+            rolling_back.set()
+            resume.wait(5.0)
+            super().rollback()
+
+    pool = ConnectionPool(SlowConnection, size=2)
+    slow = pool.acquire()
+    slow.in_transaction = True
+    releaser = threading.Thread(target=pool.release, args=(slow,))
+    releaser.start()
+    rolling_back.wait(5.0)
+
+    # La connexion en cours de rollback occupe toujours sa place, mais l'autre reste empruntable.
+    other = pool.acquire()
+    assert other is not slow
+    assert pool.stats()['borrowed'] == 2
+
+    resume.set()
+    releaser.join(5.0)
+    pool.release(other)
+    assert pool.stats()['idle'] == 2
@@ -0,0 +1,73 @@
+from pandamonium.presence import PresenceRegistry, TimerWheel
+
+
+def test_timer_wheel_expires_keys_without_heartbeat():
+    """Vérifie qu'une clé expire après le délai, sauf si son échéance a été repoussée."""
+    wheel = TimerWheel(ttl=10, tick=1)
+    wheel.schedule('a', now=0)
+    wheel.schedule('b', now=0)
+    wheel.schedule('b', now=8)
+
+    assert wheel.advance(5) == []
+    assert wheel.advance(12) == ['a']
+    assert wheel.advance(20) == ['b']
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_survives_long_pauses():
+    """Vérifie que les échéances sont respectées même si la roue n'a pas tourné pendant plusieurs tours."""
+    wheel = TimerWheel(ttl=3, tick=1)
+    wheel.schedule('a', now=0)
+    wheel.schedule('b', now=100)
+
+    assert wheel.advance(101) == ['a']
+    assert wheel.advance(105) == ['b']
+
+
+def test_online_users_are_counted_per_scope():
+    """Vérifie qu'un utilisateur reste en ligne tant qu'il lui reste une connexion dans la portée."""
+    registry = PresenceRegistry(ttl=60)
+    registry.connect('sid-1', 'alice', 'Alice', now=0)
+    registry.connect('sid-2', 'alice', 'Alice', now=0)
+    registry.connect('sid-3', 'bob', 'Bob', now=0)
+    registry.locate('sid-1', 'bamboo', 'branch-1', now=0)
+    registry.locate('sid-2', 'bamboo', 'branch-2', now=0)
+    registry.locate('sid-3', 'bamboo', 'branch-1', now=0)
+
+    assert sorted(user['uuid'] for user in registry.online('bamboo')) == ['alice', 'bob']
+    assert registry.online('branch-2') == [{'uuid': 'alice', 'name': 'Alice'}]
+
+    registry.disconnect('sid-1')
+
+    assert sorted(user['uuid'] for user in registry.online('bamboo')) == ['alice', 'bob']
+    assert [user['uuid'] for user in registry.online('branch-1')] == ['bob']
+
+
+def test_diffs_are_coalesced():
+    """Vérifie que seuls les changements nets depuis la dernière publication sont publiés."""
+    registry = PresenceRegistry(ttl=60)
+    registry.connect('sid-1', 'alice', 'Alice', now=0)
+    registry.locate('sid-1', 'bamboo', now=0)
+
+    assert registry.drain() == {'bamboo': {'joined': [{'uuid': 'alice', 'name': 'Alice'}], 'left': []}}
+
+    registry.disconnect('sid-1')
+    registry.connect('sid-2', 'alice', 'Alice', now=0)
+    registry.locate('sid-2', 'bamboo', now=0)
+
+    assert registry.drain() == {}
+
+
+def test_silent_sessions_expire():
+    """Vérifie qu'une connexion sans battement de cœur expire et que son départ est publié."""
+    registry = PresenceRegistry(ttl=10, tick=1)
+    registry.connect('sid-1', 'alice', 'Alice', now=0)
+    registry.connect('sid-2', 'bob', 'Bob', now=0)
+    registry.locate('sid-1', 'bamboo', now=0)
+    registry.locate('sid-2', 'bamboo', now=0)
+    registry.drain()
+    registry.heartbeat('sid-2', now=9)
+
+    assert registry.expire(now=12) == ['sid-1']
+    assert registry.drain() == {'bamboo': {'joined': [], 'left': [{'uuid': 'alice', 'name': 'Alice'}]}}
+    assert registry.online('bamboo') == [{'uuid': 'bob', 'name': 'Bob'}]
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from pandamonium.pubsub import Broker, UnixSocketManager, socket_path
+
+
+@pytest.fixture
+def broker(tmp_path):
+    """Broker local écoutant sur un socket UNIX temporaire."""
+    broker = Broker(str(tmp_path / 'broker.sock')).start()
+    yield broker
+    broker.close()
+
+
+def listen(manager, count):
+    """Lance l'écoute du manager donné dans un thread et renvoie la liste qui recevra les count premiers événements,
+    ainsi qu'un événement signalant que l'abonnement est prêt."""
+    received = []
+    ready = threading.Event()
+    done = threading.Event()
+
+    def run():
+        events = manager._listen()
+        ready.set()
+
+        for data in events:
+            received.append(data)
+
+            if len(received) == count:
+                done.set()
+                return
+
+    threading.Thread(target=run, daemon=True).start()
+    return received, ready, done
+
+
+def wait_until(predicate, timeout=2.0):
+    """Attend que la condition donnée soit vraie."""
+    deadline = time.monotonic() + timeout
+
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    return predicate()
+
+
+def test_events_reach_every_process(broker):
+    """Vérifie qu'un événement publié par un processus est reçu par les abonnés de tous les processus."""
+    url = f'unix://{broker.path}'
+    publisher = UnixSocketManager(url)
+    subscribers = [UnixSocketManager(url), UnixSocketManager(url)]
+    listeners = [listen(subscriber, 2) for subscriber in subscribers]
+
+    for _, ready, _ in listeners:
+        assert ready.wait(1)
+
+    # Laisse au broker le temps d'enregistrer les abonnés avant la première publication.
+    threading.Event().wait(0.1)
+
+    publisher._publish({'method': 'emit', 'event': 'user_message', 'room': 'branch'})
+    publisher._publish({'method': 'enter_room', 'room': 'bamboo'})
+
+    for received, _, done in listeners:
+        assert done.wait(1)
+        assert [data['method'] for data in received] == ['emit', 'enter_room']
+
+
+def test_other_channels_are_ignored(broker):
+    """Vérifie qu'un manager ignore les événements publiés sur un autre canal."""
+    url = f'unix://{broker.path}'
+    subscriber = UnixSocketManager(url, channel='pandamonium')
+    received, ready, done = listen(subscriber, 1)
+    assert ready.wait(1)
+    threading.Event().wait(0.1)
+
+    UnixSocketManager(url, channel='other')._publish({'method': 'emit'})
+    UnixSocketManager(url, channel='pandamonium')._publish({'method': 'close_room'})
+
+    assert done.wait(1)
+    assert received == [{'method': 'close_room'}]
+
+
+def test_only_unix_urls_are_accepted():
+    """Vérifie que seules les URLs de socket UNIX sont acceptées."""
+    assert socket_path('unix:///tmp/broker.sock') == '/tmp/broker.sock'
+
+    with pytest.raises(ValueError):
+        socket_path('redis://localhost:6379')
+
+
+def test_listener_survives_a_broker_restart(tmp_path):
+    """Vérifie qu'un abonné se reconnecte au broker après son redémarrage et reçoit de nouveau les événements."""
+    path = str(tmp_path / 'broker.sock')
+    url = f'unix://{path}'
+    broker = Broker(path).start()
+    publisher = UnixSocketManager(url)
+    subscriber = UnixSocketManager(url, retry_delay=0.01, max_retry_delay=0.05)
+    received, ready, done = listen(subscriber, 2)
+    assert ready.wait(1)
+    threading.Event().wait(0.1)
+
+    publisher._publish({'method': 'emit', 'event': 'before'})
+    assert wait_until(lambda: len(received) == 1)
+
+    broker.close()
+    # Laisse à l'abonné le temps d'échouer au moins une fois à se reconnecter.
+    threading.Event().wait(0.1)
+    broker = Broker(path).start()
+
+    try:
+        # Les événements publiés avant le réabonnement sont perdus : on publie jusqu'à ce que l'un d'eux arrive.
+        def publish_again():
+            publisher._publish({'method': 'emit', 'event': 'after'})
+            return done.wait(0.02)
+
+        assert wait_until(publish_again)
+        assert [data['event'] for data in received] == ['before', 'after']
+    finally:
+        broker.close()
@@ -0,0 +1,103 @@
+import pytest
+
+from pandamonium.database import get_db, init_db, transaction
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.relationship import friendships, memberships
+from pandamonium.migrations import migrate_db
+from pandamonium.timeline import timelines
+
+
+def test_relationship_links_and_pages(app, make_user):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        source, *targets = sorted(make_user(f'user{i}').get_column('uuid') for i in range(6))
+
+        for target in targets:
+            assert friendships.add(source, target)
+
+        assert not friendships.add(source, targets[0])
+        assert not friendships.add(source, '00000000-0000-4000-8000-000000000000')
+        assert friendships.contains(source, targets[2])
+        assert not friendships.contains(targets[2], source)
+        assert friendships.count(source) == 5
+
+        first = friendships.targets(source, limit=2)
+        second = friendships.targets(source, after=first[-1], limit=2)
+        last = friendships.targets(source, after=second[-1], limit=2)
+        assert list(first) + list(second) + list(last) == targets
+        assert len(friendships.targets(source, after=targets[-1])) == 0
+        assert list(friendships.sources(targets[1])) == [source]
+
+        assert friendships.remove(source, targets[1])
+        assert not friendships.remove(source, targets[1])
+        assert targets[1] not in friendships.targets(source)
+        assert friendships.count(source) == 4
+
+
+def test_migrate_legacy_chains(app, make_user):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner, friend, member = (make_user(name).get_column('uuid') for name in ('tartur', 'panda', 'bambi'))
+        bamboo = Bamboo.instant('Les pandas', owner).get_column('uuid')
+
+        # Base créée avec l'ancien schéma : les liens sont des chaînes d'UUIDs dans les tables users et bamboos.
+        with get_db().cursor() as cursor:
+            cursor.execute('DROP TABLE user_friends')
+            cursor.execute('DELETE FROM bamboo_members')
+            cursor.execute('ALTER TABLE users ADD COLUMN friends VARCHAR(3600)')
+            cursor.execute('ALTER TABLE users ADD COLUMN bamboos VARCHAR(3600)')
+            cursor.execute('ALTER TABLE bamboos ADD COLUMN members TEXT')
+            cursor.execute('UPDATE users SET friends = %s WHERE uuid = %s',
+                           (friend + member + '00000000-0000-4000-8000-000000000000', owner))
+            cursor.execute('UPDATE users SET bamboos = %s WHERE uuid = %s', (bamboo, member))
+            cursor.execute('UPDATE bamboos SET members = %s WHERE uuid = %s', (member + friend, bamboo))
+
+        assert migrate_db(get_db()) == [('tables', 1), ('relationships', 5), ('versions', 0)]
+        assert list(friendships.targets(owner)) == sorted([friend, member])
+        assert list(memberships.targets(bamboo)) == sorted([owner, friend, member])
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT * FROM users LIMIT 0')
+            assert 'friends' not in [column[0] for column in cursor.description]
+
+        # Une base à jour n'est pas modifiée.
+        assert migrate_db(get_db()) == [('tables', 0), ('relationships', 0), ('versions', 0)]
+
+
+def count_bamboos() -> int:
+    with get_db().cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM bamboos')
+        return cursor.fetchone()[0]
+
+
+def test_bamboo_is_created_with_its_owner_or_not_at_all(app, make_user, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('Timeline unavailable.')
+
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        owner, member = (make_user(name).get_column('uuid') for name in ('tartur', 'panda'))
+
+        with monkeypatch.context() as patch:
+            patch.setattr(timelines, 'fan_out', fail)
+
+            with pytest.raises(RuntimeError):
+                Bamboo.instant('Les pandas', owner)
+
+        assert not get_db().in_transaction
+        assert count_bamboos() == 0
+
+        # Les écritures faites dans une transaction ouverte par l'appelant sont validées ou annulées avec elle.
+        with pytest.raises(RuntimeError):
+            with transaction():
+                bamboo = Bamboo.instant('Les pandas', owner)
+                assert bamboo.add_member(member)
+                raise RuntimeError('Rollback.')
+
+        assert count_bamboos() == 0
+
+        with transaction():
+            bamboo = Bamboo.instant('Les pandas', owner)
+            assert bamboo.add_member(member)
+
+        assert list(memberships.targets(bamboo.get_column('uuid'))) == sorted([owner, member])
@@ -0,0 +1,164 @@
+from datetime import date
+
+import pytest
+
+from pandamonium.database import get_db, init_db
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.branch import Branch
+from pandamonium.entities.message import Message
+from pandamonium.entities.user import User
+from pandamonium import search as search_module
+from pandamonium.search import index_messages, rebuild_index, search, tokenize
+
+
+def test_tokenize_folds_french_text():
+    assert tokenize("L'Été, les BAMBOUS poussent à l’hôpital !") == ['ete', 'bambou', 'poussent', 'hopital']
+    assert tokenize("Qu'est-ce que c'est ? Œuvre des châteaux") == ['oeuvre', 'chateau']
+    assert tokenize('rendez-vous à 9 h') == ['rendez', '9']
+
+
+def create_branches():
+    """Crée un utilisateur, un bambou et deux branches."""
+    init_db(set_default_values=False)
+    user = User.instant('tartur', 'tartur@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', 'Tartur', 'Arthur')
+    bamboo = Bamboo.instant('Les pandas', user.get_column('uuid'))
+    first = Branch.instant('général', bamboo.get_column('uuid'))
+    second = Branch.instant('projets', bamboo.get_column('uuid'))
+    return user, bamboo, first.get_column('uuid'), second.get_column('uuid')
+
+
+def test_search_ranks_and_follows_updates(app):
+    with app.test_request_context():
+        user, bamboo, first, second = create_branches()
+        sender = user.get_column('uuid')
+
+        best = Message.instant('Le panda mange du bambou, encore du bambou', sender, first)
+        other = Message.instant('Un bambou dans le jardin et une longue phrase pour allonger ce message', sender, first)
+        Message.instant('Rien à voir avec le sujet', sender, first)
+        elsewhere = Message.instant('Les bambous du projet', sender, second)
+
+        results, total = search('BAMBOUS', [first])
+        assert [uuid for uuid, _ in results] == [best.get_column('uuid'), other.get_column('uuid')]
+        assert total == 2
+        # Le message court de l'autre branche passe devant le message long.
+        page, total = search('bambou', [first, second], page=2, limit=2)
+        assert [uuid for uuid, _ in page] == [other.get_column('uuid')]
+        assert total == 3
+        assert elsewhere.get_column('uuid') in [uuid for uuid, _ in search('bambou', [first, second])[0]]
+
+        other.set_column('content', 'Plus question de cette plante')
+        assert other.update()
+        assert [uuid for uuid, _ in search('bambou', [first])[0]] == [best.get_column('uuid')]
+        assert search('plante', [first])[0][0][0] == other.get_column('uuid')
+
+        with get_db().cursor() as cursor:
+            cursor.execute('DELETE FROM search_postings')
+
+        assert search('bambou', [first]) == ([], 0)
+        assert rebuild_index(get_db(), batch_size=2) == 4
+        assert search('bambou', [first])[1] == 1
+
+
+def test_common_terms_and_candidates_are_bounded(app, monkeypatch):
+    with app.test_request_context():
+        user, _, branch, _ = create_branches()
+        sender = user.get_column('uuid')
+        messages = [Message.instant(f'Bambou numéro {i}', sender, branch).get_column('uuid') for i in range(4)]
+        garden = Message.instant('Un bambou dans le jardin', sender, branch).get_column('uuid')
+
+        # « bambou » figure dans tous les messages : seul « jardin » départage la recherche.
+        assert search('bambou jardin', [branch]) == (search('jardin', [branch])[0], 1)
+        # Une recherche ne contenant que des termes courants garde le plus rare.
+        assert search('bambou', [branch])[1] == 5
+
+        monkeypatch.setattr(search_module, 'MAX_CANDIDATE_ROWS', 2)
+        results, total = search('bambou', [branch])
+        assert total == 2
+        assert {uuid for uuid, _ in results} <= set(messages + [garden])
+
+
+def test_rebuild_tolerates_messages_indexed_meanwhile(app, monkeypatch):
+    """Vérifie qu'un message indexé par son envoi pendant la reconstruction ne fait pas échouer celle-ci."""
+    with app.test_request_context():
+        user, _, branch, _ = create_branches()
+        messages = sorted((Message.instant(f'Bambou numéro {i}', user.get_column('uuid'), branch) for i in range(4)),
+                          key=lambda message: message.get_column('uuid'))
+        calls = []
+
+        def index_during_rebuild(cursor, documents, replace=True):
+            if not calls:
+                # Indexation par l'envoi du dernier message, entre le vidage de l'index et le lot de ce message.
+                last = messages[-1]
+                index_messages(cursor, [(last.get_column('uuid'), last.get_column('content'), branch)], replace=False)
+
+            calls.append(len(documents))
+            return index_messages(cursor, documents, replace)
+
+        monkeypatch.setattr(search_module, 'index_messages', index_during_rebuild)
+
+        assert rebuild_index(get_db(), batch_size=2) == 4
+        assert search('bambou', [branch])[1] == 4
+
+
+def test_failed_fan_out_rolls_the_message_back(app, monkeypatch):
+    """Vérifie qu'un message dont la diffusion échoue n'est ni écrit ni indexé."""
+    def fail(cursor, messages):
+        raise RuntimeError('Fan-out failed.')
+
+    with app.test_request_context():
+        user, _, branch, _ = create_branches()
+        monkeypatch.setattr('pandamonium.entities.message.fan_out_messages', fail)
+
+        with pytest.raises(RuntimeError):
+            Message.instant('Le bambou perdu', user.get_column('uuid'), branch)
+
+        assert not get_db().in_transaction
+        assert search('bambou', [branch]) == ([], 0)
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM messages')
+            assert cursor.fetchone()[0] == 0
+
+
+def test_failed_reindex_rolls_the_edit_back(app, monkeypatch):
+    """Vérifie qu'une modification dont la réindexation échoue n'est pas écrite, et que le message reste trouvable."""
+    def fail(cursor, documents, replace=True):
+        raise RuntimeError('Indexing failed.')
+
+    with app.test_request_context():
+        user, _, branch, _ = create_branches()
+        message = Message.instant('Le bambou pousse', user.get_column('uuid'), branch)
+        monkeypatch.setattr('pandamonium.entities.message.index_messages', fail)
+        message.set_column('content', 'Plus question de cette plante')
+
+        with pytest.raises(RuntimeError):
+            message.update()
+
+        assert not get_db().in_transaction
+        assert [uuid for uuid, _ in search('bambou', [branch])[0]] == [message.get_column('uuid')]
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT content FROM messages WHERE uuid = %s', (message.get_column('uuid'),))
+            assert cursor.fetchone()[0] == 'Le bambou pousse'
+
+
+def test_search_endpoint(app):
+    with app.test_request_context():
+        user, bamboo, first, second = create_branches()
+        Message.instant('Réunion demain matin', user.get_column('uuid'), first)
+        Message.instant('La réunion est annulée', user.get_column('uuid'), second)
+        bamboo_uuid = bamboo.get_column('uuid')
+
+    client = app.test_client()
+    client.post('/auth/login', data={'identifier': 'tartur', 'password': 'supermdp'})
+
+    response = client.get(f'/app/bamboo/{bamboo_uuid}/search', query_string={'q': 'reunion', 'limit': 1})
+    assert response.json['total'] == 2
+    assert response.json['next'] == 2
+    assert response.json['messages'][0]['sender']['username'] == 'tartur'
+
+    response = client.get(f'/app/bamboo/{bamboo_uuid}/search', query_string={'q': 'réunions', 'branch': second})
+    assert [message['content'] for message in response.json['messages']] == ['La réunion est annulée']
+    assert response.json['next'] is None
+
+    assert client.get(f'/app/bamboo/{bamboo_uuid}/search', query_string={'q': 'x', 'branch': 'autre'}).status_code == 404
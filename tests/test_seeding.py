@@ -0,0 +1,68 @@
+import collections
+from datetime import datetime
+
+from pandamonium.security import check_password
+from pandamonium.seeding import SeedPlan, bulk_insert, generate, load
+
+NOW = datetime(2026, 1, 1)
+
+
+class RecordingCursor:
+    """Curseur factice enregistrant les requêtes exécutées."""
+
+    def __init__(self):
+        self.requests = []
+
+    def execute(self, request, params):
+        self.requests.append((request, params))
+
+
+def test_generation_is_deterministic():
+    plan = SeedPlan(users=50, bamboos=10, messages=500, seed=42)
+    first, second = generate(plan, NOW), generate(plan, NOW)
+
+    # Seul le sel du hash du mot de passe est tiré au hasard.
+    assert [user[:3] + user[4:] for user in first.users] == [user[:3] + user[4:] for user in second.users]
+    assert first.members == second.members
+    assert list(first.messages) == list(second.messages)
+    assert generate(SeedPlan(users=50, bamboos=10, messages=500, seed=43), NOW).users != first.users
+
+
+def test_generated_data_is_consistent():
+    data = generate(SeedPlan(users=200, bamboos=30, messages=2000, password='secret'), NOW)
+    messages = list(data.messages)
+    members = {(bamboo_uuid, user_uuid) for bamboo_uuid, user_uuid, _ in data.members}
+    bamboo_of_branch = {branch_uuid: bamboo_uuid for branch_uuid, _, bamboo_uuid in data.branches}
+    seen = set()
+
+    assert len(messages) == 2000
+    assert check_password('secret', data.users[0][3])
+    assert len({user[1] for user in data.users}) == 200
+    assert len(members) == len(data.members)
+
+    for message_uuid, _, date_sent, _, sender_uuid, branch_uuid, response_uuid in messages:
+        assert (bamboo_of_branch[branch_uuid], sender_uuid) in members
+        assert date_sent <= NOW
+        assert response_uuid is None or response_uuid in seen
+        seen.add(message_uuid)
+
+    sizes = sorted(collections.Counter(bamboo_uuid for bamboo_uuid, _, _ in data.members).values())
+    assert sizes[-1] > 3 * sizes[len(sizes) // 2]
+
+
+def test_bulk_insert_batches_rows():
+    cursor = RecordingCursor()
+    rows = [(index, f'name{index}') for index in range(7)]
+
+    assert bulk_insert(cursor, 'things', ('id', 'name'), iter(rows), batch_size=3) == 7
+    assert [len(params) for _, params in cursor.requests] == [6, 6, 2]
+    assert cursor.requests[0][0] == 'INSERT INTO things(id, name) VALUES (%s, %s), (%s, %s), (%s, %s)'
+    assert cursor.requests[2][1] == [6, 'name6']
+
+
+def test_load_reports_every_table():
+    cursor = RecordingCursor()
+    report = load(cursor, generate(SeedPlan(users=20, bamboos=5, messages=100), NOW), batch_size=50)
+
+    assert [table for table, _, _ in report] == ['users', 'bamboos', 'bamboo_members', 'branches', 'messages']
+    assert report[0][1] == 20 and report[-1][1] == 100
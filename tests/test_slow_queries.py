@@ -0,0 +1,65 @@
+import json
+from datetime import date
+
+import pytest
+
+from pandamonium.database import init_db
+from pandamonium.entities.user import User
+from pandamonium.slow_queries import configure_slow_queries, fingerprint, slow_query_log, summarize
+
+
+@pytest.fixture()
+def slow_app(app, tmp_path):
+    """Journalise toutes les requêtes (seuil nul) le temps du test, sur une base contenant un utilisateur."""
+    with app.test_request_context():
+        init_db(set_default_values=False)
+        User.instant('tartur', 'tartur@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', 'Tartur', 'Arthur')
+
+    app.config.update(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD=0.0, SLOW_QUERY_LOG_PATH=str(tmp_path / 'slow.log'))
+    configure_slow_queries(app)
+
+    yield app
+
+    app.config['SLOW_QUERY_LOG'] = False
+    configure_slow_queries(app)
+
+
+def test_fingerprint_strips_parameters():
+    key, statement = fingerprint("SELECT * FROM users WHERE uuid IN (%s, %s,\n %s) AND name = 'tartur' -- ici")
+
+    assert statement == 'SELECT * FROM users WHERE uuid IN (?+) AND name = ?'
+    assert key == fingerprint('SELECT *  FROM users WHERE uuid IN (%s) AND name = %s')[0]
+    assert fingerprint('INSERT INTO t(a, b) VALUES (%s, %s), (%s, %s)')[1] == 'INSERT INTO t(a, b) VALUES (?+)'
+    assert fingerprint('SELECT * FROM t1 LIMIT 10')[1] == 'SELECT * FROM t1 LIMIT ?'
+
+
+def test_summarize_ranks_by_total_time():
+    entries = [
+        {'fingerprint': 'a', 'statement': 'A', 'duration': 0.5, 'time': '1', 'endpoint': 'x'},
+        {'fingerprint': 'b', 'statement': 'B', 'duration': 0.2, 'time': '2', 'endpoint': None},
+        {'fingerprint': 'b', 'statement': 'B', 'duration': 0.4, 'time': '3', 'endpoint': 'y', 'explain': []},
+    ]
+    first, second = summarize(entries)
+
+    assert (first['fingerprint'], first['count'], first['max'], first['explain']) == ('b', 2, 0.4, [])
+    assert first['mean'] == pytest.approx(0.3)
+    assert first['endpoints'] == {'y'}
+    assert second['fingerprint'] == 'a'
+
+
+def test_slow_queries_are_logged_with_their_plan(slow_app, tmp_path):
+    slow_app.test_client().post('/auth/login', data={'identifier': 'tartur', 'password': 'mauvais'})
+    slow_app.test_client().post('/auth/login', data={'identifier': 'tartur', 'password': 'mauvais'})
+
+    entries = [json.loads(line) for line in (tmp_path / 'slow.log').read_text(encoding='utf-8').splitlines()]
+    assert len(entries) == 2
+    assert entries[0]['endpoint'] == 'auth.login_page'
+    assert entries[0]['statement'].startswith('SELECT') and '?' in entries[0]['statement']
+    # Le plan n'est capturé qu'une fois par intervalle.
+    assert entries[0]['explain'] and 'explain' not in entries[1]
+    assert slow_query_log.stats()['slow'] == 2
+    assert slow_query_log.top(1)[0]['count'] == 2
+
+    result = slow_app.test_cli_runner().invoke(args=['slow-queries', '--explain'])
+    assert entries[0]['fingerprint'] in result.output
+    assert '2 fois' in result.output
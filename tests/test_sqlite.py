@@ -0,0 +1,93 @@
+import threading
+from datetime import date, datetime
+
+from pandamonium.database import get_db, init_db
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.branch import Branch
+from pandamonium.entities.message import Message
+from pandamonium.entities.relationship import memberships
+from pandamonium.entities.user import User
+from pandamonium.pool import ThreadLocalPool
+from pandamonium.sqlite import sqlite_factory, translate
+
+
+def test_translate_placeholders():
+    assert translate('SELECT * FROM users WHERE uuid = %s AND name LIKE %s') == \
+        'SELECT * FROM users WHERE uuid = ? AND name LIKE ?'
+    assert translate("SELECT '100%%' WHERE a = %s") == "SELECT '100%' WHERE a = ?"
+
+
+def test_types_round_trip(tmp_path):
+    connection = sqlite_factory(str(tmp_path / 'types.sqlite3'))()
+
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE TABLE things(uuid VARCHAR(36), day DATE, moment DATETIME, flag BOOLEAN NOT NULL)')
+        cursor.execute('INSERT INTO things VALUES (%s, %s, %s, %s)',
+                       ('a', date(2024, 2, 29), datetime(2024, 2, 29, 12, 30, 1), True))
+
+    with connection.cursor(dictionary=True) as cursor:
+        cursor.execute('SELECT * FROM things WHERE uuid = %s', ['a'])
+        assert cursor.fetchone() == {'uuid': 'a', 'day': date(2024, 2, 29), 'moment': datetime(2024, 2, 29, 12, 30, 1),
+                                     'flag': True}
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone() == ('wal',)
+
+    connection.close()
+
+
+def test_thread_local_pool_gives_one_connection_per_thread(tmp_path):
+    pool = ThreadLocalPool(sqlite_factory(str(tmp_path / 'pool.sqlite3')))
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.acquire()))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not first
+    assert pool.stats()['created'] == 2
+
+    pool.close()
+    assert not first.is_connected()
+
+
+def test_entities_on_sqlite(app):
+    with app.test_request_context():
+        init_db(set_default_values=False)
+
+        user = User.instant('tartur', 'tartur@example.com', 'supermdp', date(2006, 6, 26), 'il/lui', 'Tartur',
+                            'Arthur')
+        assert user is not None
+        assert User.instant('tartur', 'autre@example.com', 'supermdp', date(2006, 6, 26), None, 'T', 'A') is None
+
+        bamboo = Bamboo.instant('Les pandas', user.get_column('uuid'))
+        branch = Branch.instant('général', bamboo.get_column('uuid'))
+        # Le propriétaire est déjà membre : la violation de clé primaire est signalée comme avec MySQL.
+        assert not memberships.add(bamboo.get_column('uuid'), user.get_column('uuid'))
+        assert list(user.get_bamboos()) == [bamboo.get_column('uuid')]
+
+        for index in range(3):
+            Message.instant(f'message {index}', user.get_column('uuid'), branch.get_column('uuid'))
+
+        page = Message.fetch_page(branch.get_column('uuid'), limit=2)
+        assert [message.get_column('content') for message in page] == ['message 2', 'message 1']
+        assert isinstance(page[0].get_column('date_sent'), datetime)
+
+        user.set_column('public_bio', 'Salut !')
+        assert user.update()
+
+        with get_db().cursor() as cursor:
+            cursor.execute('SELECT public_bio, version FROM users WHERE uuid = %s', (user.get_column('uuid'),))
+            assert cursor.fetchone() == ('Salut !', 1)
+
+
+def test_seed_command_on_sqlite(runner):
+    result = runner.invoke(args=['seed', '--reset', '-u', '30', '-b', '5', '-m', '200', '--batch-size', '50'])
+
+    assert result.exit_code == 0, result.output
+    assert 'messages' in result.output
@@ -0,0 +1,114 @@
+from pandamonium.sqlite import sqlite_factory
+from pandamonium.statements import StatementCacheStats, StatementCachingConnection
+
+
+class FakePreparedCursor:
+    """Curseur préparé factice, qui ne prépare sa requête que si on lui en donne une autre que la précédente."""
+
+    def __init__(self, connection, dictionary):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.executed = None
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self.closed = False
+
+    def execute(self, operation, params):
+        if operation is not self.executed:
+            self.executed = operation
+            self.connection.prepares += 1
+
+        self.description = [('value',)] if operation.startswith('SELECT') else None
+        self.rowcount = 1
+
+    def fetchall(self):
+        return [{'value': 1}] if self.dictionary else [(1,)]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Connexion factice comptant les requêtes préparées."""
+
+    def __init__(self):
+        self.prepares = 0
+        self.cursors = []
+
+    def cursor(self, prepared=False, dictionary=False):
+        cursor = FakePreparedCursor(self, dictionary) if prepared else 'text'
+        self.cursors.append(cursor)
+        return cursor
+
+
+def test_statements_are_prepared_once_per_connection():
+    stats = StatementCacheStats()
+    connection = StatementCachingConnection(FakeConnection(), 2, stats)
+    request = 'SELECT * FROM users WHERE uuid = %s'
+
+    for _ in range(3):
+        with connection.cursor(dictionary=True, prepared=True) as cursor:
+            # Un texte égal mais distinct de celui mis en cache doit réutiliser la même requête préparée.
+            cursor.execute(''.join(request), ('uuid',))
+            assert cursor.fetchone() == {'value': 1}
+            assert cursor.fetchone() is None
+
+    assert connection.connection.prepares == 1
+    assert stats.stats()['hits'] == 2
+    assert stats.stats()['hit_rate'] == 2 / 3
+    assert connection.cursor() == 'text'
+
+
+def test_least_recently_used_statements_are_evicted():
+    stats = StatementCacheStats()
+    connection = StatementCachingConnection(FakeConnection(), 2, stats)
+
+    for request in ('SELECT 1', 'SELECT 2', 'SELECT 1', 'INSERT 3'):
+        connection.cursor(prepared=True).execute(request)
+
+    first, second, third = connection.connection.cursors
+    assert second.closed and not first.closed and not third.closed
+    assert len(connection.statements) == 2
+    assert stats.stats()['evictions'] == 1
+    assert stats.stats()['prepared'] == 2
+
+    connection.statements.clear()
+    assert first.closed and third.closed
+    assert stats.stats()['prepared'] == 0
+
+
+def test_disabled_cache_falls_back_to_text_cursors():
+    connection = StatementCachingConnection(FakeConnection(), 0, StatementCacheStats())
+
+    assert connection.cursor(prepared=True) == 'text'
+
+
+def test_prepared_cursors_behave_like_real_cursors(tmp_path):
+    """Vérifie, avec de vrais curseurs (SQLite), qu'un curseur passant par le cache renvoie les mêmes résultats qu'un
+    curseur ordinaire."""
+    stats = StatementCacheStats()
+    connection = StatementCachingConnection(sqlite_factory(str(tmp_path / 'statements.sqlite3'))(), 4, stats)
+
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE TABLE things(uuid VARCHAR(36) PRIMARY KEY, rank INT NOT NULL)')
+
+    with connection.cursor(prepared=True) as cursor:
+        cursor.executemany('INSERT INTO things VALUES (%s, %s)', [('a', 1), ('b', 2), ('c', 3)])
+        assert cursor.rowcount == 1
+
+    for dictionary in (False, True):
+        with connection.cursor(dictionary=dictionary) as plain, \
+                connection.cursor(dictionary=dictionary, prepared=True) as prepared:
+            for cursor in (plain, prepared):
+                cursor.execute('SELECT uuid, rank FROM things WHERE rank >= %s ORDER BY rank', (2,))
+
+            assert [column[0] for column in prepared.description] == [column[0] for column in plain.description]
+            assert prepared.fetchone() == plain.fetchone()
+            assert prepared.fetchall() == plain.fetchall()
+            assert prepared.fetchone() is None and plain.fetchone() is None
+
+    # Une requête préparée par texte et par format des lignes, réutilisée par chaque ligne de executemany.
+    assert stats.stats()['misses'] == 3
+    assert stats.stats()['hits'] == 2
+    connection.close()
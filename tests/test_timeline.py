@@ -0,0 +1,201 @@
+import pytest
+
+from pandamonium.database import get_db, init_db
+from pandamonium.entities.bamboo import Bamboo
+from pandamonium.entities.branch import Branch
+from pandamonium.entities.message import Message
+from pandamonium.entities.user import User
+from pandamonium.timeline import configure_timelines, rebuild_feeds, timelines
+
+
+@pytest.fixture()
+def feed_app(app):
+    """Abaisse les limites des fils d'actualité le temps du test."""
+    app.config.update(FEED_FANOUT_LIMIT=3, FEED_MAX_ENTRIES=4, FEED_TRIM_EVERY=2)
+    configure_timelines(app)
+
+    yield app
+
+    app.config.update(FEED_FANOUT_LIMIT=500, FEED_MAX_ENTRIES=200, FEED_TRIM_EVERY=20)
+    configure_timelines(app)
+
+
+def feed_of(user: User) -> list[tuple[str, str]]:
+    """Renvoie le type et l'objet des entrées du fil de l'utilisateur donné."""
+    return [(kind, subject) for _, _, _, kind, subject, _ in timelines.read(user.get_column('uuid'))]
+
+
+def count_entries(owner_uuid: str) -> int:
+    with get_db().cursor() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM feed_entries WHERE owner_uuid = %s', (owner_uuid,))
+        return cursor.fetchone()[0]
+
+
+def test_fan_out_on_write_then_on_read(feed_app, make_user):
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        tartur, panda, bambi, koala = (make_user(name) for name in ('tartur', 'panda', 'bambi', 'koala'))
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        branch = Branch.instant('général', bamboo.get_column('uuid')).get_column('uuid')
+        bamboo.add_member(panda.get_column('uuid'))
+        tartur.add_friend(panda.get_column('uuid'))
+
+        first = Message.instant('Bonjour !', tartur.get_column('uuid'), branch).get_column('uuid')
+        # Le message est copié dans la liste de chaque membre, sauf dans celle de son auteur.
+        assert count_entries(panda.get_column('uuid')) == 2
+        assert feed_of(panda) == [('message', first), ('friend', tartur.get_column('uuid'))]
+        assert feed_of(tartur) == [('member', panda.get_column('uuid'))]
+
+        # Au-delà de FEED_FANOUT_LIMIT membres, l'événement n'est écrit qu'une fois, dans la liste du bambou.
+        bamboo.add_member(bambi.get_column('uuid'))
+        bamboo.add_member(koala.get_column('uuid'))
+        second = Message.instant('Nous sommes nombreux', bambi.get_column('uuid'), branch).get_column('uuid')
+        assert count_entries(bamboo.get_column('uuid')) == 2
+        assert count_entries(panda.get_column('uuid')) == 3
+        assert feed_of(panda)[0] == ('message', second)
+        assert feed_of(tartur)[0] == ('message', second)
+        assert ('message', second) not in feed_of(bambi)
+
+        page = timelines.read(panda.get_column('uuid'), limit=2)
+        rest = timelines.read(panda.get_column('uuid'), before=page[-1][:2])
+        assert [entry[4] for entry in page + rest] == [subject for _, subject in feed_of(panda)]
+
+
+def test_large_bamboos_are_read_from_their_own_list(feed_app, make_user):
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        users = [make_user(name) for name in ('tartur', 'panda', 'bambi', 'koala', 'ours')]
+        tartur, panda, bambi, koala, ours = users
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        bamboo_uuid = bamboo.get_column('uuid')
+        branch = Branch.instant('général', bamboo_uuid).get_column('uuid')
+
+        for user in (panda, bambi, koala):
+            bamboo.add_member(user.get_column('uuid'))
+
+        # Quatre membres pour FEED_FANOUT_LIMIT=3 : les messages ne sont écrits que dans la liste du bambou.
+        before = {user: count_entries(user.get_column('uuid')) for user in users}
+        messages = [Message.instant(f'Message {i}', panda.get_column('uuid'), branch).get_column('uuid')
+                    for i in range(3)]
+        assert {user: count_entries(user.get_column('uuid')) for user in users} == before
+        assert count_entries(bamboo_uuid) == 1 + len(messages)
+
+        for member in (tartur, bambi, koala):
+            assert [subject for kind, subject in feed_of(member) if kind == 'message'] == messages[::-1]
+            page = timelines.read(member.get_column('uuid'), limit=2)
+            rest = timelines.read(member.get_column('uuid'), before=page[-1][:2])
+            assert [entry[4] for entry in page + rest] == [subject for _, subject in feed_of(member)]
+
+        # L'auteur ne voit pas ses propres messages, un non-membre ne voit pas ceux du bambou.
+        assert not [kind for kind, _ in feed_of(panda) if kind == 'message']
+        assert feed_of(ours) == []
+
+        # Un membre retiré ne lit plus la liste du bambou.
+        bamboo.remove_member(koala.get_column('uuid'))
+        assert not [kind for kind, _ in feed_of(koala) if kind == 'message']
+
+
+def test_large_bamboo_lists_are_bounded(feed_app, make_user):
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        tartur, *members = (make_user(name) for name in ('tartur', 'panda', 'bambi', 'koala'))
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        branch = Branch.instant('général', bamboo.get_column('uuid')).get_column('uuid')
+
+        for member in members:
+            bamboo.add_member(member.get_column('uuid'))
+
+        messages = [Message.instant(f'Message {i}', tartur.get_column('uuid'), branch).get_column('uuid')
+                    for i in range(30)]
+
+        # Comme celles des membres, la liste du bambou est bornée toutes les FEED_TRIM_EVERY diffusions.
+        assert count_entries(bamboo.get_column('uuid')) <= 5
+        assert [subject for _, subject in feed_of(members[0])][:4] == messages[::-1][:4]
+
+
+def test_fan_out_mode_is_remembered(feed_app, make_user):
+    class CountingCursor:
+        def __init__(self, members):
+            self.members = members
+            self.executed = 0
+
+        def execute(self, operation, params):
+            self.executed += 1
+
+        def fetchone(self):
+            return (self.members,)
+
+    cursor = CountingCursor(members=4)
+    assert timelines.is_large(cursor, 'bamboo')
+    cursor.members = 1
+    assert timelines.is_large(cursor, 'bamboo')
+    assert cursor.executed == 1
+
+    timelines.forget_size('bamboo')
+    assert not timelines.is_large(cursor, 'bamboo')
+    assert cursor.executed == 2
+
+
+def test_failed_announcements_roll_the_link_back(feed_app, make_user, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('Timeline unavailable.')
+
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        tartur, panda = make_user('tartur'), make_user('panda')
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        monkeypatch.setattr(timelines, 'fan_out', fail)
+        monkeypatch.setattr(timelines, 'push', fail)
+
+        with pytest.raises(RuntimeError):
+            bamboo.add_member(panda.get_column('uuid'))
+
+        with pytest.raises(RuntimeError):
+            tartur.add_friend(panda.get_column('uuid'))
+
+        assert not get_db().in_transaction
+        assert not bamboo.has_member(panda.get_column('uuid'))
+        assert not tartur.is_friend(panda.get_column('uuid'))
+
+        # Un lien déjà présent, ou vers un utilisateur inexistant, n'est pas annoncé.
+        assert not bamboo.add_member(tartur.get_column('uuid'))
+        assert not tartur.add_friend('00000000-0000-4000-8000-000000000000')
+
+
+def test_feeds_are_bounded(feed_app, make_user):
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        tartur, panda = make_user('tartur'), make_user('panda')
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        branch = Branch.instant('général', bamboo.get_column('uuid')).get_column('uuid')
+        bamboo.add_member(panda.get_column('uuid'))
+        messages = [Message.instant(f'Message {i}', tartur.get_column('uuid'), branch).get_column('uuid')
+                    for i in range(7)]
+
+        # Les listes sont bornées toutes les FEED_TRIM_EVERY diffusions : au plus une entrée de trop ici.
+        assert count_entries(panda.get_column('uuid')) <= 5
+        assert [subject for _, subject in feed_of(panda)][:4] == messages[::-1][:4]
+
+        with get_db().cursor() as cursor:
+            cursor.execute('DELETE FROM feed_entries')
+
+        assert rebuild_feeds(get_db()) == 4
+        assert [subject for _, subject in feed_of(panda)] == messages[::-1][:4]
+
+
+def test_feed_page(feed_app, make_user):
+    with feed_app.test_request_context():
+        init_db(set_default_values=False)
+        tartur, panda = make_user('tartur'), make_user('panda')
+        bamboo = Bamboo.instant('Les pandas', tartur.get_column('uuid'))
+        branch = Branch.instant('général', bamboo.get_column('uuid')).get_column('uuid')
+        bamboo.add_member(panda.get_column('uuid'))
+        Message.instant('Le bambou est prêt', tartur.get_column('uuid'), branch)
+
+    client = feed_app.test_client()
+    client.post('/auth/login', data={'identifier': 'panda', 'password': 'supermdp'})
+    response = client.get('/app/feed')
+
+    assert 'Le bambou est prêt' in response.text
+    assert 'Les pandas' in response.text
+    assert client.get('/app/feed', query_string={'before': 'nimporte'}).status_code == 400
@@ -0,0 +1,148 @@
+import threading
+import time
+
+from pandamonium.write_behind import WriteBehindQueue
+
+
+class Recorder:
+    """Fonction d'écriture factice enregistrant les lots reçus."""
+
+    def __init__(self, fail_on=None, failures=0, gate=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.failures = failures
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.writing = 0
+        self.concurrent = False
+
+    def __call__(self, rows):
+        with self.lock:
+            self.writing += 1
+            self.concurrent |= self.writing > 1
+
+        try:
+            if self.gate is not None:
+                self.gate.wait()
+
+            if self.fail_on is not None and self.fail_on in rows:
+                raise ValueError('Invalid row.')
+
+            with self.lock:
+                if self.failures > 0:
+                    self.failures -= 1
+                    raise ConnectionError('Database unavailable.')
+
+                self.batches.append(list(rows))
+        finally:
+            with self.lock:
+                self.writing -= 1
+
+
+def wait_for(predicate, timeout=2.0):
+    """Attend que la condition donnée soit vraie."""
+    deadline = time.monotonic() + timeout
+
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    return predicate()
+
+
+def test_full_batches_are_written_together():
+    """Vérifie qu'un lot plein est écrit d'un coup, sans attendre l'échéance."""
+    recorder = Recorder()
+    writer = WriteBehindQueue(recorder, batch_size=5, flush_interval=10.0)
+    writer.start()
+
+    for i in range(5):
+        assert writer.submit((i,))
+
+    assert wait_for(lambda: recorder.batches)
+    assert recorder.batches == [[(i,) for i in range(5)]]
+    writer.stop()
+
+
+def test_partial_batches_are_written_after_the_interval():
+    """Vérifie qu'un lot incomplet est écrit à l'échéance de flush_interval."""
+    recorder = Recorder()
+    writer = WriteBehindQueue(recorder, batch_size=100, flush_interval=0.02)
+    writer.start()
+    writer.submit((1,))
+
+    assert wait_for(lambda: recorder.batches)
+    assert writer.stats()['written'] == 1
+    writer.stop()
+
+
+def test_stop_writes_every_pending_row():
+    """Vérifie que l'arrêt de la file écrit toutes les lignes en attente puis refuse les suivantes."""
+    recorder = Recorder()
+    writer = WriteBehindQueue(recorder, batch_size=3, flush_interval=10.0)
+
+    for i in range(7):
+        writer.submit((i,))
+
+    writer.stop()
+
+    assert sum(recorder.batches, []) == [(i,) for i in range(7)]
+    assert not writer.submit((7,))
+
+
+def test_full_queue_rejects_rows():
+    """Vérifie que la file pleine refuse les lignes au lieu de grossir indéfiniment."""
+    writer = WriteBehindQueue(Recorder(), queue_size=2, put_timeout=0.01)
+
+    assert writer.submit((1,))
+    assert writer.submit((2,))
+    assert not writer.submit((3,))
+    assert writer.stats()['rejected'] == 1
+
+
+def test_failed_batches_are_retried_row_by_row():
+    """Vérifie qu'une ligne invalide n'entraîne pas la perte du reste de son lot."""
+    recorder = Recorder(fail_on=(2,))
+    writer = WriteBehindQueue(recorder, batch_size=10, flush_interval=10.0, retry_delay=0.0)
+
+    for i in range(4):
+        writer.submit((i,))
+
+    writer.stop()
+
+    assert sum(recorder.batches, []) == [(0,), (1,), (3,)]
+    assert writer.stats()['failed'] == 1
+
+
+def test_transient_failures_are_retried():
+    """Vérifie qu'une erreur passagère touchant aussi les écritures ligne par ligne ne fait perdre aucune ligne."""
+    recorder = Recorder(failures=3)
+    writer = WriteBehindQueue(recorder, batch_size=10, flush_interval=10.0, retry_delay=0.001)
+
+    for i in range(3):
+        writer.submit((i,))
+
+    writer.stop()
+
+    assert sorted(sum(recorder.batches, [])) == [(0,), (1,), (2,)]
+    assert writer.stats()['failed'] == 0
+    assert writer.stats()['retries'] >= 1
+
+
+def test_stop_timeout_does_not_write_concurrently():
+    """Vérifie qu'un arrêt dont le délai expire laisse le thread vider la file, sans écriture concurrente."""
+    gate = threading.Event()
+    recorder = Recorder(gate=gate)
+    writer = WriteBehindQueue(recorder, batch_size=2, flush_interval=10.0)
+    writer.start()
+
+    for i in range(5):
+        writer.submit((i,))
+
+    assert wait_for(lambda: recorder.writing)
+    writer.stop(timeout=0.01)
+    gate.set()
+
+    assert wait_for(lambda: len(sum(recorder.batches, [])) == 5)
+    assert sorted(sum(recorder.batches, [])) == [(i,) for i in range(5)]
+    assert not recorder.concurrent
+    writer.stop()